@@ -0,0 +1,125 @@
+"""Microbenchmarks of the queue of the channels against a plain list.
+
+Run it from the root of the repository with the development venv:
+
+    .venv/bin/python scripts/bench_queue.py
+"""
+
+import random
+import timeit
+from typing import Any, Callable
+
+from dorothy._queue import IndexedQueue
+
+# Number of songs already in the queue when every operation is measured.
+QUEUE_SIZES = [5_000, 20_000, 200_000]
+
+# Number of times every operation is repeated in a measure.
+OPERATIONS = 2_000
+
+# Number of songs added at once by the bulk insert, like a large album, and
+# number of times it's repeated in a measure.
+BULK_SIZE = 500
+BULK_OPERATIONS = 100
+
+
+def pop_front(queue: Any, positions: list[int]) -> None:
+    for _ in positions:
+        queue.pop(0)
+
+
+def insert_random(queue: Any, positions: list[int]) -> None:
+    for position in positions:
+        queue.insert(position, position)
+
+
+def remove_random(queue: Any, positions: list[int]) -> None:
+    for position in positions:
+        queue.pop(position)
+
+
+def move_random(queue: Any, positions: list[int]) -> None:
+    for position in positions:
+        queue.insert(len(queue) - position - 1, queue.pop(position))
+
+
+def bulk_insert_list(queue: list[int], positions: list[int]) -> None:
+    songs = list(range(BULK_SIZE))
+
+    for position in positions:
+        queue[position:position] = songs
+
+
+def bulk_insert_indexed(queue: IndexedQueue[int], positions: list[int]) -> None:
+    songs = list(range(BULK_SIZE))
+
+    for position in positions:
+        queue.insert_many(position, songs)
+
+
+def measure(
+    build_queue: Callable[[int], Any],
+    operation: Callable[[Any, list[int]], None],
+    size: int,
+    operations: int,
+) -> float:
+    """Measure an operation over a freshly built queue.
+
+    Args:
+        build_queue: Function that returns a queue of the given size.
+        operation: The operation to measure.
+        size: The number of songs of the queue.
+        operations: The number of times the operation is repeated.
+
+    Returns:
+        The best time in microseconds of a single operation.
+    """
+
+    # The positions are below the size of the queue after all the removals
+    positions = [random.randrange(max(1, size - operations)) for _ in range(operations)]
+    timings = timeit.repeat(
+        "operation(queue, positions)",
+        setup="queue = build_queue(size)",
+        globals={
+            "operation": operation,
+            "positions": positions,
+            "build_queue": build_queue,
+            "size": size,
+        },
+        number=1,
+        repeat=5,
+    )
+
+    return min(timings) / operations * 1_000_000
+
+
+def main() -> None:
+    random.seed(0)
+
+    benchmarks = [
+        ("pop front", pop_front, pop_front, OPERATIONS),
+        ("insert random", insert_random, insert_random, OPERATIONS),
+        ("remove random", remove_random, remove_random, OPERATIONS),
+        ("move random", move_random, move_random, OPERATIONS),
+        ("bulk insert", bulk_insert_list, bulk_insert_indexed, BULK_OPERATIONS),
+    ]
+
+    print(f"{'operation':<16}{'size':>10}{'list (us)':>14}{'indexed (us)':>16}")
+
+    for name, list_operation, indexed_operation, operations in benchmarks:
+        for size in QUEUE_SIZES:
+            list_time = measure(
+                lambda size: list(range(size)), list_operation, size, operations
+            )
+            indexed_time = measure(
+                lambda size: IndexedQueue(range(size)),
+                indexed_operation,
+                size,
+                operations,
+            )
+
+            print(f"{name:<16}{size:>10}{list_time:>14.2f}{indexed_time:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
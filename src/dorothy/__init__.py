@@ -3,9 +3,15 @@ import sys
 import colorama
 from importlib.metadata import version
 from ._orchestrator import Orchestrator
+from ._health import CircuitStates, ProviderHealth
+from ._jobs import Job, JobPriorities, JobStates
+from ._pagination import Page
+from ._search import SearchResult
+from .models._aggregate_result import AggregateResult
 from .models._artist import ArtistResourceId, Artist
 from .models._album import AlbumResourceId, Album
 from .models._controller import Controller
+from .models._library_diff import LibraryDiff
 from .models._listener import Listener
 from .models._node import NodeInstancePath, NodeManifest
 from .models._plugin_manifest import PluginManifest
@@ -25,11 +31,20 @@ __version__ = version("dorothy")
 
 __all__ = [
     "Orchestrator",
+    "CircuitStates",
+    "ProviderHealth",
+    "Job",
+    "JobPriorities",
+    "JobStates",
+    "Page",
+    "SearchResult",
+    "AggregateResult",
     "ArtistResourceId",
     "Artist",
     "AlbumResourceId",
     "Album",
     "Controller",
+    "LibraryDiff",
     "Listener",
     "NodeInstancePath",
     "NodeManifest",
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any
+
+from .models._album import Album
+from .models._artist import Artist
+from .models._node import NodeInstancePath
+from .models._resource_id import ResourceId
+from .models._song import Song
+
+
+@dataclass
+class CacheStats:
+    """Dataclass that holds the counters of a resource cache, used to tune
+    its size."""
+
+    max_entries: int
+    entries: int = field(default_factory=lambda: 0)
+    hits: int = field(default_factory=lambda: 0)
+    misses: int = field(default_factory=lambda: 0)
+    evictions: int = field(default_factory=lambda: 0)
+    expirations: int = field(default_factory=lambda: 0)
+    invalidations: int = field(default_factory=lambda: 0)
+
+    def hit_ratio(self) -> float:
+        """Get the ratio of lookups that have been answered by the cache.
+
+        Returns:
+            The ratio between 0 and 1, or 0 if there haven't been lookups.
+        """
+
+        lookups = self.hits + self.misses
+
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def dict(self) -> dict[str, Any]:
+        """Function that returns a dictionary representation of the cache stats."""
+
+        return {
+            "max_entries": self.max_entries,
+            "entries": self.entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hit_ratio(),
+        }
+
+
+class ResourceCache:
+    """Bounded cache of the resources resolved by the providers.
+
+    The least recently used resources are evicted once the cache is full,
+    and every resource can have its own time to live.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        """The resource cache constructor method.
+
+        Args:
+            max_entries: The maximum number of cached resources, the cache is
+                disabled if it's zero.
+        """
+
+        self._logger = getLogger(__name__)
+
+        self._entries: OrderedDict[
+            ResourceId, tuple[Song | Album | Artist, float | None]
+        ] = OrderedDict()
+        self._stats = CacheStats(max(0, max_entries))
+
+        # Bumped every time resources of a provider are invalidated, so a
+        # resource resolved before an invalidation isn't cached after it.
+        self._generations: dict[NodeInstancePath, int] = {}
+
+        # Held while reading or changing the cache, as the resources are
+        # resolved from worker threads too.
+        self._lock = threading.Lock()
+
+    def get(self, resource_id: ResourceId) -> Song | Album | Artist | None:
+        """Get a cached resource given its resource id.
+
+        Args:
+            resource_id: The resource id of the resource.
+
+        Returns:
+            The cached resource or `None` if it's not cached or has expired.
+        """
+
+        with self._lock:
+            entry = self._entries.get(resource_id)
+
+            if entry is None:
+                self._stats.misses += 1
+                return None
+
+            resource, expiration_time = entry
+
+            if expiration_time is not None and expiration_time <= time.monotonic():
+                del self._entries[resource_id]
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+
+            self._entries.move_to_end(resource_id)
+            self._stats.hits += 1
+
+            return resource
+
+    def get_generation(self, node_instance_path: NodeInstancePath) -> int:
+        """Get the invalidation generation of a provider, that should be taken
+        before asking the provider for a resource and given back when caching it.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+
+        Returns:
+            The number of invalidations of the resources of the provider.
+        """
+
+        with self._lock:
+            return self._generations.get(node_instance_path, 0)
+
+    def put(
+        self,
+        resource_id: ResourceId,
+        resource: Song | Album | Artist,
+        time_to_live: float | None = None,
+        generation: int | None = None,
+    ) -> None:
+        """Add or replace a resource in the cache, evicting the least recently
+        used ones if the cache is full.
+
+        Args:
+            resource_id: The resource id of the resource.
+            resource: The resource to cache.
+            time_to_live: The seconds the resource is valid for, or `None` if
+                it's valid until it's invalidated.
+            generation: The invalidation generation of the provider taken
+                before resolving the resource, it isn't cached if the
+                resources of the provider have been invalidated since then.
+        """
+
+        if self._stats.max_entries == 0:
+            return
+
+        expiration_time = (
+            time.monotonic() + time_to_live if time_to_live is not None else None
+        )
+
+        with self._lock:
+            if generation is not None and generation != self._generations.get(
+                resource_id.node_instance_path, 0
+            ):
+                return
+
+            self._entries[resource_id] = (resource, expiration_time)
+            self._entries.move_to_end(resource_id)
+
+            while len(self._entries) > self._stats.max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def _bump_generation(self, node_instance_path: NodeInstancePath) -> None:
+        """Mark that resources of a provider have been invalidated, the lock
+        must be already held.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+        """
+
+        self._generations[node_instance_path] = (
+            self._generations.get(node_instance_path, 0) + 1
+        )
+
+    def invalidate(self, resource_ids: list[ResourceId]) -> None:
+        """Drop the given resources from the cache.
+
+        Args:
+            resource_ids: The resource ids of the resources to drop.
+        """
+
+        with self._lock:
+            for resource_id in resource_ids:
+                self._bump_generation(resource_id.node_instance_path)
+
+                if self._entries.pop(resource_id, None) is not None:
+                    self._stats.invalidations += 1
+
+    def invalidate_provider(self, node_instance_path: NodeInstancePath) -> None:
+        """Drop all the resources of a provider from the cache.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+        """
+
+        with self._lock:
+            self._bump_generation(node_instance_path)
+
+            provider_resource_ids = [
+                resource_id
+                for resource_id in self._entries
+                if resource_id.node_instance_path == node_instance_path
+            ]
+
+            for resource_id in provider_resource_ids:
+                del self._entries[resource_id]
+
+            self._stats.invalidations += len(provider_resource_ids)
+
+        self._logger.debug(
+            f"Invalidated {len(provider_resource_ids)} cached resources "
+            + f'of provider "{node_instance_path}"'
+        )
+
+    def get_stats(self) -> CacheStats:
+        """Get the counters of the cache.
+
+        Returns:
+            A copy of the current counters.
+        """
+
+        with self._lock:
+            return CacheStats(
+                self._stats.max_entries,
+                len(self._entries),
+                self._stats.hits,
+                self._stats.misses,
+                self._stats.evictions,
+                self._stats.expirations,
+                self._stats.invalidations,
+            )
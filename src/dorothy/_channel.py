@@ -1,11 +1,27 @@
+import heapq
+import itertools
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
+from functools import partial
 from logging import getLogger
+from typing import Callable, Iterable
 
+from ._queue import IndexedQueue
 from .exceptions import NodeFailureException
 from .models._listener import Listener
 from .models._song import Song
 
+# Seconds the end of a song is delayed when there are gapless listeners, so
+# they can change to the next song on their own before it's skipped.
+GAPLESS_GRACE_PERIOD = 2.0
+
+# Seconds between the checks of the commands still being followed by the
+# listeners while the channel is cleaned up.
+CLEANUP_POLL_INTERVAL = 0.01
+
 
 class ChannelStates(Enum):
     """All the states that a channel can be in."""
@@ -15,18 +31,146 @@ class ChannelStates(Enum):
     STOPPED = "STOPPED"
 
 
+class ChannelChangeTypes(Enum):
+    """All the changes of a channel that are recorded in its journal."""
+
+    INSERT = "INSERT"
+    REMOVE = "REMOVE"
+    MOVE = "MOVE"
+    DROP_FRONT = "DROP_FRONT"
+    ADVANCE = "ADVANCE"
+    STOP = "STOP"
+
+
+@dataclass
+class ChannelChange:
+    """Dataclass that holds a change of the queue or the current song of a
+    channel, enough to apply it again over the previous state.
+
+    `INSERT` adds the songs at the position, `REMOVE` removes the song at the
+    position, `MOVE` moves the song at the position to the target position,
+    `DROP_FRONT` removes the songs before the position, `ADVANCE` makes the
+    head of the queue the current song and `STOP` clears the current song.
+    """
+
+    change_type: ChannelChangeTypes
+    position: int = field(default_factory=lambda: 0)
+    to_position: int = field(default_factory=lambda: 0)
+    songs: list[Song] = field(default_factory=lambda: [])
+
+
+class QueuePositionTracker:
+    """Position in the queue of a channel that follows the changes of the
+    queue, so it keeps pointing between the same two songs while other songs
+    are added, removed or played before it.
+    """
+
+    def __init__(self, position: int) -> None:
+        """The queue position tracker constructor method.
+
+        Args:
+            position: The initial position in the queue.
+        """
+
+        self.position = position
+
+    def apply(self, change: ChannelChange) -> None:
+        """Move the position to account for a change of the queue.
+
+        Args:
+            change: The change of the queue.
+        """
+
+        match change.change_type:
+            case ChannelChangeTypes.INSERT:
+                if change.position <= self.position:
+                    self.position += len(change.songs)
+            case ChannelChangeTypes.REMOVE:
+                if change.position < self.position:
+                    self.position -= 1
+            case ChannelChangeTypes.MOVE:
+                if change.position < self.position:
+                    self.position -= 1
+                if change.to_position <= self.position:
+                    self.position += 1
+            case ChannelChangeTypes.DROP_FRONT:
+                self.position = max(0, self.position - change.position)
+            case ChannelChangeTypes.ADVANCE:
+                self.position = max(0, self.position - 1)
+
+
 class Channel:
     """Channel that holds and manages all the listeners associated with
     itself.
     """
 
-    def __init__(self, channel_name: str) -> None:
+    def __init__(
+        self,
+        channel_name: str,
+        listener_timeout: float = 2.0,
+        call_from_owner: Callable[[Callable[[], None]], None] | None = None,
+    ) -> None:
+        """The channel constructor method.
+
+        Args:
+            channel_name: The name of the channel.
+            listener_timeout: Seconds to wait for every listener to follow a
+                command before quarantining it.
+            call_from_owner: Function that calls another one from the thread
+                that owns the channel, used to handle the listeners that fail
+                or recover as it's not thread safe. They are called right away
+                by default.
+        """
+
         self._logger = getLogger(channel_name)
 
+        self.name = channel_name
         self._listeners: list[Listener] = []
+        self._deadline_listeners: list[Callable[[], None]] = []
+        self._change_listeners: list[Callable[[ChannelChange], None]] = []
+
+        self._call_from_owner = (
+            call_from_owner
+            if call_from_owner is not None
+            else lambda function: function()
+        )
+
+        # Every listener follows the commands from its own thread, in the same
+        # order as they are sent, so a slow listener doesn't delay the rest of
+        # them nor the caller.
+        self.listener_timeout = listener_timeout
+        self._listener_executors: dict[Listener, ThreadPoolExecutor] = {}
+
+        # Listeners that haven't followed a command in time, they are skipped
+        # until that command returns, and listeners that have raised a node
+        # failure and must be removed.
+        self._quarantined_listeners: set[Listener] = set()
+        self._failed_listeners: set[Listener] = set()
+        self._quarantine_lock = threading.Lock()
+
+        # Commands being followed by the listeners along with the time they
+        # should have been followed by, checked by the watchdog thread.
+        self._running_commands: dict[Listener, object] = {}
+        self._command_deadlines: list[tuple[float, int, Listener, object]] = []
+        self._command_counter = itertools.count()
+        self._watchdog_condition = threading.Condition()
+        self._closed = False
+        self._watchdog = threading.Thread(
+            target=self._run_watchdog,
+            name=f"dorothy-{self.name}-watchdog",
+            daemon=True,
+        )
+        self._watchdog.start()
+
+        self._queue: IndexedQueue[Song] = IndexedQueue()
 
-        self._queue: list[Song] = []
-        self._song_start_timestamp: int = 0
+        # Monotonic time when the current song would have started if it had
+        # never been paused, moved forward on every resume.
+        self._song_start_time = 0.0
+        self._pause_time: float | None = None
+
+        # The next song the gapless listeners have been told about
+        self._announced_next_song: Song | None = None
 
         self.channel_state = ChannelStates.STOPPED
         self.current_song: Song | None = None
@@ -50,23 +194,454 @@ class Channel:
         if insert_position > len(self._queue):
             return
 
-        self._queue.insert(
-            insert_position
-            if insert_position <= len(self._queue)
-            else len(self._queue),
-            song,
+        self._queue.insert(insert_position, song)
+        self._notify_change(
+            ChannelChange(ChannelChangeTypes.INSERT, insert_position, songs=[song])
+        )
+        self._announce_next_song()
+
+    def insert_songs(self, songs: list[Song], insert_position: int) -> bool:
+        """Insert several songs into the queue in the given position, keeping
+        their order.
+
+        If the insert position is greater than the queue size the call is ignored.
+
+        Args:
+            songs: The songs to insert.
+            insert_position: The position in the queue to insert the songs.
+
+        Returns:
+            True if the songs have been inserted and false otherwise.
+        """
+
+        if insert_position > len(self._queue):
+            return False
+
+        self._logger.info(
+            f'Adding {len(songs)} songs to queue in position "{insert_position}"'
+        )
+
+        self._queue.insert_many(insert_position, songs)
+        self._notify_change(
+            ChannelChange(ChannelChangeTypes.INSERT, insert_position, songs=songs)
+        )
+        self._announce_next_song()
+
+        return True
+
+    def add_listener(self, listener: Listener) -> None:
+        """Add a listener to the channel.
+
+        Args:
+            listener: The listener to add.
+        """
+
+        self._listeners.append(listener)
+        self._listener_executors[listener] = ThreadPoolExecutor(
+            1,
+            thread_name_prefix=(
+                f"dorothy-{self.name}-{listener.node_instance_path.node_name}"
+            ),
+        )
+
+        # A gapless listener added to a channel that's already playing is
+        # told the next song that the rest of them know about.
+        next_song = self._announced_next_song
+        if listener.gapless and next_song is not None:
+            self._dispatch(
+                lambda listener: listener.set_next_song(next_song), [listener]
+            )
+
+    def get_quarantined_listeners(self) -> list[Listener]:
+        """Get the listeners that are skipped as they haven't followed a
+        command in time.
+
+        Returns:
+            The quarantined listeners.
+        """
+
+        with self._quarantine_lock:
+            return [
+                listener
+                for listener in self._listeners
+                if listener in self._quarantined_listeners
+            ]
+
+    def _run_watchdog(self) -> None:
+        """Quarantine the listeners that don't follow a command in time until
+        the channel is cleaned up."""
+
+        with self._watchdog_condition:
+            while not self._closed:
+                if len(self._command_deadlines) == 0:
+                    self._watchdog_condition.wait()
+                    continue
+
+                deadline, _, listener, command_id = self._command_deadlines[0]
+                remaining_time = deadline - time.monotonic()
+
+                if remaining_time > 0:
+                    self._watchdog_condition.wait(remaining_time)
+                    continue
+
+                heapq.heappop(self._command_deadlines)
+
+                with self._quarantine_lock:
+                    if self._running_commands.get(listener) is not command_id:
+                        continue
+
+                    self._quarantined_listeners.add(listener)
+
+                self._logger.warning(
+                    f'Listener "{listener.node_instance_path}" has not followed a'
+                    + f" command in {self.listener_timeout} seconds, quarantining it"
+                )
+
+    def _resync_listener(self, listener: Listener) -> None:
+        """Send to a listener the commands that bring it to the current state
+        of the channel, as it has missed the ones sent while quarantined.
+
+        The listeners can't start a song from the middle, so the current song
+        is played again from the start.
+
+        Args:
+            listener: The listener to synchronize.
+        """
+
+        if self._closed or listener not in self._listeners:
+            return
+
+        song = self.current_song
+
+        if self.channel_state == ChannelStates.STOPPED or song is None:
+            self._dispatch(lambda listener: listener.stop(), [listener])
+        else:
+            self._dispatch(lambda listener: listener.play(song), [listener])
+
+            if self.channel_state == ChannelStates.PAUSED:
+                self._dispatch(lambda listener: listener.pause(), [listener])
+
+        if listener.gapless:
+            next_song = self._announced_next_song
+            self._dispatch(
+                lambda listener: listener.set_next_song(next_song), [listener]
+            )
+
+    def _run_command(
+        self, command: Callable[[Listener], None], listener: Listener
+    ) -> None:
+        """Send a command to a listener, called from the thread of the
+        listener.
+
+        The timeout of the command starts once it's sent, not while it waits
+        for the previous commands of the listener. If the listener has been
+        quarantined while following it, it's released and synchronized with
+        the channel once it returns.
+
+        Args:
+            command: The function that sends the command to the listener.
+            listener: The listener to send the command to.
+        """
+
+        command_id = object()
+
+        with self._quarantine_lock:
+            self._running_commands[listener] = command_id
+
+        with self._watchdog_condition:
+            heapq.heappush(
+                self._command_deadlines,
+                (
+                    time.monotonic() + self.listener_timeout,
+                    next(self._command_counter),
+                    listener,
+                    command_id,
+                ),
+            )
+            self._watchdog_condition.notify()
+
+        try:
+            command(listener)
+        except NodeFailureException:
+            with self._quarantine_lock:
+                self._failed_listeners.add(listener)
+
+            self._call_from_owner(self._remove_failed_listeners)
+        except Exception as error:
+            self._logger.error(
+                f'Listener "{listener.node_instance_path}" has failed'
+                + f' with error "{error}"'
+            )
+        finally:
+            with self._quarantine_lock:
+                del self._running_commands[listener]
+                released = listener in self._quarantined_listeners
+                self._quarantined_listeners.discard(listener)
+
+            if released:
+                self._logger.info(
+                    f'Listener "{listener.node_instance_path}" has left the quarantine'
+                )
+                self._call_from_owner(partial(self._resync_listener, listener))
+
+    def _remove_failed_listeners(self) -> None:
+        """Remove from the channel the listeners that have raised a node
+        failure."""
+
+        with self._quarantine_lock:
+            failed_listeners = self._failed_listeners
+            self._failed_listeners = set()
+
+        if len(failed_listeners) == 0:
+            return
+
+        self._listeners = [
+            listener for listener in self._listeners if listener not in failed_listeners
+        ]
+
+        for listener in failed_listeners:
+            executor = self._listener_executors.pop(listener, None)
+
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(
+        self,
+        command: Callable[[Listener], None],
+        listeners: Iterable[Listener] | None = None,
+    ) -> None:
+        """Send a command to the listeners without waiting for them to follow
+        it, each one from its own thread.
+
+        The listeners that raise a node failure are removed from the channel
+        and the ones that don't follow the command in time are quarantined,
+        both from other threads.
+
+        Args:
+            command: The function that sends the command to a listener.
+            listeners: The listeners to send the command to, all the listeners
+                of the channel by default.
+        """
+
+        if self._closed:
+            return
+
+        with self._quarantine_lock:
+            targets = [
+                listener
+                for listener in (self._listeners if listeners is None else listeners)
+                if listener not in self._quarantined_listeners
+                and listener not in self._failed_listeners
+            ]
+
+        for listener in targets:
+            executor = self._listener_executors.get(listener)
+
+            if executor is None:
+                continue
+
+            executor.submit(self._run_command, command, listener)
+
+    def _announce_next_song(self) -> None:
+        """Tell the gapless listeners the song that follows the current one if
+        it has changed."""
+
+        next_song = (
+            self._queue[0]
+            if len(self._queue) > 0 and self.channel_state != ChannelStates.STOPPED
+            else None
+        )
+
+        if next_song is self._announced_next_song:
+            return
+
+        self._announced_next_song = next_song
+
+        self._dispatch(
+            lambda listener: listener.set_next_song(next_song),
+            [listener for listener in self._listeners if listener.gapless],
         )
 
+    def on_listener_song_start(self, listener: Listener, song: Song) -> None:
+        """Advance the channel to the song that a gapless listener has started
+        on its own, the rest of the listeners are told to play it.
+
+        Args:
+            listener: The gapless listener that has started the song.
+            song: The started song.
+        """
+
+        if (
+            self.channel_state != ChannelStates.PLAYING
+            or len(self._queue) == 0
+            or self._queue[0] is not song
+        ):
+            return
+
+        self._logger.info(
+            f'Listener "{listener.node_instance_path}" started the next song'
+        )
+
+        self._queue.pop(0)
+        self.current_song = song
+        self._song_start_time = time.monotonic()
+        self._notify_change(ChannelChange(ChannelChangeTypes.ADVANCE))
+
+        self._dispatch(
+            lambda other_listener: other_listener.play(song),
+            [
+                other_listener
+                for other_listener in self._listeners
+                if not other_listener.gapless
+            ],
+        )
+
+        self._notify_deadline_change()
+        self._announce_next_song()
+
+    def add_deadline_listener(self, listener: Callable[[], None]) -> None:
+        """Register a function to be called every time the time when the
+        current song ends changes, as the playback has started, been paused
+        or stopped.
+
+        Args:
+            listener: The function to call, the new deadline can be read with
+                `get_song_deadline`.
+        """
+
+        self._deadline_listeners.append(listener)
+
+    def _notify_deadline_change(self) -> None:
+        """Inform all the registered listeners that the song deadline has
+        changed."""
+
+        for listener in self._deadline_listeners:
+            listener()
+
+    def add_change_listener(self, listener: Callable[[ChannelChange], None]) -> None:
+        """Register a function to be called with every change of the queue or
+        the current song.
+
+        Args:
+            listener: The function to call with the change.
+        """
+
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener: Callable[[ChannelChange], None]) -> None:
+        """Stop calling a function registered with `add_change_listener`.
+
+        Args:
+            listener: The registered function.
+        """
+
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+
+    def _notify_change(self, change: ChannelChange) -> None:
+        """Inform all the registered listeners of a change of the channel.
+
+        Args:
+            change: The change of the channel.
+        """
+
+        # A listener may remove itself while being called
+        for listener in list(self._change_listeners):
+            listener(change)
+
+    def get_queue(self) -> list[Song]:
+        """Get a copy of the songs of the queue.
+
+        Returns:
+            The songs of the queue in order.
+        """
+
+        return list(self._queue)
+
+    def get_queue_slice(self, start: int, end: int) -> list[Song]:
+        """Get a copy of the songs between two positions of the queue,
+        without copying the rest of it.
+
+        Args:
+            start: The position of the first song.
+            end: The position after the last song.
+
+        Returns:
+            The songs between the positions in order, fewer if the queue ends
+                before.
+        """
+
+        return self._queue.get_range(start, end)
+
+    def get_queue_length(self) -> int:
+        """Get the number of songs of the queue.
+
+        Returns:
+            The number of songs of the queue.
+        """
+
+        return len(self._queue)
+
+    def restore(self, queue: list[Song], current_song: Song | None) -> None:
+        """Replace the queue and the current song with the ones saved by a
+        previous execution, without telling the listeners or the change
+        listeners.
+
+        The channel is left paused if there's a current song, as the
+        listeners can't start it from the middle, so it's played again from
+        the start once resumed.
+
+        Args:
+            queue: The songs of the queue.
+            current_song: The current song, if any.
+        """
+
+        self._queue = IndexedQueue(queue)
+        self.current_song = current_song
+
+        if current_song is None:
+            self.channel_state = ChannelStates.STOPPED
+            self._pause_time = None
+        else:
+            self.channel_state = ChannelStates.PAUSED
+            self._song_start_time = time.monotonic()
+            self._pause_time = self._song_start_time
+
+        # The next song is announced once the playback is resumed, to the
+        # listeners that have been added by then.
+        self._announced_next_song = None
+
+        self._logger.info(f'Restored channel "{self.name}" with {len(queue)} songs')
+
+        self._notify_deadline_change()
+
+    def get_song_deadline(self) -> float | None:
+        """Get the time when the current song ends.
+
+        Returns:
+            The time in the clock of `time.monotonic`, or `None` if the
+                channel isn't playing.
+        """
+
+        if self.channel_state != ChannelStates.PLAYING or self.current_song is None:
+            return None
+
+        song_deadline = self._song_start_time + self.current_song.duration
+
+        if any(listener.gapless for listener in self._listeners):
+            return song_deadline + GAPLESS_GRACE_PERIOD
+
+        return song_deadline
+
     def check_if_song_finished(self) -> None:
         """Check if the song has finished and change to the next one if so."""
 
-        if self.channel_state != ChannelStates.PLAYING:
-            return
+        song_deadline = self.get_song_deadline()
 
-        if self.current_song is None:
+        if song_deadline is None:
             return
 
-        if time.time() - self._song_start_timestamp > self.current_song.duration:
+        if time.monotonic() >= song_deadline:
             self.skip()
 
     def play(self) -> None:
@@ -75,24 +650,29 @@ class Channel:
         if self.channel_state == ChannelStates.PLAYING:
             return
 
-        if self.current_song is None:
-            return
+        resuming = self.channel_state == ChannelStates.PAUSED
+        song = self.current_song
 
-        for index, listener in enumerate(self._listeners):
-            try:
-                if self.channel_state == ChannelStates.PAUSED:
-                    listener.play(self.current_song)
-                    continue
+        if not resuming or song is None:
+            if len(self._queue) == 0:
+                return
 
-                if len(self._queue) > 0:
-                    self.current_song = self._queue[0]
-                    listener.play(self.current_song)
-                    self._queue.pop(0)
-            except NodeFailureException:
-                del self._listeners[index]
+            resuming = False
+            song = self._queue.pop(0)
+            self.current_song = song
+            self._notify_change(ChannelChange(ChannelChangeTypes.ADVANCE))
+
+        self._dispatch(lambda listener: listener.play(song))
 
+        if resuming and self._pause_time is not None:
+            self._song_start_time += time.monotonic() - self._pause_time
+        else:
+            self._song_start_time = time.monotonic()
+
+        self._pause_time = None
         self.channel_state = ChannelStates.PLAYING
-        self._song_start_timestamp = int(time.time())
+        self._notify_deadline_change()
+        self._announce_next_song()
 
     def pause(self) -> None:
         """Pause the current playing song."""
@@ -100,13 +680,11 @@ class Channel:
         if self.channel_state == ChannelStates.PAUSED:
             return
 
-        for index, listener in enumerate(self._listeners):
-            try:
-                listener.pause()
-            except NodeFailureException:
-                del self._listeners[index]
+        self._dispatch(lambda listener: listener.pause())
 
+        self._pause_time = time.monotonic()
         self.channel_state = ChannelStates.PAUSED
+        self._notify_deadline_change()
 
     def play_pause(self) -> bool:
         """Play or pause the playback inverting the current channel state."""
@@ -128,14 +706,14 @@ class Channel:
         if self.channel_state == ChannelStates.STOPPED:
             return
 
-        for index, listener in enumerate(self._listeners):
-            try:
-                listener.stop()
-            except NodeFailureException:
-                del self._listeners[index]
+        self._dispatch(lambda listener: listener.stop())
 
         self.current_song = None
+        self._pause_time = None
         self.channel_state = ChannelStates.STOPPED
+        self._notify_change(ChannelChange(ChannelChangeTypes.STOP))
+        self._notify_deadline_change()
+        self._announce_next_song()
 
     def skip(self) -> None:
         """Skip the current playing song and start the next one in the queue."""
@@ -156,6 +734,27 @@ class Channel:
             return
 
         self._queue.pop(remove_position)
+        self._notify_change(ChannelChange(ChannelChangeTypes.REMOVE, remove_position))
+        self._announce_next_song()
+
+    def move_in_queue(self, from_position: int, to_position: int) -> None:
+        """Move a song of the queue to another position.
+
+        If any of the positions is greater than the queue size the call is ignored.
+
+        Args:
+            from_position: The position in the queue of the song to be moved.
+            to_position: The position in the queue of the song once moved.
+        """
+
+        if from_position > len(self._queue) - 1 or to_position > len(self._queue) - 1:
+            return
+
+        self._queue.move(from_position, to_position)
+        self._notify_change(
+            ChannelChange(ChannelChangeTypes.MOVE, from_position, to_position)
+        )
+        self._announce_next_song()
 
     def play_from_queue_given_index(self, play_position: int) -> None:
         """Start the playback of the specified song by its position in the queue,
@@ -170,7 +769,8 @@ class Channel:
         if play_position > len(self._queue):
             return
 
-        self._queue = self._queue[play_position:]
+        self._queue.drop_front(play_position)
+        self._notify_change(ChannelChange(ChannelChangeTypes.DROP_FRONT, play_position))
         self.skip()
 
     def cleanup_listeners(self) -> None:
@@ -180,6 +780,23 @@ class Channel:
         Interacting with the channel after running this method is not safe and will probably fail if done.
         """
 
+        with self._watchdog_condition:
+            self._closed = True
+            self._watchdog_condition.notify()
+
+        for executor in self._listener_executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # Let the listeners follow their last commands before cleaning them
+        # up, for at most the listener timeout as some may never end them.
+        deadline = time.monotonic() + self.listener_timeout
+        while time.monotonic() < deadline:
+            with self._quarantine_lock:
+                if len(self._running_commands) == 0:
+                    break
+
+            time.sleep(CLEANUP_POLL_INTERVAL)
+
         for listener in self._listeners:
             try:
                 cleanup_message = listener.cleanup()
@@ -0,0 +1,482 @@
+import json
+import os
+import queue
+import threading
+import time
+from enum import Enum
+from functools import partial
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, TextIO
+from urllib.parse import quote
+
+from ._channel import Channel, ChannelChange, ChannelChangeTypes
+from ._deserializers import deserialize_resource_id
+from ._queue import IndexedQueue
+from .models._song import Song, SongResourceId
+
+# Version of the format of the snapshots, the ones of other versions are
+# ignored.
+SNAPSHOT_VERSION = 1
+
+
+class FsyncPolicies(Enum):
+    """All the moments when the journal is flushed to the disk.
+
+    `ALWAYS` after every change, `INTERVAL` at most once every fsync interval
+    and `NEVER` leaves it to the operating system.
+    """
+
+    ALWAYS = "ALWAYS"
+    INTERVAL = "INTERVAL"
+    NEVER = "NEVER"
+
+
+def serialize_song(song: Song) -> dict[str, Any]:
+    """Serialize a song with all the data needed to play it again.
+
+    Args:
+        song: The song to serialize.
+
+    Returns:
+        The serialized song.
+    """
+
+    return song.dict()
+
+
+def deserialize_song(serialized_song: dict[str, Any]) -> Song:
+    """Deserialize a song serialized by `serialize_song`.
+
+    Args:
+        serialized_song: The serialized song.
+
+    Raises:
+        ValueError: Raised if the resource id isn't the one of a song.
+
+    Returns:
+        The deserialized song.
+    """
+
+    resource_id = deserialize_resource_id(serialized_song["resource_id"])
+
+    if not isinstance(resource_id, SongResourceId):
+        raise ValueError(f'"{resource_id}" is not the resource id of a song')
+
+    return Song(
+        resource_id,
+        serialized_song["uri"],
+        float(serialized_song["duration"]),
+        serialized_song.get("title"),
+        serialized_song.get("album_name"),
+        serialized_song.get("artist_name"),
+        serialized_song.get("album_artist_name"),
+    )
+
+
+class ChannelStore:
+    """Durable storage of the queue and the current song of the channels.
+
+    Every change of a channel is appended to its journal and once enough of
+    them have been written the whole state is saved in a snapshot, which
+    lets the journal start again empty. The files are only touched from the
+    writer thread, in the same order as the changes, so the channels don't
+    wait for the disk.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        fsync_policy: FsyncPolicies = FsyncPolicies.INTERVAL,
+        fsync_interval: float = 1.0,
+        snapshot_interval: int = 1000,
+    ) -> None:
+        """The channel store constructor method.
+
+        Args:
+            directory: The directory where the journals and the snapshots are
+                saved.
+            fsync_policy: When the journal is flushed to the disk.
+            fsync_interval: Seconds between flushes with the `INTERVAL`
+                policy.
+            snapshot_interval: Number of changes of a channel after which a
+                snapshot is taken.
+        """
+
+        self._logger = getLogger(__name__)
+
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.snapshot_interval = snapshot_interval
+
+        self._channels: dict[str, Channel] = {}
+
+        # Sequence number of the last change of every channel and the number
+        # of changes written since its last snapshot.
+        self._sequences: dict[str, int] = {}
+        self._pending_changes: dict[str, int] = {}
+
+        # Only used from the writer thread
+        self._journals: dict[str, TextIO] = {}
+        self._unsynced_journals: set[str] = set()
+        self._last_fsync_time = time.monotonic()
+
+        self._tasks: queue.Queue[Callable[[], None] | None] = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._run_writer, name="dorothy-channel-store", daemon=True
+        )
+        self._writer.start()
+
+    def _get_path(self, channel_name: str, suffix: str) -> Path:
+        """Get the path of a file of a channel.
+
+        Args:
+            channel_name: The name of the channel.
+            suffix: The suffix of the file.
+
+        Returns:
+            The path of the file.
+        """
+
+        return self.directory / f"{quote(channel_name, safe='')}{suffix}"
+
+    def _run_writer(self) -> None:
+        """Run the tasks that write the files until the store is closed,
+        flushing the journals once the fsync interval has passed."""
+
+        while True:
+            try:
+                task = self._tasks.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                self._sync_journals()
+                continue
+
+            if task is None:
+                break
+
+            try:
+                task()
+            except OSError:
+                self._logger.exception("Failed to write the state of a channel")
+
+            if (
+                self.fsync_policy == FsyncPolicies.INTERVAL
+                and time.monotonic() - self._last_fsync_time >= self.fsync_interval
+            ):
+                self._sync_journals()
+
+        self._sync_journals()
+
+        for journal in self._journals.values():
+            journal.close()
+
+        self._journals.clear()
+
+    def _sync_journals(self) -> None:
+        """Flush to the disk the journals written since the last flush, called
+        from the writer thread."""
+
+        self._last_fsync_time = time.monotonic()
+
+        if self.fsync_policy == FsyncPolicies.NEVER:
+            self._unsynced_journals.clear()
+            return
+
+        for channel_name in self._unsynced_journals:
+            journal = self._journals.get(channel_name)
+
+            if journal is not None:
+                os.fsync(journal.fileno())
+
+        self._unsynced_journals.clear()
+
+    def _append_to_journal(self, channel_name: str, line: str) -> None:
+        """Write a change at the end of the journal of a channel, called from
+        the writer thread.
+
+        Args:
+            channel_name: The name of the channel.
+            line: The serialized change.
+        """
+
+        journal = self._journals.get(channel_name)
+
+        if journal is None:
+            journal = open(self._get_path(channel_name, ".journal"), "a")
+            self._journals[channel_name] = journal
+
+        journal.write(line + "\n")
+        journal.flush()
+
+        if self.fsync_policy == FsyncPolicies.ALWAYS:
+            os.fsync(journal.fileno())
+        else:
+            self._unsynced_journals.add(channel_name)
+
+    def _write_snapshot(
+        self,
+        channel_name: str,
+        sequence: int,
+        songs: list[Song],
+        current_song: Song | None,
+    ) -> None:
+        """Replace the snapshot of a channel and empty its journal, called
+        from the writer thread.
+
+        Args:
+            channel_name: The name of the channel.
+            sequence: The sequence number of the last change in the snapshot.
+            songs: The songs of the queue.
+            current_song: The current song, if any.
+        """
+
+        snapshot_path = self._get_path(channel_name, ".snapshot.json")
+        temporary_path = self._get_path(channel_name, ".snapshot.json.tmp")
+
+        with open(temporary_path, "w") as f:
+            json.dump(
+                {
+                    "version": SNAPSHOT_VERSION,
+                    "sequence": sequence,
+                    "queue": [serialize_song(song) for song in songs],
+                    "current_song": (
+                        serialize_song(current_song)
+                        if current_song is not None
+                        else None
+                    ),
+                },
+                f,
+            )
+            f.flush()
+
+            if self.fsync_policy != FsyncPolicies.NEVER:
+                os.fsync(f.fileno())
+
+        os.replace(temporary_path, snapshot_path)
+
+        # The changes in the journal are already in the snapshot, if it's
+        # not emptied their sequence numbers make them be skipped anyway.
+        journal = self._journals.pop(channel_name, None)
+        if journal is not None:
+            journal.close()
+
+        self._unsynced_journals.discard(channel_name)
+        open(self._get_path(channel_name, ".journal"), "w").close()
+
+    def _load_snapshot(self, channel_name: str) -> tuple[int, list[Song], Song | None]:
+        """Read the snapshot of a channel.
+
+        Args:
+            channel_name: The name of the channel.
+
+        Returns:
+            The sequence number of the last change in the snapshot, the songs
+                of the queue and the current song, empty if there's no valid
+                snapshot.
+        """
+
+        snapshot_path = self._get_path(channel_name, ".snapshot.json")
+
+        if not snapshot_path.is_file():
+            return 0, [], None
+
+        try:
+            with open(snapshot_path, "r") as f:
+                snapshot = json.load(f)
+
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                self._logger.warning(
+                    f'Ignoring the snapshot of channel "{channel_name}"'
+                    + f' with unknown version "{snapshot.get("version")}"'
+                )
+                return 0, [], None
+
+            current_song = (
+                deserialize_song(snapshot["current_song"])
+                if snapshot["current_song"] is not None
+                else None
+            )
+
+            return (
+                int(snapshot["sequence"]),
+                [deserialize_song(song) for song in snapshot["queue"]],
+                current_song,
+            )
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            self._logger.warning(
+                f'Ignoring the snapshot of channel "{channel_name}"'
+                + f' that can\'t be read with error "{error}"'
+            )
+            return 0, [], None
+
+    def _replay_journal(
+        self,
+        channel_name: str,
+        sequence: int,
+        songs: IndexedQueue[Song],
+        current_song: Song | None,
+    ) -> tuple[int, Song | None]:
+        """Apply the changes of the journal of a channel that came after its
+        snapshot.
+
+        Args:
+            channel_name: The name of the channel.
+            sequence: The sequence number of the last change in the snapshot.
+            songs: The songs of the queue, changed in place.
+            current_song: The current song in the snapshot.
+
+        Returns:
+            The sequence number of the last applied change and the current
+                song after all the changes.
+        """
+
+        journal_path = self._get_path(channel_name, ".journal")
+
+        if not journal_path.is_file():
+            return sequence, current_song
+
+        with open(journal_path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    entry_sequence = int(entry["sequence"])
+                    change_type = ChannelChangeTypes(entry["change_type"])
+                    position = int(entry.get("position", 0))
+                    to_position = int(entry.get("to_position", 0))
+                    entry_songs = [
+                        deserialize_song(song) for song in entry.get("songs", [])
+                    ]
+                except (ValueError, KeyError, TypeError):
+                    # Only the last change can be half written by a crash
+                    self._logger.warning(
+                        f'Stopped replaying the journal of channel "{channel_name}"'
+                        + " at a change that can't be read"
+                    )
+                    break
+
+                if entry_sequence <= sequence:
+                    continue
+
+                sequence = entry_sequence
+
+                match change_type:
+                    case ChannelChangeTypes.INSERT:
+                        songs.insert_many(position, entry_songs)
+                    case ChannelChangeTypes.REMOVE:
+                        if position < len(songs):
+                            songs.pop(position)
+                    case ChannelChangeTypes.MOVE:
+                        if position < len(songs):
+                            songs.move(position, to_position)
+                    case ChannelChangeTypes.DROP_FRONT:
+                        songs.drop_front(position)
+                    case ChannelChangeTypes.ADVANCE:
+                        current_song = songs.pop(0) if len(songs) > 0 else None
+                    case ChannelChangeTypes.STOP:
+                        current_song = None
+
+        return sequence, current_song
+
+    def attach(self, channel: Channel) -> None:
+        """Restore the state of a channel saved by a previous execution and
+        record its changes from now on.
+
+        The songs are saved with all their data, so restoring a channel
+        costs the size of its queue and doesn't ask anything to the
+        providers.
+
+        Args:
+            channel: The channel to restore and record.
+        """
+
+        sequence, songs, current_song = self._load_snapshot(channel.name)
+        queue_songs = IndexedQueue(songs)
+        sequence, current_song = self._replay_journal(
+            channel.name, sequence, queue_songs, current_song
+        )
+
+        if len(queue_songs) > 0 or current_song is not None:
+            channel.restore(list(queue_songs), current_song)
+
+        self._channels[channel.name] = channel
+        self._sequences[channel.name] = sequence
+        self._pending_changes[channel.name] = 0
+        channel.add_change_listener(partial(self._on_change, channel.name))
+
+        # Start with an empty journal so the next restore is fast
+        self._take_snapshot(channel.name)
+
+    def _on_change(self, channel_name: str, change: ChannelChange) -> None:
+        """Record a change of a channel, taking a snapshot if enough of them
+        have been recorded since the last one.
+
+        Args:
+            channel_name: The name of the channel.
+            change: The change of the channel.
+        """
+
+        sequence = self._sequences[channel_name] + 1
+        self._sequences[channel_name] = sequence
+
+        def write_change() -> None:
+            entry: dict[str, Any] = {
+                "sequence": sequence,
+                "change_type": change.change_type.value,
+            }
+
+            if change.change_type in (
+                ChannelChangeTypes.INSERT,
+                ChannelChangeTypes.REMOVE,
+                ChannelChangeTypes.MOVE,
+                ChannelChangeTypes.DROP_FRONT,
+            ):
+                entry["position"] = change.position
+
+            if change.change_type == ChannelChangeTypes.MOVE:
+                entry["to_position"] = change.to_position
+
+            if change.change_type == ChannelChangeTypes.INSERT:
+                entry["songs"] = [serialize_song(song) for song in change.songs]
+
+            self._append_to_journal(channel_name, json.dumps(entry))
+
+        self._tasks.put(write_change)
+
+        self._pending_changes[channel_name] += 1
+        if self._pending_changes[channel_name] >= self.snapshot_interval:
+            self._take_snapshot(channel_name)
+
+    def _take_snapshot(self, channel_name: str) -> None:
+        """Copy the state of a channel and queue the write of its snapshot.
+
+        Args:
+            channel_name: The name of the channel.
+        """
+
+        channel = self._channels[channel_name]
+
+        self._pending_changes[channel_name] = 0
+        self._tasks.put(
+            partial(
+                self._write_snapshot,
+                channel_name,
+                self._sequences[channel_name],
+                channel.get_queue(),
+                channel.current_song,
+            )
+        )
+
+    def close(self) -> None:
+        """Take a last snapshot of every channel and wait until all the
+        files have been written."""
+
+        for channel_name in self._channels:
+            self._take_snapshot(channel_name)
+
+        self._tasks.put(None)
+        self._writer.join()
+
+        self._logger.info("Saved the state of the channels")
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class CoalescingStats:
+    """Dataclass that holds the counters of a request coalescer."""
+
+    calls: int = field(default_factory=lambda: 0)
+    executions: int = field(default_factory=lambda: 0)
+    coalesced: int = field(default_factory=lambda: 0)
+    in_flight: int = field(default_factory=lambda: 0)
+    coalesced_by_operation: dict[str, int] = field(default_factory=lambda: {})
+
+    def dict(self) -> dict[str, Any]:
+        """Function that returns a dictionary representation of the
+        coalescing stats."""
+
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+            "coalesced_by_operation": dict(self.coalesced_by_operation),
+        }
+
+
+@dataclass
+class InFlightCall:
+    """Dataclass that holds a blocking call shared by several threads."""
+
+    done: threading.Event = field(default_factory=lambda: threading.Event())
+    result: Any = field(default_factory=lambda: None)
+    error: BaseException | None = field(default_factory=lambda: None)
+
+
+class RequestCoalescer:
+    """Deduplicator of identical concurrent calls, also known as singleflight.
+
+    The first caller of a key runs the computation and every caller that
+    arrives while it's in flight waits for it and gets the same result,
+    nothing is kept once the computation ends.
+
+    The keys are tuples whose first item names the operation, used to
+    break down the counters.
+    """
+
+    def __init__(self) -> None:
+        """The request coalescer constructor method."""
+
+        self._tasks: dict[tuple[Hashable, ...], asyncio.Task[Any]] = {}
+        self._calls: dict[tuple[Hashable, ...], InFlightCall] = {}
+        self._stats = CoalescingStats()
+
+        # Held while reading or changing the calls in flight, as the blocking
+        # calls are made from worker threads too.
+        self._lock = threading.Lock()
+
+    def _count_call(self, key: tuple[Hashable, ...], coalesced: bool) -> None:
+        """Update the counters with a new call, the lock must be already held.
+
+        Args:
+            key: The key of the call.
+            coalesced: If the call has joined one already in flight.
+        """
+
+        self._stats.calls += 1
+
+        if not coalesced:
+            self._stats.executions += 1
+            return
+
+        operation = str(key[0])
+        self._stats.coalesced += 1
+        self._stats.coalesced_by_operation[operation] = (
+            self._stats.coalesced_by_operation.get(operation, 0) + 1
+        )
+
+    def do(self, key: tuple[Hashable, ...], function: Callable[[], T]) -> T:
+        """Run a blocking function unless an identical call is already in
+        flight, in which case its result is awaited instead.
+
+        Args:
+            key: The key that identifies identical calls.
+            function: The function to run.
+
+        Returns:
+            The value returned by the function, shared by all the callers.
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+
+            if call is None:
+                call = InFlightCall()
+                self._calls[key] = call
+
+            self._count_call(key, not leader)
+
+        if not leader:
+            call.done.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return call.result  # type: ignore[no-any-return]
+
+        try:
+            result = function()
+            call.result = result
+            return result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
+
+    async def async_do(
+        self, key: tuple[Hashable, ...], get_coroutine: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Run a coroutine unless an identical call is already in flight, in
+        which case its result is awaited instead.
+
+        The coroutine runs in its own task, so a caller that is cancelled
+        doesn't cancel it for the rest of the callers.
+
+        Args:
+            key: The key that identifies identical calls.
+            get_coroutine: Function that returns the coroutine to run.
+
+        Returns:
+            The value returned by the coroutine, shared by all the callers.
+        """
+
+        with self._lock:
+            task = self._tasks.get(key)
+            self._count_call(key, task is not None)
+
+            if task is None:
+                task = asyncio.ensure_future(get_coroutine())
+                self._tasks[key] = task
+                task.add_done_callback(lambda task: self._forget_task(key, task))
+
+        return await asyncio.shield(task)
+
+    def _forget_task(self, key: tuple[Hashable, ...], task: asyncio.Task[Any]) -> None:
+        """Drop a finished task from the calls in flight.
+
+        Args:
+            key: The key of the task.
+            task: The finished task.
+        """
+
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+        # Mark the error as retrieved in case all the callers were cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> CoalescingStats:
+        """Get the counters of the coalescer.
+
+        Returns:
+            A copy of the current counters.
+        """
+
+        with self._lock:
+            return CoalescingStats(
+                self._stats.calls,
+                self._stats.executions,
+                self._stats.coalesced,
+                len(self._tasks) + len(self._calls),
+                dict(self._stats.coalesced_by_operation),
+            )
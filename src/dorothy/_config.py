@@ -6,6 +6,41 @@ import toml
 from platformdirs import user_config_dir
 from .models._node import Node, NODE_SUBCLASS
 
+# Config of Dorothy itself, every section configures a part of the core.
+DEFAULT_CORE_CONFIG: dict[str, dict[str, Any]] = {
+    "cache": {
+        "max_entries": 10000,
+        "aggregate_time_to_live": 30.0,
+    },
+    "queue": {
+        "expansion_job_threshold": 500,
+        "expansion_chunk_size": 200,
+    },
+    "health": {
+        "failure_threshold": 3,
+        "latency_threshold": 5.0,
+        "initial_backoff": 1.0,
+        "max_backoff": 300.0,
+    },
+    "jobs": {
+        "interactive_workers": 4,
+        "normal_workers": 2,
+        "background_workers": 1,
+        "time_slice": 0.05,
+        "max_yield": 1.0,
+    },
+    "channels": {
+        "listener_timeout": 2.0,
+    },
+    "persistence": {
+        "enabled": True,
+        "directory": "",
+        "fsync_policy": "INTERVAL",
+        "fsync_interval": 1.0,
+        "snapshot_interval": 1000,
+    },
+}
+
 
 @dataclass
 class ConfigSchema:
@@ -25,6 +60,26 @@ class ConfigManager:
             else Path(user_config_dir("dorothy"))
         )
 
+    def handle_core_config(self) -> dict[str, dict[str, Any]]:
+        """Check if the core config file exists and returns its user defined
+        config, the missing values are filled with their defaults.
+
+        Returns:
+            A dictionary with all the core config sections.
+        """
+
+        self.config_path.mkdir(parents=True, exist_ok=True)
+        core_config_file = self.config_path / "dorothy.toml"
+
+        if not core_config_file.is_file():
+            with open(core_config_file, "w+") as f:
+                toml.dump(DEFAULT_CORE_CONFIG, f)
+
+        with open(core_config_file, "r") as f:
+            user_config = toml.load(f)
+
+        return merge_core_config(user_config)
+
     def handle_node_config(
         self, plugin_name: str, node: Type[NODE_SUBCLASS]
     ) -> dict[str, Any]:
@@ -78,3 +133,23 @@ class ConfigManager:
             toml.dump(default_config, f)
 
         return default_config
+
+
+def merge_core_config(
+    user_config: dict[str, Any] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Fill a core config with the default values of its missing keys.
+
+    Args:
+        user_config: The config defined by the user.
+
+    Returns:
+        The complete core config.
+    """
+
+    user_config = user_config if user_config is not None else {}
+
+    return {
+        section_name: {**default_section, **user_config.get(section_name, {})}
+        for section_name, default_section in DEFAULT_CORE_CONFIG.items()
+    }
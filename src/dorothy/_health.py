@@ -0,0 +1,317 @@
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from logging import getLogger
+from typing import Any, Callable
+
+from .models._node import NodeInstancePath
+
+
+class CircuitStates(Enum):
+    """All the states that the circuit breaker of a provider can be in."""
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+@dataclass
+class ProviderHealth:
+    """Dataclass that holds the health of a provider as seen by the
+    orchestrator."""
+
+    node_instance_path: NodeInstancePath
+    state: CircuitStates = field(default_factory=lambda: CircuitStates.CLOSED)
+    consecutive_failures: int = field(default_factory=lambda: 0)
+    total_failures: int = field(default_factory=lambda: 0)
+    slow_calls: int = field(default_factory=lambda: 0)
+    last_latency: float | None = field(default_factory=lambda: None)
+    last_error: str | None = field(default_factory=lambda: None)
+    backoff: float = field(default_factory=lambda: 0.0)
+    retry_time: float | None = field(default_factory=lambda: None)
+    probing: bool = field(default_factory=lambda: False)
+
+    def dict(self) -> dict[str, Any]:
+        """Function that returns a dictionary representation of the health
+        of a provider."""
+
+        return {
+            "node_instance_path": str(self.node_instance_path),
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "slow_calls": self.slow_calls,
+            "last_latency": self.last_latency,
+            "last_error": self.last_error,
+            "retry_in": (
+                max(0.0, self.retry_time - time.monotonic())
+                if self.retry_time is not None
+                else None
+            ),
+        }
+
+
+class HealthMonitor:
+    """Circuit breaker that keeps track of the health of every provider.
+
+    A provider starts closed and is used normally. After enough consecutive
+    failures or calls slower than the latency threshold its circuit opens and
+    the provider is skipped. Once its backoff has passed the circuit becomes
+    half-open and a single call is let through as a probe: if it succeeds the
+    circuit closes again, otherwise it opens with twice the backoff.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        latency_threshold: float,
+        initial_backoff: float,
+        max_backoff: float,
+    ) -> None:
+        """The health monitor constructor method.
+
+        Args:
+            failure_threshold: The number of consecutive failures that opens
+                the circuit of a provider.
+            latency_threshold: The seconds after which a call is considered
+                failed, or zero to ignore the latency.
+            initial_backoff: The seconds a circuit stays open the first time.
+            max_backoff: The maximum seconds a circuit stays open.
+        """
+
+        self._logger = getLogger(__name__)
+
+        self.failure_threshold = max(1, failure_threshold)
+        self.latency_threshold = latency_threshold if latency_threshold > 0 else None
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max(initial_backoff, max_backoff)
+
+        self._health: dict[NodeInstancePath, ProviderHealth] = {}
+        self._state_listeners: list[
+            Callable[[NodeInstancePath, CircuitStates], None]
+        ] = []
+
+        # Held while reading or changing the health, as the providers are
+        # called from worker threads too.
+        self._lock = threading.Lock()
+
+    def add_state_listener(
+        self, listener: Callable[[NodeInstancePath, CircuitStates], None]
+    ) -> None:
+        """Register a function to be called every time the circuit of a
+        provider changes its state.
+
+        Args:
+            listener: The function to call with the node instance path of the
+                provider and its new state.
+        """
+
+        self._state_listeners.append(listener)
+
+    def _get_health(self, node_instance_path: NodeInstancePath) -> ProviderHealth:
+        """Get the health of a provider, the lock must be already held.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+
+        Returns:
+            The health of the provider, a closed one if it wasn't tracked.
+        """
+
+        health = self._health.get(node_instance_path)
+
+        if health is None:
+            health = ProviderHealth(node_instance_path)
+            self._health[node_instance_path] = health
+
+        return health
+
+    def _notify_state_change(
+        self, node_instance_path: NodeInstancePath, state: CircuitStates
+    ) -> None:
+        """Inform the registered listeners that a circuit has changed its state,
+        the lock must not be held.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+            state: The new state of the circuit.
+        """
+
+        self._logger.info(
+            f'Circuit of provider "{node_instance_path}" is {state.value}'
+        )
+
+        for listener in self._state_listeners:
+            listener(node_instance_path, state)
+
+    def register(self, node_instance_path: NodeInstancePath) -> None:
+        """Start tracking the health of a provider with a closed circuit.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+        """
+
+        with self._lock:
+            self._health[node_instance_path] = ProviderHealth(node_instance_path)
+
+    def try_acquire(self, node_instance_path: NodeInstancePath) -> bool:
+        """Check if a provider can be called, turning its circuit half-open if
+        its backoff has passed.
+
+        Every acquired call must end with `record_success`, `record_failure`
+        or `release`.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+
+        Returns:
+            True if the provider can be called and false if it must be skipped.
+        """
+
+        with self._lock:
+            health = self._get_health(node_instance_path)
+
+            match health.state:
+                case CircuitStates.CLOSED:
+                    return True
+
+                case CircuitStates.HALF_OPEN:
+                    if health.probing:
+                        return False
+
+                    health.probing = True
+                    return True
+
+                case CircuitStates.OPEN:
+                    if (
+                        health.retry_time is not None
+                        and health.retry_time > time.monotonic()
+                    ):
+                        return False
+
+                    health.state = CircuitStates.HALF_OPEN
+                    health.probing = True
+
+        self._notify_state_change(node_instance_path, CircuitStates.HALF_OPEN)
+
+        return True
+
+    def release(self, node_instance_path: NodeInstancePath) -> None:
+        """End an acquired call without judging the provider, used when the
+        call is abandoned by the caller.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+        """
+
+        with self._lock:
+            self._get_health(node_instance_path).probing = False
+
+    def record_success(
+        self, node_instance_path: NodeInstancePath, latency: float | None = None
+    ) -> None:
+        """Record that a call to a provider has succeeded, calls slower than
+        the latency threshold are recorded as failures.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+            latency: The seconds the call has taken, or `None` if it's not
+                meaningful for the call.
+        """
+
+        if (
+            latency is not None
+            and self.latency_threshold is not None
+            and latency > self.latency_threshold
+        ):
+            with self._lock:
+                health = self._get_health(node_instance_path)
+                health.slow_calls += 1
+                health.last_latency = latency
+
+            self.record_failure(
+                node_instance_path, f"Answered in {latency:.2f} seconds"
+            )
+            return
+
+        with self._lock:
+            health = self._get_health(node_instance_path)
+            previous_state = health.state
+
+            if latency is not None:
+                health.last_latency = latency
+
+            health.state = CircuitStates.CLOSED
+            health.consecutive_failures = 0
+            health.backoff = 0.0
+            health.retry_time = None
+            health.probing = False
+
+        if previous_state != CircuitStates.CLOSED:
+            self._notify_state_change(node_instance_path, CircuitStates.CLOSED)
+
+    def record_failure(
+        self, node_instance_path: NodeInstancePath, error: str, trip: bool = False
+    ) -> None:
+        """Record that a call to a provider has failed, opening its circuit
+        if it has failed too many times or it was being probed.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+            error: The description of the failure.
+            trip: Open the circuit right away regardless of the number of
+                failures.
+        """
+
+        with self._lock:
+            health = self._get_health(node_instance_path)
+
+            health.consecutive_failures += 1
+            health.total_failures += 1
+            health.last_error = error
+            health.probing = False
+
+            if health.state == CircuitStates.HALF_OPEN:
+                health.backoff = min(health.backoff * 2, self.max_backoff)
+            elif health.state == CircuitStates.CLOSED and (
+                trip or health.consecutive_failures >= self.failure_threshold
+            ):
+                health.backoff = self.initial_backoff
+            else:
+                return
+
+            health.state = CircuitStates.OPEN
+            health.retry_time = time.monotonic() + health.backoff
+            backoff = health.backoff
+
+        self._logger.warning(
+            f'Provider "{node_instance_path}" has failed with "{error}", '
+            + f"skipping it for {backoff:.2f} seconds"
+        )
+        self._notify_state_change(node_instance_path, CircuitStates.OPEN)
+
+    def get_state(self, node_instance_path: NodeInstancePath) -> CircuitStates:
+        """Get the state of the circuit of a provider.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+
+        Returns:
+            The current state of the circuit.
+        """
+
+        with self._lock:
+            health = self._health.get(node_instance_path)
+
+            return health.state if health is not None else CircuitStates.CLOSED
+
+    def get_all_health(self) -> list[ProviderHealth]:
+        """Get the health of all the tracked providers.
+
+        Returns:
+            A copy of the health of every provider.
+        """
+
+        with self._lock:
+            return [replace(health) for health in self._health.values()]
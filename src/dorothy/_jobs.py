@@ -0,0 +1,405 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import partial
+from logging import getLogger
+from typing import Any, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Number of finished jobs kept to be queried before being forgotten.
+FINISHED_JOBS_HISTORY = 100
+
+
+class JobStates(Enum):
+    """All the states that a job can be in."""
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    FINISHED = "FINISHED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+class JobPriorities(Enum):
+    """All the priority classes that a job can be run with, from the most to
+    the least urgent."""
+
+    INTERACTIVE = "INTERACTIVE"
+    NORMAL = "NORMAL"
+    BACKGROUND = "BACKGROUND"
+
+
+# Rank of every priority class, a lower rank is more urgent.
+PRIORITY_RANKS = {priority: rank for rank, priority in enumerate(JobPriorities)}
+
+
+@dataclass
+class Job:
+    """Dataclass that holds the state of a long running task executed in
+    the background."""
+
+    job_id: str
+    name: str
+    state: JobStates = field(default_factory=lambda: JobStates.PENDING)
+    progress: int = field(default_factory=lambda: 0)
+    total: int | None = field(default_factory=lambda: None)
+    result: Any = field(default_factory=lambda: None)
+    error: str | None = field(default_factory=lambda: None)
+    priority: JobPriorities = field(default_factory=lambda: JobPriorities.NORMAL)
+    cancel_event: threading.Event = field(default_factory=lambda: threading.Event())
+    scheduler: "JobManager | None" = field(default_factory=lambda: None, repr=False)
+    last_yield_time: float = field(default_factory=lambda: time.monotonic())
+
+    def set_progress(self, progress: int, total: int | None = None) -> None:
+        """Update the progress of the job.
+
+        Args:
+            progress: The number of items already processed.
+            total: The number of items expected to be processed.
+        """
+
+        self.progress = progress
+        self.total = total
+
+    def is_cancel_requested(self) -> bool:
+        """Check if the job has been asked to stop, long running jobs should
+        check it regularly and return early.
+
+        Returns:
+            True if the job should stop and false otherwise.
+        """
+
+        return self.cancel_event.is_set()
+
+    def checkpoint(self) -> None:
+        """Give way to more urgent work, long running jobs should call it
+        regularly between their steps.
+
+        It returns right away unless the time slice of the job has been used
+        up, in that case it waits while there is more urgent work running.
+        """
+
+        if self.scheduler is not None:
+            self.scheduler.checkpoint(self)
+
+    def is_done(self) -> bool:
+        """Check if the job has ended its execution.
+
+        Returns:
+            True if the job has finished, failed or been cancelled and
+                false otherwise.
+        """
+
+        return self.state in (
+            JobStates.FINISHED,
+            JobStates.FAILED,
+            JobStates.CANCELLED,
+        )
+
+    def dict(self) -> dict[str, Any]:
+        """Function that returns a dictionary representation of a job."""
+
+        return {
+            "job_id": self.job_id,
+            "name": self.name,
+            "state": self.state.value,
+            "priority": self.priority.value,
+            "progress": self.progress,
+            "total": self.total,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Scheduler that runs jobs in bounded pools of worker threads, one per
+    priority class, and keeps track of their state.
+
+    The scheduling is cooperative: a job that calls `Job.checkpoint` after
+    using up its time slice waits while more urgent work is running, so
+    background jobs give way to the interactive requests as they arrive.
+    """
+
+    def __init__(
+        self,
+        interactive_workers: int = 4,
+        normal_workers: int = 2,
+        background_workers: int = 1,
+        time_slice: float = 0.05,
+        max_yield: float = 1.0,
+    ) -> None:
+        """The job manager constructor method.
+
+        Args:
+            interactive_workers: The maximum number of interactive tasks
+                running at the same time.
+            normal_workers: The maximum number of normal jobs running at the
+                same time.
+            background_workers: The maximum number of background jobs running
+                at the same time.
+            time_slice: The seconds a job runs before it checks if it should
+                give way to more urgent work.
+            max_yield: The maximum seconds a job waits for more urgent work
+                every time it gives way, so it's never starved.
+        """
+
+        self._logger = getLogger(__name__)
+
+        self.time_slice = max(0.0, time_slice)
+        self.max_yield = max(0.0, max_yield)
+
+        workers = {
+            JobPriorities.INTERACTIVE: interactive_workers,
+            JobPriorities.NORMAL: normal_workers,
+            JobPriorities.BACKGROUND: background_workers,
+        }
+        self._executors = {
+            priority: ThreadPoolExecutor(
+                max_workers=max(1, workers[priority]),
+                thread_name_prefix=f"dorothy-{priority.value.lower()}",
+            )
+            for priority in JobPriorities
+        }
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Number of tasks running in every priority class, notified every
+        # time a task ends or a job is cancelled to wake up the yielded jobs.
+        self._active = {priority: 0 for priority in JobPriorities}
+        self._activity = threading.Condition()
+
+    def submit(
+        self,
+        name: str,
+        function: Callable[[Job], Any],
+        priority: JobPriorities = JobPriorities.NORMAL,
+    ) -> Job:
+        """Run a function as a job.
+
+        Args:
+            name: A human readable name of the job.
+            function: The function to run, it receives its own job to report
+                its progress and its return value is stored as the job result.
+            priority: The priority class of the job.
+
+        Returns:
+            The job that has been submitted.
+        """
+
+        job = Job(uuid.uuid4().hex, name, priority=priority, scheduler=self)
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+
+        self._logger.info(
+            f'Submitted {priority.value.lower()} job "{name}" '
+            + f'with id "{job.job_id}"'
+        )
+        self._executors[priority].submit(self._run, job, function)
+
+        return job
+
+    def _begin_activity(self, priority: JobPriorities) -> None:
+        """Mark that a task of the given priority class has started.
+
+        Args:
+            priority: The priority class of the task.
+        """
+
+        with self._activity:
+            self._active[priority] += 1
+
+    def _end_activity(self, priority: JobPriorities) -> None:
+        """Mark that a task of the given priority class has ended.
+
+        Args:
+            priority: The priority class of the task.
+        """
+
+        with self._activity:
+            self._active[priority] -= 1
+            self._activity.notify_all()
+
+    def _is_more_urgent_work_active(self, priority: JobPriorities) -> bool:
+        """Check if there are tasks more urgent than the given priority class
+        running, the activity condition must be already held.
+
+        Args:
+            priority: The priority class to compare with.
+
+        Returns:
+            True if there is more urgent work running and false otherwise.
+        """
+
+        return any(
+            self._active[other_priority] > 0
+            for other_priority in JobPriorities
+            if PRIORITY_RANKS[other_priority] < PRIORITY_RANKS[priority]
+        )
+
+    @contextmanager
+    def interactive(self) -> Iterator[None]:
+        """Context manager that marks interactive work being done, the
+        background jobs give way to it until it exits."""
+
+        self._begin_activity(JobPriorities.INTERACTIVE)
+
+        try:
+            yield
+        finally:
+            self._end_activity(JobPriorities.INTERACTIVE)
+
+    async def run_interactive(self, function: Callable[..., T], *args: Any) -> T:
+        """Run a blocking function in the interactive pool without blocking
+        the event loop.
+
+        Args:
+            function: The function to run.
+            args: The arguments to call the function with.
+
+        Returns:
+            The value returned by the function.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        with self.interactive():
+            return await loop.run_in_executor(
+                self._executors[JobPriorities.INTERACTIVE], partial(function, *args)
+            )
+
+    def checkpoint(self, job: Job) -> None:
+        """Make a job give way to more urgent work if its time slice has been
+        used up, waiting at most the maximum yield time.
+
+        Args:
+            job: The job that is giving way.
+        """
+
+        if time.monotonic() - job.last_yield_time < self.time_slice:
+            return
+
+        with self._activity:
+            self._activity.wait_for(
+                lambda: (
+                    job.is_cancel_requested()
+                    or not self._is_more_urgent_work_active(job.priority)
+                ),
+                timeout=self.max_yield,
+            )
+
+        # Let the rest of the threads run before starting a new time slice
+        time.sleep(0)
+        job.last_yield_time = time.monotonic()
+
+    def _run(self, job: Job, function: Callable[[Job], Any]) -> None:
+        """Run a job updating its state.
+
+        Args:
+            job: The job to run.
+            function: The function of the job.
+        """
+
+        with self._lock:
+            if job.state == JobStates.CANCELLED:
+                return
+
+            job.state = JobStates.RUNNING
+
+        job.last_yield_time = time.monotonic()
+        self._begin_activity(job.priority)
+
+        try:
+            job.result = function(job)
+            job.state = (
+                JobStates.CANCELLED if job.is_cancel_requested() else JobStates.FINISHED
+            )
+        except Exception as error:
+            self._logger.exception(f'Job "{job.name}" with id "{job.job_id}" failed')
+            job.error = str(error)
+            job.state = JobStates.FAILED
+        finally:
+            self._end_activity(job.priority)
+
+        self._forget_old_jobs()
+
+    def _forget_old_jobs(self) -> None:
+        """Drop the oldest finished jobs beyond the history limit."""
+
+        with self._lock:
+            finished_jobs = [job for job in self._jobs.values() if job.is_done()]
+            forgotten_jobs = len(finished_jobs) - FINISHED_JOBS_HISTORY
+
+            for job in finished_jobs[: max(0, forgotten_jobs)]:
+                del self._jobs[job.job_id]
+
+    def cancel(self, job_id: str) -> Job | None:
+        """Ask a job to stop, a pending job is cancelled right away while a
+        running one stops once it checks the request.
+
+        Args:
+            job_id: The id of the job.
+
+        Returns:
+            The job or `None` if it doesn't exist.
+        """
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+            if job is None or job.is_done():
+                return job
+
+            job.cancel_event.set()
+
+            if job.state == JobStates.PENDING:
+                job.state = JobStates.CANCELLED
+
+        # Wake up the job in case it's giving way to more urgent work
+        with self._activity:
+            self._activity.notify_all()
+
+        self._logger.info(f'Cancelling job "{job.name}" with id "{job.job_id}"')
+
+        return job
+
+    def get_job(self, job_id: str) -> Job | None:
+        """Get a job given its id.
+
+        Args:
+            job_id: The id of the job.
+
+        Returns:
+            The requested job or `None` if it doesn't exist.
+        """
+
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_all_jobs(self) -> list[Job]:
+        """Get all the jobs that are being tracked.
+
+        Returns:
+            The list of jobs, from the oldest to the newest.
+        """
+
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self) -> None:
+        """Stop accepting new jobs, ask the running ones to stop and wait for
+        them to end."""
+
+        for job in self.get_all_jobs():
+            if not job.is_done():
+                self.cancel(job.job_id)
+
+        for executor in self._executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -26,9 +26,9 @@ async def mainloop(config_manager: ConfigManager) -> None:
     try:
         await asyncio.gather(*controlers_tasks, return_exceptions=True)
 
-        while True:
-            orchestrator.check_if_song_finished()
-            await asyncio.sleep(0.5)
+        # The channels skip to their next songs with timers set on the loop,
+        # so there is nothing to do until Dorothy is closed.
+        await asyncio.get_running_loop().create_future()
 
     except asyncio.exceptions.CancelledError:
         pass
@@ -1,211 +1,1889 @@
+import asyncio
+import time
+from functools import partial
 from logging import getLogger
-from typing import Iterator, Callable, Any
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Iterator, Callable, Any, TypeVar
 
-from .exceptions import NodeFailureException
+from platformdirs import user_data_dir
+
+from .exceptions import NodeFailureException, ProviderUnavailableException
+from .models._listener import Listener
 from .models._provider import Provider
-from ._channel import Channel, ChannelStates
+from .models._aggregate_result import AggregateResult
+from .models._library_diff import LibraryDiff
+from ._channel import Channel, ChannelStates, QueuePositionTracker
+from ._channel_store import ChannelStore, FsyncPolicies
+from ._cache import CacheStats, ResourceCache
+from ._coalescing import CoalescingStats, RequestCoalescer
+from ._config import merge_core_config
+from ._health import CircuitStates, HealthMonitor, ProviderHealth
+from ._jobs import Job, JobManager, JobPriorities
+from ._pagination import Page, decode_cursor, encode_cursor
+from ._search import SearchIndex, SearchResult
+from ._stats import AlbumStats, LibraryStats, LibraryStatsTracker
 from .models._album import Album, AlbumResourceId
 from .models._resource_id import ResourceId
 from .models._song import Song, SongResourceId
 from .models._artist import Artist, ArtistResourceId
 from .models._node import NodeInstancePath
 
+RESOURCE = TypeVar("RESOURCE", Song, Album, Artist)
+T = TypeVar("T")
+
+# Number of positions around its last known position where the last song
+# of a page of a queue is looked for, as songs may have been added or
+# removed before it since the page was returned.
+QUEUE_CURSOR_SEARCH_WINDOW = 200
+
+# Seconds a job waits for a call to the event loop before checking if it
+# has been cancelled.
+LOOP_CALL_POLL_INTERVAL = 0.1
+
 
 class Orchestrator:
     """Facade object used to abstract interactions between listeners and
     providers to the controllers.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, config: dict[str, dict[str, Any]] | None = None) -> None:
+        """The orchestrator constructor method.
+
+        Args:
+            config: The core config of Dorothy, the default one is used if
+                it's not given.
+        """
+
         self._logger = getLogger(__name__)
         self._logger.info("Wiring up the orchestrator")
 
-        self._providers: dict[str, dict[str, dict[str, Provider]]] = {}
+        self.config = merge_core_config(config)
+
+        # Flat routing table of the providers keyed by their node instance path
+        self._providers: dict[NodeInstancePath, Provider] = {}
         self._channels: dict[str, Channel] = {}
 
-    def check_if_song_finished(self) -> None:
-        """Call the check song finished method in all available channels."""
+        # The last complete aggregate of every resource type, tagged with the
+        # library generations of the providers it was built from.
+        # Aggregates that include providers which don't notify their changes
+        # also expire after a while, as their generations never change.
+        self._aggregate_cache: dict[
+            str,
+            tuple[
+                tuple[tuple[NodeInstancePath, int], ...],
+                float | None,
+                AggregateResult[Any],
+            ],
+        ] = {}
+
+        jobs_config = self.config["jobs"]
+        self.jobs = JobManager(
+            int(jobs_config["interactive_workers"]),
+            int(jobs_config["normal_workers"]),
+            int(jobs_config["background_workers"]),
+            float(jobs_config["time_slice"]),
+            float(jobs_config["max_yield"]),
+        )
+        self._resource_cache = ResourceCache(int(self.config["cache"]["max_entries"]))
+        self.search_index = SearchIndex()
+        self.library_stats = LibraryStatsTracker()
+
+        # Shares the computation of identical reads made at the same time
+        self._coalescer = RequestCoalescer()
+
+        health_config = self.config["health"]
+        self.health = HealthMonitor(
+            int(health_config["failure_threshold"]),
+            float(health_config["latency_threshold"]),
+            float(health_config["initial_backoff"]),
+            float(health_config["max_backoff"]),
+        )
+        self.health.add_state_listener(self._on_health_state_change)
+
+        persistence_config = self.config["persistence"]
+        self.channel_store: ChannelStore | None = None
+        if persistence_config["enabled"]:
+            self.channel_store = ChannelStore(
+                (
+                    Path(persistence_config["directory"])
+                    if persistence_config["directory"]
+                    else Path(user_data_dir("dorothy")) / "channels"
+                ),
+                FsyncPolicies(str(persistence_config["fsync_policy"]).upper()),
+                float(persistence_config["fsync_interval"]),
+                int(persistence_config["snapshot_interval"]),
+            )
+
+        # Providers whose library couldn't be indexed, they are indexed again
+        # once their circuit closes.
+        self._unindexed_providers: set[NodeInstancePath] = set()
+
+        # Timers that skip to the next song when the current one ends, set on
+        # the event loop that owns the channels.
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._song_end_timers: dict[str, asyncio.TimerHandle] = {}
+
+    def _add_channel(self, channel_name: str) -> Channel:
+        """Create a channel whose songs are skipped once they end by timers
+        set on the running event loop, if there's one.
+
+        Args:
+            channel_name: The name of the channel.
+
+        Returns:
+            The created channel.
+        """
+
+        # The channels are created from the event loop that will own them
+        if self._loop is None:
+            try:
+                self._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+
+        channels_config = self.config["channels"]
+        channel = Channel(
+            channel_name,
+            float(channels_config["listener_timeout"]),
+            self._call_from_loop,
+        )
+        channel.add_deadline_listener(
+            lambda: self._on_song_deadline_change(channel_name)
+        )
+        self._channels[channel_name] = channel
+
+        if self.channel_store is not None:
+            self.channel_store.attach(channel)
+
+        return channel
+
+    def _add_listener(self, channel_name: str, listener: Listener) -> None:
+        """Add a listener to a channel, creating the channel if it doesn't
+        exist yet.
+
+        Args:
+            channel_name: The name of the channel.
+            listener: The listener to add.
+        """
+
+        channel = self._channels.get(channel_name)
+        if channel is None:
+            channel = self._add_channel(channel_name)
+
+        channel.add_listener(listener)
+        listener.add_song_start_listener(
+            lambda song: self._call_from_loop(
+                partial(channel.on_listener_song_start, listener, song)
+            )
+        )
+
+    def _call_from_loop(self, function: Callable[[], None]) -> None:
+        """Call a function from the event loop that owns the channels, right
+        away if it's already the current thread, as they are not thread safe.
+
+        Args:
+            function: The function to call.
+        """
+
+        try:
+            running_loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if self._loop is None:
+            self._loop = running_loop
+
+        if self._loop is None or running_loop is self._loop:
+            function()
+            return
+
+        self._loop.call_soon_threadsafe(function)
+
+    def _on_song_deadline_change(self, channel_name: str) -> None:
+        """Set again the timer of a channel after its playback has changed.
+
+        Args:
+            channel_name: The name of the channel.
+        """
+
+        self._call_from_loop(partial(self._schedule_song_end, channel_name))
+
+    def _schedule_song_end(self, channel_name: str) -> None:
+        """Set the timer that skips to the next song once the current song of
+        a channel ends, replacing the previous one, must be called from the
+        event loop.
+
+        Args:
+            channel_name: The name of the channel.
+        """
+
+        timer = self._song_end_timers.pop(channel_name, None)
+        if timer is not None:
+            timer.cancel()
+
+        song_deadline = self._channels[channel_name].get_song_deadline()
+        if song_deadline is None or self._loop is None:
+            # Without an event loop the channels are only advanced by
+            # `check_if_song_finished`.
+            return
+
+        # The event loop clock is monotonic too but it may have another origin
+        self._song_end_timers[channel_name] = self._loop.call_at(
+            self._loop.time() + song_deadline - time.monotonic(),
+            self._on_song_end,
+            channel_name,
+        )
+
+    def _on_song_end(self, channel_name: str) -> None:
+        """Skip to the next song of a channel once its timer has fired.
+
+        Args:
+            channel_name: The name of the channel.
+        """
+
+        self._song_end_timers.pop(channel_name, None)
+        self._channels[channel_name].check_if_song_finished()
+
+        # The timer may fire slightly before the deadline, in that case the
+        # song hasn't been skipped and the timer has to be set again.
+        if channel_name not in self._song_end_timers:
+            self._schedule_song_end(channel_name)
+
+    def check_if_song_finished(self) -> None:
+        """Call the check song finished method in all available channels.
+
+        The channels are advanced by timers set on the event loop, so this is
+        only needed when the orchestrator is used without one.
+        """
+
+        for channel in self._channels.values():
+            channel.check_if_song_finished()
+
+    def get_channels_names(self) -> list[str]:
+        """Returns a list with all the available channels by its name.
+
+        Returns:
+            The list of available channels given their names.
+        """
+
+        return list(self._channels.keys())
+
+    def _providers_generator(self) -> Iterator[Provider]:
+        """Generator used to iterate over providers with ease
+        using python for loops."""
+
+        yield from self._providers.values()
+
+    def _access_provider(self, resource_id: ResourceId) -> Provider:
+        """Route and returns a provider given the resource id of a resource of its own.
+
+        Args:
+            resource_id: The ID of the resource to get its provider.
+
+        Returns:
+            The provider where the resource is from.
+        """
+
+        return self._access_provider_by_path(resource_id.node_instance_path)
+
+    def _access_provider_by_path(
+        self, node_instance_path: NodeInstancePath
+    ) -> Provider:
+        """Route and returns a provider given its node instance path.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+
+        Returns:
+            The requested provider.
+        """
+
+        return self._providers[node_instance_path]
+
+    def has_provider(self, node_instance_path: NodeInstancePath) -> bool:
+        """Check if a provider is registered in the orchestrator.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+
+        Returns:
+            True if the provider is registered and false otherwise.
+        """
+
+        return node_instance_path in self._providers
+
+    def _add_provider(self, provider: Provider) -> None:
+        """Register a provider in the orchestrator and index its library
+        for searching.
+
+        Args:
+            provider: The provider to register.
+        """
+
+        node_instance_path = provider.node_instance_path
+        self._providers[node_instance_path] = provider
+        self.health.register(node_instance_path)
+        provider.jobs = self.jobs
+
+        provider.add_library_listener(
+            lambda library_diff: self._on_library_changes(provider, library_diff)
+        )
+        provider.add_invalidation_listener(
+            lambda resource_ids: self._on_resources_invalidated(
+                node_instance_path, resource_ids
+            )
+        )
+
+        self._index_provider(provider)
+
+    def _index_provider(self, provider: Provider, job: Job | None = None) -> None:
+        """Index the library of a provider for searching and count it for the
+        library stats, the circuit of the provider is opened if it fails.
+
+        Args:
+            provider: The provider to index.
+            job: Optional job that is indexing the provider, if it's cancelled
+                the provider is indexed again the next time its circuit closes.
+        """
+
+        node_instance_path = provider.node_instance_path
+
+        try:
+            searchable = self.search_index.add_provider(provider, job)
+            counted = searchable and self.library_stats.add_provider(provider, job)
+        except NodeFailureException as error:
+            self._unindexed_providers.add(node_instance_path)
+            self.health.record_failure(node_instance_path, str(error), trip=True)
+            return
+
+        if not counted:
+            self._unindexed_providers.add(node_instance_path)
+            return
+
+        self._unindexed_providers.discard(node_instance_path)
+
+    def _on_health_state_change(
+        self, node_instance_path: NodeInstancePath, state: CircuitStates
+    ) -> None:
+        """Index again the library of a provider whose circuit has closed if it
+        couldn't be indexed before.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+            state: The new state of the circuit of the provider.
+        """
+
+        provider = self._providers.get(node_instance_path)
+
+        if (
+            state != CircuitStates.CLOSED
+            or provider is None
+            or node_instance_path not in self._unindexed_providers
+        ):
+            return
+
+        self.jobs.submit(
+            f'index provider "{node_instance_path}"',
+            lambda job: self._index_provider(provider, job),
+            JobPriorities.BACKGROUND,
+        )
+
+    def _on_library_changes(
+        self, provider: Provider, library_diff: LibraryDiff
+    ) -> None:
+        """Update the search index and the library stats with the changes in
+        the library of a provider.
+
+        Args:
+            provider: The provider whose library has changed.
+            library_diff: The resources that have changed.
+        """
+
+        if not self.has_provider(provider.node_instance_path):
+            return
+
+        self._resource_cache.invalidate(
+            library_diff.added + library_diff.removed + library_diff.changed
+        )
+        self.search_index.apply_library_diff(provider, library_diff)
+        self.library_stats.apply_library_diff(provider, library_diff)
+
+    def _on_resources_invalidated(
+        self,
+        node_instance_path: NodeInstancePath,
+        resource_ids: list[ResourceId] | None,
+    ) -> None:
+        """Drop from the resource cache the resources that a provider has
+        reported as outdated.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+            resource_ids: The outdated resources or `None` if all the
+                resources of the provider are outdated.
+        """
+
+        if resource_ids is None:
+            self._resource_cache.invalidate_provider(node_instance_path)
+            return
+
+        self._resource_cache.invalidate(resource_ids)
+
+    def _call_provider(
+        self,
+        provider: Provider,
+        call: Callable[[Provider], T],
+        check_latency: bool = True,
+    ) -> T:
+        """Call a provider through its circuit breaker, recording the outcome
+        and the latency of the call.
+
+        Args:
+            provider: The provider to call.
+            call: Function that calls the provider.
+            check_latency: If the call counts as failed when it's slower than
+                the latency threshold.
+
+        Raises:
+            ProviderUnavailableException: Raised if the circuit of the provider
+                is open.
+            NodeFailureException: Raised if the provider fails.
+
+        Returns:
+            The value returned by the call.
+        """
+
+        node_instance_path = provider.node_instance_path
+
+        if not self.health.try_acquire(node_instance_path):
+            raise ProviderUnavailableException(
+                f'Provider "{node_instance_path}" is unavailable'
+            )
+
+        start_time = time.monotonic()
+
+        try:
+            result = call(provider)
+        except NodeFailureException as error:
+            self.health.record_failure(node_instance_path, str(error))
+            raise
+        except BaseException:
+            self.health.release(node_instance_path)
+            raise
+
+        self.health.record_success(
+            node_instance_path, time.monotonic() - start_time if check_latency else None
+        )
+
+        return result
+
+    async def _async_call_provider(
+        self, provider: Provider, get_coroutine: Callable[[Provider], Awaitable[T]]
+    ) -> T:
+        """Call a provider through its circuit breaker without blocking the
+        event loop, the provider is given up to its deadline to answer.
+
+        Args:
+            provider: The provider to call.
+            get_coroutine: Function that returns the coroutine that calls
+                the provider.
+
+        Raises:
+            ProviderUnavailableException: Raised if the circuit of the provider
+                is open.
+            NodeFailureException: Raised if the provider fails.
+            TimeoutError: Raised if the provider doesn't answer in its deadline.
+
+        Returns:
+            The value returned by the coroutine.
+        """
+
+        node_instance_path = provider.node_instance_path
+
+        if not self.health.try_acquire(node_instance_path):
+            raise ProviderUnavailableException(
+                f'Provider "{node_instance_path}" is unavailable'
+            )
+
+        start_time = time.monotonic()
+
+        try:
+            result = await asyncio.wait_for(get_coroutine(provider), provider.deadline)
+        except NodeFailureException as error:
+            self.health.record_failure(node_instance_path, str(error))
+            raise
+        except TimeoutError:
+            self.health.record_failure(
+                node_instance_path,
+                f"Not answered in its deadline of {provider.deadline} seconds",
+            )
+            raise
+        except BaseException:
+            self.health.release(node_instance_path)
+            raise
+
+        self.health.record_success(node_instance_path, time.monotonic() - start_time)
+
+        return result
+
+    def get_providers_health(self) -> list[ProviderHealth]:
+        """Get the health of all the providers registered in this orchestrator.
+
+        Returns:
+            The state of the circuit breaker of every provider.
+        """
+
+        return self.health.get_all_health()
+
+    def _get_library_generations(self) -> tuple[tuple[NodeInstancePath, int], ...]:
+        """Get the library generation of every registered provider, it changes
+        every time a provider is added, removed or its library changes.
+
+        Returns:
+            The node instance paths of the providers with their generations.
+        """
+
+        return tuple(
+            (node_instance_path, provider.library_generation)
+            for node_instance_path, provider in self._providers.items()
+        )
+
+    def _get_cached_aggregate(self, resource_type: str) -> AggregateResult[Any] | None:
+        """Get the cached aggregate of a resource type if it's still up to date.
+
+        Args:
+            resource_type: The type of the aggregated resources.
+
+        Returns:
+            The cached aggregate or `None` if it's outdated or missing.
+        """
+
+        cached_aggregate = self._aggregate_cache.get(resource_type)
+
+        if cached_aggregate is None:
+            return None
+
+        library_generations, expiration_time, aggregate_result = cached_aggregate
+
+        if library_generations != self._get_library_generations() or (
+            expiration_time is not None and time.monotonic() >= expiration_time
+        ):
+            return None
+
+        return aggregate_result
+
+    def _cache_aggregate(
+        self,
+        resource_type: str,
+        library_generations: tuple[tuple[NodeInstancePath, int], ...],
+        aggregate_result: AggregateResult[Any],
+    ) -> None:
+        """Store the aggregate of a resource type, partial aggregates or the ones
+        whose providers have changed while being built are discarded.
+
+        The aggregates are only stored while the circuits of all the providers
+        are closed, as the unavailable providers may have been skipped. The
+        ones that include providers which don't notify their changes expire
+        after the aggregate time to live, or aren't stored if it's zero.
+
+        Args:
+            resource_type: The type of the aggregated resources.
+            library_generations: The generations of the providers before
+                building the aggregate.
+            aggregate_result: The aggregate to store.
+        """
+
+        if (
+            aggregate_result.is_partial()
+            or library_generations != self._get_library_generations()
+            or any(
+                self.health.get_state(node_instance_path) != CircuitStates.CLOSED
+                for node_instance_path, _ in library_generations
+            )
+        ):
+            return
+
+        expiration_time = None
+        if not all(
+            provider.notifies_library_changes for provider in self._providers.values()
+        ):
+            time_to_live = float(self.config["cache"]["aggregate_time_to_live"])
+
+            if time_to_live <= 0:
+                return
+
+            expiration_time = time.monotonic() + time_to_live
+
+        self._aggregate_cache[resource_type] = (
+            library_generations,
+            expiration_time,
+            aggregate_result,
+        )
+
+    def _chain_providers(
+        self,
+        get_iterator: Callable[[Provider], Iterator[RESOURCE]],
+        skipped_providers: list[NodeInstancePath] | None = None,
+    ) -> Iterator[RESOURCE]:
+        """Chain lazily the iterators of all the providers, skipping the
+        unavailable providers and the ones that fail while being iterated.
+
+        A provider that fails may have already given some of its resources,
+        so the chain is only complete if no provider has been skipped.
+
+        Args:
+            get_iterator: Function that returns the iterator of a provider.
+            skipped_providers: Optional list where the skipped and the failed
+                providers are added.
+
+        Yields:
+            The resources given by the providers.
+        """
+
+        # The providers are copied as they can be added while iterating
+        for provider in list(self._providers_generator()):
+            node_instance_path = provider.node_instance_path
+
+            if not self.health.try_acquire(node_instance_path):
+                if skipped_providers is not None:
+                    skipped_providers.append(node_instance_path)
+
+                continue
+
+            try:
+                yield from get_iterator(provider)
+            except NodeFailureException as error:
+                self.health.record_failure(node_instance_path, str(error))
+
+                if skipped_providers is not None:
+                    skipped_providers.append(node_instance_path)
+
+                continue
+            except BaseException:
+                # The iteration has been abandoned by the caller
+                self.health.release(node_instance_path)
+                raise
+
+            self.health.record_success(node_instance_path)
+
+    async def _async_chain_providers(
+        self, get_async_iterator: Callable[[Provider], AsyncIterator[RESOURCE]]
+    ) -> AsyncIterator[RESOURCE]:
+        """Chain lazily the asynchronous iterators of all the providers,
+        skipping the unavailable providers and the ones that fail while
+        being iterated.
+
+        Args:
+            get_async_iterator: Function that returns the asynchronous
+                iterator of a provider.
+
+        Yields:
+            The resources given by the providers.
+        """
+
+        # The providers are copied as they can be added while iterating
+        for provider in list(self._providers_generator()):
+            node_instance_path = provider.node_instance_path
+
+            if not self.health.try_acquire(node_instance_path):
+                continue
+
+            try:
+                async for resource in get_async_iterator(provider):
+                    yield resource
+            except NodeFailureException as error:
+                self.health.record_failure(node_instance_path, str(error))
+                continue
+            except BaseException:
+                # The iteration has been abandoned by the caller
+                self.health.release(node_instance_path)
+                raise
+
+            self.health.record_success(node_instance_path)
+
+    async def _async_gather_providers(
+        self, get_resources: Callable[[Provider], Awaitable[list[RESOURCE]]]
+    ) -> AggregateResult[RESOURCE]:
+        """Ask all the providers for their resources concurrently, every provider
+        is given up to its own deadline to answer and the unavailable ones
+        are skipped without waiting for them.
+
+        Blocking providers run in worker threads that can't be interrupted,
+        so a provider that times out keeps working in the background but
+        its answer is discarded.
+
+        Args:
+            get_resources: Function that returns the coroutine that gets the
+                resources of a provider.
+
+        Returns:
+            The resources of the providers that answered in time, in the order
+                of the providers, the providers that timed out and the ones
+                that were unavailable.
+        """
+
+        providers = list(self._providers_generator())
+        answers = await asyncio.gather(
+            *(
+                self._async_call_provider(provider, get_resources)
+                for provider in providers
+            ),
+            return_exceptions=True,
+        )
+
+        aggregate_result: AggregateResult[RESOURCE] = AggregateResult()
+
+        for provider, answer in zip(providers, answers):
+            match answer:
+                case list():
+                    aggregate_result.resources.extend(answer)
+
+                case TimeoutError():
+                    self._logger.warning(
+                        f'Provider "{provider.node_instance_path}" has not answered '
+                        + f"in its deadline of {provider.deadline} seconds"
+                    )
+                    aggregate_result.timed_out.append(provider.node_instance_path)
+
+                case NodeFailureException():
+                    aggregate_result.unavailable.append(provider.node_instance_path)
+
+                case BaseException():
+                    raise answer
+
+        return aggregate_result
+
+    def _get_paged_providers(
+        self, cursor: str | None, limit: int
+    ) -> tuple[list[Provider], str | None, str | None]:
+        """Get the providers that hold the next page of a listing, the providers
+        are sorted by their node instance path so the order is stable.
+
+        Args:
+            cursor: The cursor returned with the previous page, or `None` to
+                start from the beginning.
+            limit: The maximum number of resources of the page.
+
+        Raises:
+            ValueError: Raised if the cursor is malformed or the limit isn't
+                positive.
+
+        Returns:
+            The providers from the one that holds the first resource of the
+                page, the node instance path of that provider and the unique id
+                of the last resource of the previous page.
+        """
+
+        if limit < 1:
+            raise ValueError(f"The limit {limit} must be positive")
+
+        after_path: str | None = None
+        after_unique_id: str | None = None
+
+        if cursor is not None:
+            after_path, after_unique_id = decode_cursor(cursor, 2)
+
+        providers = sorted(
+            self._providers_generator(),
+            key=lambda provider: str(provider.node_instance_path),
+        )
+
+        if after_path is not None:
+            providers = [
+                provider
+                for provider in providers
+                if str(provider.node_instance_path) >= after_path
+            ]
+
+        return providers, after_path, after_unique_id
+
+    @staticmethod
+    def _build_page(resources: list[RESOURCE], limit: int) -> Page[RESOURCE]:
+        """Build a page from the resources gathered for it.
+
+        Args:
+            resources: Up to one more resource than the limit, the extra one
+                tells that there is a next page.
+            limit: The maximum number of resources of the page.
+
+        Returns:
+            The page with the cursor that points to its last resource if there
+                are more resources.
+        """
+
+        if len(resources) <= limit:
+            return Page(resources)
+
+        resources = resources[:limit]
+        last_resource_id = resources[-1].resource_id
+
+        return Page(
+            resources,
+            encode_cursor(
+                str(last_resource_id.node_instance_path), last_resource_id.unique_id
+            ),
+        )
+
+    def _get_page(
+        self,
+        cursor: str | None,
+        limit: int,
+        get_provider_page: Callable[[Provider, str | None, int], list[RESOURCE]],
+    ) -> Page[RESOURCE]:
+        """Get a page of the resources of all the providers, walking the
+        providers in order and asking each one for the resources it still
+        has to give.
+
+        Args:
+            cursor: The cursor returned with the previous page, or `None` to
+                start from the beginning.
+            limit: The maximum number of resources of the page.
+            get_provider_page: Function that returns the resources of a provider
+                after the given unique id, up to the given number.
+
+        Raises:
+            ValueError: Raised if the cursor is malformed or the limit isn't
+                positive.
+
+        Returns:
+            The page of resources.
+        """
+
+        providers, after_path, after_unique_id = self._get_paged_providers(
+            cursor, limit
+        )
+
+        resources: list[RESOURCE] = []
+
+        for provider in providers:
+            provider_after_unique_id = (
+                after_unique_id
+                if str(provider.node_instance_path) == after_path
+                else None
+            )
+
+            try:
+                resources.extend(
+                    self._call_provider(
+                        provider,
+                        lambda provider: get_provider_page(
+                            provider,
+                            provider_after_unique_id,
+                            limit + 1 - len(resources),
+                        ),
+                    )
+                )
+            except NodeFailureException:
+                continue
+
+            if len(resources) > limit:
+                break
+
+        return self._build_page(resources, limit)
+
+    async def _async_get_page(
+        self,
+        cursor: str | None,
+        limit: int,
+        get_provider_page: Callable[
+            [Provider, str | None, int], Awaitable[list[RESOURCE]]
+        ],
+    ) -> Page[RESOURCE]:
+        """Get a page of the resources of all the providers without blocking
+        the event loop, every provider is given up to its own deadline to answer.
+
+        Args:
+            cursor: The cursor returned with the previous page, or `None` to
+                start from the beginning.
+            limit: The maximum number of resources of the page.
+            get_provider_page: Function that returns the coroutine that gets the
+                resources of a provider after the given unique id, up to the
+                given number.
+
+        Raises:
+            ValueError: Raised if the cursor is malformed or the limit isn't
+                positive.
+            TimeoutError: Raised if a provider doesn't answer in its deadline,
+                as skipping it would break the order of the pages.
+
+        Returns:
+            The page of resources.
+        """
+
+        providers, after_path, after_unique_id = self._get_paged_providers(
+            cursor, limit
+        )
+
+        resources: list[RESOURCE] = []
+
+        for provider in providers:
+            provider_after_unique_id = (
+                after_unique_id
+                if str(provider.node_instance_path) == after_path
+                else None
+            )
+
+            try:
+                resources.extend(
+                    await self._async_call_provider(
+                        provider,
+                        lambda provider: get_provider_page(
+                            provider,
+                            provider_after_unique_id,
+                            limit + 1 - len(resources),
+                        ),
+                    )
+                )
+            except NodeFailureException:
+                continue
+
+            if len(resources) > limit:
+                break
+
+        return self._build_page(resources, limit)
+
+    def _cache_resource(
+        self,
+        provider: Provider,
+        resource_id: ResourceId,
+        resource: Song | Album | Artist | None,
+        generation: int,
+    ) -> None:
+        """Store a resolved resource in the resource cache.
+
+        Args:
+            provider: The provider that has resolved the resource.
+            resource_id: The resource id of the resource.
+            resource: The resolved resource, it's ignored if it's `None`.
+            generation: The invalidation generation of the provider in the
+                cache taken before asking for the resource, so it isn't cached
+                if it has been invalidated meanwhile.
+        """
+
+        if resource is None:
+            return
+
+        self._resource_cache.put(
+            resource_id, resource, provider.cache_time_to_live, generation
+        )
+
+    def get_cache_stats(self) -> CacheStats:
+        """Get the counters of the resource cache.
+
+        Returns:
+            The hits, misses, evictions and size of the resource cache.
+        """
+
+        return self._resource_cache.get_stats()
+
+    def get_coalescing_stats(self) -> CoalescingStats:
+        """Get the counters of the deduplication of identical concurrent reads.
+
+        Returns:
+            The number of reads, how many have been computed and how many
+                have shared the computation of another one.
+        """
+
+        return self._coalescer.get_stats()
+
+    def get_library_stats(self) -> LibraryStats:
+        """Get the totals of the libraries of the providers, they are kept up
+        to date with every change so no provider is queried.
+
+        Returns:
+            The number of songs, albums and artists and the total duration of
+                all the libraries and of every provider.
+        """
+
+        return self.library_stats.get_stats()
+
+    def get_album_stats(self, album_resource_id: AlbumResourceId) -> AlbumStats | None:
+        """Get the totals of an album, they are kept up to date with every
+        change so no provider is queried.
+
+        Args:
+            album_resource_id: The resource id of the album.
+
+        Returns:
+            The track count and the duration of the album, or `None` if the
+                album isn't known.
+        """
+
+        return self.library_stats.get_album_stats(album_resource_id)
+
+    def _get_resource(
+        self,
+        resource_id: ResourceId,
+        get_resource: Callable[[Provider], RESOURCE | None],
+    ) -> RESOURCE | None:
+        """Resolve a resource with its provider and cache it, identical lookups
+        made at the same time share a single call to the provider.
+
+        Args:
+            resource_id: The resource id of the resource.
+            get_resource: Function that gets the resource from its provider.
+
+        Returns:
+            The resolved resource or `None` if it wasn't found or its
+                provider has failed.
+        """
+
+        def resolve() -> RESOURCE | None:
+            provider = self._access_provider(resource_id)
+            generation = self._resource_cache.get_generation(
+                provider.node_instance_path
+            )
+
+            try:
+                resource = self._call_provider(provider, get_resource)
+            except NodeFailureException:
+                return None
+
+            self._cache_resource(provider, resource_id, resource, generation)
+
+            return resource
+
+        return self._coalescer.do((resource_id.resource_name(), resource_id), resolve)
+
+    async def _async_get_resource(
+        self,
+        resource_id: ResourceId,
+        get_resource: Callable[[Provider], Awaitable[RESOURCE | None]],
+    ) -> RESOURCE | None:
+        """Resolve a resource with its provider and cache it without blocking
+        the event loop, identical lookups made at the same time share a single
+        call to the provider.
+
+        Args:
+            resource_id: The resource id of the resource.
+            get_resource: Function that returns the coroutine that gets the
+                resource from its provider.
+
+        Returns:
+            The resolved resource or `None` if it wasn't found, its provider
+                has failed or it hasn't answered in its deadline.
+        """
+
+        async def resolve() -> RESOURCE | None:
+            provider = self._access_provider(resource_id)
+            generation = self._resource_cache.get_generation(
+                provider.node_instance_path
+            )
+
+            try:
+                resource = await self._async_call_provider(provider, get_resource)
+            except (NodeFailureException, TimeoutError):
+                return None
+
+            self._cache_resource(provider, resource_id, resource, generation)
+
+            return resource
+
+        return await self._coalescer.async_do(
+            (resource_id.resource_name(), resource_id), resolve
+        )
+
+    def _get_aggregate(
+        self,
+        resource_type: str,
+        get_iterator: Callable[[Provider], Iterator[RESOURCE]],
+    ) -> AggregateResult[RESOURCE]:
+        """Get the cached aggregate of a resource type or build it chaining the
+        providers, identical requests made at the same time share a single
+        aggregate.
+
+        The providers that are skipped or fail are recorded as unavailable,
+        so an aggregate missing some of their resources is never cached.
+
+        Args:
+            resource_type: The type of the aggregated resources.
+            get_iterator: Function that returns the iterator of a provider.
+
+        Returns:
+            The aggregate of the resources, it's shared and must not be modified.
+        """
+
+        cached_aggregate = self._get_cached_aggregate(resource_type)
+        if cached_aggregate is not None:
+            return cached_aggregate
+
+        def build() -> AggregateResult[RESOURCE]:
+            library_generations = self._get_library_generations()
+            aggregate_result: AggregateResult[RESOURCE] = AggregateResult()
+            aggregate_result.resources.extend(
+                self._chain_providers(get_iterator, aggregate_result.unavailable)
+            )
+            self._cache_aggregate(resource_type, library_generations, aggregate_result)
+
+            return aggregate_result
+
+        return self._coalescer.do((f"all_{resource_type}",), build)
+
+    async def _async_get_aggregate(
+        self,
+        resource_type: str,
+        get_resources: Callable[[Provider], Awaitable[list[RESOURCE]]],
+    ) -> AggregateResult[RESOURCE]:
+        """Get the cached aggregate of a resource type or build it asking all
+        the providers concurrently, identical requests made at the same time
+        share a single aggregate.
+
+        Args:
+            resource_type: The type of the aggregated resources.
+            get_resources: Function that returns the coroutine that gets the
+                resources of a provider.
+
+        Returns:
+            The aggregate of the resources, it's shared and must not be modified.
+        """
+
+        cached_aggregate = self._get_cached_aggregate(resource_type)
+        if cached_aggregate is not None:
+            return cached_aggregate
+
+        async def build() -> AggregateResult[RESOURCE]:
+            library_generations = self._get_library_generations()
+            aggregate_result = await self._async_gather_providers(get_resources)
+            self._cache_aggregate(resource_type, library_generations, aggregate_result)
+
+            return aggregate_result
+
+        return await self._coalescer.async_do((f"all_{resource_type}",), build)
+
+    def get_song(self, song_resource_id: SongResourceId) -> Song | None:
+        """Get a song object given its resource id.
+
+        Args:
+            song_resource_id: The ID of the resource of the song to get.
+
+        Returns:
+            Object that holds all the info about the requested song or `None`
+                if no song was found.
+        """
+
+        cached_song = self._resource_cache.get(song_resource_id)
+        if isinstance(cached_song, Song):
+            return cached_song
+
+        return self._get_resource(
+            song_resource_id,
+            lambda provider: provider.get_song(song_resource_id.unique_id),
+        )
+
+    def _group_songs_by_provider(
+        self, songs_resource_ids: list[SongResourceId], songs: list[Song | None]
+    ) -> dict[NodeInstancePath, list[int]]:
+        """Fill the songs that are already cached and group the positions of
+        the rest of them by the provider that can resolve them.
+
+        Args:
+            songs_resource_ids: The resource ids of the requested songs.
+            songs: The list of results to fill, aligned with the resource ids.
+
+        Returns:
+            The positions of the missing songs keyed by the node instance path
+                of their providers, the songs of unknown providers are skipped.
+        """
+
+        missing_songs: dict[NodeInstancePath, list[int]] = {}
+
+        for index, song_resource_id in enumerate(songs_resource_ids):
+            cached_song = self._resource_cache.get(song_resource_id)
+
+            if isinstance(cached_song, Song):
+                songs[index] = cached_song
+                continue
+
+            if song_resource_id.node_instance_path not in self._providers:
+                continue
+
+            missing_songs.setdefault(song_resource_id.node_instance_path, []).append(
+                index
+            )
+
+        return missing_songs
+
+    def _store_provider_songs(
+        self,
+        provider: Provider,
+        songs_resource_ids: list[SongResourceId],
+        songs: list[Song | None],
+        indexes: list[int],
+        provider_songs: list[Song | None],
+        generation: int,
+    ) -> None:
+        """Place the songs resolved by a provider in the list of results and
+        cache them.
+
+        Args:
+            provider: The provider that has resolved the songs.
+            songs_resource_ids: The resource ids of the requested songs.
+            songs: The list of results to fill, aligned with the resource ids.
+            indexes: The positions of the songs asked to the provider.
+            provider_songs: The songs given by the provider.
+            generation: The invalidation generation of the provider in the
+                cache taken before asking for the songs.
+        """
+
+        for index, song in zip(indexes, provider_songs):
+            songs[index] = song
+            self._cache_resource(provider, songs_resource_ids[index], song, generation)
+
+    def get_songs(self, songs_resource_ids: list[SongResourceId]) -> list[Song | None]:
+        """Get several songs at once given their resource ids, the songs are
+        asked to every provider in a single batch.
+
+        Args:
+            songs_resource_ids: The resource ids of the songs to get.
+
+        Returns:
+            The requested songs in the same order as their resource ids,
+                with `None` in place of the songs that weren't found.
+        """
+
+        songs: list[Song | None] = [None] * len(songs_resource_ids)
+        missing_songs = self._group_songs_by_provider(songs_resource_ids, songs)
+
+        for node_instance_path, indexes in missing_songs.items():
+            provider = self._providers[node_instance_path]
+            generation = self._resource_cache.get_generation(node_instance_path)
+
+            try:
+                provider_songs = self._call_provider(
+                    provider,
+                    lambda provider: provider.get_songs_batch(
+                        [songs_resource_ids[index].unique_id for index in indexes]
+                    ),
+                )
+            except NodeFailureException:
+                continue
+
+            self._store_provider_songs(
+                provider, songs_resource_ids, songs, indexes, provider_songs, generation
+            )
+
+        return songs
+
+    async def async_get_songs(
+        self, songs_resource_ids: list[SongResourceId]
+    ) -> list[Song | None]:
+        """Get several songs at once given their resource ids without blocking
+        the event loop, the batches of every provider are asked concurrently.
+
+        Args:
+            songs_resource_ids: The resource ids of the songs to get.
+
+        Returns:
+            The requested songs in the same order as their resource ids,
+                with `None` in place of the songs that weren't found.
+        """
+
+        songs: list[Song | None] = [None] * len(songs_resource_ids)
+        missing_songs = self._group_songs_by_provider(songs_resource_ids, songs)
+
+        providers = [
+            self._providers[node_instance_path] for node_instance_path in missing_songs
+        ]
+        generations = [
+            self._resource_cache.get_generation(node_instance_path)
+            for node_instance_path in missing_songs
+        ]
+
+        def get_songs_batch(
+            indexes: list[int],
+        ) -> Callable[[Provider], Awaitable[list[Song | None]]]:
+            unique_ids = [songs_resource_ids[index].unique_id for index in indexes]
+            return lambda provider: provider.async_get_songs_batch(unique_ids)
+
+        answers = await asyncio.gather(
+            *(
+                self._async_call_provider(provider, get_songs_batch(indexes))
+                for provider, indexes in zip(providers, missing_songs.values())
+            ),
+            return_exceptions=True,
+        )
+
+        for provider, indexes, generation, answer in zip(
+            providers, missing_songs.values(), generations, answers
+        ):
+            match answer:
+                case list():
+                    self._store_provider_songs(
+                        provider,
+                        songs_resource_ids,
+                        songs,
+                        indexes,
+                        answer,
+                        generation,
+                    )
+
+                case NodeFailureException() | TimeoutError():
+                    continue
+
+                case BaseException():
+                    raise answer
+
+        return songs
+
+    def get_all_songs(self) -> list[Song]:
+        """Return all songs of all providers registered in this orchestrator.
+
+        Returns:
+            List that holds all the info about all the songs reported
+                by the providers.
+        """
+
+        return list(
+            self._get_aggregate(
+                "songs", lambda provider: provider.iter_songs()
+            ).resources
+        )
+
+    def get_songs_page(self, cursor: str | None, limit: int) -> Page[Song]:
+        """Return a page of the songs of all providers registered in this
+        orchestrator, sorted by provider and then by their unique ids.
+
+        Args:
+            cursor: The cursor returned with the previous page, or `None` to
+                start from the beginning.
+            limit: The maximum number of songs of the page.
+
+        Raises:
+            ValueError: Raised if the cursor is malformed or the limit isn't
+                positive.
+
+        Returns:
+            The page of songs and the cursor of the next one.
+        """
+
+        return self._get_page(
+            cursor,
+            limit,
+            lambda provider, after_unique_id, provider_limit: provider.get_songs_page(
+                after_unique_id, provider_limit
+            ),
+        )
+
+    async def async_get_songs_page(self, cursor: str | None, limit: int) -> Page[Song]:
+        """Return a page of the songs of all providers registered in this
+        orchestrator without blocking the event loop, sorted by provider and
+        then by their unique ids.
+
+        Args:
+            cursor: The cursor returned with the previous page, or `None` to
+                start from the beginning.
+            limit: The maximum number of songs of the page.
+
+        Raises:
+            ValueError: Raised if the cursor is malformed or the limit isn't
+                positive.
+            TimeoutError: Raised if a provider doesn't answer in its deadline.
+
+        Returns:
+            The page of songs and the cursor of the next one.
+        """
+
+        return await self._async_get_page(
+            cursor,
+            limit,
+            lambda provider, after_unique_id, provider_limit: (
+                provider.async_get_songs_page(after_unique_id, provider_limit)
+            ),
+        )
+
+    def iter_songs(self) -> Iterator[Song]:
+        """Iterate lazily over all the songs of all providers registered in
+        this orchestrator, chaining the iterators of the providers.
+
+        Returns:
+            An iterator over the songs given by the providers.
+        """
+
+        return self._chain_providers(lambda provider: provider.iter_songs())
+
+    async def async_get_song(self, song_resource_id: SongResourceId) -> Song | None:
+        """Get a song object given its resource id without blocking the
+        event loop.
+
+        Args:
+            song_resource_id: The ID of the resource of the song to get.
+
+        Returns:
+            Object that holds all the info about the requested song or `None`
+                if no song was found.
+        """
+
+        cached_song = self._resource_cache.get(song_resource_id)
+        if isinstance(cached_song, Song):
+            return cached_song
+
+        return await self._async_get_resource(
+            song_resource_id,
+            lambda provider: provider.async_get_song(song_resource_id.unique_id),
+        )
+
+    async def async_get_all_songs(self) -> AggregateResult[Song]:
+        """Return all songs of all providers registered in this orchestrator
+        without blocking the event loop, asking all the providers concurrently.
+
+        Complete results are cached until the library of any provider changes,
+        so the returned result is shared and must not be modified.
+
+        Returns:
+            The songs given by the providers that have answered before their
+                deadline and the providers that have timed out.
+        """
+
+        return await self._async_get_aggregate(
+            "songs", lambda provider: provider.async_get_all_songs()
+        )
+
+    def async_iter_songs(self) -> AsyncIterator[Song]:
+        """Iterate asynchronously over all the songs of all providers
+        registered in this orchestrator, chaining the iterators of the providers.
+
+        Returns:
+            An asynchronous iterator over the songs given by the providers.
+        """
+
+        return self._async_chain_providers(lambda provider: provider.async_iter_songs())
+
+    def get_album(self, album_resource_id: AlbumResourceId) -> Album | None:
+        """Get an album object given its resource id.
+
+        Args:
+            album_resource_id: The ID of the resource of the album to get.
+
+        Returns:
+            Object that holds all the info about the requested album or `None`
+                if no song was found.
+        """
+
+        cached_album = self._resource_cache.get(album_resource_id)
+        if isinstance(cached_album, Album):
+            return cached_album
+
+        return self._get_resource(
+            album_resource_id,
+            lambda provider: provider.get_album(album_resource_id.unique_id),
+        )
+
+    def get_all_albums(self) -> list[Album]:
+        """Return all albums of all providers registered in this orchestrator.
+
+        Returns:
+            A list of all the albums given by the providers.
+        """
+
+        return list(
+            self._get_aggregate(
+                "albums", lambda provider: provider.iter_albums()
+            ).resources
+        )
+
+    def get_albums_page(self, cursor: str | None, limit: int) -> Page[Album]:
+        """Return a page of the albums of all providers registered in this
+        orchestrator, sorted by provider and then by their unique ids.
+
+        Args:
+            cursor: The cursor returned with the previous page, or `None` to
+                start from the beginning.
+            limit: The maximum number of albums of the page.
+
+        Raises:
+            ValueError: Raised if the cursor is malformed or the limit isn't
+                positive.
+
+        Returns:
+            The page of albums and the cursor of the next one.
+        """
+
+        return self._get_page(
+            cursor,
+            limit,
+            lambda provider, after_unique_id, provider_limit: provider.get_albums_page(
+                after_unique_id, provider_limit
+            ),
+        )
+
+    async def async_get_albums_page(
+        self, cursor: str | None, limit: int
+    ) -> Page[Album]:
+        """Return a page of the albums of all providers registered in this
+        orchestrator without blocking the event loop, sorted by provider and
+        then by their unique ids.
+
+        Args:
+            cursor: The cursor returned with the previous page, or `None` to
+                start from the beginning.
+            limit: The maximum number of albums of the page.
+
+        Raises:
+            ValueError: Raised if the cursor is malformed or the limit isn't
+                positive.
+            TimeoutError: Raised if a provider doesn't answer in its deadline.
+
+        Returns:
+            The page of albums and the cursor of the next one.
+        """
+
+        return await self._async_get_page(
+            cursor,
+            limit,
+            lambda provider, after_unique_id, provider_limit: (
+                provider.async_get_albums_page(after_unique_id, provider_limit)
+            ),
+        )
+
+    def iter_albums(self) -> Iterator[Album]:
+        """Iterate lazily over all the albums of all providers registered in
+        this orchestrator, chaining the iterators of the providers.
+
+        Returns:
+            An iterator over the albums given by the providers.
+        """
+
+        return self._chain_providers(lambda provider: provider.iter_albums())
+
+    async def async_get_album(self, album_resource_id: AlbumResourceId) -> Album | None:
+        """Get an album object given its resource id without blocking the
+        event loop.
+
+        Args:
+            album_resource_id: The ID of the resource of the album to get.
+
+        Returns:
+            Object that holds all the info about the requested album or `None`
+                if no album was found.
+        """
+
+        cached_album = self._resource_cache.get(album_resource_id)
+        if isinstance(cached_album, Album):
+            return cached_album
+
+        return await self._async_get_resource(
+            album_resource_id,
+            lambda provider: provider.async_get_album(album_resource_id.unique_id),
+        )
+
+    async def async_get_all_albums(self) -> AggregateResult[Album]:
+        """Return all albums of all providers registered in this orchestrator
+        without blocking the event loop, asking all the providers concurrently.
+
+        Complete results are cached until the library of any provider changes,
+        so the returned result is shared and must not be modified.
+
+        Returns:
+            The albums given by the providers that have answered before their
+                deadline and the providers that have timed out.
+        """
+
+        return await self._async_get_aggregate(
+            "albums", lambda provider: provider.async_get_all_albums()
+        )
+
+    def async_iter_albums(self) -> AsyncIterator[Album]:
+        """Iterate asynchronously over all the albums of all providers
+        registered in this orchestrator, chaining the iterators of the providers.
+
+        Returns:
+            An asynchronous iterator over the albums given by the providers.
+        """
+
+        return self._async_chain_providers(
+            lambda provider: provider.async_iter_albums()
+        )
+
+    def get_artist(self, artist_resource_id: ArtistResourceId) -> Artist | None:
+        """Get an artist object given its resource id.
+
+        Args:
+            album_resource_id: The ID of the resource of the artist to get.
+
+        Returns:
+            Object that holds all the info about the requested artist or `None`
+                if no song was found.
+        """
+
+        cached_artist = self._resource_cache.get(artist_resource_id)
+        if isinstance(cached_artist, Artist):
+            return cached_artist
 
-        for channel in self._channels.values():
-            channel.check_if_song_finished()
+        return self._get_resource(
+            artist_resource_id,
+            lambda provider: provider.get_artist(artist_resource_id.unique_id),
+        )
 
-    def get_channels_names(self) -> list[str]:
-        """Returns a list with all the available channels by its name.
+    def get_all_artists(self) -> list[Artist]:
+        """Return all artists of all providers registered in this orchestrator.
 
         Returns:
-            The list of available channels given their names.
+            A list of all the artists given by the providers.
         """
 
-        return list(self._channels.keys())
+        return list(
+            self._get_aggregate(
+                "artists", lambda provider: provider.iter_artists()
+            ).resources
+        )
 
-    def _providers_generator(self) -> Iterator[Provider]:
-        """Generator used to iterate over providers with ease
-        using python for loops."""
+    def iter_artists(self) -> Iterator[Artist]:
+        """Iterate lazily over all the artists of all providers registered in
+        this orchestrator, chaining the iterators of the providers.
+
+        Returns:
+            An iterator over the artists given by the providers.
+        """
 
-        for _, provider in self._providers.items():
-            for _, instance in provider.items():
-                for _, provider_object in instance.items():
-                    yield provider_object
+        return self._chain_providers(lambda provider: provider.iter_artists())
 
-    def _access_provider(self, resource_id: ResourceId) -> Provider:
-        """Route and returns a provider given the resource id of a resource of its own.
+    async def async_get_artist(
+        self, artist_resource_id: ArtistResourceId
+    ) -> Artist | None:
+        """Get an artist object given its resource id without blocking the
+        event loop.
 
         Args:
-            resource_id: The ID of the resource to get its provider.
+            artist_resource_id: The ID of the resource of the artist to get.
 
         Returns:
-            The provider where the resource is from.
+            Object that holds all the info about the requested artist or `None`
+                if no artist was found.
         """
 
-        plugin_name: str = resource_id.node_instance_path.plugin_name
-        node_name: str = resource_id.node_instance_path.node_name
-        instance_name: str = resource_id.node_instance_path.instance_name
+        cached_artist = self._resource_cache.get(artist_resource_id)
+        if isinstance(cached_artist, Artist):
+            return cached_artist
+
+        return await self._async_get_resource(
+            artist_resource_id,
+            lambda provider: provider.async_get_artist(artist_resource_id.unique_id),
+        )
 
-        return self._providers[plugin_name][node_name][instance_name]
+    async def async_get_all_artists(self) -> AggregateResult[Artist]:
+        """Return all artists of all providers registered in this orchestrator
+        without blocking the event loop, asking all the providers concurrently.
 
-    def _delete_provider(self, node_instance_path: NodeInstancePath) -> None:
-        """Remove a provider from the orchestrator given its node instance path.
+        Complete results are cached until the library of any provider changes,
+        so the returned result is shared and must not be modified.
 
-        Args:
-            node_instance_path: The route to the node instance of the node
-                to be deleted.
+        Returns:
+            The artists given by the providers that have answered before their
+                deadline and the providers that have timed out.
         """
 
-        plugin_name: str = node_instance_path.plugin_name
-        node_name: str = node_instance_path.node_name
-        instance_name: str = node_instance_path.instance_name
+        return await self._async_get_aggregate(
+            "artists", lambda provider: provider.async_get_all_artists()
+        )
+
+    def async_iter_artists(self) -> AsyncIterator[Artist]:
+        """Iterate asynchronously over all the artists of all providers
+        registered in this orchestrator, chaining the iterators of the providers.
+
+        Returns:
+            An asynchronous iterator over the artists given by the providers.
+        """
 
-        self._logger.info(
-            f'Removing provider "{node_instance_path}" from the orchestrator'
+        return self._async_chain_providers(
+            lambda provider: provider.async_iter_artists()
         )
 
-        del self._providers[plugin_name][node_name][instance_name]
+    def search(self, query: str, limit: int = 20) -> list[SearchResult]:
+        """Look for the songs, albums and artists of all providers whose
+        titles, albums or artists match a query.
+
+        Args:
+            query: The text to look for, every word can be just the start
+                of a word.
+            limit: The maximum number of results.
+
+        Returns:
+            The best matching resources sorted by their score.
+        """
+
+        return self.search_index.search(query, limit)
 
-    def _delete_providers(self, node_instance_paths: list[NodeInstancePath]) -> None:
-        """Remove any number of providers from the orchestrator given their
-        node instance path.
+    async def async_search(self, query: str, limit: int = 20) -> list[SearchResult]:
+        """Look for the songs, albums and artists of all providers whose
+        titles, albums or artists match a query without blocking the event loop.
 
         Args:
-            node_instance_paths: The routes to the nodes instances in the
-                orchestrator to delete.
+            query: The text to look for, every word can be just the start
+                of a word.
+            limit: The maximum number of results.
+
+        Returns:
+            The best matching resources sorted by their score.
         """
 
-        for node_instance_path in node_instance_paths:
-            self._delete_provider(node_instance_path)
+        return await self._coalescer.async_do(
+            ("search", query, limit),
+            lambda: self.jobs.run_interactive(self.search_index.search, query, limit),
+        )
 
-    def get_song(self, song_resource_id: SongResourceId) -> Song | None:
-        """Get a song object given its resource id.
+    def refresh_provider(
+        self,
+        node_instance_path: NodeInstancePath,
+        progress: Callable[[int, int], None] | None = None,
+        job: Job | None = None,
+    ) -> LibraryDiff | None:
+        """Ask a provider to look for changes in its source.
 
         Args:
-            song_resource_id: The ID of the resource of the song to get.
+            node_instance_path: The route to the node instance of the provider.
+            progress: Optional function called with the number of processed
+                items and the expected total while refreshing.
+            job: Optional job that is refreshing the provider, that gives way
+                to more urgent work and stops early if it's cancelled.
 
         Returns:
-            Object that holds all the info about the requested song or `None`
-                if no song was found.
+            The resources that have changed or `None` if the provider doesn't
+                support refreshing or it has failed.
         """
 
+        provider = self._access_provider_by_path(node_instance_path)
+
         try:
-            return self._access_provider(song_resource_id).get_song(
-                song_resource_id.unique_id
+            return self._call_provider(
+                provider,
+                lambda provider: provider.refresh(progress, job),
+                check_latency=False,
             )
         except NodeFailureException:
-            self._delete_provider(song_resource_id.node_instance_path)
             return None
 
-    def get_all_songs(self) -> list[Song]:
-        """Return all songs of all providers registered in this orchestrator.
+    def refresh_providers(
+        self,
+        progress: Callable[[int, int], None] | None = None,
+        job: Job | None = None,
+    ) -> list[LibraryDiff]:
+        """Ask all the providers to look for changes in their sources.
+
+        Args:
+            progress: Optional function called with the number of refreshed
+                providers and the total number of providers.
+            job: Optional job that is refreshing the providers, that gives way
+                to more urgent work and stops early if it's cancelled.
 
         Returns:
-            List that holds all the info about all the songs reported
-                by the providers.
+            The changes of all the providers that support refreshing.
         """
 
-        songs: list[Song] = []
+        providers = list(self._providers_generator())
+        library_diffs: list[LibraryDiff] = []
+
+        for index, provider in enumerate(providers):
+            if job is not None and job.is_cancel_requested():
+                break
 
-        failed_nodes: list[NodeInstancePath] = []
-        for provider in self._providers_generator():
             try:
-                songs.extend(provider.get_all_songs())
+                library_diff = self._call_provider(
+                    provider,
+                    lambda provider: provider.refresh(job=job),
+                    check_latency=False,
+                )
             except NodeFailureException:
-                failed_nodes.append(provider.node_instance_path)
+                continue
 
-        self._delete_providers(failed_nodes)
+            if library_diff is not None:
+                library_diffs.append(library_diff)
 
-        return songs
+            if progress is not None:
+                progress(index + 1, len(providers))
 
-    def get_album(self, album_resource_id: AlbumResourceId) -> Album | None:
-        """Get an album object given its resource id.
+        return library_diffs
+
+    @staticmethod
+    def _get_resource_songs(resource: Song | Album | Artist | None) -> list[Song]:
+        """Get all the songs related to a resource.
 
         Args:
-            album_resource_id: The ID of the resource of the album to get.
+            resource: The song, album or artist to get the songs from.
 
         Returns:
-            Object that holds all the info about the requested album or `None`
-                if no song was found.
+            The song itself, the songs of the album or the songs of all the
+                albums of the artist.
         """
 
-        try:
-            return self._access_provider(album_resource_id).get_album(
-                album_resource_id.unique_id
-            )
-        except NodeFailureException:
-            self._delete_provider(album_resource_id.node_instance_path)
+        songs: list[Song] = []
 
-        return None
+        match resource:
+            case Song():
+                songs.append(resource)
 
-    def get_all_albums(self) -> list[Album]:
-        """Return all albums of all providers registered in this orchestrator.
+            case Album():
+                if resource.songs is not None:
+                    songs.extend(resource.songs)
 
-        Returns:
-            A list of all the albums given by the providers.
-        """
+            case Artist():
+                if resource.albums is None:
+                    return songs
 
-        albums: list[Album] = []
+                for album in resource.albums:
+                    if album.songs is None:
+                        continue
 
-        failed_nodes: list[NodeInstancePath] = []
-        for provider in self._providers_generator():
-            try:
-                albums.extend(provider.get_all_albums())
-            except NodeFailureException:
-                failed_nodes.append(provider.node_instance_path)
+                    songs.extend(album.songs)
 
-        return albums
+        return songs
 
-    def get_artist(self, artist_resource_id: ArtistResourceId) -> Artist | None:
-        """Get an artist object given its resource id.
+    def _get_queueable_resource(
+        self, resource_id: ResourceId
+    ) -> Song | Album | Artist | None:
+        """Get the resource whose songs are going to be added to a queue.
 
         Args:
-            album_resource_id: The ID of the resource of the artist to get.
+            resource_id: The resource id of a song, an album or an artist.
+
+        Raises:
+            ValueError: Raised if the given resource ID is not
+                a valid one to get songs from.
 
         Returns:
-            Object that holds all the info about the requested artist or `None`
-                if no song was found.
+            The requested resource or `None` if it wasn't found.
         """
 
-        try:
-            return self._access_provider(artist_resource_id).get_artist(
-                artist_resource_id.unique_id
-            )
-        except NodeFailureException:
-            return None
+        match resource_id:
+            case SongResourceId():
+                return self.get_song(resource_id)
+            case AlbumResourceId():
+                return self.get_album(resource_id)
+            case ArtistResourceId():
+                return self.get_artist(resource_id)
+            case _:
+                raise ValueError(
+                    f'The type of the resource id "{resource_id}"'
+                    + "is not valid for be added to the queue."
+                )
 
-    def get_all_artists(self) -> list[Artist]:
-        """Return all artists of all providers registered in this orchestrator.
+    async def _async_get_queueable_resource(
+        self, resource_id: ResourceId
+    ) -> Song | Album | Artist | None:
+        """Get the resource whose songs are going to be added to a queue
+        without blocking the event loop.
 
-        Returns:
-            A list of all the artists given by the providers.
-        """
+        Args:
+            resource_id: The resource id of a song, an album or an artist.
 
-        artists: list[Artist] = []
+        Raises:
+            ValueError: Raised if the given resource ID is not
+                a valid one to get songs from.
 
-        failed_nodes: list[NodeInstancePath] = []
-        for provider in self._providers_generator():
-            try:
-                artists.extend(provider.get_all_artists())
-            except NodeFailureException:
-                failed_nodes.append(provider.node_instance_path)
+        Returns:
+            The requested resource or `None` if it wasn't found.
+        """
 
-        return artists
+        match resource_id:
+            case SongResourceId():
+                return await self.async_get_song(resource_id)
+            case AlbumResourceId():
+                return await self.async_get_album(resource_id)
+            case ArtistResourceId():
+                return await self.async_get_artist(resource_id)
+            case _:
+                raise ValueError(
+                    f'The type of the resource id "{resource_id}"'
+                    + "is not valid for be added to the queue."
+                )
 
     def add_to_queue(self, channel: str, resource_id: ResourceId) -> None:
         """Add to the queue of a channel all the songs related to the
@@ -222,6 +1900,23 @@ class Orchestrator:
 
         self.insert_to_queue(channel, resource_id, 0)
 
+    async def async_add_to_queue(
+        self, channel: str, resource_id: ResourceId
+    ) -> Job | None:
+        """Add to the queue of a channel all the songs related to the
+        given resource id without blocking the event loop.
+
+        Args:
+            channel: The channel to add the songs.
+            resource_id: The resource id to add the songs from.
+
+        Returns:
+            The job that adds the songs in the background if there are too
+                many of them, or `None` if they have already been added.
+        """
+
+        return await self.async_insert_to_queue(channel, resource_id, 0)
+
     def insert_to_queue(
         self, channel: str, resource_id: ResourceId, insert_position: int
     ) -> None:
@@ -245,49 +1940,214 @@ class Orchestrator:
                 a valid one to get songs from.
         """
 
-        songs: list[Song] = []
+        resource = self._get_queueable_resource(resource_id)
 
-        match resource_id:
-            case SongResourceId():
-                song = self.get_song(resource_id)
+        self._channels[channel].insert_songs(
+            self._get_resource_songs(resource), insert_position
+        )
 
-                if song is not None:
-                    songs.append(song)
+    async def async_insert_to_queue(
+        self, channel: str, resource_id: ResourceId, insert_position: int
+    ) -> Job | None:
+        """Add to the queue of a channel all the songs related to the given
+        resource id in the desired position without blocking the event loop.
 
-            case AlbumResourceId():
-                album = self.get_album(resource_id)
+        The resource is resolved asynchronously and the queue is only changed
+        from the event loop, as the channels are not thread safe. Artists
+        whose albums are missing their songs and resources with more songs
+        than the expansion job threshold are added by a background job, in
+        chunks and as their albums are resolved.
 
-                if album is None:
-                    return
+        Args:
+            channel: The channel to add the songs.
+            resource_id: The resource id to add the songs from.
+                (Either a song, an album or an artist).
+            insert_position: The position where the songs should be added.
 
-                if album.songs is None:
-                    return
+        Raises:
+            ValueError: Raised if the given resource ID is not
+                a valid one to get songs from.
 
-                songs = album.songs
+        Returns:
+            The job that adds the songs in the background, or `None` if they
+                have already been added.
+        """
 
-            case ArtistResourceId():
-                artist = self.get_artist(resource_id)
+        resource = await self._async_get_queueable_resource(resource_id)
+        songs = self._get_resource_songs(resource)
 
-                if artist is None:
-                    return
+        if not isinstance(resource, Album | Artist) or (
+            len(self._get_unresolved_albums(resource)) == 0
+            and len(songs) <= int(self.config["queue"]["expansion_job_threshold"])
+        ):
+            self._channels[channel].insert_songs(songs, insert_position)
+            return None
 
-                if artist.albums is None:
-                    return
+        loop = asyncio.get_running_loop()
 
-                for album in artist.albums:
-                    if album.songs is None:
-                        continue
+        # Follows the changes made to the queue while the job runs, so the
+        # chunks keep being added after the previous ones.
+        insert_position_tracker = QueuePositionTracker(insert_position)
+        self._channels[channel].add_change_listener(insert_position_tracker.apply)
 
-                    songs.extend(album.songs)
+        return self.jobs.submit(
+            f'queue "{resource_id}" in channel "{channel}"',
+            lambda job: self._expand_to_queue(
+                job, loop, channel, resource, insert_position_tracker
+            ),
+            JobPriorities.NORMAL,
+        )
 
-            case _:
-                raise ValueError(
-                    f'The type of the resource id "{resource_id}"'
-                    + "is not valid for be added to the queue."
+    @staticmethod
+    def _get_unresolved_albums(resource: Album | Artist) -> list[Album]:
+        """Get the albums of a resource whose songs aren't known yet.
+
+        Args:
+            resource: The album or the artist to get the albums from.
+
+        Returns:
+            The albums that must be resolved to know their songs.
+        """
+
+        albums = [resource] if isinstance(resource, Album) else resource.albums
+
+        return [album for album in albums or [] if album.songs is None]
+
+    @staticmethod
+    def _call_in_loop(
+        job: Job, loop: asyncio.AbstractEventLoop, function: Callable[[], T]
+    ) -> T | None:
+        """Call a function from the event loop and wait for its result, used by
+        the jobs to change the channels as they are not thread safe.
+
+        The wait stops if the job is cancelled, as the event loop may be
+        waiting for the job itself to end while shutting down.
+
+        Args:
+            job: The job calling the function.
+            loop: The event loop that owns the channels.
+            function: The function to call.
+
+        Returns:
+            The value returned by the function, or `None` if the job has been
+                cancelled before the function has been called.
+        """
+
+        async def call() -> T:
+            return function()
+
+        future = asyncio.run_coroutine_threadsafe(call(), loop)
+
+        while True:
+            try:
+                return future.result(timeout=LOOP_CALL_POLL_INTERVAL)
+            except TimeoutError:
+                if job.is_cancel_requested() and future.cancel():
+                    return None
+
+    def _expand_to_queue(
+        self,
+        job: Job,
+        loop: asyncio.AbstractEventLoop,
+        channel: str,
+        resource: Album | Artist,
+        insert_position_tracker: QueuePositionTracker,
+    ) -> dict[str, int]:
+        """Add the songs of an album or an artist to the queue of a channel in
+        chunks, resolving the albums whose songs aren't known as they are
+        reached. Runs as a job and stops early if it's cancelled.
+
+        Args:
+            job: The job running the expansion.
+            loop: The event loop that owns the channels.
+            channel: The channel to add the songs.
+            resource: The album or the artist to add the songs from.
+            insert_position_tracker: The position where the next songs should
+                be added, registered as a change listener of the channel.
+
+        Returns:
+            The result of the job with the number of songs added to the queue.
+        """
+
+        try:
+            return self._expand_chunks_to_queue(
+                job, loop, channel, resource, insert_position_tracker
+            )
+        finally:
+            try:
+                loop.call_soon_threadsafe(
+                    self._channels[channel].remove_change_listener,
+                    insert_position_tracker.apply,
                 )
+            except RuntimeError:
+                # The event loop is already closed
+                pass
+
+    def _expand_chunks_to_queue(
+        self,
+        job: Job,
+        loop: asyncio.AbstractEventLoop,
+        channel: str,
+        resource: Album | Artist,
+        insert_position_tracker: QueuePositionTracker,
+    ) -> dict[str, int]:
+        """Add the songs of an album or an artist to the queue of a channel in
+        chunks, see `_expand_to_queue`.
+
+        The total of the progress is only known once all the albums have
+        their songs, until then it's left unknown.
+
+        Args:
+            job: The job running the expansion.
+            loop: The event loop that owns the channels.
+            channel: The channel to add the songs.
+            resource: The album or the artist to add the songs from.
+            insert_position_tracker: The position where the next songs should
+                be added.
+
+        Returns:
+            The result of the job with the number of songs added to the queue.
+        """
+
+        chunk_size = max(1, int(self.config["queue"]["expansion_chunk_size"]))
+        albums = [resource] if isinstance(resource, Album) else resource.albums or []
+
+        total_songs = (
+            len(self._get_resource_songs(resource))
+            if len(self._get_unresolved_albums(resource)) == 0
+            else None
+        )
+        queued_songs = 0
+        job.set_progress(queued_songs, total_songs)
+
+        def insert_chunk(chunk: list[Song]) -> bool:
+            return self._channels[channel].insert_songs(
+                chunk, insert_position_tracker.position
+            )
 
-        for song in songs:
-            self._channels[channel].insert(song, insert_position)
+        for album in albums:
+            songs = album.songs
+
+            if songs is None:
+                resolved_album = self.get_album(album.resource_id)
+                songs = self._get_resource_songs(resolved_album)
+
+            for chunk_start in range(0, len(songs), chunk_size):
+                job.checkpoint()
+
+                if job.is_cancel_requested():
+                    return {"queued_songs": queued_songs}
+
+                chunk = songs[chunk_start : chunk_start + chunk_size]
+                inserted = self._call_in_loop(job, loop, partial(insert_chunk, chunk))
+
+                if not inserted:
+                    return {"queued_songs": queued_songs}
+
+                queued_songs += len(chunk)
+                job.set_progress(queued_songs, total_songs)
+
+        return {"queued_songs": queued_songs}
 
     def remove_from_queue(self, channel: str, remove_position: int) -> None:
         """Remove a song from the queu of a channel given its index position.
@@ -303,6 +2163,19 @@ class Orchestrator:
 
         self._channels[channel].remove_from_queue(remove_position)
 
+    def move_in_queue(self, channel: str, from_position: int, to_position: int) -> None:
+        """Move a song of the queue of a channel to another position.
+
+        If any of the positions is greater than the queue size the call is ignored.
+
+        Args:
+            channel: The channel to move the song.
+            from_position: The position in the queue of the song to be moved.
+            to_position: The position in the queue of the song once moved.
+        """
+
+        self._channels[channel].move_in_queue(from_position, to_position)
+
     def play(self, channel: str) -> None:
         """Starts the playback in the desired channel.
 
@@ -363,7 +2236,100 @@ class Orchestrator:
             The songs currently set in the queue.
         """
 
-        return self._channels[channel]._queue
+        return self._channels[channel].get_queue()
+
+    def get_queue_page(
+        self, channel: str, cursor: str | None, limit: int
+    ) -> Page[Song]:
+        """Returns a page of the songs currently set in the queue of the
+        given channel.
+
+        The cursors point after the last song of their page, so the next page
+        follows it even if songs have been played, added or removed before it
+        in between. If that song has been removed or moved away, the next page
+        starts at the position it had instead.
+
+        Args:
+            channel: The channel to get its songs from its queue.
+            cursor: The cursor returned with the previous page, or `None` to
+                start from the beginning of the queue.
+            limit: The maximum number of songs of the page.
+
+        Raises:
+            ValueError: Raised if the cursor is malformed or the limit isn't
+                positive.
+
+        Returns:
+            The page of songs and the cursor of the next one.
+        """
+
+        if limit < 1:
+            raise ValueError(f"The limit {limit} must be positive")
+
+        queue_channel = self._channels[channel]
+
+        start = 0
+        if cursor is not None:
+            start_position, last_resource_id = decode_cursor(cursor, 2)
+
+            try:
+                start = int(start_position)
+            except ValueError as error:
+                raise ValueError(f'The cursor "{cursor}" is malformed') from error
+
+            if start < 1:
+                raise ValueError(f'The cursor "{cursor}" is malformed')
+
+            start = self._find_queue_cursor_anchor(
+                queue_channel, start, last_resource_id
+            )
+
+        end = start + limit
+        songs = queue_channel.get_queue_slice(start, end)
+
+        return Page(
+            songs,
+            (
+                encode_cursor(str(start + len(songs)), str(songs[-1].resource_id))
+                if end < queue_channel.get_queue_length()
+                else None
+            ),
+        )
+
+    @staticmethod
+    def _find_queue_cursor_anchor(
+        channel: Channel, position: int, last_resource_id: str
+    ) -> int:
+        """Find where the next page of a queue starts, after the last song of
+        the previous page even if songs have been added or removed before it.
+
+        Args:
+            channel: The channel whose queue is being paged.
+            position: The position after the last song of the previous page
+                when it was returned.
+            last_resource_id: The resource id of the last song of the previous
+                page.
+
+        Returns:
+            The position after the nearest song with the given resource id,
+                or the given position if it's no longer near it.
+        """
+
+        window_start = max(position - 1 - QUEUE_CURSOR_SEARCH_WINDOW, 0)
+        window = channel.get_queue_slice(
+            window_start, position + QUEUE_CURSOR_SEARCH_WINDOW
+        )
+
+        for distance in range(QUEUE_CURSOR_SEARCH_WINDOW + 1):
+            for anchor in (position - 1 - distance, position - 1 + distance):
+                if (
+                    0 <= anchor - window_start < len(window)
+                    and str(window[anchor - window_start].resource_id)
+                    == last_resource_id
+                ):
+                    return anchor + 1
+
+        return position
 
     def play_from_queue_given_index(self, channel: str, play_position: int) -> None:
         """Start playing in the given index position in the queue in
@@ -413,6 +2379,16 @@ class Orchestrator:
         safe and will probably fail if done.
         """
 
+        # The jobs still use the providers, so they must end before the
+        # providers are cleaned up.
+        self._logger.info("Waiting for the running jobs...")
+        self.jobs.shutdown()
+
+        for timer in self._song_end_timers.values():
+            timer.cancel()
+
+        self._song_end_timers.clear()
+
         self._logger.info("Cleaning provider nodes...")
         for provider in self._providers_generator():
             try:
@@ -432,3 +2408,6 @@ class Orchestrator:
         self._logger.info("Cleaning channels...")
         for _, channel in self._channels.items():
             channel.cleanup_listeners()
+
+        if self.channel_store is not None:
+            self.channel_store.close()
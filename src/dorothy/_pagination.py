@@ -0,0 +1,58 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class Page(Generic[T]):
+    """Dataclass that holds a window of a listing along with the cursor to
+    request the next one."""
+
+    items: list[T] = field(default_factory=lambda: [])
+    next_cursor: str | None = field(default_factory=lambda: None)
+
+
+def encode_cursor(*parts: str) -> str:
+    """Build an opaque cursor that points to a position of a listing.
+
+    Args:
+        parts: The values that identify the last item of a page.
+
+    Returns:
+        The URL safe cursor.
+    """
+
+    return base64.urlsafe_b64encode(json.dumps(parts).encode()).decode()
+
+
+def decode_cursor(cursor: str, parts_count: int) -> list[str]:
+    """Read the values stored in an opaque cursor.
+
+    Args:
+        cursor: The cursor to read.
+        parts_count: The number of values that the cursor must hold.
+
+    Raises:
+        ValueError: Raised if the cursor is malformed.
+
+    Returns:
+        The values that identify the last item of the previous page.
+    """
+
+    try:
+        parts = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as error:
+        raise ValueError(f'The cursor "{cursor}" is malformed') from error
+
+    if (
+        not isinstance(parts, list)
+        or len(parts) != parts_count
+        or not all(isinstance(part, str) for part in parts)
+    ):
+        raise ValueError(f'The cursor "{cursor}" is malformed')
+
+    return parts
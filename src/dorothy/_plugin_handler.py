@@ -8,7 +8,6 @@ from typing import Type, Tuple
 # This import is needed by iter_modules to detect the plugins
 import dorothy.plugins
 
-from ._channel import Channel
 from ._config import ConfigManager
 from .models._node import NodeInstancePath
 from .models._plugin_manifest import PluginManifest
@@ -88,7 +87,7 @@ class PluginHandler:
             A list of controllers that have control of the orchestrator.
         """
 
-        orchestrator = Orchestrator()
+        orchestrator = Orchestrator(self._config_manager.handle_core_config())
         controllers: list[Controller] = []
 
         for plugin in plugins_data:
@@ -110,53 +109,40 @@ class PluginHandler:
                         )
                         continue
 
+                    if issubclass(node, Controller):
+                        node_type = "controller"
+                    elif issubclass(node, Provider):
+                        node_type = "provider"
+                    elif issubclass(node, Listener):
+                        node_type = "listener"
+                    else:
+                        raise ValueError(f'Unknown node type of node "{node}"')
+
                     node_instance_path = NodeInstancePath(
                         plugin_name=plugin.name,
+                        node_type=node_type,
                         node_name=node_manifest.name,
                         instance_name=instance_name,
                     )
 
                     if issubclass(node, Controller):
-                        node_instance_path.node_type = "controller"
-
                         controllers.append(
                             node(instance_config, node_instance_path, orchestrator)
                         )
 
                     elif issubclass(node, Provider):
-                        node_instance_path.node_type = "provider"
-
-                        if plugin.name not in orchestrator._providers:
-                            orchestrator._providers[plugin.name] = {}
-
-                        if (
-                            node_manifest.name
-                            not in orchestrator._providers[plugin.name]
-                        ):
-                            orchestrator._providers[plugin.name][
-                                node_manifest.name
-                            ] = {}
-
-                        orchestrator._providers[plugin.name][node_manifest.name][
-                            instance_name
-                        ] = node(instance_config, node_instance_path)
+                        orchestrator._add_provider(
+                            node(instance_config, node_instance_path)
+                        )
 
                     elif issubclass(node, Listener):
-                        node_instance_path.node_type = "listener"
-
                         for channel in instance_config["channels"]:
-                            if channel not in orchestrator._channels:
-                                orchestrator._channels[channel] = Channel(
-                                    channel)
-
-                            orchestrator._channels[channel]._listeners.append(
-                                node(
-                                    instance_config,
-                                    node_instance_path,
-                                )
+                            listener = node(
+                                instance_config,
+                                node_instance_path,
                             )
+                            listener.jobs = orchestrator.jobs
 
-                    else:
-                        raise ValueError(f'Unknown node type of node "{node}"')
+                            orchestrator._add_listener(channel, listener)
 
         return orchestrator, controllers
@@ -0,0 +1,327 @@
+import itertools
+from typing import Generic, Iterable, Iterator, TypeVar, overload
+
+T = TypeVar("T")
+
+# Target number of items of every chunk, a chunk is split once it would
+# double it and merged with its neighbour once it drops below a quarter of it.
+CHUNK_SIZE = 1024
+
+
+class IndexedQueue(Generic[T]):
+    """Sequence split in chunks of bounded size, used as the queue of the
+    channels.
+
+    A Fenwick tree over the lengths of the chunks finds the chunk that holds
+    a position in O(log n), and as the chunks are bounded any insert, removal
+    or move at an arbitrary position only shifts the items of one chunk. A
+    large range of items is cut in new chunks, so it costs O(k) plus the
+    rebuild of the tree, that only depends on the number of chunks.
+    """
+
+    def __init__(self, items: Iterable[T] = ()) -> None:
+        """The indexed queue constructor method.
+
+        Args:
+            items: The initial items of the queue.
+        """
+
+        self._chunks: list[list[T]] = self._build_chunks(list(items))
+        self._length = sum(len(chunk) for chunk in self._chunks)
+        self._tree: list[int] = []
+        self._rebuild_tree()
+
+    @staticmethod
+    def _build_chunks(items: list[T]) -> list[list[T]]:
+        """Split a list of items in chunks of the target size.
+
+        Args:
+            items: The items to split.
+
+        Returns:
+            The chunks with the items.
+        """
+
+        return [
+            items[start : start + CHUNK_SIZE]
+            for start in range(0, len(items), CHUNK_SIZE)
+        ]
+
+    def _rebuild_tree(self) -> None:
+        """Build again the Fenwick tree after the chunks have been added,
+        removed or reordered, in O(number of chunks)."""
+
+        # Every node of the tree holds the sum of the range of chunks that
+        # ends in it, taken from the prefix sums of the lengths.
+        prefix_sums = [0, *itertools.accumulate(map(len, self._chunks))]
+        tree = [
+            prefix_sums[index] - prefix_sums[index - (index & -index)]
+            for index in range(len(prefix_sums))
+        ]
+
+        self._tree = tree
+
+    def _add_to_tree(self, chunk_index: int, delta: int) -> None:
+        """Update the Fenwick tree after the length of a chunk has changed.
+
+        Args:
+            chunk_index: The index of the chunk.
+            delta: The change of the length of the chunk.
+        """
+
+        index = chunk_index + 1
+
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def _locate(self, position: int) -> tuple[int, int]:
+        """Find the chunk that holds a position of the queue.
+
+        Args:
+            position: A position between zero and the length of the queue,
+                the length itself points to the end of the last chunk.
+
+        Returns:
+            The index of the chunk and the offset of the position inside it.
+        """
+
+        if position >= self._length:
+            last_index = len(self._chunks) - 1
+            return last_index, position - (self._length - len(self._chunks[-1]))
+
+        chunk_index = 0
+        remaining = position
+        step = 1 << ((len(self._tree) - 1).bit_length() - 1)
+
+        while step > 0:
+            next_index = chunk_index + step
+
+            if next_index < len(self._tree) and self._tree[next_index] <= remaining:
+                chunk_index = next_index
+                remaining -= self._tree[next_index]
+
+            step >>= 1
+
+        return chunk_index, remaining
+
+    def _normalize_position(self, position: int) -> int:
+        """Turn a negative position into the equivalent positive one.
+
+        Args:
+            position: The position to normalize.
+
+        Raises:
+            IndexError: Raised if the position is out of the queue.
+
+        Returns:
+            The position counted from the start of the queue.
+        """
+
+        if position < 0:
+            position += self._length
+
+        if position < 0 or position >= self._length:
+            raise IndexError("Queue index out of range")
+
+        return position
+
+    def _rebalance(self, chunk_index: int) -> None:
+        """Drop a chunk that has been emptied or merge a chunk that has shrunk
+        too much with its next neighbour.
+
+        Args:
+            chunk_index: The index of the chunk that has shrunk.
+        """
+
+        chunk = self._chunks[chunk_index]
+
+        if len(chunk) == 0:
+            del self._chunks[chunk_index]
+            self._rebuild_tree()
+
+        elif (
+            len(chunk) < CHUNK_SIZE // 4
+            and chunk_index + 1 < len(self._chunks)
+            and len(chunk) + len(self._chunks[chunk_index + 1]) <= 2 * CHUNK_SIZE
+        ):
+            chunk.extend(self._chunks.pop(chunk_index + 1))
+            self._rebuild_tree()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[T]:
+        return itertools.chain.from_iterable(self._chunks)
+
+    @overload
+    def __getitem__(self, position: int) -> T: ...
+
+    @overload
+    def __getitem__(self, position: slice) -> list[T]: ...
+
+    def __getitem__(self, position: int | slice) -> T | list[T]:
+        if isinstance(position, slice):
+            start, stop, step = position.indices(self._length)
+
+            if step != 1:
+                return list(self)[position]
+
+            return self.get_range(start, stop)
+
+        chunk_index, offset = self._locate(self._normalize_position(position))
+
+        return self._chunks[chunk_index][offset]
+
+    def get_range(self, start: int, stop: int) -> list[T]:
+        """Get the items between two positions in O(log n + k).
+
+        Args:
+            start: The position of the first item.
+            stop: The position after the last item.
+
+        Returns:
+            The items of the range, fewer if the queue ends before.
+        """
+
+        start = max(0, start)
+        stop = min(self._length, stop)
+
+        if start >= stop:
+            return []
+
+        chunk_index, offset = self._locate(start)
+        items: list[T] = []
+
+        while len(items) < stop - start:
+            chunk = self._chunks[chunk_index]
+            items.extend(chunk[offset : offset + stop - start - len(items)])
+            chunk_index += 1
+            offset = 0
+
+        return items
+
+    def insert(self, position: int, item: T) -> None:
+        """Insert an item in the given position, positions beyond the end of
+        the queue insert it at the end.
+
+        Args:
+            position: The position of the item once inserted.
+            item: The item to insert.
+        """
+
+        self.insert_many(position, [item])
+
+    def insert_many(self, position: int, items: list[T]) -> None:
+        """Insert a range of items in the given position keeping their order,
+        positions beyond the end of the queue insert them at the end.
+
+        Args:
+            position: The position of the first item once inserted.
+            items: The items to insert.
+        """
+
+        if len(items) == 0:
+            return
+
+        position = min(max(0, position), self._length)
+
+        if len(self._chunks) == 0:
+            self._chunks = self._build_chunks(list(items))
+            self._length = len(items)
+            self._rebuild_tree()
+            return
+
+        chunk_index, offset = self._locate(position)
+        chunk = self._chunks[chunk_index]
+
+        if len(chunk) + len(items) <= 2 * CHUNK_SIZE:
+            chunk[offset:offset] = items
+            self._length += len(items)
+            self._add_to_tree(chunk_index, len(items))
+            return
+
+        # The chunk would grow too large, so it's split again in chunks of
+        # the target size along with the items.
+        self._chunks[chunk_index : chunk_index + 1] = self._build_chunks(
+            chunk[:offset] + items + chunk[offset:]
+        )
+        self._length += len(items)
+        self._rebuild_tree()
+
+    def append(self, item: T) -> None:
+        """Add an item at the end of the queue.
+
+        Args:
+            item: The item to add.
+        """
+
+        self.insert_many(self._length, [item])
+
+    def pop(self, position: int = -1) -> T:
+        """Remove an item given its position.
+
+        Args:
+            position: The position of the item, the last one by default.
+
+        Raises:
+            IndexError: Raised if the position is out of the queue.
+
+        Returns:
+            The removed item.
+        """
+
+        chunk_index, offset = self._locate(self._normalize_position(position))
+        item = self._chunks[chunk_index].pop(offset)
+
+        self._length -= 1
+        self._add_to_tree(chunk_index, -1)
+        self._rebalance(chunk_index)
+
+        return item
+
+    def move(self, from_position: int, to_position: int) -> None:
+        """Move an item to another position, positions beyond the end of the
+        queue move it to the end.
+
+        Args:
+            from_position: The current position of the item.
+            to_position: The position of the item once moved.
+
+        Raises:
+            IndexError: Raised if the current position is out of the queue.
+        """
+
+        item = self.pop(from_position)
+        self.insert(to_position, item)
+
+    def drop_front(self, count: int) -> None:
+        """Remove the first items of the queue, whole chunks are dropped at once.
+
+        Args:
+            count: The number of items to remove.
+        """
+
+        count = min(max(0, count), self._length)
+
+        if count == 0:
+            return
+
+        if count == self._length:
+            self.clear()
+            return
+
+        chunk_index, offset = self._locate(count)
+        del self._chunks[:chunk_index]
+        del self._chunks[0][:offset]
+
+        self._length -= count
+        self._rebuild_tree()
+        self._rebalance(0)
+
+    def clear(self) -> None:
+        """Remove all the items of the queue."""
+
+        self._chunks = []
+        self._length = 0
+        self._rebuild_tree()
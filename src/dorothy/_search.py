@@ -0,0 +1,704 @@
+import heapq
+import itertools
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any, Iterable
+
+from ._jobs import Job
+from .models._album import Album, AlbumResourceId
+from .models._artist import Artist, ArtistResourceId
+from .models._library_diff import LibraryDiff
+from .models._node import NodeInstancePath
+from .models._provider import Provider
+from .models._resource_id import ResourceId
+from .models._song import Song, SongResourceId
+
+# Weight of a token given the field of the resource where it was found.
+TITLE_WEIGHT = 3.0
+ARTIST_WEIGHT = 2.0
+ALBUM_WEIGHT = 1.0
+
+# Extra score given to a query token that fully matches an indexed token
+# instead of being only a prefix of it.
+EXACT_MATCH_BONUS = 1.0
+
+# Extra score given to albums and artists over songs, as they group them.
+GROUP_BONUS = 0.5
+
+# Hard limit of resources checked by a search, for words that match most of
+# the library with the same score.
+MAX_CHECKED_DOCUMENTS = 10000
+
+# Length up to which the words of a query are answered from the best
+# resources of their prefix, kept apart as they match most of the library.
+SHORT_PREFIX_LENGTH = 2
+
+# Number of best resources kept for every short prefix.
+SHORT_PREFIX_TOP_SIZE = 500
+
+# Number of resources indexed between the checkpoints of the indexing job.
+INDEX_CHECKPOINT_INTERVAL = 1000
+
+TOKEN_REGEX = re.compile(r"\w+")
+
+
+def fold_text(text: str) -> str:
+    """Remove the case and the accents of a text so it can be compared.
+
+    Args:
+        text: The text to fold.
+
+    Returns:
+        The folded text.
+    """
+
+    if text.isascii():
+        return text.casefold()
+
+    decomposed_text = unicodedata.normalize("NFKD", text)
+
+    return "".join(
+        character
+        for character in decomposed_text
+        if not unicodedata.combining(character)
+    ).casefold()
+
+
+def tokenize(text: str) -> list[str]:
+    """Split a text in folded words.
+
+    Args:
+        text: The text to split.
+
+    Returns:
+        The folded words of the text.
+    """
+
+    return TOKEN_REGEX.findall(fold_text(text))
+
+
+@dataclass
+class SearchResult:
+    """Dataclass that holds a resource that matches a search query."""
+
+    resource_id: ResourceId
+    name: str | None
+    score: float
+
+    def dict(self) -> dict[str, Any]:
+        """Function that returns a dictionary representation of a search result."""
+
+        return {
+            "resource_id": str(self.resource_id),
+            "type": self.resource_id.resource_name(),
+            "name": self.name,
+            "score": self.score,
+        }
+
+
+@dataclass
+class SearchDocument:
+    """Dataclass that holds an indexed resource with the weight of its tokens."""
+
+    resource_id: ResourceId
+    name: str | None
+    tokens: dict[str, float] = field(default_factory=lambda: {})
+    bonus: float = field(default_factory=lambda: 0.0)
+
+
+class SearchIndex:
+    """In-memory search index over the titles, albums and artists of the
+    resources of the providers.
+
+    An inverted index maps every folded token to the resources that hold it,
+    grouped by the weight of the token in them, and a sorted list of all the
+    tokens resolves the prefixes of the query with a binary search. The
+    sorted list is only updated when it's searched, so indexing a whole
+    library sorts it once.
+
+    The best resources of the short prefixes, that match too many resources to
+    be checked on every keystroke, are gathered the first time they are
+    searched and then kept up to date as resources are added and removed.
+    """
+
+    def __init__(self) -> None:
+        """The search index constructor method."""
+
+        self._logger = getLogger(__name__)
+
+        self._documents: dict[str, SearchDocument] = {}
+        self._postings: dict[str, dict[float, set[str]]] = {}
+        self._sorted_tokens: list[str] = []
+        self._provider_documents: dict[str, set[str]] = {}
+
+        # Tokens added to the postings since the sorted tokens were updated,
+        # and whether any token has been removed from them since then.
+        self._added_tokens: set[str] = set()
+        self._tokens_removed = False
+
+        # The best scores and keys of the documents that match every searched
+        # short prefix, sorted from the worst one. A full list may be missing
+        # some documents, while a shorter one holds all of them.
+        self._prefix_tops: dict[str, list[tuple[float, str]]] = {}
+
+        # Held while reading or changing the index, as the providers notify
+        # their changes from their own threads.
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _build_document(self, resource: Song | Album | Artist) -> SearchDocument:
+        """Build the document of a resource with the weight of its tokens.
+
+        Args:
+            resource: The resource to index.
+
+        Returns:
+            The document of the resource.
+        """
+
+        fields: list[tuple[str | None, float]]
+
+        match resource:
+            case Song():
+                name = resource.title
+                fields = [
+                    (resource.title, TITLE_WEIGHT),
+                    (resource.artist_name, ARTIST_WEIGHT),
+                    (resource.album_artist_name, ARTIST_WEIGHT),
+                    (resource.album_name, ALBUM_WEIGHT),
+                ]
+                bonus = 0.0
+
+            case Album():
+                name = resource.title
+                fields = [(resource.title, TITLE_WEIGHT)]
+                bonus = GROUP_BONUS
+
+            case Artist():
+                name = resource.name
+                fields = [(resource.name, TITLE_WEIGHT)]
+                bonus = GROUP_BONUS
+
+        document = SearchDocument(resource.resource_id, name, bonus=bonus)
+
+        for text, weight in fields:
+            if text is None:
+                continue
+
+            for token in tokenize(text):
+                document.tokens[token] = max(document.tokens.get(token, 0.0), weight)
+
+        return document
+
+    def add(self, resource: Song | Album | Artist) -> None:
+        """Add or replace a resource in the index.
+
+        Args:
+            resource: The resource to index.
+        """
+
+        document = self._build_document(resource)
+        document_key = str(resource.resource_id)
+
+        with self._lock:
+            self._remove_document(document_key)
+
+            self._documents[document_key] = document
+            self._provider_documents.setdefault(
+                str(resource.resource_id.node_instance_path), set()
+            ).add(document_key)
+
+            for token, weight in document.tokens.items():
+                weight_postings = self._postings.get(token)
+
+                if weight_postings is None:
+                    weight_postings = {}
+                    self._postings[token] = weight_postings
+                    self._added_tokens.add(token)
+
+                weight_postings.setdefault(weight, set()).add(document_key)
+
+            for prefix in self._get_short_prefixes(document):
+                prefix_top = self._prefix_tops.get(prefix)
+                if prefix_top is None:
+                    continue
+
+                entry = (self._get_prefix_score(document, prefix), document_key)
+
+                if len(prefix_top) < SHORT_PREFIX_TOP_SIZE:
+                    insort(prefix_top, entry)
+                elif entry > prefix_top[0]:
+                    insort(prefix_top, entry)
+                    del prefix_top[0]
+
+    def _remove_document(self, document_key: str) -> None:
+        """Drop a document from the index, the lock must be already held.
+
+        Args:
+            document_key: The string representation of the resource id.
+        """
+
+        document = self._documents.pop(document_key, None)
+        if document is None:
+            return
+
+        self._provider_documents[str(document.resource_id.node_instance_path)].discard(
+            document_key
+        )
+
+        for token, weight in document.tokens.items():
+            weight_postings = self._postings[token]
+            postings = weight_postings[weight]
+            postings.discard(document_key)
+
+            if len(postings) == 0:
+                del weight_postings[weight]
+
+            if len(weight_postings) == 0:
+                del self._postings[token]
+                self._tokens_removed = True
+
+        for prefix in self._get_short_prefixes(document):
+            prefix_top = self._prefix_tops.get(prefix)
+            if prefix_top is None:
+                continue
+
+            entry = (self._get_prefix_score(document, prefix), document_key)
+            position = bisect_left(prefix_top, entry)
+
+            if position == len(prefix_top) or prefix_top[position] != entry:
+                continue
+
+            # A full list doesn't know the next best document, so it's
+            # gathered again the next time it's searched.
+            if len(prefix_top) == SHORT_PREFIX_TOP_SIZE:
+                del self._prefix_tops[prefix]
+            else:
+                del prefix_top[position]
+
+    @staticmethod
+    def _get_short_prefixes(document: SearchDocument) -> set[str]:
+        """Get the short prefixes of all the tokens of a document.
+
+        Args:
+            document: The document to check.
+
+        Returns:
+            The prefixes up to `SHORT_PREFIX_LENGTH` characters long.
+        """
+
+        return {
+            token[:length]
+            for token in document.tokens
+            for length in range(1, min(len(token), SHORT_PREFIX_LENGTH) + 1)
+        }
+
+    @staticmethod
+    def _get_prefix_score(document: SearchDocument, prefix: str) -> float:
+        """Score a document against a single word of a query.
+
+        Args:
+            document: The document to score.
+            prefix: The folded word, that must be the start of a token of
+                the document.
+
+        Returns:
+            The score of the document.
+        """
+
+        return document.bonus + max(
+            weight + (EXACT_MATCH_BONUS if token == prefix else 0.0)
+            for token, weight in document.tokens.items()
+            if token.startswith(prefix)
+        )
+
+    def remove(self, resource_id: ResourceId) -> None:
+        """Drop a resource from the index.
+
+        Args:
+            resource_id: The resource id of the resource to drop.
+        """
+
+        with self._lock:
+            self._remove_document(str(resource_id))
+
+    def add_provider(self, provider: Provider, job: Job | None = None) -> bool:
+        """Index all the songs, albums and artists of a provider.
+
+        Args:
+            provider: The provider to index.
+            job: Optional job that is indexing the provider, that gives way to
+                more urgent work and stops early if it's cancelled.
+
+        Returns:
+            True if the whole provider has been indexed and false if the job
+                has been cancelled.
+        """
+
+        resources: Iterable[Song | Album | Artist] = itertools.chain(
+            provider.iter_songs(), provider.iter_albums(), provider.iter_artists()
+        )
+
+        for index, resource in enumerate(resources):
+            if job is not None and index % INDEX_CHECKPOINT_INTERVAL == 0:
+                job.checkpoint()
+
+                if job.is_cancel_requested():
+                    self._logger.info(
+                        f'Stopped indexing provider "{provider.node_instance_path}"'
+                    )
+                    return False
+
+            self.add(resource)
+
+        # The first letter typed is the slowest word to search
+        with self._lock:
+            for first_letter in {token[0] for token in self._postings}:
+                self._get_prefix_top(first_letter)
+
+        self._logger.info(
+            f'Indexed provider "{provider.node_instance_path}" for searching'
+        )
+
+        return True
+
+    def remove_provider(self, node_instance_path: NodeInstancePath) -> None:
+        """Drop all the resources of a provider from the index.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+        """
+
+        with self._lock:
+            provider_documents = self._provider_documents.get(
+                str(node_instance_path), set()
+            )
+
+            for document_key in list(provider_documents):
+                self._remove_document(document_key)
+
+            self._provider_documents.pop(str(node_instance_path), None)
+
+    def apply_library_diff(self, provider: Provider, library_diff: LibraryDiff) -> None:
+        """Update the index with the changes of the library of a provider.
+
+        Args:
+            provider: The provider whose library has changed.
+            library_diff: The resources that have changed.
+        """
+
+        for resource_id in library_diff.removed:
+            self.remove(resource_id)
+
+        for resource_id in library_diff.added + library_diff.changed:
+            resource: Song | Album | Artist | None
+
+            match resource_id:
+                case SongResourceId():
+                    resource = provider.get_song(resource_id.unique_id)
+                case AlbumResourceId():
+                    resource = provider.get_album(resource_id.unique_id)
+                case ArtistResourceId():
+                    resource = provider.get_artist(resource_id.unique_id)
+                case _:
+                    continue
+
+            if resource is None:
+                self.remove(resource_id)
+                continue
+
+            self.add(resource)
+
+    def _update_sorted_tokens(self) -> None:
+        """Bring the sorted tokens up to date with the postings, the lock must
+        be already held.
+
+        The new tokens are sorted on their own and merged with the rest, so
+        it costs O(T + k log k) for k new tokens.
+        """
+
+        if not self._tokens_removed and len(self._added_tokens) == 0:
+            return
+
+        sorted_tokens = [
+            token
+            for token in self._sorted_tokens
+            if token in self._postings and token not in self._added_tokens
+        ]
+        sorted_tokens.extend(
+            sorted(token for token in self._added_tokens if token in self._postings)
+        )
+        # Both runs are already sorted, so this is a single merge
+        sorted_tokens.sort()
+
+        self._sorted_tokens = sorted_tokens
+        self._added_tokens.clear()
+        self._tokens_removed = False
+
+    def _get_prefix_range(self, prefix: str) -> tuple[int, int]:
+        """Get the range of the sorted tokens that start with a prefix.
+
+        Args:
+            prefix: The prefix to look for.
+
+        Returns:
+            The start and end indexes of the range.
+        """
+
+        start = bisect_left(self._sorted_tokens, prefix)
+        # Any token starting with the prefix sorts before this one
+        end = bisect_left(self._sorted_tokens, prefix + "\U0010ffff", start)
+
+        return start, end
+
+    def _get_prefix_levels(
+        self, prefix: str, start: int, end: int
+    ) -> list[tuple[float, set[str]]]:
+        """Get the documents that hold a token starting with a prefix, grouped
+        by the score that the prefix gets in them, from the best one.
+
+        Args:
+            prefix: The prefix to look for.
+            start: The start index of the range of tokens with the prefix.
+            end: The end index of the range of tokens with the prefix.
+
+        Returns:
+            The score of every group along with the keys of its documents, a
+                document may be in more than one group.
+        """
+
+        levels: list[tuple[float, set[str]]] = []
+
+        for index in range(start, end):
+            token = self._sorted_tokens[index]
+            exact_match_bonus = EXACT_MATCH_BONUS if token == prefix else 0.0
+
+            for weight, postings in self._postings[token].items():
+                levels.append((weight + exact_match_bonus, postings))
+
+        levels.sort(key=lambda level: level[0], reverse=True)
+
+        return levels
+
+    def _get_prefix_top(self, prefix: str) -> list[tuple[float, str]]:
+        """Get the best documents of a short prefix, gathering them if they
+        aren't known yet. The lock must be already held.
+
+        Args:
+            prefix: The short prefix to look for.
+
+        Returns:
+            The scores and keys of the best documents, sorted from the worst one.
+        """
+
+        prefix_top = self._prefix_tops.get(prefix)
+        if prefix_top is not None:
+            return prefix_top
+
+        self._update_sorted_tokens()
+        start, end = self._get_prefix_range(prefix)
+        scores: dict[str, float] = {}
+
+        # The levels go from the best one, so the first level of a document
+        # is its score without the bonus.
+        for level, postings in self._get_prefix_levels(prefix, start, end):
+            for document_key in postings:
+                if document_key not in scores:
+                    scores[document_key] = level + self._documents[document_key].bonus
+
+        prefix_top = heapq.nlargest(
+            SHORT_PREFIX_TOP_SIZE,
+            ((score, document_key) for document_key, score in scores.items()),
+        )
+        prefix_top.reverse()
+        self._prefix_tops[prefix] = prefix_top
+
+        return prefix_top
+
+    def _search_short_prefixes(
+        self, query_tokens: list[str], limit: int
+    ) -> list[tuple[float, str]]:
+        """Find the best documents for a query made of short words, checking
+        only the best documents of every word. The lock must be already held.
+
+        The results of a single word are exact, while the ones of more words
+        are the best among the documents that are best for one of them, so
+        there may be fewer than the limit.
+
+        Args:
+            query_tokens: The folded words of the query, none longer than
+                `SHORT_PREFIX_LENGTH`.
+            limit: The maximum number of results.
+
+        Returns:
+            The scores and keys of the best documents, sorted from the best one.
+        """
+
+        if len(query_tokens) == 1:
+            return self._get_prefix_top(query_tokens[0])[: -limit - 1 : -1]
+
+        candidates = {
+            document_key
+            for query_token in query_tokens
+            for _, document_key in self._get_prefix_top(query_token)
+        }
+
+        scored_documents: list[tuple[float, str]] = []
+        for document_key in candidates:
+            score = self._score_document(self._documents[document_key], query_tokens)
+
+            if score is not None:
+                scored_documents.append((score, document_key))
+
+        return heapq.nlargest(limit, scored_documents)
+
+    def _score_document(
+        self, document: SearchDocument, query_tokens: list[str]
+    ) -> float | None:
+        """Score a document against all the words of a query.
+
+        Args:
+            document: The document to score.
+            query_tokens: The folded words of the query.
+
+        Returns:
+            The score of the document or `None` if a word doesn't match it.
+        """
+
+        score = document.bonus
+
+        for query_token in query_tokens:
+            token_score = 0.0
+
+            for token, weight in document.tokens.items():
+                if not token.startswith(query_token):
+                    continue
+
+                if token == query_token:
+                    weight += EXACT_MATCH_BONUS
+
+                token_score = max(token_score, weight)
+
+            if token_score == 0.0:
+                return None
+
+            score += token_score
+
+        return score
+
+    def search(self, query: str, limit: int = 20) -> list[SearchResult]:
+        """Find the resources that match all the words of a query, every word
+        can be just the start of an indexed word.
+
+        The resources are checked from the best score that the first word can
+        get in them down, and the search stops once no unchecked resource
+        could score above the results already found. Words that match most of
+        the library with the same score stop after `MAX_CHECKED_DOCUMENTS`
+        resources, and queries made only of short words are answered from the
+        best resources of each word.
+
+        Args:
+            query: The text to look for.
+            limit: The maximum number of results.
+
+        Returns:
+            The best matching resources sorted by their score.
+        """
+
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if len(query_tokens) == 0 or limit <= 0:
+            return []
+
+        with self._lock:
+            self._update_sorted_tokens()
+
+            if limit <= SHORT_PREFIX_TOP_SIZE and all(
+                len(query_token) <= SHORT_PREFIX_LENGTH for query_token in query_tokens
+            ):
+                scored_documents = self._search_short_prefixes(query_tokens, limit)
+
+                # Words that are rarely found together are searched in full
+                if len(query_tokens) == 1 or len(scored_documents) == limit:
+                    return self._build_results(scored_documents)
+
+            prefix_ranges = {
+                query_token: self._get_prefix_range(query_token)
+                for query_token in query_tokens
+            }
+
+            # The candidates are gathered from the word that matches the
+            # fewest tokens and then checked against the rest of them.
+            query_tokens.sort(
+                key=lambda query_token: (
+                    prefix_ranges[query_token][1] - prefix_ranges[query_token][0]
+                )
+            )
+
+            start, end = prefix_ranges[query_tokens[0]]
+            if start == end:
+                return []
+
+            # The most that the rest of the words and the bonus can add
+            other_tokens_bound = (len(query_tokens) - 1) * (
+                TITLE_WEIGHT + EXACT_MATCH_BONUS
+            ) + GROUP_BONUS
+
+            checked_documents: set[str] = set()
+            # Min heap with the best documents found so far
+            best_documents: list[tuple[float, str]] = []
+
+            for level, postings in self._get_prefix_levels(query_tokens[0], start, end):
+                if (
+                    len(best_documents) >= limit
+                    and best_documents[0][0] >= level + other_tokens_bound
+                ) or len(checked_documents) >= MAX_CHECKED_DOCUMENTS:
+                    break
+
+                for document_key in postings:
+                    if document_key in checked_documents:
+                        continue
+
+                    if len(checked_documents) >= MAX_CHECKED_DOCUMENTS:
+                        break
+
+                    checked_documents.add(document_key)
+
+                    score = self._score_document(
+                        self._documents[document_key], query_tokens
+                    )
+                    if score is None:
+                        continue
+
+                    if len(best_documents) < limit:
+                        heapq.heappush(best_documents, (score, document_key))
+                    elif (score, document_key) > best_documents[0]:
+                        heapq.heapreplace(best_documents, (score, document_key))
+
+            return self._build_results(sorted(best_documents, reverse=True))
+
+    def _build_results(
+        self, scored_documents: list[tuple[float, str]]
+    ) -> list[SearchResult]:
+        """Build the results of a search, the lock must be already held.
+
+        Args:
+            scored_documents: The scores and keys of the found documents.
+
+        Returns:
+            The search results in the same order.
+        """
+
+        return [
+            SearchResult(
+                self._documents[document_key].resource_id,
+                self._documents[document_key].name,
+                score,
+            )
+            for score, document_key in scored_documents
+        ]
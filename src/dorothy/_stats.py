@@ -0,0 +1,327 @@
+import itertools
+import threading
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any, Iterable
+
+from ._jobs import Job
+from .models._album import Album, AlbumResourceId
+from .models._artist import Artist, ArtistResourceId
+from .models._library_diff import LibraryDiff
+from .models._node import NodeInstancePath
+from .models._provider import Provider
+from .models._resource_id import ResourceId
+from .models._song import Song, SongResourceId
+
+# Number of resources counted between the checkpoints of the indexing job.
+COUNT_CHECKPOINT_INTERVAL = 1000
+
+
+@dataclass
+class AlbumStats:
+    """Dataclass that holds the totals of an album."""
+
+    resource_id: AlbumResourceId
+    title: str | None
+    track_count: int | None = field(default_factory=lambda: None)
+    duration: float | None = field(default_factory=lambda: None)
+
+    def dict(self) -> dict[str, Any]:
+        """Function that returns a dictionary representation of the album stats."""
+
+        return {
+            "resource_id": str(self.resource_id),
+            "title": self.title,
+            "track_count": self.track_count,
+            "duration": self.duration,
+        }
+
+
+@dataclass
+class ProviderStats:
+    """Dataclass that holds the totals of the library of a provider."""
+
+    node_instance_path: NodeInstancePath
+    songs: int = field(default_factory=lambda: 0)
+    albums: int = field(default_factory=lambda: 0)
+    artists: int = field(default_factory=lambda: 0)
+    duration: float = field(default_factory=lambda: 0.0)
+
+    def dict(self) -> dict[str, Any]:
+        """Function that returns a dictionary representation of the provider
+        stats."""
+
+        return {
+            "node_instance_path": str(self.node_instance_path),
+            "songs": self.songs,
+            "albums": self.albums,
+            "artists": self.artists,
+            "duration": self.duration,
+        }
+
+
+@dataclass
+class LibraryStats:
+    """Dataclass that holds the totals of the libraries of all the providers."""
+
+    songs: int = field(default_factory=lambda: 0)
+    albums: int = field(default_factory=lambda: 0)
+    artists: int = field(default_factory=lambda: 0)
+    duration: float = field(default_factory=lambda: 0.0)
+    providers: list[ProviderStats] = field(default_factory=lambda: [])
+
+    def dict(self) -> dict[str, Any]:
+        """Function that returns a dictionary representation of the library
+        stats."""
+
+        return {
+            "songs": self.songs,
+            "albums": self.albums,
+            "artists": self.artists,
+            "duration": self.duration,
+            "providers": [provider_stats.dict() for provider_stats in self.providers],
+        }
+
+
+class LibraryStatsTracker:
+    """Running totals of the libraries of the providers.
+
+    The contribution of every resource is remembered, so the totals are
+    updated with the changes of the libraries instead of being computed
+    again and reading them doesn't depend on the size of the libraries.
+    """
+
+    def __init__(self) -> None:
+        """The library stats tracker constructor method."""
+
+        self._logger = getLogger(__name__)
+
+        self._song_durations: dict[SongResourceId, float] = {}
+        self._albums: dict[AlbumResourceId, AlbumStats] = {}
+        self._artists: set[ArtistResourceId] = set()
+        self._providers: dict[NodeInstancePath, ProviderStats] = {}
+        self._totals = LibraryStats()
+
+        # Held while reading or changing the totals, as the providers notify
+        # their changes from their own threads.
+        self._lock = threading.Lock()
+
+    def _get_provider_stats(
+        self, node_instance_path: NodeInstancePath
+    ) -> ProviderStats:
+        """Get the totals of a provider, the lock must be already held.
+
+        Args:
+            node_instance_path: The route to the node instance of the provider.
+
+        Returns:
+            The totals of the provider, empty ones if it wasn't tracked.
+        """
+
+        provider_stats = self._providers.get(node_instance_path)
+
+        if provider_stats is None:
+            provider_stats = ProviderStats(node_instance_path)
+            self._providers[node_instance_path] = provider_stats
+
+        return provider_stats
+
+    def _remove_resource(self, resource_id: ResourceId) -> None:
+        """Drop the contribution of a resource to the totals, the lock must be
+        already held.
+
+        Args:
+            resource_id: The resource id of the resource.
+        """
+
+        provider_stats = self._get_provider_stats(resource_id.node_instance_path)
+
+        match resource_id:
+            case SongResourceId():
+                duration = self._song_durations.pop(resource_id, None)
+                if duration is None:
+                    return
+
+                provider_stats.songs -= 1
+                provider_stats.duration -= duration
+                self._totals.songs -= 1
+                self._totals.duration -= duration
+
+            case AlbumResourceId():
+                if self._albums.pop(resource_id, None) is None:
+                    return
+
+                provider_stats.albums -= 1
+                self._totals.albums -= 1
+
+            case ArtistResourceId():
+                if resource_id not in self._artists:
+                    return
+
+                self._artists.discard(resource_id)
+                provider_stats.artists -= 1
+                self._totals.artists -= 1
+
+    def add(self, resource: Song | Album | Artist) -> None:
+        """Add or replace the contribution of a resource to the totals.
+
+        Args:
+            resource: The resource to count.
+        """
+
+        with self._lock:
+            self._remove_resource(resource.resource_id)
+            provider_stats = self._get_provider_stats(
+                resource.resource_id.node_instance_path
+            )
+
+            match resource:
+                case Song():
+                    self._song_durations[resource.resource_id] = resource.duration
+                    provider_stats.songs += 1
+                    provider_stats.duration += resource.duration
+                    self._totals.songs += 1
+                    self._totals.duration += resource.duration
+
+                case Album():
+                    album_stats = AlbumStats(resource.resource_id, resource.title)
+
+                    if resource.songs is not None:
+                        album_stats.track_count = len(resource.songs)
+                        album_stats.duration = sum(
+                            song.duration for song in resource.songs
+                        )
+
+                    self._albums[resource.resource_id] = album_stats
+                    provider_stats.albums += 1
+                    self._totals.albums += 1
+
+                case Artist():
+                    self._artists.add(resource.resource_id)
+                    provider_stats.artists += 1
+                    self._totals.artists += 1
+
+    def remove(self, resource_id: ResourceId) -> None:
+        """Drop the contribution of a resource to the totals.
+
+        Args:
+            resource_id: The resource id of the resource to drop.
+        """
+
+        with self._lock:
+            self._remove_resource(resource_id)
+
+    def add_provider(self, provider: Provider, job: Job | None = None) -> bool:
+        """Count all the songs, albums and artists of a provider.
+
+        Args:
+            provider: The provider to count.
+            job: Optional job that is counting the provider, that gives way to
+                more urgent work and stops early if it's cancelled.
+
+        Returns:
+            True if the whole provider has been counted and false if the job
+                has been cancelled.
+        """
+
+        resources: Iterable[Song | Album | Artist] = itertools.chain(
+            provider.iter_songs(), provider.iter_albums(), provider.iter_artists()
+        )
+
+        for index, resource in enumerate(resources):
+            if job is not None and index % COUNT_CHECKPOINT_INTERVAL == 0:
+                job.checkpoint()
+
+                if job.is_cancel_requested():
+                    self._logger.info(
+                        "Stopped counting the library of provider "
+                        + f'"{provider.node_instance_path}"'
+                    )
+                    return False
+
+            self.add(resource)
+
+        self._logger.info(
+            f'Counted the library of provider "{provider.node_instance_path}"'
+        )
+
+        return True
+
+    def apply_library_diff(self, provider: Provider, library_diff: LibraryDiff) -> None:
+        """Update the totals with the changes of the library of a provider.
+
+        Args:
+            provider: The provider whose library has changed.
+            library_diff: The resources that have changed.
+        """
+
+        for resource_id in library_diff.removed:
+            self.remove(resource_id)
+
+        for resource_id in library_diff.added + library_diff.changed:
+            resource: Song | Album | Artist | None
+
+            match resource_id:
+                case SongResourceId():
+                    resource = provider.get_song(resource_id.unique_id)
+                case AlbumResourceId():
+                    resource = provider.get_album(resource_id.unique_id)
+                case ArtistResourceId():
+                    resource = provider.get_artist(resource_id.unique_id)
+                case _:
+                    continue
+
+            if resource is None:
+                self.remove(resource_id)
+                continue
+
+            self.add(resource)
+
+    def get_stats(self) -> LibraryStats:
+        """Get the totals of all the libraries.
+
+        Returns:
+            A copy of the current totals, along with the totals of every
+                provider.
+        """
+
+        with self._lock:
+            return LibraryStats(
+                self._totals.songs,
+                self._totals.albums,
+                self._totals.artists,
+                self._totals.duration,
+                [
+                    ProviderStats(
+                        provider_stats.node_instance_path,
+                        provider_stats.songs,
+                        provider_stats.albums,
+                        provider_stats.artists,
+                        provider_stats.duration,
+                    )
+                    for provider_stats in self._providers.values()
+                ],
+            )
+
+    def get_album_stats(self, album_resource_id: AlbumResourceId) -> AlbumStats | None:
+        """Get the totals of an album.
+
+        Args:
+            album_resource_id: The resource id of the album.
+
+        Returns:
+            A copy of the totals of the album or `None` if it isn't tracked.
+        """
+
+        with self._lock:
+            album_stats = self._albums.get(album_resource_id)
+
+            if album_stats is None:
+                return None
+
+            return AlbumStats(
+                album_stats.resource_id,
+                album_stats.title,
+                album_stats.track_count,
+                album_stats.duration,
+            )
@@ -4,3 +4,11 @@ class NodeFailureException(Exception):
     """
 
     pass
+
+
+class ProviderUnavailableException(NodeFailureException):
+    """Exception raised by the orchestrator when a provider is skipped as
+    its circuit is open after failing too many times
+    """
+
+    pass
@@ -0,0 +1,27 @@
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+from ._node import NodeInstancePath
+
+T = TypeVar("T")
+
+
+@dataclass
+class AggregateResult(Generic[T]):
+    """Dataclass that holds the resources gathered from several providers,
+    along with the providers that didn't answer in time or were skipped as
+    unavailable."""
+
+    resources: list[T] = field(default_factory=lambda: [])
+    timed_out: list[NodeInstancePath] = field(default_factory=lambda: [])
+    unavailable: list[NodeInstancePath] = field(default_factory=lambda: [])
+
+    def is_partial(self) -> bool:
+        """Check if any provider is missing from the result.
+
+        Returns:
+            True if some provider has timed out or was unavailable and
+                false otherwise.
+        """
+
+        return len(self.timed_out) > 0 or len(self.unavailable) > 0
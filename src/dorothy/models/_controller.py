@@ -34,6 +34,7 @@ class Controller(Node, ABC):
         super().__init__(config, node_instance_path)
 
         self.orchestrator = orchestrator
+        self.jobs = orchestrator.jobs
 
     async def cleanup(self) -> None | str:
         """An overrideable function that is run when the application is shutting down,
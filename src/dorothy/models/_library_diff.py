@@ -0,0 +1,37 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+from ._node import NodeInstancePath
+from ._resource_id import ResourceId
+
+
+@dataclass
+class LibraryDiff:
+    """Dataclass that holds the resources that have changed in the library
+    of a provider."""
+
+    node_instance_path: NodeInstancePath
+    added: list[ResourceId] = field(default_factory=lambda: [])
+    removed: list[ResourceId] = field(default_factory=lambda: [])
+    changed: list[ResourceId] = field(default_factory=lambda: [])
+
+    def is_empty(self) -> bool:
+        """Check if the diff doesn't hold any change.
+
+        Returns:
+            True if there aren't changes and false otherwise.
+        """
+
+        return (
+            len(self.added) == 0 and len(self.removed) == 0 and len(self.changed) == 0
+        )
+
+    def dict(self) -> dict[str, Any]:
+        """Function that returns a dictionary representation of a library diff."""
+
+        return {
+            "node_instance_path": str(self.node_instance_path),
+            "added": [str(resource_id) for resource_id in self.added],
+            "removed": [str(resource_id) for resource_id in self.removed],
+            "changed": [str(resource_id) for resource_id in self.changed],
+        }
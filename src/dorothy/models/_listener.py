@@ -29,6 +29,11 @@ class Listener(Node, ABC):
 
         super().__init__(config, node_instance_path)
 
+        # Gapless listeners are told the next song in advance and change to it
+        # on their own, notifying it with `notify_song_started`.
+        self.gapless = False
+        self._song_start_listeners: list[Callable[[Song], None]] = []
+
     @staticmethod
     @override
     def extra_node_default_configs() -> dict[str, Any]:
@@ -44,6 +49,40 @@ class Listener(Node, ABC):
 
         return None
 
+    def add_song_start_listener(self, listener: Callable[[Song], None]) -> None:
+        """Register a function to be called every time the listener starts
+        a song on its own.
+
+        Args:
+            listener: The function to call with the started song.
+        """
+
+        self._song_start_listeners.append(listener)
+
+    def notify_song_started(self, song: Song) -> None:
+        """Inform all the registered listeners that a song has started, should
+        be called by the gapless listeners once they change to the next song.
+
+        It can be called from any thread.
+
+        Args:
+            song: The song that has started.
+        """
+
+        for listener in self._song_start_listeners:
+            listener(song)
+
+    def set_next_song(self, song: Song | None) -> None:
+        """An overrideable function that tells a gapless listener the song
+        that follows the current one, so it can be prepared in advance.
+
+        Args:
+            song: The next song or `None` if the playback ends after the
+                current one.
+        """
+
+        return None
+
     @abstractmethod
     def play(self, song: Song) -> None:
         """Start playing the current song.
@@ -1,24 +1,32 @@
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass, field, fields
+from functools import cached_property
 from ..exceptions import NodeFailureException
-from typing import Any, TypeVar, Type
+from .._jobs import Job, JobManager, JobPriorities
+from typing import Any, Callable, TypeVar, Type
 from abc import ABC, abstractmethod
 from logging import getLogger
 
-from ._resource_id import ResourceId
-from ._album import Album
-from ._artist import Artist
-from ._song import Song
 
-
-@dataclass
+@dataclass(frozen=True)
 class NodeInstancePath:
-    """A class that represent the unique path of a node."""
+    """A class that represent the unique path of a node.
+
+    It's immutable and hashable so it can be used to route to the nodes, and
+    its strings are interned as the same paths are shared by every resource.
+    """
 
     plugin_name: str = field(default_factory=lambda: "")
     node_type: str = field(default_factory=lambda: "")
     node_name: str = field(default_factory=lambda: "")
     instance_name: str = field(default_factory=lambda: "")
 
+    def __post_init__(self) -> None:
+        for path_field in fields(self):
+            object.__setattr__(
+                self, path_field.name, sys.intern(getattr(self, path_field.name))
+            )
+
     @staticmethod
     def _sanitize(string: str) -> str:
         """Escapes any conflict character from the given string.
@@ -39,6 +47,13 @@ class NodeInstancePath:
             The string representation of the node instance path.
         """
 
+        return self._serialized
+
+    @cached_property
+    def _serialized(self) -> str:
+        """The string representation of the node instance path, it's only
+        built once as it's used to serialize every resource id."""
+
         return (
             f"{self._sanitize(self.plugin_name)}"
             + f">{self._sanitize(self.node_type)}"
@@ -74,6 +89,9 @@ class Node(ABC):
         self.node_instance_path = node_instance_path
         self._logger = getLogger(str(self.node_instance_path))
 
+        # The scheduler of Dorothy, attached once the node is loaded
+        self.jobs: JobManager | None = None
+
     @staticmethod
     @abstractmethod
     def get_node_manifest() -> NodeManifest:
@@ -96,6 +114,39 @@ class Node(ABC):
 
         return {}
 
+    def submit_job(
+        self,
+        name: str,
+        function: Callable[[Job], Any],
+        priority: JobPriorities = JobPriorities.BACKGROUND,
+    ) -> Job:
+        """Run a function as a job in the scheduler of Dorothy, long running
+        jobs should call `Job.checkpoint` regularly to give way to the
+        interactive requests.
+
+        Args:
+            name: A human readable name of the job.
+            function: The function to run, it receives its own job to report
+                its progress.
+            priority: The priority class of the job.
+
+        Raises:
+            RuntimeError: Raised if the node hasn't been attached to the
+                scheduler yet.
+
+        Returns:
+            The job that has been submitted.
+        """
+
+        if self.jobs is None:
+            raise RuntimeError(
+                f'Node "{self.node_instance_path}" isn\'t attached to a scheduler'
+            )
+
+        return self.jobs.submit(
+            f"{self.node_instance_path}: {name}", function, priority
+        )
+
     def raise_failure_node_exception(
         self, message: str, exception: type[NodeFailureException] = NodeFailureException
     ) -> None:
@@ -115,7 +166,7 @@ class Node(ABC):
             + f' "{exception.__name__}" exception with '
             + f"the message: {message}"
         )
-        raise exception()
+        raise exception(message)
 
 
 NODE_SUBCLASS = TypeVar("NODE_SUBCLASS", bound=Node)
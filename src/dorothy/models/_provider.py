@@ -1,5 +1,18 @@
+import asyncio
+import heapq
+import itertools
+from bisect import bisect_right
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Type, TypeVar, Callable
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Type,
+    TypeVar,
+    Callable,
+    Iterator,
+)
 from typing_extensions import override
 from logging import getLogger
 
@@ -8,10 +21,57 @@ from ..exceptions import NodeFailureException
 if TYPE_CHECKING:
     from .._orchestrator import Orchestrator
 
+from .._jobs import Job
 from ._node import NodeInstancePath, Node
 from ._song import Song
 from ._album import Album
 from ._artist import Artist
+from ._library_diff import LibraryDiff
+from ._resource_id import ResourceId
+
+RESOURCE = TypeVar("RESOURCE", Song, Album, Artist)
+T = TypeVar("T")
+
+# Number of resources pulled at once from a blocking iterator by the
+# asynchronous adapters.
+ASYNC_ITERATOR_CHUNK_SIZE = 256
+
+# Seconds a provider has to answer an aggregate query before being skipped.
+DEFAULT_DEADLINE = 10.0
+
+# Seconds the resolved resources are cached, zero caches them until the
+# provider invalidates them.
+DEFAULT_CACHE_TIME_TO_LIVE = 0.0
+
+
+async def iterate_in_thread(
+    get_iterator: Callable[[], Iterator[RESOURCE]],
+    run_in_thread: Callable[..., Awaitable[Any]] = asyncio.to_thread,
+) -> AsyncIterator[RESOURCE]:
+    """Iterate asynchronously over a blocking iterator, the iterator is advanced
+    in chunks in a worker thread so the event loop is never blocked.
+
+    Args:
+        get_iterator: Function that returns the blocking iterator.
+        run_in_thread: Coroutine function used to run the blocking calls in
+            a worker thread.
+
+    Yields:
+        The items of the iterator.
+    """
+
+    iterator = await run_in_thread(get_iterator)
+
+    while True:
+        chunk = await run_in_thread(
+            list, itertools.islice(iterator, ASYNC_ITERATOR_CHUNK_SIZE)
+        )
+
+        if len(chunk) == 0:
+            return
+
+        for item in chunk:
+            yield item
 
 
 class Provider(Node, ABC):
@@ -33,6 +93,193 @@ class Provider(Node, ABC):
 
         super().__init__(config, node_instance_path)
 
+        self._library_listeners: list[Callable[[LibraryDiff], None]] = []
+        self._invalidation_listeners: list[
+            Callable[[list[ResourceId] | None], None]
+        ] = []
+
+        self.deadline = float(self.config.get("deadline", DEFAULT_DEADLINE))
+
+        cache_time_to_live = float(
+            self.config.get("cache_time_to_live", DEFAULT_CACHE_TIME_TO_LIVE)
+        )
+        self.cache_time_to_live = cache_time_to_live if cache_time_to_live > 0 else None
+
+        # Bumped every time the library changes, used to invalidate the
+        # aggregates of resources cached by the orchestrator.
+        self.library_generation = 0
+
+        # Set by the providers that call `notify_library_changes` every time
+        # their library changes, as otherwise the library generation never
+        # changes and nothing can be cached by it.
+        self.notifies_library_changes = False
+
+        # The resources sorted by their unique ids used to serve pages, tagged
+        # with the library generation they were sorted in.
+        self._sorted_resources: dict[str, tuple[int, list[str], list[Any]]] = {}
+
+    @staticmethod
+    @override
+    def extra_node_default_configs() -> dict[str, Any]:
+        return {
+            "deadline": DEFAULT_DEADLINE,
+            "cache_time_to_live": DEFAULT_CACHE_TIME_TO_LIVE,
+        }
+
+    async def run_in_thread(self, function: Callable[..., T], *args: Any) -> T:
+        """Run a blocking function in a worker thread without blocking the
+        event loop, using the interactive pool of the scheduler once the
+        provider is attached to it.
+
+        Args:
+            function: The function to run.
+            args: The arguments to call the function with.
+
+        Returns:
+            The value returned by the function.
+        """
+
+        if self.jobs is None:
+            return await asyncio.to_thread(function, *args)
+
+        return await self.jobs.run_interactive(function, *args)
+
+    def add_library_listener(self, listener: Callable[[LibraryDiff], None]) -> None:
+        """Register a function to be called every time the library of the
+        provider changes.
+
+        Args:
+            listener: The function to call with the diff of every change.
+        """
+
+        self._library_listeners.append(listener)
+
+    def notify_library_changes(self, library_diff: LibraryDiff) -> None:
+        """Inform all the registered listeners that the library has changed,
+        should be called by the providers whose content can change after
+        their instantiation.
+
+        It also bumps the library generation of the provider, so the cached
+        aggregates of its resources are built again.
+
+        Args:
+            library_diff: The resources that have changed.
+        """
+
+        if library_diff.is_empty():
+            return
+
+        self.library_generation += 1
+
+        for listener in self._library_listeners:
+            listener(library_diff)
+
+    def _get_sorted_page(
+        self,
+        resource_type: str,
+        get_all_resources: Callable[[], list[RESOURCE]],
+        after_unique_id: str | None,
+        limit: int,
+    ) -> list[RESOURCE]:
+        """Get a page of resources sorted by their unique ids, the sorted
+        resources are kept until the library generation changes.
+
+        Providers that don't notify their changes get all their resources
+        again for every page and only the page is sorted.
+
+        Args:
+            resource_type: The type of the resources.
+            get_all_resources: Function that returns all the resources.
+            after_unique_id: The unique id of the last resource of the previous
+                page, or `None` to start from the beginning.
+            limit: The maximum number of resources of the page.
+
+        Returns:
+            The resources that follow the given unique id.
+        """
+
+        if not self.notifies_library_changes:
+            return heapq.nsmallest(
+                limit,
+                (
+                    resource
+                    for resource in get_all_resources()
+                    if after_unique_id is None
+                    or resource.resource_id.unique_id > after_unique_id
+                ),
+                key=lambda resource: resource.resource_id.unique_id,
+            )
+
+        sorted_resources = self._sorted_resources.get(resource_type)
+
+        if sorted_resources is None or sorted_resources[0] != self.library_generation:
+            library_generation = self.library_generation
+            resources = sorted(
+                get_all_resources(), key=lambda resource: resource.resource_id.unique_id
+            )
+
+            sorted_resources = (
+                library_generation,
+                [resource.resource_id.unique_id for resource in resources],
+                resources,
+            )
+            self._sorted_resources[resource_type] = sorted_resources
+
+        _, unique_ids, all_resources = sorted_resources
+        start = bisect_right(unique_ids, after_unique_id) if after_unique_id else 0
+
+        return all_resources[start : start + limit]
+
+    def add_invalidation_listener(
+        self, listener: Callable[[list[ResourceId] | None], None]
+    ) -> None:
+        """Register a function to be called every time the provider reports
+        some of its resources as outdated.
+
+        Args:
+            listener: The function to call with the outdated resource ids, or
+                `None` if all the resources are outdated.
+        """
+
+        self._invalidation_listeners.append(listener)
+
+    def invalidate_cached_resources(
+        self, resource_ids: list[ResourceId] | None = None
+    ) -> None:
+        """Report that some resources have changed so they are resolved again
+        instead of being served from the caches, the resources included in
+        the diffs of `notify_library_changes` are already invalidated.
+
+        Args:
+            resource_ids: The outdated resource ids, or `None` if all the
+                resources of the provider are outdated.
+        """
+
+        for listener in self._invalidation_listeners:
+            listener(resource_ids)
+
+    def refresh(
+        self,
+        progress: Callable[[int, int], None] | None = None,
+        job: Job | None = None,
+    ) -> LibraryDiff | None:
+        """An overrideable function that looks for changes in the source of
+        the provider and updates its library with them.
+
+        Args:
+            progress: Optional function called with the number of processed
+                items and the expected total while refreshing.
+            job: Optional job that is running the refresh, long refreshes
+                should call `Job.checkpoint` regularly and stop early if
+                it's cancelled.
+
+        Returns:
+            The resources that have changed or None if the provider
+                doesn't support refreshing.
+        """
+
+        return None
+
     def cleanup(self) -> None | str:
         """An overrideable function that is run when the application is shutting down,
         should return None when the cleanup is successful or an error in a string to notify the user of the incidence.
@@ -66,6 +313,136 @@ class Provider(Node, ABC):
 
         ...
 
+    def iter_songs(self) -> Iterator[Song]:
+        """An overrideable function that iterates lazily over all the songs
+        available by the provider.
+
+        By default it adapts `get_all_songs`, providers that can produce
+        their songs on demand should override it.
+
+        Returns:
+            An iterator over the available songs.
+        """
+
+        return iter(self.get_all_songs())
+
+    async def async_get_song(self, unique_song_id: str) -> Song | None:
+        """An overrideable coroutine that gets a song by its unique id.
+
+        By default it runs `get_song` in a worker thread, providers that can
+        do their I/O asynchronously should override it.
+
+        Args:
+            unique_song_id: The given unique id.
+
+        Returns:
+            An object of the requested song.
+        """
+
+        return await self.run_in_thread(self.get_song, unique_song_id)
+
+    def get_songs_batch(self, unique_songs_ids: list[str]) -> list[Song | None]:
+        """An overrideable function that gets several songs by their unique ids
+        at once.
+
+        By default it calls `get_song` for every song, providers that can
+        resolve many songs at once more efficiently should override it.
+
+        Args:
+            unique_songs_ids: The given unique ids.
+
+        Returns:
+            The requested songs in the same order as their ids, with `None`
+                in place of the songs that weren't found.
+        """
+
+        return [self.get_song(unique_song_id) for unique_song_id in unique_songs_ids]
+
+    async def async_get_songs_batch(
+        self, unique_songs_ids: list[str]
+    ) -> list[Song | None]:
+        """An overrideable coroutine that gets several songs by their unique ids
+        at once.
+
+        By default it runs `get_songs_batch` in a worker thread.
+
+        Args:
+            unique_songs_ids: The given unique ids.
+
+        Returns:
+            The requested songs in the same order as their ids, with `None`
+                in place of the songs that weren't found.
+        """
+
+        return await self.run_in_thread(self.get_songs_batch, unique_songs_ids)
+
+    def get_songs_page(
+        self, after_unique_song_id: str | None, limit: int
+    ) -> list[Song]:
+        """An overrideable function that gets a page of the songs available by
+        the provider, sorted by their unique ids.
+
+        By default it sorts the result of `get_all_songs` once per library
+        generation, so providers that notify their changes are paged efficiently.
+
+        Args:
+            after_unique_song_id: The unique id of the last song of the previous
+                page, or `None` to start from the beginning.
+            limit: The maximum number of songs of the page.
+
+        Returns:
+            The songs whose unique ids follow the given one, sorted by them.
+        """
+
+        return self._get_sorted_page(
+            "songs", self.get_all_songs, after_unique_song_id, limit
+        )
+
+    async def async_get_songs_page(
+        self, after_unique_song_id: str | None, limit: int
+    ) -> list[Song]:
+        """An overrideable coroutine that gets a page of the songs available by
+        the provider, sorted by their unique ids.
+
+        By default it runs `get_songs_page` in a worker thread.
+
+        Args:
+            after_unique_song_id: The unique id of the last song of the previous
+                page, or `None` to start from the beginning.
+            limit: The maximum number of songs of the page.
+
+        Returns:
+            The songs whose unique ids follow the given one, sorted by them.
+        """
+
+        return await self.run_in_thread(
+            self.get_songs_page, after_unique_song_id, limit
+        )
+
+    async def async_get_all_songs(self) -> list[Song]:
+        """An overrideable coroutine that returns a list of all the songs
+        available by the provider.
+
+        By default it runs `get_all_songs` in a worker thread.
+
+        Returns:
+            The list of available songs.
+        """
+
+        return await self.run_in_thread(self.get_all_songs)
+
+    def async_iter_songs(self) -> AsyncIterator[Song]:
+        """An overrideable function that iterates asynchronously over all the
+        songs available by the provider.
+
+        By default it advances `iter_songs` in chunks in a worker thread.
+
+        Returns:
+            An asynchronous iterator over the available songs.
+        """
+
+        return iterate_in_thread(self.iter_songs, self.run_in_thread)
+
     @abstractmethod
     def get_album(self, unique_album_id: str) -> Album | None:
         """Gets an album by its unique id.
@@ -89,6 +466,101 @@ class Provider(Node, ABC):
 
         ...
 
+    def iter_albums(self) -> Iterator[Album]:
+        """An overrideable function that iterates lazily over all the albums
+        available by the provider.
+
+        By default it adapts `get_all_albums`, providers that can produce
+        their albums on demand should override it.
+
+        Returns:
+            An iterator over the available albums.
+        """
+
+        return iter(self.get_all_albums())
+
+    async def async_get_album(self, unique_album_id: str) -> Album | None:
+        """An overrideable coroutine that gets an album by its unique id.
+
+        By default it runs `get_album` in a worker thread, providers that can
+        do their I/O asynchronously should override it.
+
+        Args:
+            unique_album_id: The given unique id.
+
+        Returns:
+            An object of the requested album.
+        """
+
+        return await self.run_in_thread(self.get_album, unique_album_id)
+
+    def get_albums_page(
+        self, after_unique_album_id: str | None, limit: int
+    ) -> list[Album]:
+        """An overrideable function that gets a page of the albums available by
+        the provider, sorted by their unique ids.
+
+        By default it sorts the result of `get_all_albums` once per library
+        generation, so providers that notify their changes are paged efficiently.
+
+        Args:
+            after_unique_album_id: The unique id of the last album of the previous
+                page, or `None` to start from the beginning.
+            limit: The maximum number of albums of the page.
+
+        Returns:
+            The albums whose unique ids follow the given one, sorted by them.
+        """
+
+        return self._get_sorted_page(
+            "albums", self.get_all_albums, after_unique_album_id, limit
+        )
+
+    async def async_get_albums_page(
+        self, after_unique_album_id: str | None, limit: int
+    ) -> list[Album]:
+        """An overrideable coroutine that gets a page of the albums available by
+        the provider, sorted by their unique ids.
+
+        By default it runs `get_albums_page` in a worker thread.
+
+        Args:
+            after_unique_album_id: The unique id of the last album of the previous
+                page, or `None` to start from the beginning.
+            limit: The maximum number of albums of the page.
+
+        Returns:
+            The albums whose unique ids follow the given one, sorted by them.
+        """
+
+        return await self.run_in_thread(
+            self.get_albums_page, after_unique_album_id, limit
+        )
+
+    async def async_get_all_albums(self) -> list[Album]:
+        """An overrideable coroutine that returns a list of all the albums
+        available by the provider.
+
+        By default it runs `get_all_albums` in a worker thread.
+
+        Returns:
+            The list of available albums.
+        """
+
+        return await self.run_in_thread(self.get_all_albums)
+
+    def async_iter_albums(self) -> AsyncIterator[Album]:
+        """An overrideable function that iterates asynchronously over all the
+        albums available by the provider.
+
+        By default it advances `iter_albums` in chunks in a worker thread.
+
+        Returns:
+            An asynchronous iterator over the available albums.
+        """
+
+        return iterate_in_thread(self.iter_albums, self.run_in_thread)
+
     @abstractmethod
     def get_artist(self, unique_artist_id: str) -> Artist | None:
         """Gets an artist by its unique id.
@@ -111,3 +583,55 @@ class Provider(Node, ABC):
         """
 
         ...
+
+    def iter_artists(self) -> Iterator[Artist]:
+        """An overrideable function that iterates lazily over all the artists
+        available by the provider.
+
+        By default it adapts `get_all_artists`, providers that can produce
+        their artists on demand should override it.
+
+        Returns:
+            An iterator over the available artists.
+        """
+
+        return iter(self.get_all_artists())
+
+    async def async_get_artist(self, unique_artist_id: str) -> Artist | None:
+        """An overrideable coroutine that gets an artist by its unique id.
+
+        By default it runs `get_artist` in a worker thread, providers that can
+        do their I/O asynchronously should override it.
+
+        Args:
+            unique_artist_id: The given unique id.
+
+        Returns:
+            An object of the requested artist.
+        """
+
+        return await self.run_in_thread(self.get_artist, unique_artist_id)
+
+    async def async_get_all_artists(self) -> list[Artist]:
+        """An overrideable coroutine that returns a list of all the artists
+        available by the provider.
+
+        By default it runs `get_all_artists` in a worker thread.
+
+        Returns:
+            The list of available artists.
+        """
+
+        return await self.run_in_thread(self.get_all_artists)
+
+    def async_iter_artists(self) -> AsyncIterator[Artist]:
+        """An overrideable function that iterates asynchronously over all the
+        artists available by the provider.
+
+        By default it advances `iter_artists` in chunks in a worker thread.
+
+        Returns:
+            An asynchronous iterator over the available artists.
+        """
+
+        return iterate_in_thread(self.iter_artists, self.run_in_thread)
@@ -3,9 +3,10 @@ from abc import ABC, abstractmethod
 from ._node import NodeInstancePath
 
 
-@dataclass
+@dataclass(frozen=True)
 class ResourceId(ABC):
-    """Dummy base class for all the resource id classes."""
+    """Dummy base class for all the resource id classes, they are immutable
+    and hashable."""
 
     node_instance_path: NodeInstancePath
     unique_id: str
@@ -17,10 +17,11 @@ class Song:
 
     resource_id: SongResourceId
     uri: str
-    duration: int
+    duration: float
     title: str | None = field(default_factory=lambda: None)
     album_name: str | None = field(default_factory=lambda: None)
     artist_name: str | None = field(default_factory=lambda: None)
+    album_artist_name: str | None = field(default_factory=lambda: None)
 
     def dict(self) -> dict[str, Any]:
         """Function that returns a dictionary representation of a song."""
@@ -32,4 +33,5 @@ class Song:
             "title": self.title,
             "album_name": self.album_name,
             "artist_name": self.artist_name,
+            "album_artist_name": self.album_artist_name,
         }
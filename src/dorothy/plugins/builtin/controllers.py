@@ -1,12 +1,14 @@
 import asyncio
+import json
 import logging
 import time
 from multiprocessing import Process, set_start_method, Queue
 from threading import Thread
-from typing import Any
+from typing import Any, Callable, Iterable
 
 import aiohttp.web
 from aiohttp import web
+from aiohttp.typedefs import Handler
 from aiohttp.web_request import Request
 from aiohttp.web_response import Response
 from aiohttp_apispec import (  # type: ignore
@@ -17,13 +19,28 @@ from aiohttp_apispec import (  # type: ignore
     validation_middleware,
 )
 
-from dorothy import deserialize_resource_id
+from dorothy import deserialize_node_instance_path, deserialize_resource_id
 from dorothy import Controller, NodeInstancePath, NodeManifest
-from dorothy import Orchestrator
+from dorothy import AlbumResourceId, Job, JobPriorities, Orchestrator, Page
+from dorothy import SongResourceId
 from marshmallow import Schema, fields
 
 from .exceptions import FailedCreatePlaybinPlayer
 
+# Number of serialized items buffered before being written to a streamed response.
+STREAM_CHUNK_SIZE = 256
+
+# Maximum number of songs that can be requested in a single batch.
+MAX_BATCH_SIZE = 1000
+
+# Default and maximum number of results returned by a search.
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 200
+
+# Default and maximum number of items returned in a page of a listing.
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
 
 class ResourceId(Schema):
     """Generic resource ID schema.
@@ -47,6 +64,8 @@ class SongSchema(Schema):
             song is part of.
         artist_name (str): The name of the artist
             author of the song.
+        album_artist_name (str): The name of the artist
+            credited for the whole album.
     """
 
     resource_id = fields.Str()
@@ -55,6 +74,7 @@ class SongSchema(Schema):
     title = fields.Str()
     album_name = fields.Str()
     artist_name = fields.Str()
+    album_artist_name = fields.Str()
 
 
 class SongList(Schema):
@@ -67,6 +87,57 @@ class SongList(Schema):
     songs = fields.List(fields.Nested(SongSchema()))
 
 
+class SongPage(SongList):
+    """Page of a list of songs.
+
+    Attributes:
+        songs (list[SongSchema]): The songs of the page.
+        next_cursor (str): The cursor of the next page, `null` if it's
+            the last one.
+    """
+
+    next_cursor = fields.Str(allow_none=True)
+
+
+class AggregateSongList(SongPage):
+    """List of songs gathered from all the providers.
+
+    Attributes:
+        songs (list[SongSchema]): A list of songs.
+        timed_out (list[str]): The node instance paths of the providers
+            that haven't answered in time, only when listing all the songs.
+        unavailable (list[str]): The node instance paths of the providers
+            skipped as unavailable, only when listing all the songs.
+        next_cursor (str): The cursor of the next page, only when paginating.
+    """
+
+    timed_out = fields.List(fields.Str())
+    unavailable = fields.List(fields.Str())
+
+
+class ResourceIdList(Schema):
+    """Generic list of resource IDs schema.
+
+    Attributes:
+        resource_ids (list[str]): The IDs of the resources.
+    """
+
+    resource_ids = fields.List(fields.Str(), required=True)
+
+
+class SongBatch(Schema):
+    """Songs resolved in a batch.
+
+    Attributes:
+        songs (list[SongSchema]): The songs in the same order as they
+            were requested, `null` in place of the songs not found.
+        missing (list[str]): The resource IDs of the songs not found.
+    """
+
+    songs = fields.List(fields.Nested(SongSchema(), allow_none=True))
+    missing = fields.List(fields.Str())
+
+
 class ChannelList(Schema):
     """Generic list of channel names
 
@@ -102,6 +173,49 @@ class AlbumList(Schema):
     albums = fields.List(fields.Nested(AlbumSchema()))
 
 
+class AggregateAlbumList(AlbumList):
+    """List of albums gathered from all the providers.
+
+    Attributes:
+        albums (list[AlbumSchema]): A list of albums.
+        timed_out (list[str]): The node instance paths of the providers
+            that haven't answered in time, only when listing all the albums.
+        unavailable (list[str]): The node instance paths of the providers
+            skipped as unavailable, only when listing all the albums.
+        next_cursor (str): The cursor of the next page, only when paginating.
+    """
+
+    timed_out = fields.List(fields.Str())
+    unavailable = fields.List(fields.Str())
+    next_cursor = fields.Str(allow_none=True)
+
+
+class SearchResultSchema(Schema):
+    """Generic search result schema.
+
+    Attributes:
+        resource_id (str): The resource ID of the matching resource.
+        type (str): The type of the resource, a song, an album or an artist.
+        name (str): The title or name of the resource.
+        score (float): How well the resource matches the query.
+    """
+
+    resource_id = fields.Str()
+    type = fields.Str()
+    name = fields.Str()
+    score = fields.Float()
+
+
+class SearchResultList(Schema):
+    """Generic list of search results schema.
+
+    Attributes:
+        results (list[SearchResultSchema]): The results sorted by their score.
+    """
+
+    results = fields.List(fields.Nested(SearchResultSchema()))
+
+
 class ChannelState(Schema):
     """Generic channel schema
 
@@ -114,6 +228,172 @@ class ChannelState(Schema):
     player_state = fields.Str()
 
 
+class JobSchema(Schema):
+    """Generic background job schema.
+
+    Attributes:
+        job_id (str): The ID of the job.
+        name (str): The name of the job.
+        state (str): The state of the job.
+        progress (int): The number of items already processed.
+        total (int): The number of items expected to be processed.
+        result (dict): The result of the job once it has finished.
+        error (str): The error of the job if it has failed.
+        priority (str): The priority class the job runs with.
+    """
+
+    job_id = fields.Str()
+    name = fields.Str()
+    state = fields.Str()
+    priority = fields.Str()
+    progress = fields.Int()
+    total = fields.Int()
+    result = fields.Raw()
+    error = fields.Str()
+
+
+class JobList(Schema):
+    """Generic list of jobs schema.
+
+    Attributes:
+        jobs (list[JobSchema]): A list of jobs.
+    """
+
+    jobs = fields.List(fields.Nested(JobSchema()))
+
+
+class ProviderHealthSchema(Schema):
+    """Generic provider health schema.
+
+    Attributes:
+        node_instance_path (str): The node instance path of the provider.
+        state (str): The state of the circuit of the provider.
+        consecutive_failures (int): The failures since the last success.
+        total_failures (int): All the failures of the provider.
+        slow_calls (int): The calls slower than the latency threshold.
+        last_latency (float): The seconds taken by the last call.
+        last_error (str): The description of the last failure.
+        retry_in (float): The seconds until the provider is probed again.
+    """
+
+    node_instance_path = fields.Str()
+    state = fields.Str()
+    consecutive_failures = fields.Int()
+    total_failures = fields.Int()
+    slow_calls = fields.Int()
+    last_latency = fields.Float(allow_none=True)
+    last_error = fields.Str(allow_none=True)
+    retry_in = fields.Float(allow_none=True)
+
+
+class ProviderHealthList(Schema):
+    """Generic list of provider health schema.
+
+    Attributes:
+        providers (list[ProviderHealthSchema]): The health of every provider.
+    """
+
+    providers = fields.List(fields.Nested(ProviderHealthSchema()))
+
+
+class CacheStatsSchema(Schema):
+    """Generic resource cache counters schema.
+
+    Attributes:
+        max_entries (int): The maximum number of cached resources.
+        entries (int): The number of cached resources.
+        hits (int): The lookups answered by the cache.
+        misses (int): The lookups that had to ask the providers.
+        evictions (int): The resources dropped to make room for new ones.
+        expirations (int): The resources dropped as they were too old.
+        invalidations (int): The resources dropped as they have changed.
+        hit_ratio (float): The ratio of lookups answered by the cache.
+    """
+
+    max_entries = fields.Int()
+    entries = fields.Int()
+    hits = fields.Int()
+    misses = fields.Int()
+    evictions = fields.Int()
+    expirations = fields.Int()
+    invalidations = fields.Int()
+    hit_ratio = fields.Float()
+
+
+class CoalescingStatsSchema(Schema):
+    """Generic request coalescing counters schema.
+
+    Attributes:
+        calls (int): The reads made to the orchestrator.
+        executions (int): The reads that have been computed.
+        coalesced (int): The reads that have shared the computation of an
+            identical one already in flight.
+        in_flight (int): The computations currently running.
+        coalesced_by_operation (dict[str, int]): The coalesced reads by the
+            name of the operation.
+    """
+
+    calls = fields.Int()
+    executions = fields.Int()
+    coalesced = fields.Int()
+    in_flight = fields.Int()
+    coalesced_by_operation = fields.Dict(keys=fields.Str(), values=fields.Int())
+
+
+class ProviderStatsSchema(Schema):
+    """Generic library totals of a provider schema.
+
+    Attributes:
+        node_instance_path (str): The node instance path of the provider.
+        songs (int): The number of songs of the provider.
+        albums (int): The number of albums of the provider.
+        artists (int): The number of artists of the provider.
+        duration (float): The total duration in seconds of the songs of the
+            provider.
+    """
+
+    node_instance_path = fields.Str()
+    songs = fields.Int()
+    albums = fields.Int()
+    artists = fields.Int()
+    duration = fields.Float()
+
+
+class LibraryStatsSchema(Schema):
+    """Generic library totals schema.
+
+    Attributes:
+        songs (int): The number of songs of all the providers.
+        albums (int): The number of albums of all the providers.
+        artists (int): The number of artists of all the providers.
+        duration (float): The total duration in seconds of all the songs.
+        providers (list[ProviderStatsSchema]): The totals of every provider.
+    """
+
+    songs = fields.Int()
+    albums = fields.Int()
+    artists = fields.Int()
+    duration = fields.Float()
+    providers = fields.List(fields.Nested(ProviderStatsSchema()))
+
+
+class AlbumStatsSchema(Schema):
+    """Generic album totals schema.
+
+    Attributes:
+        resource_id (str): The resource ID of the album.
+        title (str): The title of the album.
+        track_count (int): The number of songs of the album.
+        duration (float): The total duration in seconds of the songs of the
+            album.
+    """
+
+    resource_id = fields.Str()
+    title = fields.Str()
+    track_count = fields.Int()
+    duration = fields.Float()
+
+
 class RestController(Controller):
     """A controller that enables support to interacting with a REST API."""
 
@@ -169,6 +449,7 @@ class RestController(Controller):
             [
                 web.get("/songs", self.get_all_songs, allow_head=False),
                 web.get("/songs/{song_resource_id}", self.get_song, allow_head=False),
+                web.post("/songs:batchGet", self.get_songs_batch),
                 web.get(
                     "/channels/{channel_name}/queue", self.list_queue, allow_head=False
                 ),
@@ -196,6 +477,27 @@ class RestController(Controller):
                 web.get(
                     "/albums/{album_resource_id}", self.get_album, allow_head=False
                 ),
+                web.get(
+                    "/albums/{album_resource_id}/stats",
+                    self.get_album_stats,
+                    allow_head=False,
+                ),
+                web.get("/search", self.search, allow_head=False),
+                web.get(
+                    "/providers/health", self.get_providers_health, allow_head=False
+                ),
+                web.post("/providers/refresh", self.refresh_providers),
+                web.post(
+                    "/providers/{node_instance_path}/refresh", self.refresh_provider
+                ),
+                web.get("/cache/stats", self.get_cache_stats, allow_head=False),
+                web.get(
+                    "/coalescing/stats", self.get_coalescing_stats, allow_head=False
+                ),
+                web.get("/stats", self.get_library_stats, allow_head=False),
+                web.get("/jobs", self.get_all_jobs, allow_head=False),
+                web.get("/jobs/{job_id}", self.get_job, allow_head=False),
+                web.delete("/jobs/{job_id}", self.cancel_job),
             ]
         )
 
@@ -208,10 +510,127 @@ class RestController(Controller):
             in_place=True,
         )
 
+        app.middlewares.append(self.interactive_middleware)
         app.middlewares.append(validation_middleware)
 
         return app
 
+    @web.middleware
+    async def interactive_middleware(
+        self, request: Request, handler: Handler
+    ) -> web.StreamResponse:
+        """Mark every request as interactive work while it's answered, so the
+        background jobs give way to it.
+
+        Args:
+            request: The request being answered.
+            handler: The next handler of the request.
+
+        Returns:
+            The response of the request.
+        """
+
+        with self.orchestrator.jobs.interactive():
+            return await handler(request)
+
+    async def stream_json_list(
+        self,
+        request: Request,
+        key: str,
+        items: Iterable[dict[str, Any]],
+        extra_fields: dict[str, Any] | None = None,
+    ) -> web.StreamResponse:
+        """Stream a JSON object with a list as a chunked response, so the whole
+        serialized list is never held in memory.
+
+        Args:
+            request: The request being answered.
+            key: The key of the list in the JSON object.
+            items: The dictionaries to serialize into the list.
+            extra_fields: Other fields added to the JSON object after the list.
+
+        Returns:
+            The already sent response.
+        """
+
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+
+        await response.write(f"{{{json.dumps(key)}: [".encode())
+
+        chunk: list[str] = []
+        first_chunk = True
+        for item in items:
+            chunk.append(json.dumps(item))
+
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                separator = "" if first_chunk else ", "
+                await response.write((separator + ", ".join(chunk)).encode())
+                chunk = []
+                first_chunk = False
+
+        if len(chunk) > 0:
+            separator = "" if first_chunk else ", "
+            await response.write((separator + ", ".join(chunk)).encode())
+
+        await response.write(b"]")
+
+        for field_key, field_value in (extra_fields or {}).items():
+            await response.write(
+                f", {json.dumps(field_key)}: {json.dumps(field_value)}".encode()
+            )
+
+        await response.write(b"}")
+        await response.write_eof()
+
+        return response
+
+    def get_page_query(self, request: Request) -> tuple[str | None, int] | None:
+        """Read the "cursor" and "limit" pagination parameters of a request.
+
+        Args:
+            request: The request being answered.
+
+        Raises:
+            ValueError: Raised if the limit isn't a valid integer.
+
+        Returns:
+            The cursor and the limit of the requested page, or `None` if the
+                request doesn't ask for a page.
+        """
+
+        if "cursor" not in request.query and "limit" not in request.query:
+            return None
+
+        try:
+            limit = int(request.query.get("limit", DEFAULT_PAGE_LIMIT))
+        except ValueError as error:
+            raise ValueError('The "limit" must be an integer') from error
+
+        if limit < 1 or limit > MAX_PAGE_LIMIT:
+            raise ValueError(f'The "limit" must be between 1 and {MAX_PAGE_LIMIT}')
+
+        return request.query.get("cursor"), limit
+
+    def get_page_response(self, key: str, page: Page[Any]) -> Response:
+        """Generates the response of a page of resources.
+
+        Args:
+            key: The key of the list in the JSON object.
+            page: The page to send.
+
+        Returns:
+            The JSON response with the page and the cursor of the next one.
+        """
+
+        return web.json_response(
+            {
+                key: [resource.dict() for resource in page.items],
+                "next_cursor": page.next_cursor,
+            }
+        )
+
     def get_channel_state_dict(self, channel_name: str) -> dict[str, Any]:
         """Generates a dict with the state of the channel.
 
@@ -233,17 +652,39 @@ class RestController(Controller):
 
     @docs(
         tags=["songs"],
-        summary="Get all songs registered by the providers",
+        summary='Get all songs registered by the providers, or a page of them if "limit" or "cursor" are given',
     )
     @response_schema(
-        SongList, 200, description="List of all songs registered by the providers"
+        AggregateSongList,
+        200,
+        description="List of all songs registered by the providers that answered in time",
     )
-    async def get_all_songs(self, request: Request) -> Response:
-        json_songs = []
-        for song in self.orchestrator.get_all_songs():
-            json_songs.append(song.dict())
-
-        return web.json_response({"songs": json_songs})
+    async def get_all_songs(self, request: Request) -> web.StreamResponse:
+        try:
+            page_query = self.get_page_query(request)
+
+            if page_query is not None:
+                return self.get_page_response(
+                    "songs", await self.orchestrator.async_get_songs_page(*page_query)
+                )
+        except ValueError as error:
+            return web.Response(status=400, text=str(error))
+        except TimeoutError:
+            return web.Response(
+                status=504, text="A provider hasn't answered in its deadline"
+            )
+
+        aggregate_result = await self.orchestrator.async_get_all_songs()
+
+        return await self.stream_json_list(
+            request,
+            "songs",
+            (song.dict() for song in aggregate_result.resources),
+            {
+                "timed_out": [str(path) for path in aggregate_result.timed_out],
+                "unavailable": [str(path) for path in aggregate_result.unavailable],
+            },
+        )
 
     @docs(
         tags=["songs"],
@@ -253,13 +694,67 @@ class RestController(Controller):
     async def get_song(self, request: Request) -> Response:
         resource_id = deserialize_resource_id(request.match_info["song_resource_id"])
 
-        song = self.orchestrator.get_song(resource_id)
+        if not isinstance(resource_id, SongResourceId):
+            return web.Response(status=422, text="The resource id must be of a song")
+
+        song = await self.orchestrator.async_get_song(resource_id)
 
         if song is None:
             return web.Response(status=404, text="The requested song wasn't found")
 
         return web.json_response(song.dict())
 
+    @docs(
+        tags=["songs"],
+        summary="Get all data of several songs at once",
+    )
+    @json_schema(ResourceIdList)
+    @response_schema(
+        SongBatch, 200, description="The requested songs in the order of the request"
+    )
+    async def get_songs_batch(self, request: Request) -> Response:
+        data = await request.json()
+        serialized_resource_ids: list[str] = data["resource_ids"]
+
+        if len(serialized_resource_ids) > MAX_BATCH_SIZE:
+            return web.Response(
+                status=413,
+                text=f"A batch can't request more than {MAX_BATCH_SIZE} songs",
+            )
+
+        # The invalid resource ids are reported as missing songs
+        songs_positions: list[int] = []
+        songs_resource_ids: list[SongResourceId] = []
+        for position, serialized_resource_id in enumerate(serialized_resource_ids):
+            try:
+                resource_id = deserialize_resource_id(serialized_resource_id)
+            except (ValueError, IndexError):
+                continue
+
+            if isinstance(resource_id, SongResourceId):
+                songs_positions.append(position)
+                songs_resource_ids.append(resource_id)
+
+        json_songs: list[dict[str, Any] | None] = [None] * len(serialized_resource_ids)
+        for position, song in zip(
+            songs_positions, await self.orchestrator.async_get_songs(songs_resource_ids)
+        ):
+            if song is not None:
+                json_songs[position] = song.dict()
+
+        return web.json_response(
+            {
+                "songs": json_songs,
+                "missing": [
+                    serialized_resource_id
+                    for serialized_resource_id, json_song in zip(
+                        serialized_resource_ids, json_songs
+                    )
+                    if json_song is None
+                ],
+            }
+        )
+
     @docs(
         tags=["channels"],
         summary="Get all channels available",
@@ -270,10 +765,23 @@ class RestController(Controller):
 
     @docs(
         tags=["channels"],
-        summary="List all songs in the queue",
+        summary='List all songs in the queue, or a page of them if "limit" or "cursor" are given',
     )
-    @response_schema(SongList, 200, description="All the songs in the queue")
+    @response_schema(SongPage, 200, description="The songs in the queue")
     async def list_queue(self, request: Request) -> Response:
+        try:
+            page_query = self.get_page_query(request)
+
+            if page_query is not None:
+                return self.get_page_response(
+                    "songs",
+                    self.orchestrator.get_queue_page(
+                        request.match_info["channel_name"], *page_query
+                    ),
+                )
+        except ValueError as error:
+            return web.Response(status=400, text=str(error))
+
         json_songs = [
             song.dict()
             for song in self.orchestrator.get_queue(request.match_info["channel_name"])
@@ -295,11 +803,33 @@ class RestController(Controller):
             self.get_channel_state_dict(request.match_info["channel_name"])
         )
 
+    def get_queue_job_response(self, job: Job | None) -> Response:
+        """Generates the response of a change in a queue that may have been
+        left to a background job.
+
+        Args:
+            job: The job that changes the queue, or `None` if the queue
+                has already been changed.
+
+        Returns:
+            An empty response, or the job with a 202 status if there's one.
+        """
+
+        if job is None:
+            return web.Response()
+
+        return web.json_response(
+            job.dict(), status=202, headers={"Location": f"/jobs/{job.job_id}"}
+        )
+
     @docs(
         tags=["channels"],
-        summary="Add song or album to the queue at the end",
+        summary="Add song, album or artist to the queue at the end",
         responses={
-            200: {"description": "Song or album successfully added to the queue"}
+            200: {"description": "Song or album successfully added to the queue"},
+            202: {
+                "description": "The songs are being added to the queue by the returned job"
+            },
         },
     )
     @json_schema(ResourceId)
@@ -308,15 +838,20 @@ class RestController(Controller):
 
         resource_id = deserialize_resource_id(data["resource_id"])
 
-        self.orchestrator.add_to_queue(request.match_info["channel_name"], resource_id)
+        job = await self.orchestrator.async_add_to_queue(
+            request.match_info["channel_name"], resource_id
+        )
 
-        return web.Response()
+        return self.get_queue_job_response(job)
 
     @docs(
         tags=["channels"],
         summary='Add song or album to the queue at the position specified by "{position}" ',
         responses={
-            200: {"description": "Song or album successfully inserted to the queue"}
+            200: {"description": "Song or album successfully inserted to the queue"},
+            202: {
+                "description": "The songs are being inserted to the queue by the returned job"
+            },
         },
     )
     @json_schema(ResourceId)
@@ -329,11 +864,11 @@ class RestController(Controller):
         position = int(request.match_info["position"])
 
         resource_id = deserialize_resource_id(data["resource_id"])
-        self.orchestrator.insert_to_queue(
+        job = await self.orchestrator.async_insert_to_queue(
             request.match_info["channel_name"], resource_id, position
         )
 
-        return web.Response()
+        return self.get_queue_job_response(job)
 
     @docs(
         tags=["channels"],
@@ -433,17 +968,39 @@ class RestController(Controller):
 
     @docs(
         tags=["albums"],
-        summary="Get all albums registered by the providers",
+        summary='Get all albums registered by the providers, or a page of them if "limit" or "cursor" are given',
     )
     @response_schema(
-        AlbumList, 200, description="The list of albums registered by the providers"
+        AggregateAlbumList,
+        200,
+        description="The list of albums registered by the providers that answered in time",
     )
-    async def get_all_albums(self, request: Request) -> Response:
-        json_albums = []
-        for album in self.orchestrator.get_all_albums():
-            json_albums.append(album.dict())
-
-        return web.json_response({"albums": json_albums})
+    async def get_all_albums(self, request: Request) -> web.StreamResponse:
+        try:
+            page_query = self.get_page_query(request)
+
+            if page_query is not None:
+                return self.get_page_response(
+                    "albums", await self.orchestrator.async_get_albums_page(*page_query)
+                )
+        except ValueError as error:
+            return web.Response(status=400, text=str(error))
+        except TimeoutError:
+            return web.Response(
+                status=504, text="A provider hasn't answered in its deadline"
+            )
+
+        aggregate_result = await self.orchestrator.async_get_all_albums()
+
+        return await self.stream_json_list(
+            request,
+            "albums",
+            (album.dict() for album in aggregate_result.resources),
+            {
+                "timed_out": [str(path) for path in aggregate_result.timed_out],
+                "unavailable": [str(path) for path in aggregate_result.unavailable],
+            },
+        )
 
     @docs(
         tags=["albums"],
@@ -455,4 +1012,225 @@ class RestController(Controller):
     async def get_album(self, request: Request) -> Response:
         resource_id = deserialize_resource_id(request.match_info["album_resource_id"])
 
-        return web.json_response(self.orchestrator.get_album(resource_id).dict())
+        if not isinstance(resource_id, AlbumResourceId):
+            return web.Response(status=422, text="The resource id must be of an album")
+
+        album = await self.orchestrator.async_get_album(resource_id)
+
+        if album is None:
+            return web.Response(status=404, text="The requested album wasn't found")
+
+        return web.json_response(album.dict())
+
+    @docs(
+        tags=["stats"],
+        summary="Get the track count and the duration of an album",
+    )
+    @response_schema(
+        AlbumStatsSchema, 200, description="The totals of the requested album"
+    )
+    async def get_album_stats(self, request: Request) -> Response:
+        resource_id = deserialize_resource_id(request.match_info["album_resource_id"])
+
+        if not isinstance(resource_id, AlbumResourceId):
+            return web.Response(status=422, text="The resource id must be of an album")
+
+        album_stats = self.orchestrator.get_album_stats(resource_id)
+
+        if album_stats is None:
+            return web.Response(status=404, text="The requested album wasn't found")
+
+        return web.json_response(album_stats.dict())
+
+    @docs(
+        tags=["search"],
+        summary='Search songs, albums and artists matching the query "q"',
+    )
+    @response_schema(
+        SearchResultList, 200, description="The best results sorted by their score"
+    )
+    async def search(self, request: Request) -> Response:
+        query = request.query.get("q", "")
+
+        try:
+            limit = int(request.query.get("limit", DEFAULT_SEARCH_LIMIT))
+        except ValueError:
+            return web.Response(status=400, text='The "limit" must be an integer')
+
+        limit = max(0, min(limit, MAX_SEARCH_LIMIT))
+
+        return web.json_response(
+            {
+                "results": [
+                    result.dict()
+                    for result in await self.orchestrator.async_search(query, limit)
+                ]
+            }
+        )
+
+    @docs(
+        tags=["providers"],
+        summary="Get the health of all the providers",
+    )
+    @response_schema(
+        ProviderHealthList,
+        200,
+        description='The circuit of every provider. "state" can be "CLOSED", "OPEN" or "HALF_OPEN".',
+    )
+    async def get_providers_health(self, request: Request) -> Response:
+        return web.json_response(
+            {
+                "providers": [
+                    health.dict() for health in self.orchestrator.get_providers_health()
+                ]
+            }
+        )
+
+    @staticmethod
+    def get_refresh_progress(job: Job) -> Callable[[int, int], None]:
+        """Build the progress callback of a refresh job, that also lets the job
+        give way to more urgent work.
+
+        Args:
+            job: The refresh job.
+
+        Returns:
+            The function to report the progress of the refresh.
+        """
+
+        def progress(current: int, total: int) -> None:
+            job.set_progress(current, total)
+            job.checkpoint()
+
+        return progress
+
+    @docs(
+        tags=["providers"],
+        summary="Start a job that looks for changes in the sources of all the providers",
+    )
+    @response_schema(
+        JobSchema, 202, description="The refresh job that has been started"
+    )
+    async def refresh_providers(self, request: Request) -> Response:
+        job = self.orchestrator.jobs.submit(
+            "refresh providers",
+            lambda job: [
+                library_diff.dict()
+                for library_diff in self.orchestrator.refresh_providers(
+                    self.get_refresh_progress(job), job
+                )
+            ],
+            JobPriorities.BACKGROUND,
+        )
+
+        return web.json_response(
+            job.dict(), status=202, headers={"Location": f"/jobs/{job.job_id}"}
+        )
+
+    @docs(
+        tags=["providers"],
+        summary='Start a job that looks for changes in the source of the provider "{node_instance_path}"',
+    )
+    @response_schema(
+        JobSchema, 202, description="The refresh job that has been started"
+    )
+    async def refresh_provider(self, request: Request) -> Response:
+        node_instance_path = deserialize_node_instance_path(
+            request.match_info["node_instance_path"]
+        )
+
+        if not self.orchestrator.has_provider(node_instance_path):
+            return web.Response(status=404, text="The requested provider wasn't found")
+
+        def refresh(job: Job) -> dict[str, Any] | None:
+            library_diff = self.orchestrator.refresh_provider(
+                node_instance_path, self.get_refresh_progress(job), job
+            )
+
+            return library_diff.dict() if library_diff is not None else None
+
+        job = self.orchestrator.jobs.submit(
+            f"refresh {node_instance_path}", refresh, JobPriorities.BACKGROUND
+        )
+
+        return web.json_response(
+            job.dict(), status=202, headers={"Location": f"/jobs/{job.job_id}"}
+        )
+
+    @docs(
+        tags=["cache"],
+        summary="Get the counters of the resource cache",
+    )
+    @response_schema(
+        CacheStatsSchema, 200, description="The counters of the resource cache"
+    )
+    async def get_cache_stats(self, request: Request) -> Response:
+        return web.json_response(self.orchestrator.get_cache_stats().dict())
+
+    @docs(
+        tags=["cache"],
+        summary="Get the counters of the deduplication of identical concurrent reads",
+    )
+    @response_schema(
+        CoalescingStatsSchema,
+        200,
+        description="The counters of the reads that have shared a computation",
+    )
+    async def get_coalescing_stats(self, request: Request) -> Response:
+        return web.json_response(self.orchestrator.get_coalescing_stats().dict())
+
+    @docs(
+        tags=["stats"],
+        summary="Get the number of songs, albums and artists and the total duration of the libraries",
+    )
+    @response_schema(
+        LibraryStatsSchema,
+        200,
+        description="The totals of all the libraries and of every provider",
+    )
+    async def get_library_stats(self, request: Request) -> Response:
+        return web.json_response(self.orchestrator.get_library_stats().dict())
+
+    @docs(
+        tags=["jobs"],
+        summary="Get all the background jobs",
+    )
+    @response_schema(JobList, 200, description="The list of background jobs")
+    async def get_all_jobs(self, request: Request) -> Response:
+        return web.json_response(
+            {"jobs": [job.dict() for job in self.orchestrator.jobs.get_all_jobs()]}
+        )
+
+    @docs(
+        tags=["jobs"],
+        summary="Get the state and progress of a background job",
+    )
+    @response_schema(JobSchema, 200, description="The state of the requested job")
+    async def get_job(self, request: Request) -> Response:
+        job = self.orchestrator.jobs.get_job(request.match_info["job_id"])
+
+        if job is None:
+            return web.Response(status=404, text="The requested job wasn't found")
+
+        return web.json_response(job.dict())
+
+    @docs(
+        tags=["jobs"],
+        summary="Cancel a background job",
+        responses={
+            409: {"description": "The job has already ended"},
+        },
+    )
+    @response_schema(JobSchema, 202, description="The job that has been asked to stop")
+    async def cancel_job(self, request: Request) -> Response:
+        job = self.orchestrator.jobs.get_job(request.match_info["job_id"])
+
+        if job is None:
+            return web.Response(status=404, text="The requested job wasn't found")
+
+        if job.is_done():
+            return web.Response(status=409, text="The requested job has already ended")
+
+        self.orchestrator.jobs.cancel(job.job_id)
+
+        return web.json_response(job.dict(), status=202)
@@ -1,3 +1,4 @@
+import threading
 from multiprocessing import set_start_method
 from typing import Any, Callable, Self
 
@@ -41,6 +42,7 @@ class PlaybinListener(Listener):
 
         return NodeManifest(
             name="playbin",
+            default_config={"gapless": True},
         )
 
     def __init__(
@@ -51,6 +53,14 @@ class PlaybinListener(Listener):
         self.player: Gst.Element
         self.current_song_uri: str = ""
 
+        self.gapless = bool(self.config.get("gapless", True))
+
+        # The song that follows the current one and the one already queued in
+        # the player, the player reads them from its own streaming threads.
+        self._next_song: Song | None = None
+        self._prerolled_song: Song | None = None
+        self._songs_lock = threading.Lock()
+
     def start_the_player(self) -> None:
         """Start the Playbin player.
 
@@ -71,6 +81,75 @@ class PlaybinListener(Listener):
         fakesink = Gst.ElementFactory.make("fakesink", "fakesink")
         self.player.set_property("video-sink", fakesink)
 
+        if self.gapless:
+            self.player.connect("about-to-finish", self._on_about_to_finish)
+
+        # There isn't a GLib main loop to dispatch the bus messages, so they
+        # are handled as soon as they are posted and then dropped.
+        self.player.get_bus().set_sync_handler(self._on_bus_message)
+
+    def _on_about_to_finish(self, player: Gst.Element) -> None:
+        """Queue the next song in the player right before the current one ends,
+        so it starts without tearing down the pipeline.
+
+        Called from a streaming thread of the player.
+
+        Args:
+            player: The player whose song is about to finish.
+        """
+
+        with self._songs_lock:
+            next_song = self._next_song
+
+            if next_song is None:
+                return
+
+            player.set_property("uri", next_song.uri)
+            self._prerolled_song = next_song
+
+    def _on_bus_message(self, bus: Gst.Bus, message: Gst.Message) -> Gst.BusSyncReply:
+        """Handle a message posted by the player, notifying the start of the
+        queued song once its stream starts.
+
+        Called from the thread that has posted the message.
+
+        Args:
+            bus: The bus of the player.
+            message: The posted message.
+
+        Returns:
+            The reply that drops the message from the bus.
+        """
+
+        if message.type == Gst.MessageType.ERROR:
+            error, _ = message.parse_error()
+            self._logger.error(f"The player has failed: {error.message}")
+
+        elif message.type == Gst.MessageType.STREAM_START:
+            with self._songs_lock:
+                started_song = self._prerolled_song
+                self._prerolled_song = None
+
+                if started_song is not None:
+                    self.current_song_uri = started_song.uri
+
+            if started_song is not None:
+                self.notify_song_started(started_song)
+
+        return Gst.BusSyncReply.DROP
+
+    def set_next_song(self, song: Song | None) -> None:
+        """Set the song that is queued in the player once the current one is
+        about to finish.
+
+        Args:
+            song: The next song or `None` if the playback ends after the
+                current one.
+        """
+
+        with self._songs_lock:
+            self._next_song = song
+
     @ensure_player_is_available
     def play(self, song: Song) -> None:
         """Play the given song.
@@ -100,6 +179,9 @@ class PlaybinListener(Listener):
     def stop(self) -> None:
         """Stop the song playback."""
 
+        with self._songs_lock:
+            self._prerolled_song = None
+
         res = self.player.set_state(Gst.State.NULL)
         if res == Gst.StateChangeReturn.FAILURE:
             self._logger.error("Unable to stop the playing song")
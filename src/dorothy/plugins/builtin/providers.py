@@ -1,6 +1,15 @@
-from multiprocessing import Process, Queue
+import os
+import threading
+from dataclasses import replace
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from multiprocessing import Process, Queue, get_all_start_methods, get_context
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Iterable, Iterator
 
 from dorothy import (
     Album,
@@ -10,8 +19,9 @@ from dorothy import (
     AlbumResourceId,
     ArtistResourceId,
 )
-from dorothy import NodeInstancePath, NodeManifest, Provider
+from dorothy import Job, LibraryDiff, NodeInstancePath, NodeManifest, Provider
 from platformdirs import (
+    user_cache_dir,
     user_desktop_dir,
     user_documents_dir,
     user_downloads_dir,
@@ -23,13 +33,82 @@ from tinytag import TinyTag  # type: ignore
 from tinytag.tinytag import TinyTagException  # type: ignore
 import time
 
+from .tag_index import IndexEntry, SongTags, TagIndex
+from .walker import DEFAULT_AUDIO_EXTENSIONS, LibraryWalker, WalkedFile
+from .watcher import LibraryChanges, LibraryWatcher, create_library_watcher
+
+# Number of files sent at once to each worker of the scan.
+SCAN_CHUNK_SIZE = 256
+
+# Number of files walked by a refresh between its progress reports and the
+# checkpoints of its job.
+REFRESH_PROGRESS_INTERVAL = 1000
+
+# The provider runs alongside the threads of the player, and forking it could
+# copy a lock held by one of them into the workers, so they are started from
+# a clean process instead.
+SCAN_START_METHOD = "forkserver" if "forkserver" in get_all_start_methods() else "spawn"
+
+
+def read_song_tags(song_path: Path) -> SongTags | None:
+    """Parse the tags of an audio file.
+
+    Args:
+        song_path: The path of the file to parse.
+
+    Returns:
+        The tags of the file or `None` if the file is not a valid song.
+    """
+
+    try:
+        song_metadata = TinyTag.get(song_path)
+    except TinyTagException:
+        return None
+
+    if song_metadata.duration is None:
+        return None
+
+    return SongTags(
+        song_metadata.duration,
+        song_metadata.title,
+        song_metadata.album,
+        song_metadata.artist,
+        song_metadata.albumartist,
+    )
+
+
+def read_songs_tags(songs_paths: list[Path]) -> list[SongTags | None]:
+    """Parse the tags of a chunk of audio files, used by the workers of the scan.
+
+    Args:
+        songs_paths: The paths of the files to parse.
+
+    Returns:
+        The tags of each file in the same order, `None` if a file is not
+            a valid song.
+    """
+
+    return [read_song_tags(song_path) for song_path in songs_paths]
+
 
 class FilesystemProvider(Provider):
     @classmethod
     def get_node_manifest(cls) -> NodeManifest:
         return NodeManifest(
             name="filesystem",
-            default_config={"paths": ["$MUSIC"], "exclude_paths": []},
+            default_config={
+                "paths": ["$MUSIC"],
+                "exclude_paths": [],
+                "scan_workers": 0,
+                "scan_executor": "process",
+                "audio_extensions": DEFAULT_AUDIO_EXTENSIONS,
+                "sniff_magic_bytes": False,
+                "follow_symlinks": True,
+                "watch": True,
+                "watch_backend": "auto",
+                "watch_debounce_time": 2.0,
+                "watch_poll_interval": 60.0,
+            },
         )
 
     def __init__(
@@ -37,6 +116,9 @@ class FilesystemProvider(Provider):
     ) -> None:
         super().__init__(config, node_instance_path)
 
+        # The refreshes and the watcher report every change of the library
+        self.notifies_library_changes = True
+
         self._logger.info("Parsing source paths in the config...")
         self.paths = self.parse_paths(self.config["paths"])
         self.remove_redundant_source_paths()
@@ -44,11 +126,71 @@ class FilesystemProvider(Provider):
         self._logger.info("Parsing ignore paths in the config...")
         self.exclude_paths = self.parse_paths(self.config["exclude_paths"])
 
-        self.songs_paths = self.get_songs_paths()
+        self.tag_index = TagIndex(self.get_tag_index_file())
+
+        scan_workers = int(self.config.get("scan_workers", 0))
+        self.scan_workers = scan_workers if scan_workers > 0 else os.cpu_count() or 1
+        self.scan_executor = str(self.config.get("scan_executor", "process"))
+
+        self.walker = LibraryWalker(
+            self.paths,
+            self.exclude_paths,
+            self.config.get("audio_extensions", DEFAULT_AUDIO_EXTENSIONS),
+            bool(self.config.get("sniff_magic_bytes", False)),
+            bool(self.config.get("follow_symlinks", True)),
+        )
+
+        # The catalog of songs is keyed by their unique ids and the secondary
+        # maps hold references to the same objects, so every request is
+        # answered from memory without touching the files again.
+        self.songs: dict[str, Song] = {}
+        self.album_songs: dict[str, list[Song]] = {}
+        self.artist_albums: dict[str, list[Album]] = {}
+        self.albums: dict[str, Album] = {}
+        self.artists: dict[str, Artist] = {}
+
+        # Every artist holds its own views of the albums it's credited in,
+        # keyed by the artist and album names, that only contain its songs.
+        self.artist_album_songs: dict[tuple[str, str], list[Song]] = {}
+        self.artist_album_views: dict[tuple[str, str], Album] = {}
+
+        # Held while reading or changing the catalog, as the library watcher
+        # applies the changes from its own thread.
+        self._catalog_lock = threading.RLock()
+
+        # Held by the refreshes and the watcher for the whole update, so they
+        # are applied one after the other. The files are parsed while only
+        # holding this one, so the readers of the catalog aren't blocked.
+        self._update_lock = threading.RLock()
+
+        self.scan_library()
+
+        self.watcher: LibraryWatcher | None = None
+        if self.config.get("watch", True):
+            self.watcher = create_library_watcher(
+                self.walker,
+                self.apply_library_changes,
+                str(self.config.get("watch_backend", "auto")),
+                float(self.config.get("watch_debounce_time", 2.0)),
+                float(self.config.get("watch_poll_interval", 60.0)),
+            )
+            self.watcher.start()
+
+    def get_tag_index_file(self) -> Path:
+        """Get the path of the tag index of the provider instance.
 
-        self.albums: dict[str, list[Path]] = {}
-        self.artists: dict[str, list[str]] = {}
-        self.load_album_artist_lists(self.songs_paths)
+        Returns:
+            The path of the tag index file inside the user cache directory.
+        """
+
+        node_name = self.node_instance_path.node_name
+        instance_name = self.node_instance_path.instance_name
+
+        return (
+            Path(user_cache_dir("dorothy"))
+            / self.node_instance_path.plugin_name
+            / f"{node_name}-{instance_name}.sqlite3"
+        )
 
     def parse_paths(self, raw_paths: list[str]) -> list[Path]:
         special_words: dict[str, Callable[[], str]] = {
@@ -117,112 +259,734 @@ class FilesystemProvider(Provider):
         for set_index, source_path_index in enumerate(redundant_paths_indexes):
             del self.paths[source_path_index - set_index]
 
-    def is_file_ignored(self, file: Path) -> bool:
-        for exclude_path in self.exclude_paths:
-            if exclude_path in file.parents:
-                return True
+    def build_song(self, song_path: Path, song_tags: SongTags) -> Song:
+        """Build a song object given the tags of its file.
+
+        Args:
+            song_path: The absolute path of the file.
+            song_tags: The tags of the file.
+
+        Returns:
+            The song object.
+        """
+
+        return Song(
+            SongResourceId(self.node_instance_path, str(song_path)),
+            song_path.as_uri(),
+            song_tags.duration,
+            song_tags.title,
+            song_tags.album,
+            song_tags.artist,
+            song_tags.album_artist,
+        )
+
+    @staticmethod
+    def get_song_album_name(song: Song) -> str:
+        """Get the name of the album a song is registered in.
 
-        return False
+        Args:
+            song: The song to check.
 
-    def get_songs_paths(self) -> list[Path]:
-        songs_paths: list[Path] = []
+        Returns:
+            The name of the album of the song.
+        """
 
-        for path in self.paths:
-            for file in path.glob("**/*"):
-                if not file.is_file():
-                    continue
+        return song.album_name if song.album_name is not None else "Unknown album"
 
-                if self.is_file_ignored(file):
-                    continue
+    @staticmethod
+    def get_song_artists_names(song: Song) -> list[str]:
+        """Get the names of the artists a song is credited to, its own artist
+        and the artist of its album if they are different.
 
-                songs_paths.append(file)
+        Args:
+            song: The song to check.
 
-        return songs_paths
+        Returns:
+            The deduplicated names of the artists of the song.
+        """
 
-    def get_song(self, song_unique_id: str | Path) -> Song | None:
-        song_path = Path(song_unique_id)
+        artists_names = [
+            song.artist_name if song.artist_name is not None else "Unknown artist"
+        ]
 
-        try:
-            song_metadata = TinyTag.get(song_path)
-
-            if song_metadata.duration is None:
-                return None
-            return Song(
-                SongResourceId(self.node_instance_path, str(song_path.absolute())),
-                song_path.as_uri(),
-                song_metadata.duration,
-                song_metadata.title,
-                song_metadata.album,
-                song_metadata.artist,
+        if (
+            song.album_artist_name is not None
+            and song.album_artist_name not in artists_names
+        ):
+            artists_names.append(song.album_artist_name)
+
+        return artists_names
+
+    def add_song_to_catalog(self, song: Song) -> None:
+        """Register a song in the catalog and in the album and artist maps.
+
+        Args:
+            song: The song to register.
+        """
+
+        album_name = self.get_song_album_name(song)
+
+        self.songs[song.resource_id.unique_id] = song
+
+        if album_name not in self.albums:
+            self.album_songs[album_name] = []
+            self.albums[album_name] = Album(
+                AlbumResourceId(self.node_instance_path, album_name),
+                album_name,
+                self.album_songs[album_name],
             )
 
-        except TinyTagException:
-            return None
+        self.album_songs[album_name].append(song)
+
+        for artist_name in self.get_song_artists_names(song):
+            if artist_name not in self.artists:
+                self.artist_albums[artist_name] = []
+                self.artists[artist_name] = Artist(
+                    ArtistResourceId(self.node_instance_path, artist_name),
+                    artist_name,
+                    self.artist_albums[artist_name],
+                )
+
+            artist_album = (artist_name, album_name)
+            if artist_album not in self.artist_album_views:
+                self.artist_album_songs[artist_album] = []
+                self.artist_album_views[artist_album] = Album(
+                    AlbumResourceId(self.node_instance_path, album_name),
+                    album_name,
+                    self.artist_album_songs[artist_album],
+                )
+
+                self.artist_albums[artist_name].append(
+                    self.artist_album_views[artist_album]
+                )
+
+            self.artist_album_songs[artist_album].append(song)
+
+    def remove_song_from_catalog(self, unique_song_id: str) -> None:
+        """Drop a song from the catalog and from the album and artist maps,
+        removing the albums and artists that become empty.
+
+        Args:
+            unique_song_id: The unique id of the song to drop.
+        """
+
+        song = self.songs.pop(unique_song_id, None)
+        if song is None:
+            return
+
+        album_name = self.get_song_album_name(song)
+
+        album_songs = self.album_songs[album_name]
+        album_songs.remove(song)
+
+        if len(album_songs) == 0:
+            del self.album_songs[album_name]
+            del self.albums[album_name]
 
-    def load_album_artist_lists(self, songs_paths: list[Path]) -> None:
-        for song_path in songs_paths:
-            song = self.get_song(song_path)
+        for artist_name in self.get_song_artists_names(song):
+            artist_album = (artist_name, album_name)
 
-            if song is None:
+            artist_album_songs = self.artist_album_songs[artist_album]
+            artist_album_songs.remove(song)
+
+            if len(artist_album_songs) > 0:
                 continue
 
-            album_name = (
-                song.album_name if song.album_name is not None else "Unknown album"
+            album_view = self.artist_album_views.pop(artist_album)
+            del self.artist_album_songs[artist_album]
+
+            artist_albums = self.artist_albums[artist_name]
+            artist_albums[:] = [
+                artist_album_view
+                for artist_album_view in artist_albums
+                if artist_album_view is not album_view
+            ]
+
+            if len(artist_albums) == 0:
+                del self.artist_albums[artist_name]
+                del self.artists[artist_name]
+
+    def get_scan_executor(self) -> Executor:
+        """Create the pool of workers used to parse the files of the scan.
+
+        Returns:
+            A process or thread pool depending on the config of the provider.
+        """
+
+        if self.scan_executor == "thread":
+            return ThreadPoolExecutor(max_workers=self.scan_workers)
+
+        return ProcessPoolExecutor(
+            max_workers=self.scan_workers, mp_context=get_context(SCAN_START_METHOD)
+        )
+
+    def load_catalog(self, walked_files: Iterable[WalkedFile]) -> list[WalkedFile]:
+        """Fill the catalog with the songs found in the given files.
+
+        The files are parsed before taking the lock of the catalog, that is
+        only held to add the songs.
+
+        Args:
+            walked_files: The files to load, can be a lazy iterator.
+
+        Returns:
+            All the files that have been loaded.
+        """
+
+        files, songs = self.read_songs(walked_files)
+
+        with self._catalog_lock:
+            for song in songs:
+                self.add_song_to_catalog(song)
+
+        return files
+
+    def read_songs(
+        self, walked_files: Iterable[WalkedFile], job: Job | None = None
+    ) -> tuple[list[WalkedFile], list[Song]]:
+        """Build the songs found in the given files without touching the catalog.
+
+        Only the files that have changed since they were indexed are parsed,
+        they are sent in chunks to the scan workers as soon as they are
+        walked and merged back in the walk order, so the catalog is the same
+        regardless of the number of workers.
+
+        Args:
+            walked_files: The files to read, can be a lazy iterator.
+            job: Optional job that is reading the files, that gives way to
+                more urgent work after every chunk and stops early if it's
+                cancelled, leaving the result incomplete.
+
+        Returns:
+            All the files that have been read and the songs found in them.
+        """
+
+        start_time = time.perf_counter()
+
+        files: list[WalkedFile] = []
+        songs_tags: list[SongTags | None] = []
+
+        executor: Executor | None = None
+        parsed_chunks: list[tuple[list[int], Future[list[SongTags | None]]]] = []
+        changed_files_indexes: list[int] = []
+        parsed_files = 0
+
+        try:
+            for walked_file in walked_files:
+                entry = self.tag_index.get(
+                    str(walked_file.path), walked_file.mtime_ns, walked_file.size
+                )
+
+                files.append(walked_file)
+                songs_tags.append(entry.tags if entry is not None else None)
+
+                if entry is not None:
+                    continue
+
+                changed_files_indexes.append(len(files) - 1)
+                if len(changed_files_indexes) < SCAN_CHUNK_SIZE:
+                    continue
+
+                if job is not None:
+                    job.checkpoint()
+
+                    if job.is_cancel_requested():
+                        changed_files_indexes = []
+                        break
+
+                # The pool is only started once there is enough work to do,
+                # so a boot without changes never spawns any worker.
+                if executor is None and self.scan_workers > 1:
+                    executor = self.get_scan_executor()
+
+                if executor is not None:
+                    parsed_chunks.append(
+                        (
+                            changed_files_indexes,
+                            executor.submit(
+                                read_songs_tags,
+                                [files[index].path for index in changed_files_indexes],
+                            ),
+                        )
+                    )
+                else:
+                    self.store_songs_tags(
+                        files,
+                        songs_tags,
+                        changed_files_indexes,
+                        read_songs_tags(
+                            [files[index].path for index in changed_files_indexes]
+                        ),
+                    )
+
+                parsed_files += len(changed_files_indexes)
+                changed_files_indexes = []
+
+            self.store_songs_tags(
+                files,
+                songs_tags,
+                changed_files_indexes,
+                read_songs_tags([files[index].path for index in changed_files_indexes]),
             )
-            artist_name = (
-                song.artist_name if song.artist_name is not None else "Unknown artist"
+            parsed_files += len(changed_files_indexes)
+
+            for chunk_indexes, chunk_future in parsed_chunks:
+                if job is not None:
+                    job.checkpoint()
+
+                    if job.is_cancel_requested():
+                        break
+
+                self.store_songs_tags(
+                    files, songs_tags, chunk_indexes, chunk_future.result()
+                )
+
+        finally:
+            if executor is not None:
+                executor.shutdown(
+                    cancel_futures=job is not None and job.is_cancel_requested()
+                )
+
+        songs = [
+            self.build_song(walked_file.path, song_tags)
+            for walked_file, song_tags in zip(files, songs_tags)
+            if song_tags is not None
+        ]
+
+        elapsed_time = time.perf_counter() - start_time
+        self._logger.info(
+            f"Scanned {len(files)} files ({parsed_files} parsed "
+            + f"with {self.scan_workers} worker(s)) in {elapsed_time:.2f}s, "
+            + f"{len(files) / max(elapsed_time, 1e-9):.0f} files/s"
+        )
+
+        return files, songs
+
+    def store_songs_tags(
+        self,
+        files: list[WalkedFile],
+        songs_tags: list[SongTags | None],
+        indexes: list[int],
+        parsed_tags: list[SongTags | None],
+    ) -> None:
+        """Save the result of parsing a chunk of files in the scan results
+        and in the tag index.
+
+        Args:
+            files: All the files of the scan.
+            songs_tags: The tags of all the files of the scan.
+            indexes: The positions in the scan of the parsed files.
+            parsed_tags: The tags of the parsed files.
+        """
+
+        for index, song_tags in zip(indexes, parsed_tags):
+            walked_file = files[index]
+            songs_tags[index] = song_tags
+
+            self.tag_index.put(
+                str(walked_file.path),
+                IndexEntry(walked_file.mtime_ns, walked_file.size, song_tags),
             )
 
-            self.albums.setdefault(album_name, []).append(song_path)
-            self.artists.setdefault(artist_name, []).append(album_name)
+    def scan_library(self) -> None:
+        """Walk all the library and load all its songs into the catalog."""
 
-    def get_all_songs(self) -> list[Song]:
-        self.raise_failure_node_exception("A")
-        songs: list[Song] = []
+        self._logger.info("Scanning the library...")
+        files = self.load_catalog(self.walker.walk())
+
+        self.tag_index.prune({str(walked_file.path) for walked_file in files})
+
+    def apply_library_changes(self, changes: LibraryChanges) -> None:
+        """Update the catalog with a batch of changes detected by the
+        library watcher, only the changed files are loaded again.
+
+        Args:
+            changes: The batch of changes to apply.
+        """
+
+        # Keyed by path as the changed files can also be inside of a
+        # changed directory.
+        walked_files: dict[str, WalkedFile] = {}
+        walked_directories: list[str] = []
+
+        for path in sorted(changes.changed_paths):
+            if os.path.isdir(path):
+                for walked_file in self.walker.walk_directory(Path(path)):
+                    walked_files[str(walked_file.path)] = walked_file
+
+                walked_directories.append(path.rstrip(os.sep) + os.sep)
+                continue
+
+            if self.walker.is_excluded(path) or not self.walker.is_audio_file(path):
+                continue
+
+            try:
+                file_stat = os.stat(path)
+            except OSError:
+                continue
 
-        for song_path in self.songs_paths:
-            song = self.get_song(song_path)
+            walked_files[path] = WalkedFile(
+                Path(path), file_stat.st_mtime_ns, file_stat.st_size
+            )
+
+        # The catalog is only changed by the updates, so it can be read
+        # without its lock while holding the update one.
+        with self._update_lock:
+            # The songs of a changed directory that weren't walked again have
+            # been deleted without an event, as when the watcher lost events
+            # or the directory was replaced.
+            removed_paths = set(changes.removed_paths)
+            if len(walked_directories) > 0:
+                removed_paths.update(
+                    song_path
+                    for song_path in self.songs
+                    if song_path.startswith(tuple(walked_directories))
+                    and song_path not in walked_files
+                )
+
+            # Like on refresh, the unchanged files of a changed directory
+            # aren't loaded again.
+            changed_files = {
+                song_path: walked_file
+                for song_path, walked_file in walked_files.items()
+                if song_path in changes.changed_paths
+                or self.tag_index.get(song_path, walked_file.mtime_ns, walked_file.size)
+                is None
+            }
+
+            library_diff = self.update_catalog(changed_files, removed_paths)
+
+        self.notify_library_changes(library_diff)
+
+    def update_catalog(
+        self,
+        walked_files: dict[str, WalkedFile],
+        removed_paths: set[str],
+        job: Job | None = None,
+    ) -> LibraryDiff:
+        """Load again the given files and drop the removed ones from the catalog.
+
+        Args:
+            walked_files: The files to load again keyed by their path.
+            removed_paths: The removed files and directories.
+            job: Optional job that is updating the catalog, if it's cancelled
+                while parsing the files the catalog is left untouched.
+
+        Returns:
+            The songs, albums and artists that have changed.
+        """
+
+        with self._update_lock:
+            _, songs = self.read_songs(walked_files.values(), job)
+
+            if job is not None and job.is_cancel_requested():
+                # The parsed files are already in the tag index, so they're
+                # forgotten to be loaded again by the next update.
+                self.tag_index.remove(list(walked_files))
+                self._logger.info("Stopped updating the catalog, it's left untouched")
+                return LibraryDiff(self.node_instance_path)
+
+            with self._catalog_lock:
+                removed_songs_ids = [
+                    removed_path
+                    for removed_path in removed_paths
+                    if removed_path in self.songs
+                ]
+
+                # Any other removed path can be a directory, so all the songs
+                # inside of it are removed too.
+                removed_directories = tuple(
+                    removed_path.rstrip(os.sep) + os.sep
+                    for removed_path in removed_paths
+                    if removed_path not in self.songs
+                )
+
+                if len(removed_directories) > 0:
+                    removed_songs_ids.extend(
+                        unique_song_id
+                        for unique_song_id in self.songs
+                        if unique_song_id.startswith(removed_directories)
+                    )
+
+                touched_songs_ids = set(removed_songs_ids) | walked_files.keys()
+                previous_songs = {
+                    unique_song_id: self.songs[unique_song_id]
+                    for unique_song_id in touched_songs_ids
+                    if unique_song_id in self.songs
+                }
+                previous_albums = set(self.albums)
+                previous_artists = set(self.artists)
+
+                for unique_song_id in touched_songs_ids:
+                    self.remove_song_from_catalog(unique_song_id)
+
+                for song in songs:
+                    self.add_song_to_catalog(song)
+
+                current_songs = {
+                    unique_song_id: self.songs[unique_song_id]
+                    for unique_song_id in touched_songs_ids
+                    if unique_song_id in self.songs
+                }
+
+                library_diff = self.get_library_diff(
+                    previous_songs, current_songs, previous_albums, previous_artists
+                )
+
+            self.tag_index.remove(removed_songs_ids)
+            self.tag_index.flush()
+
+        return library_diff
+
+    def get_library_diff(
+        self,
+        previous_songs: dict[str, Song],
+        current_songs: dict[str, Song],
+        previous_albums: set[str],
+        previous_artists: set[str],
+    ) -> LibraryDiff:
+        """Compare the state of the catalog before and after an update.
+
+        Args:
+            previous_songs: The touched songs that were in the catalog before
+                the update.
+            current_songs: The touched songs that are in the catalog after
+                the update.
+            previous_albums: The albums that were in the catalog before the update.
+            previous_artists: The artists that were in the catalog before
+                the update.
+
+        Returns:
+            The songs, albums and artists that have changed.
+        """
+
+        library_diff = LibraryDiff(self.node_instance_path)
+
+        touched_albums: set[str] = set()
+        touched_artists: set[str] = set()
+
+        for unique_song_id in sorted(previous_songs.keys() | current_songs.keys()):
+            song_resource_id = SongResourceId(self.node_instance_path, unique_song_id)
+            previous_song = previous_songs.get(unique_song_id)
+            current_song = current_songs.get(unique_song_id)
+
+            for song in (previous_song, current_song):
+                if song is None:
+                    continue
 
-            if song is None:
+                touched_albums.add(self.get_song_album_name(song))
+                touched_artists.update(self.get_song_artists_names(song))
+
+            if previous_song is None:
+                library_diff.added.append(song_resource_id)
+            elif current_song is None:
+                library_diff.removed.append(song_resource_id)
+            elif previous_song != current_song:
+                library_diff.changed.append(song_resource_id)
+
+        for album_name in sorted(touched_albums):
+            album_resource_id = AlbumResourceId(self.node_instance_path, album_name)
+
+            if album_name not in previous_albums:
+                library_diff.added.append(album_resource_id)
+            elif album_name not in self.albums:
+                library_diff.removed.append(album_resource_id)
+            else:
+                library_diff.changed.append(album_resource_id)
+
+        for artist_name in sorted(touched_artists):
+            artist_resource_id = ArtistResourceId(self.node_instance_path, artist_name)
+
+            if artist_name not in previous_artists:
+                library_diff.added.append(artist_resource_id)
+            elif artist_name not in self.artists:
+                library_diff.removed.append(artist_resource_id)
+            else:
+                library_diff.changed.append(artist_resource_id)
+
+        return library_diff
+
+    def refresh(
+        self,
+        progress: Callable[[int, int], None] | None = None,
+        job: Job | None = None,
+    ) -> LibraryDiff | None:
+        """Walk the library looking for changes, only the files whose
+        modification time or size have changed are loaded again.
+
+        Args:
+            progress: Optional function called with the number of walked files
+                and the expected total while refreshing.
+            job: Optional job that is running the refresh, that gives way to
+                more urgent work and stops early if it's cancelled.
+
+        Returns:
+            The songs, albums and artists that have changed.
+        """
+
+        self._logger.info("Refreshing the library...")
+
+        with self._catalog_lock:
+            expected_files = len(self.songs)
+
+        walked_files: list[WalkedFile] = []
+        for walked_file in self.walker.walk():
+            walked_files.append(walked_file)
+
+            if len(walked_files) % REFRESH_PROGRESS_INTERVAL != 0:
                 continue
 
-            songs.append(song)
+            if progress is not None:
+                progress(len(walked_files), max(expected_files, len(walked_files)))
+
+            if job is not None:
+                job.checkpoint()
+
+                if job.is_cancel_requested():
+                    self._logger.info("Stopped refreshing the library")
+                    return LibraryDiff(self.node_instance_path)
+
+        # The catalog is only changed by the updates, so it can be read
+        # without its lock while holding the update one.
+        with self._update_lock:
+            changed_files = {
+                str(walked_file.path): walked_file
+                for walked_file in walked_files
+                if self.tag_index.get(
+                    str(walked_file.path), walked_file.mtime_ns, walked_file.size
+                )
+                is None
+            }
+
+            removed_paths = self.songs.keys() - {
+                str(walked_file.path) for walked_file in walked_files
+            }
+
+            library_diff = self.update_catalog(changed_files, removed_paths, job)
+
+        if progress is not None:
+            progress(len(walked_files), len(walked_files))
+
+        self.notify_library_changes(library_diff)
+
+        return library_diff
+
+    def get_song(self, unique_song_id: str) -> Song | None:
+        with self._catalog_lock:
+            return self.songs.get(unique_song_id)
+
+    def get_songs_batch(self, unique_songs_ids: list[str]) -> list[Song | None]:
+        with self._catalog_lock:
+            return [
+                self.songs.get(unique_song_id) for unique_song_id in unique_songs_ids
+            ]
+
+    def get_all_songs(self) -> list[Song]:
+        with self._catalog_lock:
+            return list(self.songs.values())
+
+    def iter_songs(self) -> Iterator[Song]:
+        # Only the references are copied while holding the lock, so the
+        # watcher is not blocked by slow consumers of the iterator.
+        with self._catalog_lock:
+            songs = tuple(self.songs.values())
 
-        return songs
+        yield from songs
 
-    def get_album(self, album_unique_id: str) -> Album:
-        songs: list[Song] = []
-        for song_path in self.albums[album_unique_id]:
-            song = self.get_song(song_path)
+    @staticmethod
+    def copy_album(album: Album) -> Album:
+        """Copy an album of the catalog along with its list of songs, that is
+        changed in place by the updates. The catalog lock must be held.
 
-            if song is not None:
-                songs.append(song)
+        Args:
+            album: The album to copy.
 
-        return Album(
-            AlbumResourceId(self.node_instance_path, album_unique_id),
-            album_unique_id,
-            songs,
+        Returns:
+            The copy of the album.
+        """
+
+        return replace(album, songs=list(album.songs or []))
+
+    @classmethod
+    def copy_artist(cls, artist: Artist) -> Artist:
+        """Copy an artist of the catalog along with its albums, whose lists
+        are changed in place by the updates. The catalog lock must be held.
+
+        Args:
+            artist: The artist to copy.
+
+        Returns:
+            The copy of the artist.
+        """
+
+        return replace(
+            artist, albums=[cls.copy_album(album) for album in artist.albums or []]
         )
 
+    def get_album(self, unique_album_id: str) -> Album | None:
+        with self._catalog_lock:
+            album = self.albums.get(unique_album_id)
+            return self.copy_album(album) if album is not None else None
+
     def get_all_albums(self) -> list[Album]:
-        albums: list[Album] = []
+        with self._catalog_lock:
+            return [self.copy_album(album) for album in self.albums.values()]
+
+    def iter_albums(self) -> Iterator[Album]:
+        # Only the references are copied while holding the lock and every
+        # album is copied once it's reached, so the watcher is not blocked by
+        # slow consumers of the iterator.
+        with self._catalog_lock:
+            albums = tuple(self.albums.items())
+
+        for album_name, album in albums:
+            with self._catalog_lock:
+                # The album has been removed meanwhile
+                if self.albums.get(album_name) is not album:
+                    continue
 
-        for album_name in self.albums.keys():
-            albums.append(self.get_album(album_name))
+                album_copy = self.copy_album(album)
 
-        return albums
+            yield album_copy
 
-    def get_artist(self, artist_unique_id: str) -> Artist:
-        return Artist(
-            ArtistResourceId(self.node_instance_path, artist_unique_id),
-            artist_unique_id,
-            [self.get_album(album) for album in self.albums.keys()],
-        )
+    def get_artist(self, unique_artist_id: str) -> Artist | None:
+        with self._catalog_lock:
+            artist = self.artists.get(unique_artist_id)
+            return self.copy_artist(artist) if artist is not None else None
 
     def get_all_artists(self) -> list[Artist]:
-        artists: list[Artist] = []
+        with self._catalog_lock:
+            return [self.copy_artist(artist) for artist in self.artists.values()]
+
+    def iter_artists(self) -> Iterator[Artist]:
+        # Only the references are copied while holding the lock and every
+        # artist is copied once it's reached, so the watcher is not blocked by
+        # slow consumers of the iterator.
+        with self._catalog_lock:
+            artists = tuple(self.artists.items())
+
+        for artist_name, artist in artists:
+            with self._catalog_lock:
+                # The artist has been removed meanwhile
+                if self.artists.get(artist_name) is not artist:
+                    continue
+
+                artist_copy = self.copy_artist(artist)
+
+            yield artist_copy
+
+    def cleanup(self) -> None | str:
+        """Stop watching the library and write the pending changes of the
+        tag index to the disk.
+
+        Returns:
+            None or a string with a error message if something goes wrong.
+        """
+
+        if self.watcher is not None:
+            self.watcher.stop()
 
-        for artist in self.artists.keys():
-            artists.append(self.get_artist(artist))
+        with self._update_lock:
+            self.tag_index.close()
 
-        return artists
+        return None
@@ -0,0 +1,305 @@
+import sqlite3
+from dataclasses import dataclass, field
+from logging import getLogger
+from pathlib import Path
+
+# Bump this value every time the layout of the index changes,
+# outdated indexes are dropped and rebuilt from scratch.
+SCHEMA_VERSION = 2
+
+# Number of pending entries that forces a write to the disk.
+FLUSH_THRESHOLD = 1000
+
+
+@dataclass
+class SongTags:
+    """Dataclass that holds the tags of an audio file needed to build a song."""
+
+    duration: float
+    title: str | None = field(default_factory=lambda: None)
+    album: str | None = field(default_factory=lambda: None)
+    artist: str | None = field(default_factory=lambda: None)
+    album_artist: str | None = field(default_factory=lambda: None)
+
+
+@dataclass
+class IndexEntry:
+    """Dataclass that holds a file indexed with the data used to detect
+    changes on it.
+
+    The tags are `None` when the file is not a valid song, so it is not parsed
+    again until it changes.
+    """
+
+    mtime_ns: int
+    size: int
+    tags: SongTags | None = field(default_factory=lambda: None)
+
+
+class TagIndex:
+    """Persistent on-disk index of the tags of the audio files stored in a
+    SQLite database.
+
+    Entries are keyed by the absolute path of the file and only considered
+    valid while its modification time and size don't change.
+    """
+
+    def __init__(self, index_file: Path) -> None:
+        """The tag index constructor method.
+
+        Args:
+            index_file: The path of the SQLite file that holds the index.
+        """
+
+        self._logger = getLogger(__name__)
+        self.index_file = index_file
+
+        self._closed = False
+        self._connection = self._open()
+        self._entries = self._load_entries()
+        self._pending: dict[str, IndexEntry | None] = {}
+
+    def _open(self) -> sqlite3.Connection:
+        """Open the index database, rebuilding it if it is corrupted.
+
+        Returns:
+            A connection to a ready to use index database.
+        """
+
+        try:
+            return self._connect()
+        except sqlite3.DatabaseError as error:
+            self._logger.warning(
+                f'The tag index "{self.index_file}" is corrupted '
+                + f'with error "{error}", rebuilding it...'
+            )
+
+        self.index_file.unlink(missing_ok=True)
+        return self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Connect to the index database and create its schema if needed.
+
+        Raises:
+            sqlite3.DatabaseError: Raised if the database is corrupted.
+
+        Returns:
+            A connection to the index database.
+        """
+
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.index_file, check_same_thread=False)
+
+        try:
+            if connection.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                raise sqlite3.DatabaseError("Integrity check failed")
+
+            schema_version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if schema_version != SCHEMA_VERSION:
+                self._logger.info(
+                    f"Tag index schema version {schema_version} is outdated, "
+                    + f"migrating to version {SCHEMA_VERSION}..."
+                )
+
+                connection.executescript(
+                    f"""
+                    DROP TABLE IF EXISTS files;
+                    CREATE TABLE files (
+                        path TEXT PRIMARY KEY,
+                        mtime_ns INTEGER NOT NULL,
+                        size INTEGER NOT NULL,
+                        duration REAL,
+                        title TEXT,
+                        album TEXT,
+                        artist TEXT,
+                        album_artist TEXT
+                    ) WITHOUT ROWID;
+                    PRAGMA user_version = {SCHEMA_VERSION};
+                    """
+                )
+
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+
+        return connection
+
+    def _load_entries(self) -> dict[str, IndexEntry]:
+        """Read all the entries stored in the index.
+
+        Returns:
+            A dictionary with the entries of the index keyed by their path.
+        """
+
+        try:
+            rows = self._connection.execute(
+                "SELECT path, mtime_ns, size, duration, title, album, artist, "
+                + "album_artist FROM files"
+            ).fetchall()
+        except sqlite3.DatabaseError as error:
+            self._recover(error)
+            return {}
+
+        entries: dict[str, IndexEntry] = {}
+        for path, mtime_ns, size, duration, title, album, artist, album_artist in rows:
+            entries[path] = IndexEntry(
+                mtime_ns,
+                size,
+                SongTags(duration, title, album, artist, album_artist)
+                if duration is not None
+                else None,
+            )
+
+        return entries
+
+    def _recover(self, error: sqlite3.DatabaseError) -> bool:
+        """Throw away a broken index and start a new empty one.
+
+        Using the index once it has been closed raises a programming error,
+        which doesn't mean that the file is broken, so it's kept.
+
+        Args:
+            error: The error that was raised using the broken index.
+
+        Returns:
+            True if the index has been rebuilt and false otherwise.
+        """
+
+        if self._closed or isinstance(error, sqlite3.ProgrammingError):
+            self._logger.warning(
+                f'The tag index "{self.index_file}" has failed '
+                + f'with error "{error}", keeping it'
+            )
+            return False
+
+        self._logger.warning(
+            f'The tag index "{self.index_file}" has failed '
+            + f'with error "{error}", rebuilding it...'
+        )
+
+        self._connection.close()
+        self.index_file.unlink(missing_ok=True)
+
+        self._connection = self._connect()
+        self._entries = {}
+
+        return True
+
+    def get(self, path: str, mtime_ns: int, size: int) -> IndexEntry | None:
+        """Get the indexed entry of a file if it hasn't changed since it was indexed.
+
+        Args:
+            path: The absolute path of the file.
+            mtime_ns: The current modification time of the file in nanoseconds.
+            size: The current size of the file in bytes.
+
+        Returns:
+            The entry of the file or `None` if the file is not indexed or
+                it has changed.
+        """
+
+        entry = self._entries.get(path)
+
+        if entry is None or entry.mtime_ns != mtime_ns or entry.size != size:
+            return None
+
+        return entry
+
+    def put(self, path: str, entry: IndexEntry) -> None:
+        """Add or replace the entry of a file.
+
+        Args:
+            path: The absolute path of the file.
+            entry: The entry to index.
+        """
+
+        self._entries[path] = entry
+        self._pending[path] = entry
+
+        if len(self._pending) >= FLUSH_THRESHOLD:
+            self.flush()
+
+    def remove(self, paths: list[str]) -> None:
+        """Remove the entries of the given files.
+
+        Args:
+            paths: The absolute paths of the files to remove.
+        """
+
+        for path in paths:
+            if self._entries.pop(path, None) is not None:
+                self._pending[path] = None
+
+        if len(self._pending) >= FLUSH_THRESHOLD:
+            self.flush()
+
+    def prune(self, alive_paths: set[str]) -> None:
+        """Remove all the entries of the files that are no longer available.
+
+        Args:
+            alive_paths: The paths of all the files that should be kept.
+        """
+
+        for path in self._entries.keys() - alive_paths:
+            del self._entries[path]
+            self._pending[path] = None
+
+        self.flush()
+
+    def flush(self) -> None:
+        """Write all the pending changes to the disk, they are dropped if the
+        index has already been closed."""
+
+        if len(self._pending) == 0:
+            return
+
+        if self._closed:
+            self._logger.warning(
+                f"Dropping {len(self._pending)} changes of the tag index "
+                + f'"{self.index_file}" made after closing it'
+            )
+            self._pending = {}
+            return
+
+        upserts = [
+            (
+                path,
+                entry.mtime_ns,
+                entry.size,
+                entry.tags.duration if entry.tags is not None else None,
+                entry.tags.title if entry.tags is not None else None,
+                entry.tags.album if entry.tags is not None else None,
+                entry.tags.artist if entry.tags is not None else None,
+                entry.tags.album_artist if entry.tags is not None else None,
+            )
+            for path, entry in self._pending.items()
+            if entry is not None
+        ]
+        deletions = [(path,) for path, entry in self._pending.items() if entry is None]
+        self._pending = {}
+
+        try:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    upserts,
+                )
+                self._connection.executemany(
+                    "DELETE FROM files WHERE path = ?", deletions
+                )
+        except sqlite3.DatabaseError as error:
+            # The in-memory entries are still valid, so they are queued again
+            # to be written into the fresh index on the next flush.
+            entries = self._entries
+            if not self._recover(error):
+                return
+
+            self._entries = entries
+            self._pending = {path: entry for path, entry in entries.items()}
+
+    def close(self) -> None:
+        """Write all the pending changes and close the index."""
+
+        self.flush()
+        self._closed = True
+        self._connection.close()
@@ -0,0 +1,237 @@
+import os
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from typing import Iterator
+
+# Extensions of the audio formats that can be parsed by TinyTag.
+DEFAULT_AUDIO_EXTENSIONS = [
+    ".mp3",
+    ".flac",
+    ".ogg",
+    ".oga",
+    ".opus",
+    ".m4a",
+    ".m4b",
+    ".mp4",
+    ".wav",
+    ".wma",
+    ".aif",
+    ".aiff",
+    ".aifc",
+]
+
+# Number of bytes read from the start of a file to sniff its format.
+MAGIC_BYTES_LENGTH = 12
+
+
+@dataclass
+class WalkedFile:
+    """Dataclass that holds a file found in the library with the stat data
+    needed to detect changes on it."""
+
+    path: Path
+    mtime_ns: int
+    size: int
+
+
+def has_audio_magic_bytes(header: bytes) -> bool:
+    """Check if the header of a file matches any of the supported audio formats.
+
+    Args:
+        header: The first bytes of the file.
+
+    Returns:
+        True if the header belongs to an audio file and false otherwise.
+    """
+
+    if header.startswith((b"ID3", b"fLaC", b"OggS")):
+        return True
+
+    # MPEG audio frame sync
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0:
+        return True
+
+    if header.startswith(b"RIFF") and header[8:12] == b"WAVE":
+        return True
+
+    if header.startswith(b"FORM") and header[8:12] in (b"AIFF", b"AIFC"):
+        return True
+
+    if header[4:8] == b"ftyp":
+        return True
+
+    # ASF header object GUID used by WMA files
+    return header.startswith(b"\x30\x26\xb2\x75\x8e\x66\xcf\x11")
+
+
+class LibraryWalker:
+    """Walker of the library directories built on top of `os.scandir`.
+
+    Excluded directories are pruned before descending into them, only audio
+    files are reported and symbolic links are followed detecting loops.
+    """
+
+    def __init__(
+        self,
+        paths: list[Path],
+        exclude_paths: list[Path],
+        audio_extensions: list[str],
+        sniff_magic_bytes: bool = False,
+        follow_symlinks: bool = True,
+    ) -> None:
+        """The library walker constructor method.
+
+        Args:
+            paths: The root directories of the library.
+            exclude_paths: The directories and files to skip.
+            audio_extensions: The extensions of the files to report.
+            sniff_magic_bytes: If the files with an unknown extension should
+                be reported when their first bytes belong to an audio file.
+            follow_symlinks: If the symbolic links should be followed.
+        """
+
+        self._logger = getLogger(__name__)
+
+        self.paths = [path.absolute() for path in paths]
+        self.exclude_paths = {str(path.absolute()) for path in exclude_paths}
+        self.audio_extensions = {extension.lower() for extension in audio_extensions}
+        self.sniff_magic_bytes = sniff_magic_bytes
+        self.follow_symlinks = follow_symlinks
+
+    def is_excluded(self, path: str) -> bool:
+        """Check if a path or any of its parents has been excluded.
+
+        Args:
+            path: The absolute path to check.
+
+        Returns:
+            True if the path is excluded and false otherwise.
+        """
+
+        while True:
+            if path in self.exclude_paths:
+                return True
+
+            parent = os.path.dirname(path)
+            if parent == path:
+                return False
+
+            path = parent
+
+    def is_audio_file(self, path: str) -> bool:
+        """Check if a file should be considered an audio file.
+
+        Args:
+            path: The path of the file.
+
+        Returns:
+            True if the file is an audio file and false otherwise.
+        """
+
+        if os.path.splitext(path)[1].lower() in self.audio_extensions:
+            return True
+
+        if not self.sniff_magic_bytes:
+            return False
+
+        try:
+            with open(path, "rb") as file:
+                return has_audio_magic_bytes(file.read(MAGIC_BYTES_LENGTH))
+        except OSError:
+            return False
+
+    def walk(self) -> Iterator[WalkedFile]:
+        """Walk all the library directories.
+
+        Yields:
+            The audio files found in the library, in a stable order.
+        """
+
+        visited_directories: set[tuple[int, int]] = set()
+
+        for path in self.paths:
+            if self.is_excluded(str(path)):
+                continue
+
+            yield from self.walk_directory(path, visited_directories)
+
+    def walk_directory(
+        self, path: Path, visited_directories: set[tuple[int, int]] | None = None
+    ) -> Iterator[WalkedFile]:
+        """Walk a single directory and all its subdirectories.
+
+        Args:
+            path: The absolute path of the directory.
+            visited_directories: The device and inode pairs of the directories
+                already walked, used to detect symbolic link loops.
+
+        Yields:
+            The audio files found in the directory, in a stable order.
+        """
+
+        if visited_directories is None:
+            visited_directories = set()
+
+        try:
+            root_stat = path.stat()
+        except OSError:
+            return
+
+        root_key = (root_stat.st_dev, root_stat.st_ino)
+        if root_key in visited_directories:
+            return
+
+        visited_directories.add(root_key)
+        pending_directories = [str(path)]
+
+        while len(pending_directories) > 0:
+            directory = pending_directories.pop()
+
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = sorted(iterator, key=lambda entry: entry.name)
+            except OSError as error:
+                self._logger.warning(f'Unable to read directory "{directory}": {error}')
+                continue
+
+            subdirectories: list[str] = []
+
+            for entry in entries:
+                if entry.path in self.exclude_paths:
+                    continue
+
+                try:
+                    if not self.follow_symlinks and entry.is_symlink():
+                        continue
+
+                    if entry.is_dir():
+                        # The stat result is cached by the entry, so it's
+                        # only requested once per directory.
+                        entry_stat = entry.stat()
+                        entry_key = (entry_stat.st_dev, entry_stat.st_ino)
+
+                        if entry_key in visited_directories:
+                            self._logger.debug(
+                                f'Skipping already walked directory "{entry.path}"'
+                            )
+                            continue
+
+                        visited_directories.add(entry_key)
+                        subdirectories.append(entry.path)
+                        continue
+
+                    if not entry.is_file() or not self.is_audio_file(entry.path):
+                        continue
+
+                    entry_stat = entry.stat()
+
+                except OSError:
+                    continue
+
+                yield WalkedFile(
+                    Path(entry.path), entry_stat.st_mtime_ns, entry_stat.st_size
+                )
+
+            # Reversed so the subdirectories are popped in alphabetical order
+            pending_directories.extend(reversed(subdirectories))
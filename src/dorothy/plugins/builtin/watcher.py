@@ -0,0 +1,499 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Callable
+
+from .walker import LibraryWalker
+
+# Inotify constants from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+# Modifications are only reported once the file is closed, so writing a file
+# in many small chunks doesn't generate a storm of events.
+WATCH_MASK = (
+    IN_CLOSE_WRITE
+    | IN_ATTRIB
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+EVENT_HEADER = struct.Struct("iIII")
+
+# Maximum time that a batch of changes can be held back while new events keep
+# arriving, relative to the debounce time.
+MAX_DELAY_FACTOR = 10
+
+
+@dataclass
+class LibraryChanges:
+    """Dataclass that holds a batch of changes detected in the library.
+
+    Changed paths can be files or directories that should be loaded again,
+    removed paths can be files or directories whose songs should be dropped.
+    """
+
+    changed_paths: set[str] = field(default_factory=lambda: set())
+    removed_paths: set[str] = field(default_factory=lambda: set())
+
+    def is_empty(self) -> bool:
+        """Check if the batch doesn't hold any change.
+
+        Returns:
+            True if there aren't changes and false otherwise.
+        """
+
+        return len(self.changed_paths) == 0 and len(self.removed_paths) == 0
+
+
+class LibraryWatcher(ABC):
+    """Watcher that reports the changes in the library in a background thread.
+
+    Changes are debounced and batched, so a big import is reported once when
+    the filesystem settles instead of once per file.
+    """
+
+    def __init__(
+        self,
+        walker: LibraryWalker,
+        on_changes: Callable[[LibraryChanges], None],
+        debounce_time: float,
+    ) -> None:
+        """The library watcher constructor method.
+
+        Args:
+            walker: The walker that knows the library directories.
+            on_changes: Function called from the watcher thread with every
+                batch of changes.
+            debounce_time: Seconds without new events needed to report a batch.
+        """
+
+        self._logger = getLogger(__name__)
+
+        self.walker = walker
+        self.on_changes = on_changes
+        self.debounce_time = debounce_time
+
+        self._pending = LibraryChanges()
+        self._first_event_time: float | None = None
+        self._last_event_time = 0.0
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=type(self).__name__, daemon=True
+        )
+
+    def start(self) -> None:
+        """Start watching the library in the background."""
+
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching the library and wait for the background thread to end."""
+
+        self._stop_event.set()
+
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def mark_changed(self, path: str) -> None:
+        """Add a changed path to the pending batch.
+
+        Args:
+            path: The changed file or directory.
+        """
+
+        self._pending.removed_paths.discard(path)
+        self._pending.changed_paths.add(path)
+        self._touch_pending()
+
+    def mark_removed(self, path: str) -> None:
+        """Add a removed path to the pending batch.
+
+        Args:
+            path: The removed file or directory.
+        """
+
+        self._pending.changed_paths.discard(path)
+        self._pending.removed_paths.add(path)
+        self._touch_pending()
+
+    def _touch_pending(self) -> None:
+        """Register that a new event has been added to the pending batch."""
+
+        self._last_event_time = time.monotonic()
+
+        if self._first_event_time is None:
+            self._first_event_time = self._last_event_time
+
+    def _time_until_flush(self) -> float | None:
+        """Get the time left until the pending batch should be reported.
+
+        Returns:
+            The seconds to wait or `None` if there isn't a pending batch.
+        """
+
+        if self._first_event_time is None:
+            return None
+
+        now = time.monotonic()
+
+        return max(
+            0.0,
+            min(
+                self._last_event_time + self.debounce_time - now,
+                self._first_event_time + self.debounce_time * MAX_DELAY_FACTOR - now,
+            ),
+        )
+
+    def flush(self) -> None:
+        """Report the pending batch of changes if there is any."""
+
+        changes = self._pending
+        self._pending = LibraryChanges()
+        self._first_event_time = None
+
+        if changes.is_empty():
+            return
+
+        self._logger.info(
+            f"Detected {len(changes.changed_paths)} changed and "
+            + f"{len(changes.removed_paths)} removed path(s) in the library"
+        )
+
+        try:
+            self.on_changes(changes)
+        except Exception:
+            self._logger.exception("Failed to apply the changes of the library")
+
+    def _run(self) -> None:
+        """Body of the background thread."""
+
+        try:
+            self.watch()
+        except Exception:
+            self._logger.exception("The library watcher has crashed")
+
+    @abstractmethod
+    def watch(self) -> None:
+        """Watch the library until the watcher is stopped, it should call
+        `flush` when the pending batch is due.
+        """
+
+        ...
+
+
+class InotifyWatcher(LibraryWatcher):
+    """Library watcher that uses the Linux inotify API through `ctypes`."""
+
+    def __init__(
+        self,
+        walker: LibraryWalker,
+        on_changes: Callable[[LibraryChanges], None],
+        debounce_time: float,
+    ) -> None:
+        """The inotify watcher constructor method, it sets up the watches of
+        all the library directories.
+
+        Args:
+            walker: The walker that knows the library directories.
+            on_changes: Function called from the watcher thread with every
+                batch of changes.
+            debounce_time: Seconds without new events needed to report a batch.
+
+        Raises:
+            OSError: Raised if inotify is not available or the library
+                can't be watched.
+        """
+
+        super().__init__(walker, on_changes, debounce_time)
+
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        self._watches: dict[int, str] = {}
+
+        try:
+            for path in self.walker.paths:
+                self.add_watches(str(path))
+        except OSError:
+            os.close(self._fd)
+            raise
+
+        self._logger.info(f"Watching {len(self._watches)} directories with inotify")
+
+    def add_watches(self, path: str) -> None:
+        """Watch a directory and all its subdirectories.
+
+        Args:
+            path: The absolute path of the directory.
+
+        Raises:
+            OSError: Raised if the kernel refuses to add more watches.
+        """
+
+        visited_directories: set[tuple[int, int]] = set()
+
+        for directory, subdirectories, _ in os.walk(
+            path, followlinks=self.walker.follow_symlinks
+        ):
+            try:
+                directory_stat = os.stat(directory)
+            except OSError:
+                subdirectories.clear()
+                continue
+
+            directory_key = (directory_stat.st_dev, directory_stat.st_ino)
+            if directory_key in visited_directories or self.walker.is_excluded(
+                directory
+            ):
+                subdirectories.clear()
+                continue
+
+            visited_directories.add(directory_key)
+
+            watch_descriptor = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), WATCH_MASK
+            )
+
+            if watch_descriptor < 0:
+                error = ctypes.get_errno()
+
+                # The directory could have been removed while walking it
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+
+                raise OSError(error, os.strerror(error), directory)
+
+            # Moved directories keep their watch descriptor,
+            # so it's updated to the new path.
+            self._watches[watch_descriptor] = directory
+
+    def watch(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                timeout = self._time_until_flush()
+                if timeout is None or timeout > self.debounce_time:
+                    timeout = self.debounce_time
+
+                readable, _, _ = select.select([self._fd], [], [], timeout)
+
+                if len(readable) > 0:
+                    self.read_events()
+
+                timeout = self._time_until_flush()
+                if timeout is not None and timeout <= 0:
+                    self.flush()
+
+        finally:
+            os.close(self._fd)
+
+    def read_events(self) -> None:
+        """Read all the available inotify events and add them to the pending batch."""
+
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(buffer):
+            watch_descriptor, mask, _, name_length = EVENT_HEADER.unpack_from(
+                buffer, offset
+            )
+            offset += EVENT_HEADER.size
+
+            name = os.fsdecode(buffer[offset : offset + name_length].rstrip(b"\0"))
+            offset += name_length
+
+            self.handle_event(watch_descriptor, mask, name)
+
+    def handle_event(self, watch_descriptor: int, mask: int, name: str) -> None:
+        """Translate an inotify event into a change of the library.
+
+        Args:
+            watch_descriptor: The watch that has received the event.
+            mask: The mask of the event.
+            name: The name of the affected file inside the watched directory.
+        """
+
+        if mask & IN_Q_OVERFLOW:
+            self._logger.warning("Inotify queue overflowed, rescanning the library")
+
+            # The directories created while the events were lost aren't
+            # watched yet.
+            for library_path in self.walker.paths:
+                try:
+                    self.add_watches(str(library_path))
+                except OSError as error:
+                    self._logger.warning(f'Unable to watch "{library_path}": {error}')
+
+                self.mark_changed(str(library_path))
+
+            return
+
+        if mask & IN_IGNORED:
+            self._watches.pop(watch_descriptor, None)
+            return
+
+        directory = self._watches.get(watch_descriptor)
+        if directory is None:
+            return
+
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            # Already reported by the event of its parent directory
+            return
+
+        path = os.path.join(directory, name) if name != "" else directory
+
+        if self.walker.is_excluded(path):
+            return
+
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            self.mark_removed(path)
+            return
+
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    self.add_watches(path)
+                except OSError as error:
+                    self._logger.warning(f'Unable to watch "{path}": {error}')
+
+                self.mark_changed(path)
+
+            return
+
+        self.mark_changed(path)
+
+
+class PollingWatcher(LibraryWatcher):
+    """Library watcher that walks the library periodically comparing the
+    modification time and size of the files."""
+
+    def __init__(
+        self,
+        walker: LibraryWalker,
+        on_changes: Callable[[LibraryChanges], None],
+        debounce_time: float,
+        poll_interval: float,
+    ) -> None:
+        """The polling watcher constructor method.
+
+        Args:
+            walker: The walker that knows the library directories.
+            on_changes: Function called from the watcher thread with every
+                batch of changes.
+            debounce_time: Seconds without new events needed to report a batch.
+            poll_interval: Seconds between every walk of the library.
+        """
+
+        super().__init__(walker, on_changes, debounce_time)
+
+        self.poll_interval = poll_interval
+
+    def snapshot(self) -> dict[str, tuple[int, int]]:
+        """Walk the library to get the state of all its files.
+
+        Returns:
+            The modification time and size of every file keyed by its path.
+        """
+
+        return {
+            str(walked_file.path): (walked_file.mtime_ns, walked_file.size)
+            for walked_file in self.walker.walk()
+        }
+
+    def watch(self) -> None:
+        previous_snapshot = self.snapshot()
+        self._logger.info(
+            f"Watching {len(previous_snapshot)} files polling every "
+            + f"{self.poll_interval}s"
+        )
+
+        while not self._stop_event.wait(self.poll_interval):
+            current_snapshot = self.snapshot()
+
+            for path in previous_snapshot.keys() - current_snapshot.keys():
+                self.mark_removed(path)
+
+            for path, file_state in current_snapshot.items():
+                if previous_snapshot.get(path) != file_state:
+                    self.mark_changed(path)
+
+            previous_snapshot = current_snapshot
+
+            # Every poll is already a batch of all the changes in the interval
+            self.flush()
+
+
+def create_library_watcher(
+    walker: LibraryWalker,
+    on_changes: Callable[[LibraryChanges], None],
+    backend: str = "auto",
+    debounce_time: float = 2.0,
+    poll_interval: float = 60.0,
+) -> LibraryWatcher:
+    """Create the best library watcher available in the system.
+
+    Args:
+        walker: The walker that knows the library directories.
+        on_changes: Function called from the watcher thread with every
+            batch of changes.
+        backend: Either "inotify", "polling" or "auto" to use inotify when
+            available and polling otherwise.
+        debounce_time: Seconds without new events needed to report a batch.
+        poll_interval: Seconds between every walk of the library when polling.
+
+    Returns:
+        The library watcher, not started yet.
+    """
+
+    logger = getLogger(__name__)
+
+    if backend in ("auto", "inotify"):
+        try:
+            return InotifyWatcher(walker, on_changes, debounce_time)
+        except (OSError, AttributeError) as error:
+            logger.warning(
+                f'Unable to use inotify with error "{error}", '
+                + "falling back to polling the library"
+            )
+
+    return PollingWatcher(walker, on_changes, debounce_time, poll_interval)
@@ -0,0 +1,126 @@
+from typing import Any
+
+from dorothy import (
+    Album,
+    AlbumResourceId,
+    Artist,
+    ArtistResourceId,
+    NodeInstancePath,
+    NodeManifest,
+    Provider,
+    Song,
+    SongResourceId,
+)
+
+# Route to the provider that owns the resources built by the tests.
+PROVIDER_PATH = NodeInstancePath("tests", "provider", "fake", "default")
+
+# Core config of the orchestrators built by the tests, that don't persist
+# the channels.
+ORCHESTRATOR_CONFIG: dict[str, dict[str, Any]] = {"persistence": {"enabled": False}}
+
+
+def make_song(
+    unique_id: str,
+    duration: float = 180.0,
+    node_instance_path: NodeInstancePath = PROVIDER_PATH,
+) -> Song:
+    """Build a song that isn't backed by any file.
+
+    Args:
+        unique_id: The unique id of the song, also used as its title.
+        duration: The duration of the song in seconds.
+        node_instance_path: The route to the provider of the song.
+
+    Returns:
+        The song.
+    """
+
+    return Song(
+        SongResourceId(node_instance_path, unique_id),
+        f"file:///{unique_id}.mp3",
+        duration,
+        unique_id,
+        "Album",
+        "Artist",
+    )
+
+
+def make_album(
+    unique_id: str,
+    songs: list[Song] | None,
+    node_instance_path: NodeInstancePath = PROVIDER_PATH,
+) -> Album:
+    """Build an album with the given songs.
+
+    Args:
+        unique_id: The unique id of the album, also used as its title.
+        songs: The songs of the album, or `None` if they aren't known.
+        node_instance_path: The route to the provider of the album.
+
+    Returns:
+        The album.
+    """
+
+    return Album(AlbumResourceId(node_instance_path, unique_id), unique_id, songs)
+
+
+class FakeProvider(Provider):
+    """Provider that serves from memory the resources it's given."""
+
+    def __init__(
+        self,
+        songs: list[Song] | None = None,
+        albums: list[Album] | None = None,
+        artists: list[Artist] | None = None,
+        node_instance_path: NodeInstancePath = PROVIDER_PATH,
+        config: dict[str, Any] | None = None,
+    ) -> None:
+        super().__init__(config if config is not None else {}, node_instance_path)
+
+        self.songs = {song.resource_id.unique_id: song for song in songs or []}
+        self.albums = {album.resource_id.unique_id: album for album in albums or []}
+        self.artists = {
+            artist.resource_id.unique_id: artist for artist in artists or []
+        }
+
+    @staticmethod
+    def get_node_manifest() -> NodeManifest:
+        return NodeManifest(name="fake")
+
+    def get_song(self, unique_song_id: str) -> Song | None:
+        return self.songs.get(unique_song_id)
+
+    def get_all_songs(self) -> list[Song]:
+        return list(self.songs.values())
+
+    def get_album(self, unique_album_id: str) -> Album | None:
+        return self.albums.get(unique_album_id)
+
+    def get_all_albums(self) -> list[Album]:
+        return list(self.albums.values())
+
+    def get_artist(self, unique_artist_id: str) -> Artist | None:
+        return self.artists.get(unique_artist_id)
+
+    def get_all_artists(self) -> list[Artist]:
+        return list(self.artists.values())
+
+
+def make_artist(
+    unique_id: str,
+    albums: list[Album],
+    node_instance_path: NodeInstancePath = PROVIDER_PATH,
+) -> Artist:
+    """Build an artist with the given albums.
+
+    Args:
+        unique_id: The unique id of the artist, also used as its name.
+        albums: The albums of the artist.
+        node_instance_path: The route to the provider of the artist.
+
+    Returns:
+        The artist.
+    """
+
+    return Artist(ArtistResourceId(node_instance_path, unique_id), unique_id, albums)
@@ -0,0 +1,143 @@
+import asyncio
+import time
+import unittest
+from typing import Iterator
+from unittest import mock
+
+from dorothy import LibraryDiff, NodeInstancePath, Orchestrator, Song
+from dorothy.exceptions import NodeFailureException
+
+from .helpers import ORCHESTRATOR_CONFIG, PROVIDER_PATH, FakeProvider, make_song
+
+# Route to a second provider of the orchestrator.
+OTHER_PROVIDER_PATH = NodeInstancePath("tests", "provider", "other", "default")
+
+
+class CountingProvider(FakeProvider):
+    """Provider that counts how many times its songs are listed."""
+
+    def __init__(
+        self, songs: list[Song], node_instance_path: NodeInstancePath = PROVIDER_PATH
+    ) -> None:
+        super().__init__(songs, node_instance_path=node_instance_path)
+
+        self.listings = 0
+
+    def get_all_songs(self) -> list[Song]:
+        self.listings += 1
+        return list(self.songs.values())
+
+
+class FailingProvider(CountingProvider):
+    """Provider that fails halfway through the listing of its songs once it's
+    told to."""
+
+    failing = False
+
+    def iter_songs(self) -> Iterator[Song]:
+        if not self.failing:
+            return super().iter_songs()
+
+        return self._iter_failing_songs()
+
+    def _iter_failing_songs(self) -> Iterator[Song]:
+        self.listings += 1
+        songs = list(self.songs.values())
+
+        yield from songs[: len(songs) // 2]
+        raise NodeFailureException("Lost the connection")
+
+
+class AggregateCacheTests(unittest.TestCase):
+    def make_orchestrator(
+        self, *providers: FakeProvider, time_to_live: float = 30.0
+    ) -> Orchestrator:
+        orchestrator = Orchestrator(
+            {**ORCHESTRATOR_CONFIG, "cache": {"aggregate_time_to_live": time_to_live}}
+        )
+        self.addCleanup(orchestrator._cleanup_nodes)
+
+        for provider in providers:
+            orchestrator._add_provider(provider)
+
+        return orchestrator
+
+    def test_resources_are_routed_to_their_provider(self) -> None:
+        song, other_song = (
+            make_song("a"),
+            make_song("b", node_instance_path=OTHER_PROVIDER_PATH),
+        )
+        orchestrator = self.make_orchestrator(
+            FakeProvider([song]),
+            FakeProvider([other_song], node_instance_path=OTHER_PROVIDER_PATH),
+        )
+
+        self.assertEqual(orchestrator.get_song(song.resource_id), song)
+        self.assertEqual(orchestrator.get_song(other_song.resource_id), other_song)
+        self.assertEqual(orchestrator.get_all_songs(), [song, other_song])
+
+    def test_aggregate_is_cached_until_the_library_changes(self) -> None:
+        provider = CountingProvider([make_song("a")])
+        provider.notifies_library_changes = True
+        orchestrator = self.make_orchestrator(provider)
+        listings = provider.listings
+
+        orchestrator.get_all_songs()
+        orchestrator.get_all_songs()
+        self.assertEqual(provider.listings, listings + 1)
+
+        song = make_song("b")
+        provider.songs["b"] = song
+        provider.notify_library_changes(
+            LibraryDiff(PROVIDER_PATH, added=[song.resource_id])
+        )
+
+        self.assertEqual(len(orchestrator.get_all_songs()), 2)
+        self.assertEqual(provider.listings, listings + 2)
+
+    def test_aggregate_of_silent_provider_expires(self) -> None:
+        provider = CountingProvider([make_song("a")])
+        orchestrator = self.make_orchestrator(provider)
+        listings = provider.listings
+
+        orchestrator.get_all_songs()
+        orchestrator.get_all_songs()
+        self.assertEqual(provider.listings, listings + 1)
+
+        with mock.patch(
+            "dorothy._orchestrator.time.monotonic", return_value=time.monotonic() + 60
+        ):
+            orchestrator.get_all_songs()
+
+        self.assertEqual(provider.listings, listings + 2)
+
+    def test_zero_time_to_live_disables_the_cache_of_silent_providers(self) -> None:
+        provider = CountingProvider([make_song("a")])
+        orchestrator = self.make_orchestrator(provider, time_to_live=0.0)
+        listings = provider.listings
+
+        orchestrator.get_all_songs()
+        orchestrator.get_all_songs()
+
+        self.assertEqual(provider.listings, listings + 2)
+
+    def test_aggregate_truncated_by_a_failure_isnt_cached(self) -> None:
+        songs = [make_song(str(index)) for index in range(4)]
+        provider = FailingProvider(songs)
+        provider.notifies_library_changes = True
+        orchestrator = self.make_orchestrator(provider)
+        provider.failing = True
+        listings = provider.listings
+
+        aggregate = orchestrator._get_aggregate(
+            "songs", lambda provider: provider.iter_songs()
+        )
+
+        self.assertEqual(aggregate.resources, songs[:2])
+        self.assertEqual(aggregate.unavailable, [PROVIDER_PATH])
+
+        # The async listing reads the same cache
+        provider.failing = False
+        asyncio.run(orchestrator.async_get_all_songs())
+
+        self.assertEqual(provider.listings, listings + 2)
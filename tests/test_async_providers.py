@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import unittest
+from typing import Iterator
+from unittest import mock
+
+from dorothy import Orchestrator, Song
+from dorothy.models import _provider
+
+from .helpers import ORCHESTRATOR_CONFIG, FakeProvider, make_song
+
+# Seconds to wait for the event loop to answer.
+WAIT_TIMEOUT = 5.0
+
+
+class BlockingProvider(FakeProvider):
+    """Sync provider whose listing blocks until it's released, and that
+    records how many songs have been pulled from its iterator."""
+
+    def __init__(self, songs: list[Song]) -> None:
+        super().__init__(songs)
+
+        self.release = threading.Event()
+        self.released_in_time: bool | None = None
+        self.listing_threads: list[int] = []
+        self.pulled_songs = 0
+
+    def get_all_songs(self) -> list[Song]:
+        self.listing_threads.append(threading.get_ident())
+        self.released_in_time = self.release.wait(WAIT_TIMEOUT)
+
+        return super().get_all_songs()
+
+    def iter_songs(self) -> Iterator[Song]:
+        for song in self.songs.values():
+            self.pulled_songs += 1
+            yield song
+
+
+class AsyncProviderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.songs = [make_song(f"{index}") for index in range(5)]
+        self.provider = BlockingProvider(self.songs)
+
+        self.orchestrator = Orchestrator(ORCHESTRATOR_CONFIG)
+        self.addCleanup(self.orchestrator._cleanup_nodes)
+
+        self.provider.release.set()
+        self.orchestrator._add_provider(self.provider)
+        self.provider.release.clear()
+        self.provider.pulled_songs = 0
+
+    def test_blocking_providers_dont_block_the_event_loop(self) -> None:
+        async def release_provider() -> None:
+            # Only reached if the loop keeps running while the provider blocks
+            await asyncio.sleep(0.01)
+            self.provider.release.set()
+
+        async def run() -> list[Song]:
+            aggregate_result, _ = await asyncio.gather(
+                self.orchestrator.async_get_all_songs(), release_provider()
+            )
+
+            return aggregate_result.resources
+
+        self.assertEqual(asyncio.run(run()), self.songs)
+        self.assertTrue(self.provider.released_in_time)
+        self.assertNotIn(threading.get_ident(), self.provider.listing_threads)
+
+    def test_async_iterators_pull_the_songs_in_chunks(self) -> None:
+        async def run() -> list[Song]:
+            songs = self.orchestrator.async_iter_songs()
+
+            first_song = await anext(songs)
+            self.assertEqual(self.provider.pulled_songs, 2)
+
+            return [first_song] + [song async for song in songs]
+
+        with mock.patch.object(_provider, "ASYNC_ITERATOR_CHUNK_SIZE", 2):
+            self.assertEqual(asyncio.run(run()), self.songs)
+
+    def test_resources_are_resolved_asynchronously(self) -> None:
+        async def run() -> tuple[Song | None, Song | None]:
+            return (
+                await self.orchestrator.async_get_song(self.songs[1].resource_id),
+                await self.orchestrator.async_get_song(
+                    make_song("missing").resource_id
+                ),
+            )
+
+        self.assertEqual(asyncio.run(run()), (self.songs[1], None))
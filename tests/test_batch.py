@@ -0,0 +1,93 @@
+import asyncio
+import unittest
+
+from dorothy import NodeInstancePath, Orchestrator, Song, SongResourceId
+from dorothy.exceptions import NodeFailureException
+
+from .helpers import ORCHESTRATOR_CONFIG, PROVIDER_PATH, FakeProvider, make_song
+
+# Route to a second provider of the orchestrator.
+OTHER_PROVIDER_PATH = NodeInstancePath("tests", "provider", "other", "default")
+
+# Route to a provider that isn't registered in the orchestrator.
+UNKNOWN_PROVIDER_PATH = NodeInstancePath("tests", "provider", "unknown", "default")
+
+
+class BatchProvider(FakeProvider):
+    """Provider that records the batches of songs it's asked for, and fails
+    them once it's told to."""
+
+    failing = False
+
+    def __init__(self, songs: list[Song], node_instance_path: NodeInstancePath) -> None:
+        super().__init__(songs, node_instance_path=node_instance_path)
+
+        self.batches: list[list[str]] = []
+
+    def get_songs_batch(self, unique_songs_ids: list[str]) -> list[Song | None]:
+        self.batches.append(unique_songs_ids)
+
+        if self.failing:
+            raise NodeFailureException("Lost the connection")
+
+        return [self.songs.get(unique_song_id) for unique_song_id in unique_songs_ids]
+
+
+class BatchResolutionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.songs = [make_song("a"), make_song("b")]
+        self.other_songs = [make_song("c", node_instance_path=OTHER_PROVIDER_PATH)]
+
+        self.provider = BatchProvider(self.songs, PROVIDER_PATH)
+        self.other_provider = BatchProvider(self.other_songs, OTHER_PROVIDER_PATH)
+
+        self.orchestrator = Orchestrator(ORCHESTRATOR_CONFIG)
+        self.addCleanup(self.orchestrator._cleanup_nodes)
+        self.orchestrator._add_provider(self.provider)
+        self.orchestrator._add_provider(self.other_provider)
+
+        self.resource_ids = [
+            self.songs[1].resource_id,
+            self.other_songs[0].resource_id,
+            SongResourceId(PROVIDER_PATH, "missing"),
+            SongResourceId(UNKNOWN_PROVIDER_PATH, "a"),
+            self.songs[0].resource_id,
+        ]
+
+    def test_songs_are_asked_in_a_batch_per_provider(self) -> None:
+        self.assertEqual(
+            self.orchestrator.get_songs(self.resource_ids),
+            [self.songs[1], self.other_songs[0], None, None, self.songs[0]],
+        )
+        self.assertEqual(self.provider.batches, [["b", "missing", "a"]])
+        self.assertEqual(self.other_provider.batches, [["c"]])
+
+    def test_cached_songs_arent_asked_again(self) -> None:
+        self.orchestrator.get_song(self.songs[0].resource_id)
+
+        self.orchestrator.get_songs(self.resource_ids)
+
+        self.assertEqual(self.provider.batches, [["b", "missing"]])
+
+    def test_songs_of_a_failing_provider_are_missing(self) -> None:
+        self.provider.failing = True
+
+        self.assertEqual(
+            self.orchestrator.get_songs(self.resource_ids),
+            [None, self.other_songs[0], None, None, None],
+        )
+
+    def test_async_batches_match_the_blocking_ones(self) -> None:
+        self.assertEqual(
+            asyncio.run(self.orchestrator.async_get_songs(self.resource_ids)),
+            [self.songs[1], self.other_songs[0], None, None, self.songs[0]],
+        )
+        self.assertEqual(self.provider.batches, [["b", "missing", "a"]])
+
+        self.other_provider.failing = True
+        self.orchestrator._resource_cache.invalidate_provider(OTHER_PROVIDER_PATH)
+
+        self.assertEqual(
+            asyncio.run(self.orchestrator.async_get_songs(self.resource_ids[:2])),
+            [self.songs[1], None],
+        )
@@ -0,0 +1,105 @@
+import unittest
+
+from dorothy import NodeInstancePath, Orchestrator, Song
+from dorothy._cache import ResourceCache
+
+from .helpers import ORCHESTRATOR_CONFIG, FakeProvider, make_song
+
+
+class ResourceCacheTests(unittest.TestCase):
+    def test_get_returns_the_cached_resource(self) -> None:
+        cache = ResourceCache(10)
+        song = make_song("a")
+
+        self.assertIsNone(cache.get(song.resource_id))
+
+        cache.put(song.resource_id, song)
+
+        self.assertIs(cache.get(song.resource_id), song)
+        stats = cache.get_stats()
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+
+    def test_least_recently_used_resource_is_evicted(self) -> None:
+        cache = ResourceCache(2)
+        a, b, c = make_song("a"), make_song("b"), make_song("c")
+
+        cache.put(a.resource_id, a)
+        cache.put(b.resource_id, b)
+        # Reading "a" makes "b" the least recently used one
+        cache.get(a.resource_id)
+        cache.put(c.resource_id, c)
+
+        self.assertIs(cache.get(a.resource_id), a)
+        self.assertIsNone(cache.get(b.resource_id))
+        self.assertIs(cache.get(c.resource_id), c)
+        self.assertEqual(cache.get_stats().evictions, 1)
+
+    def test_expired_resource_is_dropped(self) -> None:
+        cache = ResourceCache(10)
+        expired, valid = make_song("expired"), make_song("valid")
+
+        cache.put(expired.resource_id, expired, time_to_live=0.0)
+        cache.put(valid.resource_id, valid, time_to_live=3600.0)
+
+        self.assertIsNone(cache.get(expired.resource_id))
+        self.assertIs(cache.get(valid.resource_id), valid)
+        stats = cache.get_stats()
+        self.assertEqual((stats.expirations, stats.entries), (1, 1))
+
+    def test_invalidate_provider_only_drops_its_resources(self) -> None:
+        cache = ResourceCache(10)
+        other_path = NodeInstancePath("tests", "provider", "other", "default")
+        own, other = make_song("own"), make_song("other", node_instance_path=other_path)
+
+        cache.put(own.resource_id, own)
+        cache.put(other.resource_id, other)
+        cache.invalidate_provider(own.resource_id.node_instance_path)
+
+        self.assertIsNone(cache.get(own.resource_id))
+        self.assertIs(cache.get(other.resource_id), other)
+
+    def test_resource_resolved_before_an_invalidation_isnt_cached(self) -> None:
+        cache = ResourceCache(10)
+        other_path = NodeInstancePath("tests", "provider", "other", "default")
+        stale, other = (
+            make_song("stale"),
+            make_song("other", node_instance_path=other_path),
+        )
+
+        generation = cache.get_generation(stale.resource_id.node_instance_path)
+        other_generation = cache.get_generation(other_path)
+        # The resource changes while it's being resolved
+        cache.invalidate([stale.resource_id])
+
+        cache.put(stale.resource_id, stale, generation=generation)
+        cache.put(other.resource_id, other, generation=other_generation)
+
+        self.assertIsNone(cache.get(stale.resource_id))
+        self.assertIs(cache.get(other.resource_id), other)
+
+    def test_zero_max_entries_disables_the_cache(self) -> None:
+        cache = ResourceCache(0)
+        song = make_song("a")
+
+        cache.put(song.resource_id, song)
+
+        self.assertIsNone(cache.get(song.resource_id))
+
+
+class OrchestratorResourceCacheTests(unittest.TestCase):
+    def test_song_changed_while_resolving_it_isnt_cached(self) -> None:
+        song = make_song("song")
+        provider = FakeProvider([song])
+        orchestrator = Orchestrator(ORCHESTRATOR_CONFIG)
+        orchestrator._add_provider(provider)
+        self.addCleanup(orchestrator._cleanup_nodes)
+
+        def get_changing_song(unique_song_id: str) -> Song | None:
+            # The watcher reports the change before the lookup returns
+            provider.invalidate_cached_resources([song.resource_id])
+            return song
+
+        provider.get_song = get_changing_song  # type: ignore[method-assign]
+
+        self.assertIs(orchestrator.get_song(song.resource_id), song)
+        self.assertIsNone(orchestrator._resource_cache.get(song.resource_id))
@@ -0,0 +1,305 @@
+import threading
+import time
+import unittest
+
+from dorothy import Listener, NodeInstancePath, NodeManifest, Orchestrator, Song
+from dorothy._channel import (
+    GAPLESS_GRACE_PERIOD,
+    Channel,
+    ChannelChange,
+    ChannelChangeTypes,
+    ChannelStates,
+)
+from dorothy.exceptions import NodeFailureException
+
+from .helpers import ORCHESTRATOR_CONFIG, make_song
+
+# Seconds to wait for the listeners to follow the commands.
+WAIT_TIMEOUT = 5.0
+
+
+class FakeListener(Listener):
+    """Listener that records the commands it's sent."""
+
+    def __init__(self, name: str, gapless: bool) -> None:
+        super().__init__({}, NodeInstancePath("tests", "listener", name, "default"))
+
+        self.gapless = gapless
+        self.commands: list[tuple[str, str | None]] = []
+        self._commands_condition = threading.Condition()
+
+    @staticmethod
+    def get_node_manifest() -> NodeManifest:
+        return NodeManifest(name="fake")
+
+    def _record(self, command: str, song: Song | None = None) -> None:
+        with self._commands_condition:
+            self.commands.append((command, song.title if song is not None else None))
+            self._commands_condition.notify_all()
+
+    def wait_for_commands(self, count: int) -> list[tuple[str, str | None]]:
+        with self._commands_condition:
+            self._commands_condition.wait_for(
+                lambda: len(self.commands) >= count, WAIT_TIMEOUT
+            )
+
+            return list(self.commands)
+
+    def set_next_song(self, song: Song | None) -> None:
+        self._record("set_next_song", song)
+
+    def play(self, song: Song) -> None:
+        self._record("play", song)
+
+    def pause(self) -> None:
+        self._record("pause")
+
+    def stop(self) -> None:
+        self._record("stop")
+
+
+class GaplessHandOffTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.channel = Channel("main")
+        self.addCleanup(self.channel.cleanup_listeners)
+
+        self.gapless_listener = FakeListener("gapless", gapless=True)
+        self.listener = FakeListener("regular", gapless=False)
+        self.channel.add_listener(self.gapless_listener)
+        self.channel.add_listener(self.listener)
+
+        self.changes: list[ChannelChange] = []
+        self.channel.add_change_listener(self.changes.append)
+
+        self.songs = [make_song(title) for title in ("a", "b", "c")]
+        self.channel.insert_songs(self.songs, 0)
+
+    def test_playing_announces_the_next_song_to_gapless_listeners(self) -> None:
+        self.channel.play()
+
+        self.assertEqual(
+            self.gapless_listener.wait_for_commands(2),
+            [("play", "a"), ("set_next_song", "b")],
+        )
+        self.assertEqual(self.listener.wait_for_commands(1), [("play", "a")])
+
+    def test_song_started_by_gapless_listener_advances_the_channel(self) -> None:
+        self.channel.play()
+        self.gapless_listener.wait_for_commands(2)
+
+        self.channel.on_listener_song_start(self.gapless_listener, self.songs[1])
+
+        self.assertIs(self.channel.current_song, self.songs[1])
+        self.assertEqual(self.channel.get_queue(), self.songs[2:])
+        self.assertEqual(self.changes[-1].change_type, ChannelChangeTypes.ADVANCE)
+
+        # The gapless listener is already playing it, so it's only told the
+        # song after it, while the rest of the listeners change to it.
+        self.assertEqual(
+            self.gapless_listener.wait_for_commands(3),
+            [("play", "a"), ("set_next_song", "b"), ("set_next_song", "c")],
+        )
+        self.assertEqual(
+            self.listener.wait_for_commands(2), [("play", "a"), ("play", "b")]
+        )
+
+    def test_song_start_that_is_no_longer_next_is_ignored(self) -> None:
+        self.channel.play()
+        self.channel.remove_from_queue(0)
+
+        self.channel.on_listener_song_start(self.gapless_listener, self.songs[1])
+
+        self.assertIs(self.channel.current_song, self.songs[0])
+        self.assertEqual(self.channel.get_queue(), self.songs[2:])
+        self.assertEqual(
+            self.gapless_listener.wait_for_commands(3),
+            [("play", "a"), ("set_next_song", "b"), ("set_next_song", "c")],
+        )
+
+    def test_song_start_while_paused_is_ignored(self) -> None:
+        self.channel.play()
+        self.channel.pause()
+
+        self.channel.on_listener_song_start(self.gapless_listener, self.songs[1])
+
+        self.assertIs(self.channel.current_song, self.songs[0])
+        self.assertEqual(self.channel.channel_state, ChannelStates.PAUSED)
+
+    def test_gapless_listeners_get_a_grace_period(self) -> None:
+        self.channel.play()
+        song_deadline = self.channel.get_song_deadline()
+
+        assert song_deadline is not None
+        self.assertAlmostEqual(
+            song_deadline - self.channel._song_start_time,
+            self.songs[0].duration + GAPLESS_GRACE_PERIOD,
+        )
+
+    def test_stopping_clears_the_next_song(self) -> None:
+        self.channel.play()
+        self.channel.stop()
+
+        self.assertEqual(
+            self.gapless_listener.wait_for_commands(4),
+            [
+                ("play", "a"),
+                ("set_next_song", "b"),
+                ("stop", None),
+                ("set_next_song", None),
+            ],
+        )
+
+    def test_added_gapless_listener_is_told_the_next_song(self) -> None:
+        self.channel.play()
+
+        late_listener = FakeListener("late", gapless=True)
+        self.channel.add_listener(late_listener)
+
+        self.assertEqual(late_listener.wait_for_commands(1), [("set_next_song", "b")])
+
+
+class BlockingListener(FakeListener):
+    """Listener that doesn't follow the play commands until it's released."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name, gapless=False)
+
+        self.release = threading.Event()
+
+    def play(self, song: Song) -> None:
+        self.release.wait(WAIT_TIMEOUT)
+        super().play(song)
+
+
+class FailingListener(FakeListener):
+    """Listener whose node fails as soon as it's told to play."""
+
+    def play(self, song: Song) -> None:
+        raise NodeFailureException("Lost the output device")
+
+
+class ListenerQuarantineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.channel = Channel("main", listener_timeout=0.05)
+        self.addCleanup(self.channel.cleanup_listeners)
+
+        self.slow_listener = BlockingListener("slow")
+        self.listener = FakeListener("regular", gapless=False)
+        self.channel.add_listener(self.slow_listener)
+        self.channel.add_listener(self.listener)
+
+        # Released before the cleanup, so it doesn't wait for the listener
+        self.addCleanup(self.slow_listener.release.set)
+
+        self.channel.insert_songs([make_song("a"), make_song("b")], 0)
+
+    def wait_for_quarantine(self, quarantined: bool) -> None:
+        deadline = time.monotonic() + WAIT_TIMEOUT
+
+        while (
+            self.slow_listener in self.channel.get_quarantined_listeners()
+        ) != quarantined:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.005)
+
+    def test_slow_listener_doesnt_delay_the_rest(self) -> None:
+        start_time = time.monotonic()
+        self.channel.play()
+
+        self.assertLess(time.monotonic() - start_time, 1.0)
+        self.assertEqual(self.listener.wait_for_commands(1), [("play", "a")])
+
+    def test_slow_listener_is_quarantined_and_synchronized_once_it_returns(
+        self,
+    ) -> None:
+        self.channel.play()
+        self.wait_for_quarantine(True)
+
+        # The commands sent meanwhile only reach the rest of the listeners
+        self.channel.pause()
+        self.assertEqual(
+            self.listener.wait_for_commands(2), [("play", "a"), ("pause", None)]
+        )
+
+        self.slow_listener.release.set()
+        self.wait_for_quarantine(False)
+
+        self.assertEqual(
+            self.slow_listener.wait_for_commands(3),
+            [("play", "a"), ("play", "a"), ("pause", None)],
+        )
+
+    def test_failed_listener_is_removed(self) -> None:
+        failing_listener = FailingListener("failing", gapless=False)
+        self.channel.add_listener(failing_listener)
+
+        self.channel.play()
+        self.listener.wait_for_commands(1)
+
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while failing_listener in self.channel._listeners:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.005)
+
+        self.channel.pause()
+        self.assertEqual(
+            self.listener.wait_for_commands(2), [("play", "a"), ("pause", None)]
+        )
+
+
+class QueuePageTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.orchestrator = Orchestrator(ORCHESTRATOR_CONFIG)
+        self.addCleanup(self.orchestrator._cleanup_nodes)
+
+        self.channel = self.orchestrator._add_channel("main")
+        self.songs = [make_song(f"{index:02}") for index in range(10)]
+        self.channel.insert_songs(self.songs, 0)
+
+    def page_titles(self, cursor: str | None) -> tuple[list[str | None], str | None]:
+        page = self.orchestrator.get_queue_page("main", cursor, 4)
+
+        return [song.title for song in page.items], page.next_cursor
+
+    def test_channel_hands_out_slices_of_its_queue(self) -> None:
+        self.assertEqual(self.channel.get_queue_slice(2, 5), self.songs[2:5])
+        self.assertEqual(self.channel.get_queue_slice(8, 20), self.songs[8:])
+        self.assertEqual(self.channel.get_queue_length(), 10)
+
+    def test_pages_cover_the_whole_queue(self) -> None:
+        titles, cursor = self.page_titles(None)
+        self.assertEqual(titles, ["00", "01", "02", "03"])
+
+        titles, cursor = self.page_titles(cursor)
+        self.assertEqual(titles, ["04", "05", "06", "07"])
+
+        titles, cursor = self.page_titles(cursor)
+        self.assertEqual(titles, ["08", "09"])
+        self.assertIsNone(cursor)
+
+    def test_next_page_follows_the_last_song_when_the_queue_changes(self) -> None:
+        _, cursor = self.page_titles(None)
+
+        # The played songs and the ones queued in front move the last song
+        self.channel.remove_from_queue(0)
+        self.channel.insert_songs([make_song("new-1"), make_song("new-2")], 0)
+
+        titles, _ = self.page_titles(cursor)
+        self.assertEqual(titles, ["04", "05", "06", "07"])
+
+    def test_next_page_starts_at_the_old_position_without_its_last_song(
+        self,
+    ) -> None:
+        _, cursor = self.page_titles(None)
+
+        self.channel.remove_from_queue(3)
+
+        titles, _ = self.page_titles(cursor)
+        self.assertEqual(titles, ["05", "06", "07", "08"])
+
+    def test_malformed_cursors_and_limits_are_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            self.orchestrator.get_queue_page("main", "not a cursor", 4)
+
+        with self.assertRaises(ValueError):
+            self.orchestrator.get_queue_page("main", None, 0)
@@ -0,0 +1,135 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from dorothy._channel import Channel, ChannelStates
+from dorothy._channel_store import ChannelStore, FsyncPolicies
+
+from .helpers import make_song
+
+# Name of the channel, with characters that must be quoted in the file names.
+CHANNEL_NAME = "living room/main"
+
+
+class ChannelStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = Path(temporary_directory.name)
+
+    def open_store(self, snapshot_interval: int = 1000) -> tuple[ChannelStore, Channel]:
+        store = ChannelStore(
+            self.directory,
+            FsyncPolicies.ALWAYS,
+            snapshot_interval=snapshot_interval,
+        )
+        # Closing a store again once it's closed or crashed does nothing
+        self.addCleanup(store.close)
+
+        channel = Channel(CHANNEL_NAME)
+        self.addCleanup(channel.cleanup_listeners)
+
+        store.attach(channel)
+
+        return store, channel
+
+    def crash(self, store: ChannelStore) -> None:
+        """Wait for the queued writes and stop the writer without taking the
+        last snapshots, like a process that is killed."""
+
+        store._tasks.put(None)
+        store._writer.join()
+
+    def change_channel(self, channel: Channel) -> None:
+        channel.insert_songs([make_song(str(index)) for index in range(20)], 0)
+        channel.play()
+        channel.remove_from_queue(3)
+        channel.move_in_queue(0, 5)
+        channel.insert(make_song("inserted"), 2)
+        channel.play_from_queue_given_index(4)
+        channel.pause()
+
+    def assert_same_state(self, channel: Channel, expected: Channel) -> None:
+        self.assertEqual(channel.get_queue(), expected.get_queue())
+        self.assertEqual(channel.current_song, expected.current_song)
+
+    def test_state_is_restored_after_close(self) -> None:
+        store, channel = self.open_store()
+        self.change_channel(channel)
+        store.close()
+
+        _, restored_channel = self.open_store()
+
+        self.assert_same_state(restored_channel, channel)
+        self.assertEqual(restored_channel.channel_state, ChannelStates.PAUSED)
+
+    def test_journal_is_replayed_after_crash(self) -> None:
+        store, channel = self.open_store()
+        self.change_channel(channel)
+        self.crash(store)
+
+        _, restored_channel = self.open_store()
+
+        self.assert_same_state(restored_channel, channel)
+
+    def test_half_written_change_is_ignored(self) -> None:
+        store, channel = self.open_store()
+        self.change_channel(channel)
+        self.crash(store)
+
+        journal_path = next(self.directory.glob("*.journal"))
+        with open(journal_path, "a") as f:
+            f.write('{"sequence": 1000, "change_ty')
+
+        _, restored_channel = self.open_store()
+
+        self.assert_same_state(restored_channel, channel)
+
+    def test_changes_already_in_the_snapshot_are_skipped(self) -> None:
+        store, channel = self.open_store()
+        self.change_channel(channel)
+        self.crash(store)
+
+        # The journal is emptied once its changes are in a snapshot, keep it
+        # as if the process had crashed before emptying it.
+        journal_path = next(self.directory.glob("*.journal"))
+        journal = journal_path.read_text()
+        store, _ = self.open_store()
+        store.close()
+        journal_path.write_text(journal)
+
+        _, restored_channel = self.open_store()
+
+        self.assert_same_state(restored_channel, channel)
+
+    def test_snapshots_are_taken_every_interval(self) -> None:
+        store, channel = self.open_store(snapshot_interval=3)
+        self.change_channel(channel)
+        self.crash(store)
+
+        snapshot_path = next(self.directory.glob("*.snapshot.json"))
+        journal_path = next(self.directory.glob("*.journal"))
+
+        self.assertGreater(json.loads(snapshot_path.read_text())["sequence"], 0)
+        self.assertLess(len(journal_path.read_text().splitlines()), 3)
+
+        _, restored_channel = self.open_store()
+
+        self.assert_same_state(restored_channel, channel)
+
+    def test_snapshot_of_unknown_version_is_ignored(self) -> None:
+        store, channel = self.open_store()
+        self.change_channel(channel)
+        store.close()
+
+        snapshot_path = next(self.directory.glob("*.snapshot.json"))
+        snapshot = json.loads(snapshot_path.read_text())
+        snapshot["version"] = -1
+        snapshot_path.write_text(json.dumps(snapshot))
+
+        _, restored_channel = self.open_store()
+
+        self.assertEqual(restored_channel.get_queue(), [])
+        self.assertIsNone(restored_channel.current_song)
+        self.assertEqual(restored_channel.channel_state, ChannelStates.STOPPED)
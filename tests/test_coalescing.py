@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from dorothy._coalescing import RequestCoalescer
+
+# Seconds to wait for the callers to join a call in flight.
+JOIN_TIMEOUT = 5.0
+
+
+class RequestCoalescerTests(unittest.TestCase):
+    def wait_for_calls(self, coalescer: RequestCoalescer, calls: int) -> None:
+        deadline = time.monotonic() + JOIN_TIMEOUT
+
+        while coalescer.get_stats().calls < calls:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+
+    def test_concurrent_calls_share_a_single_execution(self) -> None:
+        coalescer = RequestCoalescer()
+        release = threading.Event()
+        executions = 0
+
+        def function() -> str:
+            nonlocal executions
+            executions += 1
+            release.wait(JOIN_TIMEOUT)
+            return "result"
+
+        with ThreadPoolExecutor(4) as executor:
+            futures = [
+                executor.submit(coalescer.do, ("get_song", "a"), function)
+                for _ in range(4)
+            ]
+            self.wait_for_calls(coalescer, 4)
+            release.set()
+
+            results = [future.result() for future in futures]
+
+        self.assertEqual(results, ["result"] * 4)
+        self.assertEqual(executions, 1)
+        stats = coalescer.get_stats()
+        self.assertEqual((stats.executions, stats.coalesced), (1, 3))
+        self.assertEqual(stats.coalesced_by_operation, {"get_song": 3})
+
+    def test_error_is_raised_to_every_caller(self) -> None:
+        coalescer = RequestCoalescer()
+        release = threading.Event()
+
+        def function() -> str:
+            release.wait(JOIN_TIMEOUT)
+            raise ValueError("Failed")
+
+        with ThreadPoolExecutor(2) as executor:
+            futures = [
+                executor.submit(coalescer.do, ("get_song", "a"), function)
+                for _ in range(2)
+            ]
+            self.wait_for_calls(coalescer, 2)
+            release.set()
+
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result()
+
+    def test_nothing_is_kept_once_the_call_ends(self) -> None:
+        coalescer = RequestCoalescer()
+
+        self.assertEqual(coalescer.do(("get_song", "a"), lambda: 1), 1)
+        self.assertEqual(coalescer.do(("get_song", "a"), lambda: 2), 2)
+        self.assertEqual(coalescer.get_stats().executions, 2)
+
+    def test_different_keys_are_not_coalesced(self) -> None:
+        coalescer = RequestCoalescer()
+
+        async def run() -> list[str]:
+            async def get(key: str) -> str:
+                await asyncio.sleep(0)
+                return key
+
+            return list(
+                await asyncio.gather(
+                    coalescer.async_do(("get_song", "a"), lambda: get("a")),
+                    coalescer.async_do(("get_song", "b"), lambda: get("b")),
+                )
+            )
+
+        self.assertEqual(asyncio.run(run()), ["a", "b"])
+        self.assertEqual(coalescer.get_stats().executions, 2)
+
+    def test_async_calls_share_a_single_task(self) -> None:
+        coalescer = RequestCoalescer()
+        executions = 0
+
+        async def run() -> list[str]:
+            release = asyncio.Event()
+
+            async def get() -> str:
+                nonlocal executions
+                executions += 1
+                await release.wait()
+                return "result"
+
+            callers = [
+                asyncio.ensure_future(coalescer.async_do(("get_song", "a"), get))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0)
+
+            # A cancelled caller doesn't cancel the call for the rest of them
+            callers[0].cancel()
+            await asyncio.sleep(0)
+            release.set()
+
+            return await asyncio.gather(*callers[1:])
+
+        self.assertEqual(asyncio.run(run()), ["result"] * 2)
+        self.assertEqual(executions, 1)
+        self.assertEqual(coalescer.get_stats().coalesced, 2)
@@ -0,0 +1,92 @@
+import asyncio
+import time
+import unittest
+
+from dorothy import AggregateResult, NodeInstancePath, Orchestrator, Song
+
+from .helpers import ORCHESTRATOR_CONFIG, PROVIDER_PATH, FakeProvider, make_song
+
+# Route to a second provider of the orchestrator.
+OTHER_PROVIDER_PATH = NodeInstancePath("tests", "provider", "other", "default")
+
+
+class SlowProvider(FakeProvider):
+    """Provider that takes a while to list its songs asynchronously."""
+
+    def __init__(
+        self,
+        songs: list[Song],
+        node_instance_path: NodeInstancePath,
+        delay: float,
+        deadline: float = 10.0,
+    ) -> None:
+        super().__init__(
+            songs, node_instance_path=node_instance_path, config={"deadline": deadline}
+        )
+
+        self.delay = delay
+        self.listings = 0
+
+    async def async_get_all_songs(self) -> list[Song]:
+        self.listings += 1
+        await asyncio.sleep(self.delay)
+
+        return self.get_all_songs()
+
+
+class FanOutTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.songs = [make_song("a")]
+        self.other_songs = [make_song("b", node_instance_path=OTHER_PROVIDER_PATH)]
+
+        self.orchestrator = Orchestrator(ORCHESTRATOR_CONFIG)
+        self.addCleanup(self.orchestrator._cleanup_nodes)
+
+    def get_all_songs(self) -> AggregateResult[Song]:
+        return asyncio.run(self.orchestrator.async_get_all_songs())
+
+    def test_providers_are_asked_at_the_same_time(self) -> None:
+        self.orchestrator._add_provider(SlowProvider(self.songs, PROVIDER_PATH, 0.2))
+        self.orchestrator._add_provider(
+            SlowProvider(self.other_songs, OTHER_PROVIDER_PATH, 0.2)
+        )
+
+        start_time = time.monotonic()
+        aggregate_result = self.get_all_songs()
+
+        self.assertLess(time.monotonic() - start_time, 0.35)
+        self.assertEqual(aggregate_result.resources, self.songs + self.other_songs)
+        self.assertFalse(aggregate_result.is_partial())
+
+    def test_late_provider_is_skipped_after_its_deadline(self) -> None:
+        late_provider = SlowProvider(self.songs, PROVIDER_PATH, 5.0, deadline=0.05)
+        self.orchestrator._add_provider(late_provider)
+        self.orchestrator._add_provider(
+            SlowProvider(self.other_songs, OTHER_PROVIDER_PATH, 0.0)
+        )
+
+        start_time = time.monotonic()
+        aggregate_result = self.get_all_songs()
+
+        self.assertLess(time.monotonic() - start_time, 1.0)
+        self.assertEqual(aggregate_result.resources, self.other_songs)
+        self.assertEqual(aggregate_result.timed_out, [PROVIDER_PATH])
+        self.assertTrue(aggregate_result.is_partial())
+
+        # Partial results aren't cached, so the provider is asked again
+        self.get_all_songs()
+        self.assertEqual(late_provider.listings, 2)
+
+    def test_unavailable_provider_isnt_waited_for(self) -> None:
+        unavailable_provider = SlowProvider(self.songs, PROVIDER_PATH, 5.0)
+        self.orchestrator._add_provider(unavailable_provider)
+        self.orchestrator._add_provider(
+            SlowProvider(self.other_songs, OTHER_PROVIDER_PATH, 0.0)
+        )
+        self.orchestrator.health.record_failure(PROVIDER_PATH, "Down", trip=True)
+
+        aggregate_result = self.get_all_songs()
+
+        self.assertEqual(aggregate_result.resources, self.other_songs)
+        self.assertEqual(aggregate_result.unavailable, [PROVIDER_PATH])
+        self.assertEqual(unavailable_provider.listings, 0)
@@ -0,0 +1,395 @@
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from typing import Any, Callable
+from unittest import mock
+
+from dorothy import (
+    AlbumResourceId,
+    ArtistResourceId,
+    Job,
+    LibraryDiff,
+    NodeInstancePath,
+    SongResourceId,
+)
+from dorothy.plugins.builtin import providers
+from dorothy.plugins.builtin.providers import FilesystemProvider
+from dorothy.plugins.builtin.tag_index import SongTags
+from dorothy.plugins.builtin.watcher import LibraryChanges
+
+PROVIDER_PATH = NodeInstancePath("builtin", "provider", "filesystem", "default")
+
+
+class TemporaryFilesystemProvider(FilesystemProvider):
+    """Filesystem provider that keeps its tag index next to the library."""
+
+    def get_tag_index_file(self) -> Path:
+        return Path(self.config["paths"][0]).parent / "tags.sqlite3"
+
+
+class FilesystemProviderTests(unittest.TestCase):
+    """The songs are text files holding their title, album, artist and
+    optionally album artist, so they can be written and parsed without real
+    audio files."""
+
+    def setUp(self) -> None:
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+
+        self.library = Path(temporary_directory.name) / "music"
+        self.library.mkdir()
+
+        self.parsed_paths: list[Path] = []
+        self.on_parse: Callable[[], None] = lambda: None
+
+        patcher = mock.patch.object(providers, "read_song_tags", self.read_song_tags)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_song_tags(self, song_path: Path) -> SongTags | None:
+        self.parsed_paths.append(song_path)
+        self.on_parse()
+
+        # The album artist is optional
+        return SongTags(60.0, *song_path.read_text().split("|"))
+
+    def write_song(self, name: str, tags: str, mtime_ns: int = 10**18) -> str:
+        song_path = self.library / name
+        song_path.parent.mkdir(parents=True, exist_ok=True)
+        song_path.write_text(tags)
+
+        # The mtime is set by hand so a rewrite is always seen as a change
+        os.utime(song_path, ns=(mtime_ns, mtime_ns))
+
+        return str(song_path)
+
+    def make_provider(self, **config: Any) -> FilesystemProvider:
+        provider = TemporaryFilesystemProvider(
+            {
+                "paths": [str(self.library)],
+                "exclude_paths": [],
+                "scan_workers": 1,
+                "watch": False,
+                **config,
+            },
+            PROVIDER_PATH,
+        )
+        self.addCleanup(provider.cleanup)
+
+        return provider
+
+    def test_scan_groups_the_songs_by_album_and_artist(self) -> None:
+        first_path = self.write_song("a/1.mp3", "One|Album|Artist")
+        second_path = self.write_song("a/2.mp3", "Two|Album|Guest")
+        self.write_song("notes.txt", "Not|A|Song")
+
+        provider = self.make_provider()
+
+        self.assertEqual(provider.songs.keys(), {first_path, second_path})
+
+        album = provider.get_album("Album")
+        assert album is not None
+        self.assertEqual([song.title for song in album.songs or []], ["One", "Two"])
+
+        guest = provider.get_artist("Guest")
+        assert guest is not None
+        self.assertEqual(
+            [
+                [song.title for song in artist_album.songs or []]
+                for artist_album in guest.albums or []
+            ],
+            [["Two"]],
+        )
+
+    def test_artists_only_hold_their_own_songs(self) -> None:
+        self.write_song("1.mp3", "One|Hits|Solo|Various")
+        self.write_song("2.mp3", "Two|Hits|Duo|Various")
+        self.write_song("3.mp3", "Three|Hits|Solo|Various")
+        self.write_song("4.mp3", "Four|Debut|Solo")
+        self.write_song("5.mp3", "Five|Live|Various|Various")
+
+        provider = self.make_provider()
+
+        def get_artist_albums(artist_name: str) -> dict[str | None, list[str | None]]:
+            artist = provider.get_artist(artist_name)
+            assert artist is not None
+
+            return {
+                album.title: [song.title for song in album.songs or []]
+                for album in artist.albums or []
+            }
+
+        self.assertEqual(
+            get_artist_albums("Solo"), {"Hits": ["One", "Three"], "Debut": ["Four"]}
+        )
+        self.assertEqual(get_artist_albums("Duo"), {"Hits": ["Two"]})
+        self.assertEqual(
+            get_artist_albums("Various"),
+            {"Hits": ["One", "Two", "Three"], "Live": ["Five"]},
+        )
+
+        # The whole album is still listed with every artist
+        hits = provider.get_album("Hits")
+        assert hits is not None
+        self.assertEqual(len(hits.songs or []), 3)
+
+    def test_artists_without_songs_are_dropped(self) -> None:
+        self.write_song("1.mp3", "One|Hits|Solo|Various")
+        duo_path = self.write_song("2.mp3", "Two|Hits|Duo|Various")
+        self.write_song("3.mp3", "Three|Debut|Duo")
+        provider = self.make_provider()
+
+        provider.update_catalog({}, {duo_path})
+
+        duo = provider.get_artist("Duo")
+        assert duo is not None
+        self.assertEqual([album.title for album in duo.albums or []], ["Debut"])
+
+        provider.update_catalog({}, {str(self.library / "3.mp3")})
+
+        self.assertIsNone(provider.get_artist("Duo"))
+        self.assertEqual(
+            {artist.name for artist in provider.get_all_artists()}, {"Solo", "Various"}
+        )
+
+    def test_workers_load_the_songs_in_walk_order(self) -> None:
+        songs_paths = [
+            self.write_song(f"{directory}/{index:02}.mp3", f"{index}|{directory}|A")
+            for directory in ("a", "b", "c")
+            for index in range(7)
+        ]
+
+        with mock.patch.object(providers, "SCAN_CHUNK_SIZE", 3):
+            provider = self.make_provider(scan_workers=4, scan_executor="thread")
+
+        self.assertEqual(list(provider.songs), songs_paths)
+        self.assertEqual(
+            sorted(self.parsed_paths), [Path(path) for path in songs_paths]
+        )
+
+        album = provider.get_album("b")
+        assert album is not None
+        self.assertEqual(
+            [song.title for song in album.songs or []],
+            [str(index) for index in range(7)],
+        )
+
+    def test_unchanged_library_is_loaded_from_the_tag_index(self) -> None:
+        for index in range(10):
+            self.write_song(f"{index}.mp3", f"{index}|Album|Artist")
+
+        with mock.patch.object(providers, "SCAN_CHUNK_SIZE", 3):
+            first_provider = self.make_provider(scan_workers=4, scan_executor="thread")
+            first_provider.cleanup()
+
+            self.parsed_paths.clear()
+            with mock.patch.object(
+                TemporaryFilesystemProvider, "get_scan_executor"
+            ) as get_scan_executor_mock:
+                provider = self.make_provider(scan_workers=4, scan_executor="thread")
+
+        self.assertEqual(self.parsed_paths, [])
+        get_scan_executor_mock.assert_not_called()
+        self.assertEqual(len(provider.songs), 10)
+        self.assertEqual(provider.songs.keys(), first_provider.songs.keys())
+
+    def test_process_workers_arent_forked(self) -> None:
+        provider = self.make_provider(scan_workers=2)
+
+        with mock.patch.object(providers, "ProcessPoolExecutor") as executor_mock:
+            provider.get_scan_executor()
+
+        self.assertNotEqual(providers.SCAN_START_METHOD, "fork")
+        self.assertEqual(
+            executor_mock.call_args.kwargs["mp_context"].get_start_method(),
+            providers.SCAN_START_METHOD,
+        )
+
+    def test_refresh_reports_the_changed_songs_albums_and_artists(self) -> None:
+        kept_path = self.write_song("kept.mp3", "Kept|Album|Artist")
+        changed_path = self.write_song("changed.mp3", "Old|Album|Artist")
+        removed_path = self.write_song("removed.mp3", "Gone|Single|Solo")
+
+        provider = self.make_provider()
+
+        self.write_song("changed.mp3", "New|Album|Artist", 2 * 10**18)
+        os.remove(removed_path)
+        added_path = self.write_song("added.mp3", "Added|Other|Artist")
+
+        self.parsed_paths.clear()
+        library_diff = provider.refresh()
+        assert library_diff is not None
+
+        self.assertEqual(
+            sorted(self.parsed_paths),
+            [Path(added_path), Path(changed_path)],
+        )
+        self.assertEqual(provider.songs.keys(), {kept_path, changed_path, added_path})
+        self.assertEqual(
+            library_diff.added,
+            [
+                SongResourceId(PROVIDER_PATH, added_path),
+                AlbumResourceId(PROVIDER_PATH, "Other"),
+            ],
+        )
+        self.assertEqual(
+            library_diff.removed,
+            [
+                SongResourceId(PROVIDER_PATH, removed_path),
+                AlbumResourceId(PROVIDER_PATH, "Single"),
+                ArtistResourceId(PROVIDER_PATH, "Solo"),
+            ],
+        )
+        self.assertEqual(
+            library_diff.changed,
+            [
+                SongResourceId(PROVIDER_PATH, changed_path),
+                AlbumResourceId(PROVIDER_PATH, "Album"),
+                ArtistResourceId(PROVIDER_PATH, "Artist"),
+            ],
+        )
+
+    def test_removed_directory_drops_the_songs_inside(self) -> None:
+        self.write_song("a/1.mp3", "One|Album|Artist")
+        self.write_song("a/b/2.mp3", "Two|Album|Artist")
+        kept_path = self.write_song("ab/3.mp3", "Three|Other|Artist")
+
+        provider = self.make_provider()
+        provider.update_catalog({}, {str(self.library / "a")})
+
+        self.assertEqual(provider.songs.keys(), {kept_path})
+        self.assertIsNone(provider.get_album("Album"))
+
+    def test_changed_directory_drops_the_songs_deleted_inside(self) -> None:
+        kept_path = self.write_song("a/1.mp3", "One|Album|Artist")
+        removed_path = self.write_song("a/2.mp3", "Two|Album|Artist")
+        replaced_path = self.write_song("b/3.mp3", "Three|Other|Artist")
+        provider = self.make_provider()
+
+        library_diffs: list[LibraryDiff] = []
+        provider.add_library_listener(library_diffs.append)
+
+        # Deleted while the watcher lost its events, so only the library is
+        # reported as changed.
+        os.remove(removed_path)
+        os.remove(replaced_path)
+        added_path = self.write_song("b/4.mp3", "Four|Other|Artist")
+
+        self.parsed_paths.clear()
+        provider.apply_library_changes(LibraryChanges({str(self.library)}, set()))
+
+        self.assertEqual(provider.songs.keys(), {kept_path, added_path})
+        self.assertEqual(self.parsed_paths, [Path(added_path)])
+
+        album = provider.get_album("Album")
+        assert album is not None
+        self.assertEqual([song.title for song in album.songs or []], ["One"])
+
+        self.assertEqual(len(library_diffs), 1)
+        self.assertEqual(
+            library_diffs[0].added, [SongResourceId(PROVIDER_PATH, added_path)]
+        )
+        self.assertEqual(
+            library_diffs[0].removed,
+            [
+                SongResourceId(PROVIDER_PATH, removed_path),
+                SongResourceId(PROVIDER_PATH, replaced_path),
+            ],
+        )
+
+    def test_handed_out_albums_and_artists_dont_change(self) -> None:
+        first_path = self.write_song("1.mp3", "One|Album|Artist")
+        second_path = self.write_song("2.mp3", "Two|Album|Artist")
+        provider = self.make_provider()
+
+        album = provider.get_album("Album")
+        artist = provider.get_artist("Artist")
+        iterated_albums = provider.iter_albums()
+        next(provider.iter_artists())
+
+        self.write_song("3.mp3", "Three|Album|Artist")
+        os.remove(first_path)
+        provider.refresh()
+
+        assert album is not None and artist is not None
+        self.assertEqual([song.title for song in album.songs or []], ["One", "Two"])
+        self.assertEqual(
+            [song.title for song in (artist.albums or [])[0].songs or []],
+            ["One", "Two"],
+        )
+
+        # Iterators copy the albums once they are reached
+        self.assertEqual(
+            [
+                [song.title for song in iterated_album.songs or []]
+                for iterated_album in iterated_albums
+            ],
+            [["Two", "Three"]],
+        )
+        self.assertEqual(
+            provider.songs.keys() - {second_path}, {str(self.library / "3.mp3")}
+        )
+
+    def test_catalog_is_readable_while_parsing(self) -> None:
+        self.write_song("old.mp3", "Old|Album|Artist")
+        provider = self.make_provider()
+        self.write_song("new.mp3", "New|Album|Artist")
+
+        readers_done: list[bool] = []
+
+        def read_catalog() -> None:
+            reader = threading.Thread(target=provider.get_all_songs)
+            reader.start()
+            reader.join(timeout=5.0)
+
+            readers_done.append(not reader.is_alive())
+
+        self.on_parse = read_catalog
+        provider.refresh()
+
+        self.assertEqual(readers_done, [True])
+        self.assertEqual(len(provider.get_all_songs()), 2)
+
+    def test_cancelled_refresh_leaves_the_catalog_untouched(self) -> None:
+        old_path = self.write_song("old.mp3", "Old|Album|Artist")
+        provider = self.make_provider()
+        self.write_song("new.mp3", "New|Album|Artist")
+
+        job = Job("refresh", "refresh provider")
+        job.cancel_event.set()
+
+        with mock.patch.object(providers, "REFRESH_PROGRESS_INTERVAL", 1):
+            library_diff = provider.refresh(job=job)
+
+        assert library_diff is not None
+        self.assertTrue(library_diff.is_empty())
+        self.assertEqual(provider.songs.keys(), {old_path})
+
+    def test_update_cancelled_while_parsing_leaves_the_catalog_untouched(
+        self,
+    ) -> None:
+        old_path = self.write_song("old.mp3", "Old|Album|Artist")
+        provider = self.make_provider()
+        os.remove(old_path)
+        for index in range(10):
+            self.write_song(f"new-{index}.mp3", f"New {index}|Album|Artist")
+
+        job = Job("refresh", "refresh provider")
+        self.on_parse = job.cancel_event.set
+        self.parsed_paths.clear()
+
+        with mock.patch.object(providers, "SCAN_CHUNK_SIZE", 2):
+            library_diff = provider.refresh(job=job)
+
+        assert library_diff is not None
+        self.assertTrue(library_diff.is_empty())
+        self.assertEqual(provider.songs.keys(), {old_path})
+        self.assertEqual(len(self.parsed_paths), 2)
+
+        # The next refresh loads all the files that weren't loaded
+        library_diff = provider.refresh()
+
+        assert library_diff is not None
+        self.assertEqual(len(provider.songs), 10)
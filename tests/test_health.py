@@ -0,0 +1,99 @@
+import unittest
+from unittest import mock
+
+from dorothy._health import CircuitStates, HealthMonitor
+
+from .helpers import PROVIDER_PATH
+
+
+class HealthMonitorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.monitor = HealthMonitor(
+            failure_threshold=3,
+            latency_threshold=1.0,
+            initial_backoff=10.0,
+            max_backoff=25.0,
+        )
+        self.monitor.register(PROVIDER_PATH)
+
+        self.transitions: list[CircuitStates] = []
+        self.monitor.add_state_listener(lambda _, state: self.transitions.append(state))
+
+        # Fake clock so the backoff passes without waiting for it
+        self.now = 1000.0
+        patcher = mock.patch(
+            "dorothy._health.time.monotonic", side_effect=lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open_circuit(self) -> None:
+        for _ in range(self.monitor.failure_threshold):
+            self.assertTrue(self.monitor.try_acquire(PROVIDER_PATH))
+            self.monitor.record_failure(PROVIDER_PATH, "Failed")
+
+    def test_circuit_opens_after_consecutive_failures(self) -> None:
+        self.monitor.record_failure(PROVIDER_PATH, "Failed")
+        self.monitor.record_failure(PROVIDER_PATH, "Failed")
+        # A success resets the count of consecutive failures
+        self.monitor.record_success(PROVIDER_PATH)
+        self.monitor.record_failure(PROVIDER_PATH, "Failed")
+        self.monitor.record_failure(PROVIDER_PATH, "Failed")
+
+        self.assertEqual(self.monitor.get_state(PROVIDER_PATH), CircuitStates.CLOSED)
+
+        self.monitor.record_failure(PROVIDER_PATH, "Failed")
+
+        self.assertEqual(self.monitor.get_state(PROVIDER_PATH), CircuitStates.OPEN)
+        self.assertFalse(self.monitor.try_acquire(PROVIDER_PATH))
+        self.assertEqual(self.transitions, [CircuitStates.OPEN])
+
+    def test_slow_call_counts_as_failure(self) -> None:
+        self.monitor.record_failure(PROVIDER_PATH, "Failed")
+        self.monitor.record_failure(PROVIDER_PATH, "Failed")
+        self.monitor.record_success(PROVIDER_PATH, latency=2.0)
+
+        self.assertEqual(self.monitor.get_state(PROVIDER_PATH), CircuitStates.OPEN)
+        self.assertEqual(self.monitor.get_all_health()[0].slow_calls, 1)
+
+    def test_half_open_lets_a_single_probe_through(self) -> None:
+        self.open_circuit()
+        self.now += 10.0
+
+        self.assertTrue(self.monitor.try_acquire(PROVIDER_PATH))
+        self.assertEqual(self.monitor.get_state(PROVIDER_PATH), CircuitStates.HALF_OPEN)
+        self.assertFalse(self.monitor.try_acquire(PROVIDER_PATH))
+
+        self.monitor.record_success(PROVIDER_PATH, latency=0.1)
+
+        self.assertEqual(self.monitor.get_state(PROVIDER_PATH), CircuitStates.CLOSED)
+        self.assertTrue(self.monitor.try_acquire(PROVIDER_PATH))
+        self.assertEqual(
+            self.transitions,
+            [CircuitStates.OPEN, CircuitStates.HALF_OPEN, CircuitStates.CLOSED],
+        )
+
+    def test_failed_probe_doubles_the_backoff_up_to_the_maximum(self) -> None:
+        self.open_circuit()
+
+        for expected_backoff in (20.0, 25.0):
+            self.now += self.monitor.get_all_health()[0].backoff
+            self.assertTrue(self.monitor.try_acquire(PROVIDER_PATH))
+            self.monitor.record_failure(PROVIDER_PATH, "Failed")
+
+            health = self.monitor.get_all_health()[0]
+            self.assertEqual(health.state, CircuitStates.OPEN)
+            self.assertEqual(health.backoff, expected_backoff)
+
+        self.now += 24.0
+        self.assertFalse(self.monitor.try_acquire(PROVIDER_PATH))
+
+    def test_released_probe_can_be_retried(self) -> None:
+        self.open_circuit()
+        self.now += 10.0
+
+        self.assertTrue(self.monitor.try_acquire(PROVIDER_PATH))
+        self.monitor.release(PROVIDER_PATH)
+
+        self.assertEqual(self.monitor.get_state(PROVIDER_PATH), CircuitStates.HALF_OPEN)
+        self.assertTrue(self.monitor.try_acquire(PROVIDER_PATH))
@@ -0,0 +1,103 @@
+import unittest
+from typing import Iterator
+
+from dorothy import NodeInstancePath, Orchestrator, Song
+from dorothy.exceptions import NodeFailureException
+
+from .helpers import (
+    ORCHESTRATOR_CONFIG,
+    PROVIDER_PATH,
+    FakeProvider,
+    make_album,
+    make_song,
+)
+
+# Route to a second provider of the orchestrator.
+OTHER_PROVIDER_PATH = NodeInstancePath("tests", "provider", "other", "default")
+
+
+class StreamingProvider(FakeProvider):
+    """Provider that records how many songs have been pulled from it, and
+    fails after giving some of them once it's told to."""
+
+    fail_after: int | None = None
+
+    def __init__(self, songs: list[Song], node_instance_path: NodeInstancePath) -> None:
+        super().__init__(
+            songs,
+            [
+                make_album(
+                    f"album-{node_instance_path.node_name}", songs, node_instance_path
+                )
+            ],
+            node_instance_path=node_instance_path,
+        )
+
+        self.pulled_songs = 0
+
+    def iter_songs(self) -> Iterator[Song]:
+        for song in self.songs.values():
+            if self.fail_after is not None and self.pulled_songs >= self.fail_after:
+                raise NodeFailureException("Lost the connection")
+
+            self.pulled_songs += 1
+            yield song
+
+
+class StreamingIteratorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.orchestrator = Orchestrator(ORCHESTRATOR_CONFIG)
+        self.addCleanup(self.orchestrator._cleanup_nodes)
+
+        self.songs = [make_song(f"a-{index}") for index in range(3)]
+        self.other_songs = [
+            make_song(f"b-{index}", node_instance_path=OTHER_PROVIDER_PATH)
+            for index in range(3)
+        ]
+
+        self.provider = StreamingProvider(self.songs, PROVIDER_PATH)
+        self.other_provider = StreamingProvider(self.other_songs, OTHER_PROVIDER_PATH)
+        self.orchestrator._add_provider(self.provider)
+        self.orchestrator._add_provider(self.other_provider)
+
+        self.provider.pulled_songs = 0
+        self.other_provider.pulled_songs = 0
+
+    def test_songs_are_pulled_from_the_providers_on_demand(self) -> None:
+        songs = self.orchestrator.iter_songs()
+
+        self.assertEqual(next(songs), self.songs[0])
+        self.assertEqual(
+            (self.provider.pulled_songs, self.other_provider.pulled_songs), (1, 0)
+        )
+
+        self.assertEqual(list(songs), self.songs[1:] + self.other_songs)
+
+    def test_albums_of_every_provider_are_chained(self) -> None:
+        self.assertEqual(
+            [album.title for album in self.orchestrator.iter_albums()],
+            ["album-fake", "album-other"],
+        )
+
+    def test_failing_provider_is_skipped_keeping_the_songs_it_gave(self) -> None:
+        self.provider.fail_after = 2
+
+        self.assertEqual(
+            list(self.orchestrator.iter_songs()), self.songs[:2] + self.other_songs
+        )
+
+        (health,) = [
+            health
+            for health in self.orchestrator.health.get_all_health()
+            if health.node_instance_path == self.provider.node_instance_path
+        ]
+        self.assertEqual(health.total_failures, 1)
+        self.assertEqual(health.last_error, "Lost the connection")
+
+    def test_abandoned_iteration_leaves_the_providers_available(self) -> None:
+        for _ in self.orchestrator.iter_songs():
+            break
+
+        self.assertEqual(
+            self.orchestrator.get_all_songs(), self.songs + self.other_songs
+        )
@@ -0,0 +1,172 @@
+import threading
+import time
+import unittest
+from typing import Callable, Iterator
+
+from dorothy import Orchestrator, Song
+from dorothy._jobs import Job, JobManager, JobPriorities, JobStates
+
+from .helpers import ORCHESTRATOR_CONFIG, FakeProvider, make_song
+
+# Seconds to wait for a job to reach the expected state.
+WAIT_TIMEOUT = 5.0
+
+
+def wait_until(predicate: Callable[[], bool]) -> bool:
+    """Wait until a condition holds or the wait timeout passes.
+
+    Args:
+        predicate: The condition to wait for.
+
+    Returns:
+        True if the condition holds and false if the timeout has passed.
+    """
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+
+    while not predicate():
+        if time.monotonic() >= deadline:
+            return False
+
+        time.sleep(0.001)
+
+    return True
+
+
+class JobManagerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.manager = JobManager(time_slice=0.0, max_yield=WAIT_TIMEOUT)
+        self.addCleanup(self.manager.shutdown)
+
+    def test_job_result_and_failure_are_recorded(self) -> None:
+        def fail(job: Job) -> None:
+            raise ValueError("Failed")
+
+        finished = self.manager.submit("Finish", lambda job: 42)
+        failed = self.manager.submit("Fail", fail)
+
+        self.assertTrue(wait_until(lambda: finished.is_done() and failed.is_done()))
+        self.assertEqual((finished.state, finished.result), (JobStates.FINISHED, 42))
+        self.assertEqual((failed.state, failed.error), (JobStates.FAILED, "Failed"))
+
+    def test_background_job_gives_way_to_interactive_work(self) -> None:
+        passed_checkpoint = threading.Event()
+
+        def run(job: Job) -> None:
+            job.checkpoint()
+            passed_checkpoint.set()
+
+        with self.manager.interactive():
+            job = self.manager.submit("Scan", run, JobPriorities.BACKGROUND)
+
+            self.assertTrue(wait_until(lambda: job.state == JobStates.RUNNING))
+            self.assertFalse(passed_checkpoint.wait(0.1))
+
+        self.assertTrue(passed_checkpoint.wait(WAIT_TIMEOUT))
+
+    def test_interactive_work_doesnt_wait_for_itself(self) -> None:
+        with self.manager.interactive():
+            job = self.manager.submit(
+                "Search", lambda job: job.checkpoint(), JobPriorities.INTERACTIVE
+            )
+
+            self.assertTrue(wait_until(job.is_done))
+
+    def test_checkpoint_waits_at_most_the_maximum_yield(self) -> None:
+        manager = JobManager(time_slice=0.0, max_yield=0.05)
+        self.addCleanup(manager.shutdown)
+
+        with manager.interactive():
+            job = manager.submit(
+                "Scan", lambda job: job.checkpoint(), JobPriorities.BACKGROUND
+            )
+
+            self.assertTrue(wait_until(job.is_done))
+
+        self.assertEqual(job.state, JobStates.FINISHED)
+
+    def test_cancel_wakes_up_a_yielded_job(self) -> None:
+        def run(job: Job) -> None:
+            while not job.is_cancel_requested():
+                job.checkpoint()
+
+        with self.manager.interactive():
+            job = self.manager.submit("Scan", run, JobPriorities.BACKGROUND)
+
+            self.assertTrue(wait_until(lambda: job.state == JobStates.RUNNING))
+            self.manager.cancel(job.job_id)
+
+            self.assertTrue(wait_until(job.is_done))
+
+        self.assertEqual(job.state, JobStates.CANCELLED)
+
+    def test_cancelled_pending_job_never_runs(self) -> None:
+        release = threading.Event()
+        ran = threading.Event()
+
+        # The single background worker is kept busy by the first job
+        blocking = self.manager.submit(
+            "Block", lambda job: release.wait(WAIT_TIMEOUT), JobPriorities.BACKGROUND
+        )
+        pending = self.manager.submit(
+            "Pending", lambda job: ran.set(), JobPriorities.BACKGROUND
+        )
+
+        self.assertEqual(pending.state, JobStates.PENDING)
+        self.manager.cancel(pending.job_id)
+        release.set()
+
+        self.assertTrue(wait_until(blocking.is_done))
+        self.assertFalse(ran.wait(0.1))
+        self.assertEqual(pending.state, JobStates.CANCELLED)
+
+    def test_shutdown_cancels_running_jobs(self) -> None:
+        def run(job: Job) -> None:
+            while not job.is_cancel_requested():
+                time.sleep(0.001)
+
+        job = self.manager.submit("Scan", run, JobPriorities.BACKGROUND)
+        self.assertTrue(wait_until(lambda: job.state == JobStates.RUNNING))
+
+        self.manager.shutdown()
+
+        self.assertEqual(job.state, JobStates.CANCELLED)
+
+
+class IndexingJobTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.provider = FakeProvider(
+            [make_song(f"{index:05}") for index in range(3000)]
+        )
+        self.orchestrator = Orchestrator(ORCHESTRATOR_CONFIG)
+        self.addCleanup(self.orchestrator._cleanup_nodes)
+
+    def test_cancelled_indexing_stops_early_and_is_retried(self) -> None:
+        job = Job("index", "index provider")
+        iter_songs = self.provider.iter_songs
+
+        def cancel_halfway() -> Iterator[Song]:
+            for index, song in enumerate(iter_songs()):
+                if index == 1500:
+                    job.cancel_event.set()
+
+                yield song
+
+        self.provider.iter_songs = cancel_halfway  # type: ignore[method-assign]
+        self.orchestrator._providers[self.provider.node_instance_path] = self.provider
+        self.orchestrator.health.register(self.provider.node_instance_path)
+        self.orchestrator._index_provider(self.provider, job)
+
+        self.assertIn(
+            self.provider.node_instance_path, self.orchestrator._unindexed_providers
+        )
+        self.assertLess(len(self.orchestrator.search_index._documents), 3000)
+        self.assertEqual(self.orchestrator.library_stats.get_stats().songs, 0)
+
+        self.provider.iter_songs = iter_songs  # type: ignore[method-assign]
+        self.orchestrator._index_provider(self.provider)
+
+        self.assertNotIn(
+            self.provider.node_instance_path, self.orchestrator._unindexed_providers
+        )
+        self.assertEqual(len(self.orchestrator.search_index._documents), 3000)
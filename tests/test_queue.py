@@ -0,0 +1,119 @@
+import random
+import unittest
+from unittest import mock
+
+from dorothy import _queue
+from dorothy._queue import IndexedQueue
+
+# Tiny chunks so a few operations split, merge and drop them.
+TEST_CHUNK_SIZE = 4
+
+# Number of random operations checked against a plain list.
+FUZZ_OPERATIONS = 5000
+
+
+class IndexedQueueTests(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(_queue, "CHUNK_SIZE", TEST_CHUNK_SIZE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_same_items(self, queue: IndexedQueue[int], items: list[int]) -> None:
+        self.assertEqual(len(queue), len(items))
+        self.assertEqual(list(queue), items)
+
+        # Every position is found through the Fenwick tree
+        for position, item in enumerate(items):
+            self.assertEqual(queue[position], item)
+
+        for chunk in queue._chunks:
+            self.assertGreater(len(chunk), 0)
+            self.assertLessEqual(len(chunk), 2 * TEST_CHUNK_SIZE)
+
+    def test_matches_a_list_under_random_operations(self) -> None:
+        rng = random.Random(21)
+        queue: IndexedQueue[int] = IndexedQueue(range(10))
+        items = list(range(10))
+        next_item = 10
+
+        for _ in range(FUZZ_OPERATIONS):
+            operation = rng.choice(
+                ["insert", "insert_many", "append", "pop", "move", "drop_front"]
+            )
+            position = rng.randint(0, len(items) + 2)
+
+            match operation:
+                case "insert":
+                    queue.insert(position, next_item)
+                    items.insert(position, next_item)
+                    next_item += 1
+
+                case "insert_many":
+                    new_items = list(range(next_item, next_item + rng.randint(0, 20)))
+                    queue.insert_many(position, new_items)
+                    items[position:position] = new_items
+                    next_item += len(new_items)
+
+                case "append":
+                    queue.append(next_item)
+                    items.append(next_item)
+                    next_item += 1
+
+                case "pop" if len(items) > 0:
+                    position = rng.randint(-len(items), len(items) - 1)
+                    self.assertEqual(queue.pop(position), items.pop(position))
+
+                case "move" if len(items) > 0:
+                    from_position = rng.randrange(len(items))
+                    queue.move(from_position, position)
+                    items.insert(position, items.pop(from_position))
+
+                case "drop_front":
+                    count = rng.randint(0, 6)
+                    queue.drop_front(count)
+                    del items[:count]
+
+            self.assertEqual(len(queue), len(items))
+
+            start = rng.randint(0, len(items))
+            stop = start + rng.randint(0, 12)
+            self.assertEqual(queue.get_range(start, stop), items[start:stop])
+
+        self.assert_same_items(queue, items)
+
+    def test_slices_match_a_list(self) -> None:
+        queue = IndexedQueue(range(50))
+        items = list(range(50))
+
+        for position in (slice(3, 20), slice(-10, None), slice(None, None, 3)):
+            self.assertEqual(queue[position], items[position])
+
+        self.assertEqual(queue[-1], 49)
+
+    def test_out_of_range_positions_raise(self) -> None:
+        queue = IndexedQueue(range(3))
+
+        for position in (3, -4):
+            with self.assertRaises(IndexError):
+                queue[position]
+
+            with self.assertRaises(IndexError):
+                queue.pop(position)
+
+        with self.assertRaises(IndexError):
+            IndexedQueue[int]().pop()
+
+    def test_large_insert_is_split_in_bounded_chunks(self) -> None:
+        queue = IndexedQueue(range(6))
+        items = list(range(6))
+
+        queue.insert_many(3, list(range(100, 200)))
+        items[3:3] = range(100, 200)
+        self.assert_same_items(queue, items)
+
+        queue.drop_front(len(items) - 1)
+        self.assert_same_items(queue, items[-1:])
+
+        queue.clear()
+        queue.append(1)
+        self.assert_same_items(queue, [1])
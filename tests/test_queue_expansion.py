@@ -0,0 +1,206 @@
+import asyncio
+import random
+import threading
+import time
+import unittest
+from typing import Callable
+
+from dorothy import Album, Job, JobStates, Orchestrator, Song
+from dorothy._channel import ChannelChange, ChannelChangeTypes, QueuePositionTracker
+
+from .helpers import (
+    ORCHESTRATOR_CONFIG,
+    FakeProvider,
+    make_album,
+    make_artist,
+    make_song,
+)
+
+# Seconds to wait for a job to end.
+WAIT_TIMEOUT = 10.0
+
+# Number of random changes applied to the queue followed by a tracker.
+FUZZ_CHANGES = 2000
+
+
+class QueuePositionTrackerTests(unittest.TestCase):
+    def test_keeps_pointing_between_the_same_songs(self) -> None:
+        rng = random.Random(18)
+        tracker = QueuePositionTracker(3)
+
+        # The songs before the tracked position are marked as such, and must
+        # stay before it whatever the changes of the queue.
+        queue = [True] * 3 + [False] * 3
+
+        for _ in range(FUZZ_CHANGES):
+            change_type = rng.choice(list(ChannelChangeTypes)[:-1])
+            position = rng.randint(0, len(queue))
+
+            match change_type:
+                case ChannelChangeTypes.INSERT:
+                    count = rng.randint(1, 3)
+                    change = ChannelChange(
+                        change_type, position, songs=[make_song("new")] * count
+                    )
+                    queue[position:position] = [position <= tracker.position] * count
+
+                case ChannelChangeTypes.REMOVE if len(queue) > 0:
+                    position = rng.randrange(len(queue))
+                    change = ChannelChange(change_type, position)
+                    del queue[position]
+
+                case ChannelChangeTypes.MOVE if len(queue) > 0:
+                    position = rng.randrange(len(queue))
+                    to_position = rng.randrange(len(queue))
+                    change = ChannelChange(change_type, position, to_position)
+                    del queue[position]
+                    before = sum(queue) >= to_position
+                    queue.insert(to_position, before)
+
+                case ChannelChangeTypes.DROP_FRONT:
+                    change = ChannelChange(change_type, position)
+                    del queue[:position]
+
+                case ChannelChangeTypes.ADVANCE if len(queue) > 0:
+                    change = ChannelChange(change_type)
+                    del queue[0]
+
+                case _:
+                    continue
+
+            tracker.apply(change)
+
+            self.assertEqual(
+                queue,
+                [True] * tracker.position + [False] * (len(queue) - tracker.position),
+            )
+
+
+class QueueExpansionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.album_songs = [make_song(f"album-{index:04}") for index in range(1200)]
+        self.album = make_album("album", self.album_songs)
+        self.provider = FakeProvider(self.album_songs, [self.album])
+
+        self.orchestrator = Orchestrator(
+            {
+                **ORCHESTRATOR_CONFIG,
+                "queue": {"expansion_job_threshold": 500, "expansion_chunk_size": 100},
+            }
+        )
+        self.orchestrator._add_provider(self.provider)
+
+    async def wait_for_job(self, is_done: Callable[[], bool]) -> None:
+        deadline = time.monotonic() + WAIT_TIMEOUT
+
+        while not is_done():
+            self.assertLess(time.monotonic(), deadline)
+            await asyncio.sleep(0.001)
+
+    def test_large_album_is_queued_by_a_job_in_order(self) -> None:
+        async def run() -> list[Song]:
+            channel = self.orchestrator._add_channel("main")
+            channel.insert_songs([make_song("before"), make_song("after")], 0)
+
+            job = await self.orchestrator.async_insert_to_queue(
+                "main", self.album.resource_id, 1
+            )
+            assert job is not None
+
+            # Songs queued in front while the job runs don't split the album
+            await self.wait_for_job(lambda: job.progress > 0)
+            channel.insert(make_song("head"), 0)
+            await self.wait_for_job(job.is_done)
+
+            self.assertEqual(job.state, JobStates.FINISHED)
+            self.assertEqual(job.result, {"queued_songs": 1200})
+            self.assertEqual((job.progress, job.total), (1200, 1200))
+
+            self.orchestrator._cleanup_nodes()
+
+            return channel.get_queue()
+
+        queue = asyncio.run(run())
+
+        self.assertEqual(queue[:2], [make_song("head"), make_song("before")])
+        self.assertEqual(queue[2:-1], self.album_songs)
+        self.assertEqual(queue[-1], make_song("after"))
+
+    def test_small_album_is_queued_right_away(self) -> None:
+        small_album = make_album("small", self.album_songs[:10])
+        self.provider.albums["small"] = small_album
+
+        async def run() -> None:
+            channel = self.orchestrator._add_channel("main")
+
+            job = await self.orchestrator.async_add_to_queue(
+                "main", small_album.resource_id
+            )
+
+            self.assertIsNone(job)
+            self.assertEqual(channel.get_queue(), self.album_songs[:10])
+
+            self.orchestrator._cleanup_nodes()
+
+        asyncio.run(run())
+
+    def test_shutdown_cancels_a_running_expansion(self) -> None:
+        # The albums of the artist are resolved one by one by the job
+        albums = [
+            make_album(f"slow-{index}", self.album_songs[:5]) for index in range(200)
+        ]
+        artist = make_artist(
+            "artist",
+            [make_album(album.resource_id.unique_id, None) for album in albums],
+        )
+        self.provider.artists["artist"] = artist
+
+        resolving = threading.Event()
+
+        def slow_get_album(unique_album_id: str) -> Album | None:
+            resolving.set()
+            time.sleep(0.01)
+            return next(
+                album
+                for album in albums
+                if album.resource_id.unique_id == unique_album_id
+            )
+
+        self.provider.get_album = slow_get_album  # type: ignore[method-assign]
+
+        async def run() -> None:
+            self.orchestrator._add_channel("main")
+
+            job = await self.orchestrator.async_add_to_queue("main", artist.resource_id)
+            assert job is not None
+            await self.wait_for_job(resolving.is_set)
+
+            # The event loop is blocked while cleaning up, so the job must
+            # give up waiting for it.
+            start_time = time.monotonic()
+            self.orchestrator._cleanup_nodes()
+
+            self.assertLess(time.monotonic() - start_time, WAIT_TIMEOUT)
+            self.assertEqual(job.state, JobStates.CANCELLED)
+
+        asyncio.run(run())
+
+    def test_jobs_end_before_the_providers_are_cleaned_up(self) -> None:
+        jobs_done_on_cleanup: list[bool] = []
+
+        def cleanup() -> None:
+            jobs_done_on_cleanup.extend(
+                job.is_done() for job in self.orchestrator.jobs.get_all_jobs()
+            )
+
+        self.provider.cleanup = cleanup  # type: ignore[method-assign]
+
+        def run(job: Job) -> None:
+            while not job.is_cancel_requested():
+                time.sleep(0.001)
+
+        job = self.orchestrator.jobs.submit("wait", run)
+        self.orchestrator._cleanup_nodes()
+
+        self.assertEqual(jobs_done_on_cleanup, [True])
+        self.assertEqual(job.state, JobStates.CANCELLED)
@@ -0,0 +1,176 @@
+import random
+import unittest
+from unittest import mock
+
+from dorothy import Song, _search
+from dorothy._search import SearchIndex, fold_text, tokenize
+
+from .helpers import make_album, make_song
+
+# Number of random changes applied to the index before comparing its results.
+FUZZ_CHANGES = 500
+
+
+def make_titled_song(unique_id: str, title: str) -> Song:
+    """Build a song with the given title and without album and artist.
+
+    Args:
+        unique_id: The unique id of the song.
+        title: The title of the song.
+
+    Returns:
+        The song.
+    """
+
+    song = make_song(unique_id)
+    song.title = title
+    song.album_name = None
+    song.artist_name = None
+
+    return song
+
+
+class FoldingTests(unittest.TestCase):
+    def test_case_and_accents_are_removed(self) -> None:
+        self.assertEqual(fold_text("Beyoncé"), "beyonce")
+        self.assertEqual(fold_text("ÉLAN Straße"), "elan strasse")
+
+    def test_text_is_split_in_folded_words(self) -> None:
+        self.assertEqual(
+            tokenize("Café del Mar - Vol. 2"), ["cafe", "del", "mar", "vol", "2"]
+        )
+
+
+class SearchIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = SearchIndex()
+
+    def search_ids(self, query: str, limit: int = 20) -> list[str]:
+        return [
+            str(result.resource_id.unique_id)
+            for result in self.index.search(query, limit)
+        ]
+
+    def test_accented_query_matches_plain_title(self) -> None:
+        self.index.add(make_titled_song("song", "Cancion Animal"))
+
+        self.assertEqual(self.search_ids("canción"), ["song"])
+
+    def test_every_word_must_match(self) -> None:
+        self.index.add(make_titled_song("both", "Blue Monday"))
+        self.index.add(make_titled_song("one", "Blue Train"))
+
+        self.assertEqual(self.search_ids("blu mon"), ["both"])
+        self.assertEqual(self.search_ids("blue xyz"), [])
+
+    def test_exact_words_and_titles_rank_first(self) -> None:
+        prefix = make_song("prefix")
+        prefix.title = "Lovers"
+        exact = make_song("exact")
+        exact.title = "Love"
+        album = make_song("album")
+        album.title = "Something"
+        album.album_name = "Love"
+        self.index.add(prefix)
+        self.index.add(exact)
+        self.index.add(album)
+
+        self.assertEqual(self.search_ids("love"), ["exact", "prefix", "album"])
+
+    def test_albums_rank_over_their_songs(self) -> None:
+        song = make_titled_song("song", "Kid A")
+        self.index.add(song)
+        self.index.add(make_album("Kid A", [song]))
+
+        self.assertEqual(self.search_ids("kid"), ["Kid A", "song"])
+
+    def test_updated_and_removed_resources_are_found_again(self) -> None:
+        song = make_titled_song("song", "Yesterday")
+        self.index.add(song)
+        self.assertEqual(self.search_ids("y"), ["song"])
+
+        self.index.add(make_titled_song("song", "Tomorrow"))
+        self.assertEqual(self.search_ids("y"), [])
+        self.assertEqual(self.search_ids("tomo"), ["song"])
+
+        self.index.remove(song.resource_id)
+        self.assertEqual(self.search_ids("t"), [])
+        self.assertEqual(len(self.index), 0)
+
+    def test_short_words_keep_the_best_results_up_to_date(self) -> None:
+        rng = random.Random(9)
+        words = ["a", "ab", "abc", "b", "ba", "bad", "c"]
+        titles: dict[str, str] = {}
+
+        # Few best documents are kept, so they are often dropped and gathered
+        # again while the index changes.
+        with mock.patch.object(_search, "SHORT_PREFIX_TOP_SIZE", 5):
+            for change in range(FUZZ_CHANGES):
+                unique_id = f"{rng.randrange(40):02}"
+
+                if unique_id in titles and rng.random() < 0.3:
+                    self.index.remove(make_song(unique_id).resource_id)
+                    del titles[unique_id]
+                else:
+                    titles[unique_id] = " ".join(rng.sample(words, 2))
+                    self.index.add(make_titled_song(unique_id, titles[unique_id]))
+
+                query = rng.choice(["a", "b", "c", "ab", "ba"])
+                self.assertEqual(
+                    self.search_ids(query, 3),
+                    self.search_all(titles, query)[:3],
+                    f"change {change}",
+                )
+
+    def test_short_words_found_together_match_all_of_them(self) -> None:
+        rng = random.Random(9)
+        words = ["a", "ab", "b", "ba", "c", "ca", "d"]
+        titles = {f"{index:03}": " ".join(rng.sample(words, 3)) for index in range(300)}
+
+        for unique_id, title in titles.items():
+            self.index.add(make_titled_song(unique_id, title))
+
+        with mock.patch.object(_search, "SHORT_PREFIX_TOP_SIZE", 10):
+            frequent_ids = self.search_ids("a b", 5)
+            # Only a few titles hold both words, so they are searched in full
+            rare_ids = self.search_ids("ab ca d", 50)
+
+        self.assertEqual(len(frequent_ids), 5)
+        self.assertTrue(
+            set(frequent_ids) <= set(self.search_all(titles, "a b")),
+        )
+        self.assertEqual(rare_ids, self.search_all(titles, "ab ca d"))
+        self.assertLess(len(rare_ids), 50)
+
+    def search_all(self, titles: dict[str, str], query: str) -> list[str]:
+        """Score every title against a query without the index.
+
+        Args:
+            titles: The titles of the songs keyed by their unique ids.
+            query: The query to score.
+
+        Returns:
+            The unique ids of the matching songs from the best one.
+        """
+
+        scored_ids: list[tuple[float, str]] = []
+
+        for unique_id, title in titles.items():
+            score = 0.0
+
+            for query_token in tokenize(query):
+                token_scores = [
+                    _search.TITLE_WEIGHT
+                    + (_search.EXACT_MATCH_BONUS if token == query_token else 0.0)
+                    for token in tokenize(title)
+                    if token.startswith(query_token)
+                ]
+
+                if len(token_scores) == 0:
+                    break
+
+                score += max(token_scores)
+            else:
+                scored_ids.append((score, unique_id))
+
+        return [unique_id for _, unique_id in sorted(scored_ids, reverse=True)]
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from dorothy import Orchestrator
+from dorothy._channel import ChannelStates
+
+from .helpers import ORCHESTRATOR_CONFIG, make_song
+
+
+class SongEndTimerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.orchestrator = Orchestrator(ORCHESTRATOR_CONFIG)
+        self.addCleanup(self.orchestrator._cleanup_nodes)
+
+    def test_songs_are_skipped_once_they_end(self) -> None:
+        async def run() -> None:
+            channel = self.orchestrator._add_channel("main")
+            channel.insert_songs([make_song("a", 0.1), make_song("b", 0.1)], 0)
+
+            self.assertEqual(self.orchestrator._song_end_timers, {})
+
+            channel.play()
+            self.assertEqual(list(self.orchestrator._song_end_timers), ["main"])
+
+            await asyncio.sleep(0.15)
+            assert channel.current_song is not None
+            self.assertEqual(channel.current_song.title, "b")
+
+            await asyncio.sleep(0.15)
+            self.assertEqual(channel.channel_state, ChannelStates.STOPPED)
+
+            # Nothing wakes the loop while nothing is playing
+            self.assertEqual(self.orchestrator._song_end_timers, {})
+
+        asyncio.run(run())
+
+    def test_paused_time_isnt_counted(self) -> None:
+        async def run() -> None:
+            channel = self.orchestrator._add_channel("main")
+            channel.insert_songs([make_song("a", 0.1)], 0)
+
+            channel.play()
+            await asyncio.sleep(0.05)
+            channel.pause()
+            self.assertEqual(self.orchestrator._song_end_timers, {})
+
+            await asyncio.sleep(0.1)
+            channel.play()
+
+            song_deadline = channel.get_song_deadline()
+            assert song_deadline is not None
+            self.assertGreater(song_deadline - time.monotonic(), 0.02)
+            self.assertLess(song_deadline - time.monotonic(), 0.06)
+
+            await asyncio.sleep(0.08)
+            self.assertEqual(channel.channel_state, ChannelStates.STOPPED)
+
+        asyncio.run(run())
+
+    def test_changes_from_other_threads_set_the_timer_on_the_loop(self) -> None:
+        async def run() -> None:
+            channel = self.orchestrator._add_channel("main")
+            channel.insert_songs([make_song("a", 60.0)], 0)
+
+            worker = threading.Thread(target=channel.play)
+            worker.start()
+            worker.join()
+
+            self.assertEqual(self.orchestrator._song_end_timers, {})
+
+            await asyncio.sleep(0)
+            self.assertEqual(list(self.orchestrator._song_end_timers), ["main"])
+
+        asyncio.run(run())
+
+    def test_channels_without_a_loop_are_advanced_by_hand(self) -> None:
+        channel = self.orchestrator._add_channel("main")
+        channel.insert_songs([make_song("a", 0.01), make_song("b", 60.0)], 0)
+
+        channel.play()
+        self.assertEqual(self.orchestrator._song_end_timers, {})
+
+        time.sleep(0.02)
+        self.orchestrator.check_if_song_finished()
+
+        assert channel.current_song is not None
+        self.assertEqual(channel.current_song.title, "b")
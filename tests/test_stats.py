@@ -0,0 +1,118 @@
+import unittest
+
+from dorothy import Job, LibraryDiff, NodeInstancePath, Orchestrator
+from dorothy._stats import LibraryStatsTracker
+
+from .helpers import (
+    ORCHESTRATOR_CONFIG,
+    PROVIDER_PATH,
+    FakeProvider,
+    make_album,
+    make_artist,
+    make_song,
+)
+
+# Route to a second provider of the orchestrator.
+OTHER_PROVIDER_PATH = NodeInstancePath("tests", "provider", "other", "default")
+
+
+class LibraryStatsTrackerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.songs = [make_song("a", 100.0), make_song("b", 200.0)]
+        self.album = make_album("album", self.songs)
+        self.provider = FakeProvider(
+            self.songs, [self.album], [make_artist("artist", [self.album])]
+        )
+
+        self.tracker = LibraryStatsTracker()
+        self.tracker.add_provider(self.provider)
+
+    def test_provider_is_counted_in_full(self) -> None:
+        stats = self.tracker.get_stats()
+
+        self.assertEqual(
+            (stats.songs, stats.albums, stats.artists, stats.duration),
+            (2, 1, 1, 300.0),
+        )
+        self.assertEqual(
+            [provider_stats.node_instance_path for provider_stats in stats.providers],
+            [PROVIDER_PATH],
+        )
+
+        album_stats = self.tracker.get_album_stats(self.album.resource_id)
+        assert album_stats is not None
+        self.assertEqual((album_stats.track_count, album_stats.duration), (2, 300.0))
+
+    def test_totals_follow_the_library_changes(self) -> None:
+        changed_song = make_song("b", 50.0)
+        added_song = make_song("c", 10.0)
+        album = make_album("album", [changed_song, added_song])
+        self.provider.songs = {"b": changed_song, "c": added_song}
+        self.provider.albums = {"album": album}
+
+        self.tracker.apply_library_diff(
+            self.provider,
+            LibraryDiff(
+                PROVIDER_PATH,
+                added=[added_song.resource_id],
+                removed=[self.songs[0].resource_id],
+                changed=[changed_song.resource_id, album.resource_id],
+            ),
+        )
+
+        stats = self.tracker.get_stats()
+        self.assertEqual((stats.songs, stats.duration), (2, 60.0))
+        self.assertEqual(stats.albums, 1)
+
+        album_stats = self.tracker.get_album_stats(album.resource_id)
+        assert album_stats is not None
+        self.assertEqual((album_stats.track_count, album_stats.duration), (2, 60.0))
+
+    def test_resources_are_never_counted_twice(self) -> None:
+        self.tracker.add(self.songs[0])
+        self.tracker.remove(make_song("missing").resource_id)
+        self.tracker.remove(self.album.resource_id)
+        self.tracker.remove(self.album.resource_id)
+
+        stats = self.tracker.get_stats()
+        self.assertEqual((stats.songs, stats.albums, stats.duration), (2, 0, 300.0))
+        self.assertIsNone(self.tracker.get_album_stats(self.album.resource_id))
+
+    def test_cancelled_count_stops_early(self) -> None:
+        job = Job("index", "index provider")
+        job.cancel_event.set()
+        tracker = LibraryStatsTracker()
+
+        self.assertFalse(tracker.add_provider(self.provider, job))
+        self.assertEqual(tracker.get_stats().songs, 0)
+
+
+class OrchestratorLibraryStatsTests(unittest.TestCase):
+    def test_stats_follow_the_providers(self) -> None:
+        orchestrator = Orchestrator(ORCHESTRATOR_CONFIG)
+        self.addCleanup(orchestrator._cleanup_nodes)
+
+        provider = FakeProvider([make_song("a", 100.0)])
+        orchestrator._add_provider(provider)
+        orchestrator._add_provider(
+            FakeProvider(
+                [make_song("b", 20.0, OTHER_PROVIDER_PATH)],
+                node_instance_path=OTHER_PROVIDER_PATH,
+            )
+        )
+
+        added_song = make_song("c", 30.0)
+        provider.songs["c"] = added_song
+        provider.notify_library_changes(
+            LibraryDiff(PROVIDER_PATH, added=[added_song.resource_id])
+        )
+
+        stats = orchestrator.get_library_stats()
+        self.assertEqual((stats.songs, stats.duration), (3, 150.0))
+        self.assertEqual(
+            {
+                provider_stats.node_instance_path: provider_stats.songs
+                for provider_stats in stats.providers
+            },
+            {PROVIDER_PATH: 2, OTHER_PROVIDER_PATH: 1},
+        )
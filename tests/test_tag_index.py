@@ -0,0 +1,150 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from dorothy.plugins.builtin import tag_index as tag_index_module
+from dorothy.plugins.builtin.tag_index import IndexEntry, SongTags, TagIndex
+
+
+class TagIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.index_file = Path(temporary_directory.name) / "index" / "tags.sqlite"
+
+    def open_index(self) -> TagIndex:
+        tag_index = TagIndex(self.index_file)
+        self.addCleanup(tag_index.close)
+
+        return tag_index
+
+    def test_entries_are_kept_between_executions(self) -> None:
+        tag_index = self.open_index()
+        tag_index.put("/music/a.mp3", IndexEntry(1, 10, SongTags(60.0, "a", "b")))
+        tag_index.put("/music/notes.mp3", IndexEntry(2, 20))
+        tag_index.close()
+
+        tag_index = self.open_index()
+
+        self.assertEqual(
+            tag_index.get("/music/a.mp3", 1, 10),
+            IndexEntry(1, 10, SongTags(60.0, "a", "b")),
+        )
+        self.assertEqual(tag_index.get("/music/notes.mp3", 2, 20), IndexEntry(2, 20))
+
+        # A changed file is no longer valid
+        self.assertIsNone(tag_index.get("/music/a.mp3", 2, 10))
+        self.assertIsNone(tag_index.get("/music/a.mp3", 1, 11))
+
+    def test_corrupted_index_is_rebuilt_empty(self) -> None:
+        self.index_file.parent.mkdir(parents=True)
+        self.index_file.write_bytes(b"not a database" * 100)
+
+        tag_index = self.open_index()
+        self.assertIsNone(tag_index.get("/music/a.mp3", 1, 10))
+
+        tag_index.put("/music/a.mp3", IndexEntry(1, 10, SongTags(60.0, "a")))
+        tag_index.close()
+
+        self.assertIsNotNone(self.open_index().get("/music/a.mp3", 1, 10))
+
+    def test_index_broken_while_writing_is_rebuilt_with_the_known_entries(
+        self,
+    ) -> None:
+        tag_index = self.open_index()
+        tag_index.put("/music/a.mp3", IndexEntry(1, 10, SongTags(60.0, "a")))
+        tag_index.flush()
+
+        broken_connection = mock.MagicMock()
+        broken_connection.__enter__.side_effect = sqlite3.DatabaseError(
+            "database disk image is malformed"
+        )
+        tag_index._connection.close()
+        tag_index._connection = broken_connection
+
+        tag_index.put("/music/b.mp3", IndexEntry(1, 10, SongTags(60.0, "b")))
+        tag_index.flush()
+        tag_index.close()
+
+        reopened_index = self.open_index()
+        self.assertIsNotNone(reopened_index.get("/music/a.mp3", 1, 10))
+        self.assertIsNotNone(reopened_index.get("/music/b.mp3", 1, 10))
+
+    def test_outdated_schema_is_dropped(self) -> None:
+        self.index_file.parent.mkdir(parents=True)
+        connection = sqlite3.connect(self.index_file)
+        with connection:
+            connection.executescript(
+                f"""
+                CREATE TABLE files (path TEXT PRIMARY KEY, mtime REAL);
+                INSERT INTO files VALUES ('/music/a.mp3', 1.0);
+                PRAGMA user_version = {tag_index_module.SCHEMA_VERSION - 1};
+                """
+            )
+        connection.close()
+
+        tag_index = self.open_index()
+        self.assertIsNone(tag_index.get("/music/a.mp3", 1, 10))
+
+        tag_index.put("/music/a.mp3", IndexEntry(1, 10, SongTags(60.0, "a")))
+        tag_index.close()
+
+        self.assertIsNotNone(self.open_index().get("/music/a.mp3", 1, 10))
+
+    def test_pending_changes_are_written_once_enough_pile_up(self) -> None:
+        tag_index = self.open_index()
+
+        with mock.patch.object(tag_index_module, "FLUSH_THRESHOLD", 3):
+            tag_index.put("/music/a.mp3", IndexEntry(1, 10, SongTags(60.0, "a")))
+            tag_index.put("/music/b.mp3", IndexEntry(1, 10, SongTags(60.0, "b")))
+            self.assertIsNone(self.open_index().get("/music/a.mp3", 1, 10))
+
+            tag_index.put("/music/c.mp3", IndexEntry(1, 10, SongTags(60.0, "c")))
+            self.assertIsNotNone(self.open_index().get("/music/a.mp3", 1, 10))
+
+            tag_index.remove(["/music/a.mp3", "/music/b.mp3", "/music/missing.mp3"])
+            self.assertIsNotNone(self.open_index().get("/music/a.mp3", 1, 10))
+
+            tag_index.remove(["/music/c.mp3"])
+            self.assertIsNone(self.open_index().get("/music/a.mp3", 1, 10))
+
+    def test_prune_drops_the_files_no_longer_available(self) -> None:
+        tag_index = self.open_index()
+        for name in ("a", "b", "c"):
+            tag_index.put(f"/music/{name}.mp3", IndexEntry(1, 10, SongTags(60.0)))
+
+        tag_index.prune({"/music/b.mp3", "/music/d.mp3"})
+
+        self.assertIsNone(tag_index.get("/music/a.mp3", 1, 10))
+        self.assertIsNotNone(tag_index.get("/music/b.mp3", 1, 10))
+
+        # Pruning writes the changes right away
+        reopened_index = self.open_index()
+        self.assertIsNone(reopened_index.get("/music/a.mp3", 1, 10))
+        self.assertIsNone(reopened_index.get("/music/c.mp3", 1, 10))
+        self.assertIsNotNone(reopened_index.get("/music/b.mp3", 1, 10))
+
+    def test_changes_after_closing_keep_the_index(self) -> None:
+        tag_index = self.open_index()
+        tag_index.put("/music/a.mp3", IndexEntry(1, 10, SongTags(60.0, "a")))
+        tag_index.close()
+
+        # A job still running while shutting down
+        tag_index.put("/music/b.mp3", IndexEntry(1, 10, SongTags(60.0, "b")))
+        tag_index.flush()
+
+        self.assertTrue(self.index_file.exists())
+        self.assertIsNotNone(self.open_index().get("/music/a.mp3", 1, 10))
+
+    def test_closed_connection_isnt_taken_as_corruption(self) -> None:
+        tag_index = self.open_index()
+        tag_index.put("/music/a.mp3", IndexEntry(1, 10, SongTags(60.0, "a")))
+        tag_index.flush()
+
+        tag_index._connection.close()
+        tag_index.put("/music/b.mp3", IndexEntry(1, 10, SongTags(60.0, "b")))
+        tag_index.flush()
+
+        self.assertIsNotNone(self.open_index().get("/music/a.mp3", 1, 10))
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from dorothy.plugins.builtin.walker import (
+    DEFAULT_AUDIO_EXTENSIONS,
+    LibraryWalker,
+    has_audio_magic_bytes,
+)
+
+
+class LibraryWalkerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+
+        self.library = Path(temporary_directory.name) / "music"
+        self.library.mkdir()
+
+    def write_file(self, name: str, content: bytes = b"") -> Path:
+        file_path = self.library / name
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(content)
+
+        return file_path
+
+    def walk_names(self, library_walker: LibraryWalker) -> list[str]:
+        return [
+            str(walked_file.path.relative_to(self.library))
+            for walked_file in library_walker.walk()
+        ]
+
+    def make_walker(self, **options: bool) -> LibraryWalker:
+        return LibraryWalker([self.library], [], DEFAULT_AUDIO_EXTENSIONS, **options)
+
+    def test_only_audio_files_are_walked_in_order(self) -> None:
+        self.write_file("b/2.MP3")
+        self.write_file("b/1.flac")
+        self.write_file("a.ogg")
+        self.write_file("c/cover.jpg")
+        self.write_file("notes.txt")
+
+        self.assertEqual(
+            self.walk_names(self.make_walker()), ["a.ogg", "b/1.flac", "b/2.MP3"]
+        )
+
+    def test_walked_files_carry_their_stat_data(self) -> None:
+        song_path = self.write_file("song.mp3", b"12345")
+        os.utime(song_path, ns=(10**18, 10**18))
+
+        (walked_file,) = self.make_walker().walk()
+
+        self.assertEqual(walked_file.path, song_path)
+        self.assertEqual((walked_file.mtime_ns, walked_file.size), (10**18, 5))
+
+    def test_excluded_directories_are_never_read(self) -> None:
+        self.write_file("kept/1.mp3")
+        self.write_file("skipped/2.mp3")
+        self.write_file("skipped/deep/3.mp3")
+        self.write_file("skipped.mp3")
+
+        library_walker = LibraryWalker(
+            [self.library],
+            [self.library / "skipped", self.library / "skipped.mp3"],
+            DEFAULT_AUDIO_EXTENSIONS,
+        )
+
+        with mock.patch.object(os, "scandir", wraps=os.scandir) as scandir_mock:
+            self.assertEqual(self.walk_names(library_walker), ["kept/1.mp3"])
+
+        self.assertEqual(
+            [call.args[0] for call in scandir_mock.call_args_list],
+            [str(self.library), str(self.library / "kept")],
+        )
+        self.assertTrue(library_walker.is_excluded(str(self.library / "skipped/deep")))
+        self.assertFalse(library_walker.is_excluded(str(self.library / "kept")))
+
+    def test_symlink_loops_are_walked_once(self) -> None:
+        self.write_file("a/1.mp3")
+        (self.library / "a" / "loop").symlink_to(self.library)
+        (self.library / "b").symlink_to(self.library / "a")
+
+        self.assertEqual(self.walk_names(self.make_walker()), ["a/1.mp3"])
+
+    def test_symlinks_can_be_ignored(self) -> None:
+        outside_path = self.library.parent / "outside.mp3"
+        outside_path.write_bytes(b"")
+        (self.library / "linked.mp3").symlink_to(outside_path)
+        self.write_file("real.mp3")
+
+        self.assertEqual(
+            self.walk_names(self.make_walker(follow_symlinks=False)), ["real.mp3"]
+        )
+        self.assertEqual(
+            self.walk_names(self.make_walker()), ["linked.mp3", "real.mp3"]
+        )
+
+    def test_unknown_extensions_can_be_sniffed(self) -> None:
+        self.write_file("song.bin", b"ID3\x04\x00" + bytes(10))
+        self.write_file("notes.bin", b"plain text notes")
+
+        self.assertEqual(self.walk_names(self.make_walker()), [])
+        self.assertEqual(
+            self.walk_names(self.make_walker(sniff_magic_bytes=True)), ["song.bin"]
+        )
+
+    def test_audio_headers_are_recognized(self) -> None:
+        self.assertTrue(has_audio_magic_bytes(b"fLaC\x00\x00\x00\x22"))
+        self.assertTrue(has_audio_magic_bytes(b"\xff\xfb\x90\x64"))
+        self.assertTrue(has_audio_magic_bytes(b"RIFF\x24\x08\x00\x00WAVE"))
+        self.assertTrue(has_audio_magic_bytes(b"\x00\x00\x00\x20ftypM4A "))
+        self.assertFalse(has_audio_magic_bytes(b"RIFF\x24\x08\x00\x00AVI "))
+        self.assertFalse(has_audio_magic_bytes(b""))